@@ -2,8 +2,11 @@ import pandas as pd
 import numpy as np
 import re
 import json
+import codecs
+import io
+import os
 import logging
-from typing import Dict, List, Optional, Union
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, Union
 
 # Logging konfigürasyonu
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -55,10 +58,19 @@ class OpenFoodFactsPreprocessor:
             ]
         }
         
+        # Sadece ürün belgesine (ProductDocument) taşınan sütunlar - filtrelere ve özelliklere girmez
+        self.document_columns = ['labels_tags', 'traces_tags', 'nova_group', 'image_url', 'image_small_url']
+        
         # Tüm gerekli sütunları birleştir
         self.all_required_columns = []
         for category in self.required_columns.values():
             self.all_required_columns.extend(category)
+        
+        # Denenecek encoding'ler (öncelik sırasına göre)
+        self.encodings = ['utf-8', 'latin-1', 'iso-8859-1', 'cp1252']
+        
+        # Encoding tespiti için okunacak örnek boyutu (byte)
+        self.encoding_sample_size = 1024 * 1024
     
     def load_tsv(self, file_path: str, nrows: Optional[int] = None) -> pd.DataFrame:
         """
@@ -93,6 +105,235 @@ class OpenFoodFactsPreprocessor:
             logger.error(f"Dosya yükleme hatası: {e}")
             raise
     
+    def detect_encoding(self, file_path: str) -> str:
+        """
+        Dosyanın başından alınan örnek ile encoding'i bir kez tespit et
+        """
+        with open(file_path, 'rb') as f:
+            sample = f.read(self.encoding_sample_size)
+        
+        for encoding in self.encodings:
+            try:
+                # Örneğin sonunda yarım kalmış çok byte'lı karakter hata sayılmasın
+                codecs.getincrementaldecoder(encoding)().decode(sample, final=False)
+                logger.info(f"Encoding tespit edildi: {encoding}")
+                return encoding
+            except UnicodeDecodeError:
+                continue
+        
+        raise ValueError("Hiçbir encoding ile dosya okunamadı")
+    
+    def fallback_encodings(self, encoding: str) -> List[str]:
+        """
+        Tespit edilen encoding ve listede ondan sonra gelenler - örnekten sonra gelen bir byte
+        çözülemezse okuma bir sonraki encoding ile devam eder (load_tsv'deki gibi)
+        """
+        if encoding in self.encodings:
+            return self.encodings[self.encodings.index(encoding):]
+        return [encoding] + self.encodings
+    
+    def is_numeric_column(self, col: str) -> bool:
+        """Sayısal olarak işlenen sütunlar (_100g ve additives_n)"""
+        return col.endswith('_100g') or col == 'additives_n'
+    
+    def get_projected_read_options(self, file_path: str, encoding: str) -> Dict[str, Any]:
+        """
+        Sadece gerekli sütunları (usecols) ve sayısal sütunlar için float dtype'ları belirle
+        """
+        header = pd.read_csv(file_path, sep='\t', encoding=encoding, nrows=0).columns
+        required = set(self.all_required_columns) | set(self.document_columns)
+        usecols = [col for col in header if col in required]
+        
+        dtype = {col: ('float64' if self.is_numeric_column(col) else str) for col in usecols}
+        
+        logger.info(f"Sütun projeksiyonu: {len(usecols)}/{len(header)} sütun okunacak")
+        return {'usecols': usecols, 'dtype': dtype}
+    
+    def _untyped_read_options(self, read_options: Dict[str, Any]) -> Dict[str, Any]:
+        """Sayısal sütunları da string olarak okuyan (projeksiyonlu) seçenekler"""
+        return {**read_options, 'dtype': {col: str for col in read_options['usecols']}}
+    
+    def load_tsv_projected(self, file_path: str, nrows: Optional[int] = None) -> pd.DataFrame:
+        """
+        TSV dosyasını sadece gerekli sütunlarla ve tipli sayısal sütunlarla yükle.
+        Sayısal sütunlarda dönüştürülemeyen değer varsa o sütunlar string okunur
+        (clean_numeric_columns yine errors='coerce' ile dönüştürür).
+        """
+        try:
+            logger.info(f"TSV dosyası (projeksiyonlu) yükleniyor: {file_path}")
+            
+            for encoding in self.fallback_encodings(self.detect_encoding(file_path)):
+                read_options = self.get_projected_read_options(file_path, encoding)
+                try:
+                    try:
+                        df = pd.read_csv(
+                            file_path,
+                            sep='\t',
+                            encoding=encoding,
+                            low_memory=False,
+                            nrows=nrows,
+                            **read_options
+                        )
+                    except UnicodeDecodeError:
+                        raise
+                    except ValueError as e:
+                        logger.warning(f"Tipli okuma başarısız, sayısal sütunlar string okunuyor: {e}")
+                        df = pd.read_csv(
+                            file_path,
+                            sep='\t',
+                            encoding=encoding,
+                            low_memory=False,
+                            nrows=nrows,
+                            **self._untyped_read_options(read_options)
+                        )
+                except UnicodeDecodeError as e:
+                    logger.warning(f"{encoding} ile okunamadı, sonraki encoding deneniyor: {e}")
+                    continue
+                
+                logger.info(f"Dosya {encoding} encoding ile başarıyla yüklendi")
+                break
+            else:
+                raise ValueError("Hiçbir encoding ile dosya okunamadı")
+            
+            logger.info(f"Toplam satır sayısı: {len(df)}")
+            logger.info(f"Toplam sütun sayısı: {len(df.columns)}")
+            return df
+            
+        except Exception as e:
+            logger.error(f"Dosya yükleme hatası: {e}")
+            raise
+    
+    def iter_tsv_chunks(
+        self,
+        file_path: str,
+        chunksize: int = 100000,
+        nrows: Optional[int] = None,
+        projected: bool = True
+    ) -> Iterator[pd.DataFrame]:
+        """
+        TSV dosyasını chunksize satırlık parçalar halinde oku (bellek kullanımı dosya boyutundan bağımsız)
+        """
+        logger.info(f"TSV dosyası parça parça okunuyor: {file_path} (chunksize={chunksize})")
+        
+        encodings = self.fallback_encodings(self.detect_encoding(file_path))
+        encoding = encodings.pop(0)
+        if projected:
+            read_options = self.get_projected_read_options(file_path, encoding)
+        else:
+            read_options = {'dtype': str}  # Tüm sütunları string olarak oku
+        
+        typed = projected
+        consumed = 0
+        while True:
+            index_offset = consumed
+            reader = pd.read_csv(
+                file_path,
+                sep='\t',
+                encoding=encoding,
+                low_memory=False,
+                # Tipli okuma ya da encoding yarıda kaldıysa okunmuş satırları atla
+                skiprows=range(1, consumed + 1) if consumed else None,
+                nrows=nrows - consumed if nrows is not None else None,
+                chunksize=chunksize,
+                **read_options
+            )
+            try:
+                with reader:
+                    for chunk in reader:
+                        if index_offset:
+                            # Satır index'i baştan okunmuş gibi devam etsin
+                            chunk.index += index_offset
+                        consumed += len(chunk)
+                        yield chunk
+                return
+            except UnicodeDecodeError as e:
+                if not encodings:
+                    raise
+                encoding = encodings.pop(0)
+                logger.warning(f"Encoding {consumed}. satırdan sonra başarısız, {encoding} ile devam ediliyor: {e}")
+            except ValueError as e:
+                if not typed:
+                    raise
+                typed = False
+                logger.warning(f"Tipli okuma {consumed}. satırdan sonra başarısız, sayısal sütunlar string okunuyor: {e}")
+                read_options = self._untyped_read_options(read_options)
+    
+    def split_byte_ranges(self, file_path: str, n_ranges: int, start_offset: Optional[int] = None) -> List[Tuple[int, int]]:
+        """
+        Dosyanın veri kısmını (başlık hariç) satır sınırlarına hizalanmış yaklaşık eşit byte aralıklarına böl.
+        OpenFoodFacts dump'ında her kayıt tek satırdır; aralıklar satır ortasından başlamaz.
+        start_offset verilirse (ör. checkpoint'ten devam) bölme o satır başından itibaren yapılır.
+        """
+        file_size = os.path.getsize(file_path)
+        
+        with open(file_path, 'rb') as f:
+            f.readline()  # Başlık
+            data_start = max(f.tell(), start_offset or 0)
+            
+            boundaries = [data_start]
+            for i in range(1, n_ranges):
+                target = data_start + (file_size - data_start) * i // n_ranges
+                if target <= boundaries[-1]:
+                    continue
+                f.seek(target - 1)
+                f.readline()  # Satır sonuna kadar ilerle
+                position = f.tell()
+                if boundaries[-1] < position < file_size:
+                    boundaries.append(position)
+            boundaries.append(file_size)
+        
+        return [(start, end) for start, end in zip(boundaries[:-1], boundaries[1:]) if end > start]
+    
+    def load_tsv_range(self, file_path: str, start: int, end: int, encoding: str,
+                       read_options: Dict[str, Any]) -> pd.DataFrame:
+        """
+        [start, end) byte aralığındaki satırları başlık satırı ile birlikte oku.
+        Tipli okuma başarısız olursa sayısal sütunlar string okunur.
+        """
+        with open(file_path, 'rb') as f:
+            header = f.readline()
+            f.seek(start)
+            data = header + f.read(end - start)
+        
+        for fallback in self.fallback_encodings(encoding):
+            try:
+                try:
+                    return pd.read_csv(io.BytesIO(data), sep='\t', encoding=fallback, low_memory=False, **read_options)
+                except UnicodeDecodeError:
+                    raise
+                except ValueError as e:
+                    if 'usecols' not in read_options:
+                        raise
+                    logger.warning(f"Tipli okuma başarısız ({start}-{end}), sayısal sütunlar string okunuyor: {e}")
+                    return pd.read_csv(
+                        io.BytesIO(data), sep='\t', encoding=fallback, low_memory=False,
+                        **self._untyped_read_options(read_options)
+                    )
+            except UnicodeDecodeError as e:
+                logger.warning(f"{fallback} ile okunamadı ({start}-{end}), sonraki encoding deneniyor: {e}")
+        
+        raise ValueError("Hiçbir encoding ile dosya okunamadı")
+    
+    def preprocess_byte_range(
+        self,
+        file_path: str,
+        start: int,
+        end: int,
+        encoding: Optional[str] = None,
+        read_options: Optional[Dict[str, Any]] = None
+    ) -> pd.DataFrame:
+        """
+        Tek bir byte aralığını preprocess() ile aynı adımlardan geçir (paralel ingest için).
+        encoding ve read_options verilmezse dosyadan tespit edilir.
+        """
+        encoding = encoding or self.detect_encoding(file_path)
+        if read_options is None:
+            read_options = self.get_projected_read_options(file_path, encoding)
+        
+        df = self.load_tsv_range(file_path, start, end, encoding, read_options)
+        available_required_cols = [col for col in self.all_required_columns if col in df.columns]
+        return self._process_frame(df, available_required_cols)
+    
     def check_available_columns(self, df: pd.DataFrame) -> Dict[str, List[str]]:
         """
         Mevcut sütunları kontrol et ve eksik olanları belirle
@@ -256,47 +497,65 @@ class OpenFoodFactsPreprocessor:
         
         return filtered_df
     
+    def _process_frame(self, df: pd.DataFrame, available_required_cols: List[str]) -> pd.DataFrame:
+        """
+        Yüklenmiş (ham) veri üzerinde temizleme, türetme ve filtreleme adımlarını uygula
+        """
+        # Sadece mevcut gerekli sütunları seç
+        df_selected = df[available_required_cols].copy()
+        
+        # Sayısal sütunları temizle
+        numeric_columns = [col for col in available_required_cols if self.is_numeric_column(col)]
+        df_cleaned = self.clean_numeric_columns(df_selected, numeric_columns)
+        
+        # Alerjen bilgilerini işle
+        df_processed = self.process_allergens(df_cleaned)
+        
+        # Katkı maddelerini işle
+        df_processed = self.process_additives(df_processed)
+        
+        # Türetilmiş özellikler hesapla
+        df_enhanced = self.calculate_derived_features(df_processed)
+        
+        # Kalite filtrelerini uygula
+        df_final = self.apply_quality_filters(df_enhanced)
+        
+        # Belge sütunlarını filtrelenmiş satırlara geri ekle
+        document_cols = [col for col in self.document_columns if col in df.columns and col not in df_final.columns]
+        if document_cols:
+            df_final = df_final.join(df[document_cols])
+        return df_final
+    
     def preprocess(
         self,
         file_path: str,
         output_path: Optional[str] = None,
-        sample_size: Optional[int] = None
+        sample_size: Optional[int] = None,
+        projected: bool = True,
+        writer: Optional[Callable[..., Any]] = None
     ) -> pd.DataFrame:
         """
         Ana önişleme fonksiyonu
+        projected=False ise tüm sütunlar string olarak okunur (eski okuyucu)
+        writer verilirse çıktı save_processed yerine onunla yazılır (aynı imza)
         """
         logger.info("OpenFoodFacts veri önişleme başlatılıyor...")
         
         # 1. Veri yükleme
-        df = self.load_tsv(file_path, nrows=sample_size)
+        if projected:
+            df = self.load_tsv_projected(file_path, nrows=sample_size)
+        else:
+            df = self.load_tsv(file_path, nrows=sample_size)
         
         # 2. Sütun kontrolü
         column_info = self.check_available_columns(df)
         
-        # 3. Sadece mevcut gerekli sütunları seç
-        available_required_cols = column_info['present']
-        df_selected = df[available_required_cols].copy()
-        
-        # 4. Sayısal sütunları temizle
-        numeric_columns = [col for col in available_required_cols 
-                          if col.endswith('_100g') or col == 'additives_n']
-        df_cleaned = self.clean_numeric_columns(df_selected, numeric_columns)
-        
-        # 5. Alerjen bilgilerini işle
-        df_processed = self.process_allergens(df_cleaned)
-        
-        # 6. Katkı maddelerini işle
-        df_processed = self.process_additives(df_processed)
-        
-        # 7. Türetilmiş özellikler hesapla
-        df_enhanced = self.calculate_derived_features(df_processed)
-        
-        # 8. Kalite filtrelerini uygula
-        df_final = self.apply_quality_filters(df_enhanced)
+        # 3-8. Sütun seçimi, temizleme, türetilmiş özellikler ve kalite filtreleri
+        df_final = self._process_frame(df, column_info['present'])
         
         # 9. Sonuçları kaydet
         if output_path:
-            df_final.to_csv(output_path, index=False, encoding='utf-8')
+            (writer or self.save_processed)(df_final, output_path)
             logger.info(f"İşlenmiş veri kaydedildi: {output_path}")
         
         # 10. Özet bilgiler
@@ -304,6 +563,63 @@ class OpenFoodFactsPreprocessor:
         
         return df_final
     
+    def preprocess_chunked(
+        self,
+        file_path: str,
+        output_path: Optional[str] = None,
+        sample_size: Optional[int] = None,
+        chunksize: int = 100000,
+        projected: bool = True,
+        writer: Optional[Callable[..., Any]] = None
+    ) -> Iterator[pd.DataFrame]:
+        """
+        Streaming önişleme - her parçayı preprocess() ile aynı adımlardan geçirip temizlenmiş parçaları döndür.
+        Yield edilen parçaların birleşimi preprocess() çıktısı ile aynıdır.
+        """
+        logger.info("OpenFoodFacts streaming veri önişleme başlatılıyor...")
+        
+        save = writer or self.save_processed
+        available_required_cols = None
+        total_rows = 0
+        total_kept = 0
+        
+        for chunk_number, chunk in enumerate(self.iter_tsv_chunks(file_path, chunksize=chunksize, nrows=sample_size, projected=projected), 1):
+            # Sütun kontrolü sadece ilk parçada (tüm parçalar aynı başlığı paylaşır)
+            if available_required_cols is None:
+                available_required_cols = self.check_available_columns(chunk)['present']
+            
+            total_rows += len(chunk)
+            df_final = self._process_frame(chunk, available_required_cols)
+            del chunk
+            
+            # Parçayı dosyaya ekle (başlık sadece ilk parçada)
+            if output_path:
+                save(df_final, output_path, part_number=chunk_number - 1, row_offset=total_kept)
+            
+            total_kept += len(df_final)
+            logger.info(f"Parça {chunk_number} işlendi: {total_kept}/{total_rows} satır korundu")
+            yield df_final
+        
+        if output_path and total_rows:
+            logger.info(f"İşlenmiş veri kaydedildi: {output_path}")
+        
+        logger.info("=== STREAMING ÖNİŞLEME ÖZETİ ===")
+        logger.info(f"Okunan satır sayısı: {total_rows}")
+        logger.info(f"Korunan satır sayısı: {total_kept}")
+    
+    def save_processed(self, df: pd.DataFrame, output_path: str, part_number: int = 0, row_offset: int = 0):
+        """
+        İşlenmiş veriyi CSV olarak kaydet. part_number > 0 ise önceki parçalara eklenir (başlıksız).
+        row_offset, parçanın çıktıdaki ilk satırı - CSV'de kullanılmaz, writer imzası için vardır.
+        """
+        df.to_csv(
+            output_path,
+            index=False,
+            encoding='utf-8',
+            mode='w' if part_number == 0 else 'a',
+            header=part_number == 0
+        )
+    
     def print_summary(self, df: pd.DataFrame):
         """
         İşlenmiş verinin özetini yazdır
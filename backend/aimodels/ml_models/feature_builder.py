@@ -0,0 +1,166 @@
+# aimodels/ml_models/feature_builder.py
+
+from typing import Any, Dict, Optional
+
+from api.models.product_features import ProductFeatures
+from api.pipeline.feature_matrix import product_matrix_values
+
+# Eğitim ve servislerin ortak feature vektörü - sütun sırası model dosyasındaki feature_columns sırasıdır
+USER_FEATURE_COLUMNS = [
+    'user_age', 'user_bmi', 'user_gender_male', 'user_activity_high', 'user_activity_moderate',
+    'has_diabetes', 'has_kidney_disease', 'has_hyperthyroidism', 'has_osteoporosis',
+    'prefers_high_protein', 'prefers_low_fat', 'is_vegan',
+    'goal_muscle_gain', 'goal_heart_health', 'goal_boost_energy',
+]
+
+# Ürün feature'ı -> ürün verisindeki anahtar (product_to_data / load_product_data çıktısı)
+PRODUCT_FEATURE_SOURCES = {
+    'product_energy': 'energy_kcal',
+    'product_protein': 'protein',
+    'product_fat': 'fat',
+    'product_sugar': 'sugar',
+    'product_salt': 'salt',
+    'product_fiber': 'fiber',
+    'product_processing_level': 'processing_level',
+    'product_nutrition_quality': 'nutrition_quality_score',
+    'product_health_score': 'health_score',
+    'product_additives_count': 'additives_count',
+    'product_high_sugar': 'is_high_sugar',
+    'product_high_salt': 'is_high_salt',
+    'product_high_fat': 'is_high_fat',
+    'product_high_protein': 'is_high_protein',
+    'product_high_fiber': 'is_high_fiber',
+    'product_has_risky_additives': 'has_risky_additives',
+}
+
+FEATURE_COLUMNS = USER_FEATURE_COLUMNS + list(PRODUCT_FEATURE_SOURCES)
+
+# None/geçersiz değerleri 0'a çevrilen besin değerleri
+NUTRIENT_KEYS = {'energy_kcal', 'protein', 'fat', 'sugar', 'salt', 'fiber'}
+
+# Ürün verisinde değer yoksa kullanılan varsayılanlar
+PRODUCT_DEFAULTS = {
+    'processing_level': 3,
+    'nutrition_quality_score': 5,
+    'health_score': 5,
+}
+
+
+def safe_float(value: Any) -> float:
+    """None ve sayıya çevrilemeyen değerler 0"""
+    try:
+        return float(value) if value is not None else 0.0
+    except (ValueError, TypeError):
+        return 0.0
+
+
+def calculate_bmi(user_profile: Dict[str, Any]) -> float:
+    """Profildeki BMI, yoksa boy/kilodan hesaplanan (eğitim verisindeki gibi 1 ondalık)"""
+    if user_profile.get('bmi'):
+        return float(user_profile['bmi'])
+
+    height = user_profile.get('height', 170)
+    weight = user_profile.get('weight', 70)
+    if height and weight and height > 0:
+        return round(weight / ((height / 100) ** 2), 1)
+
+    return 24.0  # Varsayılan
+
+
+def create_user_features(user_profile: Dict[str, Any]) -> Dict[str, float]:
+    """Feature vektörünün kullanıcıya ait kısmı (toplu skorlamada bir kez hesaplanır)"""
+    features = {}
+
+    # Kullanıcı özellikleri
+    features['user_age'] = user_profile.get('age', 30)
+    features['user_bmi'] = calculate_bmi(user_profile)
+    features['user_gender_male'] = 1 if user_profile.get('gender') == 'Male' else 0
+    features['user_activity_high'] = 1 if user_profile.get('activity_level') == 'high' else 0
+    features['user_activity_moderate'] = 1 if user_profile.get('activity_level') == 'moderate' else 0
+
+    # Sağlık durumu
+    medical_conditions = user_profile.get('medical_conditions') or []
+    features['has_diabetes'] = 1 if 'diabetes_type_2' in medical_conditions else 0
+    features['has_kidney_disease'] = 1 if 'chronic_kidney_disease' in medical_conditions else 0
+    features['has_hyperthyroidism'] = 1 if 'hyperthyroidism' in medical_conditions else 0
+    features['has_osteoporosis'] = 1 if 'osteoporosis' in medical_conditions else 0
+
+    # Diyet tercihleri
+    diet_prefs = user_profile.get('dietary_preferences') or []
+    features['prefers_high_protein'] = 1 if 'high_protein' in diet_prefs else 0
+    features['prefers_low_fat'] = 1 if 'low_fat' in diet_prefs else 0
+    features['is_vegan'] = 1 if 'vegan' in diet_prefs else 0
+
+    # Sağlık hedefleri
+    health_goals = user_profile.get('health_goals') or []
+    features['goal_muscle_gain'] = 1 if 'muscle_gain' in health_goals else 0
+    features['goal_heart_health'] = 1 if 'heart_health' in health_goals else 0
+    features['goal_boost_energy'] = 1 if 'boost_energy' in health_goals else 0
+
+    return features
+
+
+def create_feature_vector(user_profile: Dict[str, Any], product_data: Dict[str, Any],
+                          user_features: Optional[Dict[str, float]] = None) -> Dict[str, float]:
+    """
+    Kullanıcı + ürün feature vektörü. Eğitim (training_model) ve servisler aynı fonksiyonu kullanır.
+    product_data: product_to_data() çıktısı veya aynı anahtarlara sahip bir eğitim satırı
+    """
+    features = dict(user_features if user_features is not None else create_user_features(user_profile))
+    for feature, key in PRODUCT_FEATURE_SOURCES.items():
+        value = product_data.get(key, PRODUCT_DEFAULTS.get(key, 0))
+        features[feature] = safe_float(value) if key in NUTRIENT_KEYS else value
+    return features
+
+
+def product_to_data(product: Any) -> Dict[str, Any]:
+    """ProductFeatures nesnesini feature sözlüğüne çevir (besin değerleri varsa özellik matrisinden)"""
+    values = product_matrix_values(product) if isinstance(product, ProductFeatures) else None
+    if values is not None:
+        return {
+            'product_code': product.product_code,
+            'product_name': product.product_name,
+            'main_category': product.main_category,
+            'processing_level': product.processing_level,
+            'nutrition_quality_score': product.nutrition_quality_score,
+            'health_score': product.health_score,
+
+            'energy_kcal': values['energy_kcal'],
+            'protein': values['protein'],
+            'fat': values['fat'],
+            'sugar': values['sugar'],
+            'salt': values['salt'],
+            'fiber': values['fiber'],
+
+            'is_high_sugar': int(values['is_high_sugar']),
+            'is_high_salt': int(values['is_high_salt']),
+            'is_high_fat': int(values['is_high_fat']),
+            'is_high_protein': int(values['is_high_protein']),
+            'is_high_fiber': int(values['is_high_fiber']),
+            'has_risky_additives': int(values['has_risky_additives']),
+            'additives_count': int(values['additives_count']),
+        }
+
+    return {
+        'product_code': product.product_code,
+        'product_name': product.product_name,
+        'main_category': product.main_category,
+        'processing_level': product.processing_level,
+        'nutrition_quality_score': product.nutrition_quality_score,
+        'health_score': product.health_score,
+
+        'energy_kcal': product.get_energy_kcal(),
+        'protein': product.get_protein(),
+        'fat': product.get_fat(),
+        'sugar': product.get_sugar(),
+        'salt': product.get_salt(),
+        'fiber': product.get_fiber(),
+
+        'is_high_sugar': 1 if product.is_high_sugar() else 0,
+        'is_high_salt': 1 if product.is_high_salt() else 0,
+        'is_high_fat': 1 if product.is_high_fat() else 0,
+        'is_high_protein': 1 if product.is_high_protein() else 0,
+        'is_high_fiber': 1 if product.is_high_fiber() else 0,
+        'has_risky_additives': 1 if product.has_risky_additives() else 0,
+        'additives_count': product.get_additives_count(),
+    }
@@ -2,10 +2,8 @@
 
 import os
 import logging
-import pandas as pd
 from pathlib import Path
 import django
-import joblib
 from typing import Dict, List, Optional, Any
 
 # Django setup
@@ -14,6 +12,9 @@ os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
 django.setup()
 
 from api.models.product_features import ProductFeatures
+from api.pipeline.feature_matrix import METHOD_COLUMNS, prefetch_matrix_values, product_matrix_values
+from .feature_builder import calculate_bmi, create_feature_vector, create_user_features, product_to_data
+from .model_registry import get_model_artifacts
 
 logger = logging.getLogger(__name__)
 
@@ -21,30 +22,22 @@ class MLProductScoreService:
     """
     ML Model tabanlı kişiselleştirilmiş ürün skoru hesaplama servisi
     """
-    def __init__(self):
-        self.model = None
-        self.scaler = None  
-        self.feature_columns = []
-        self.model_dir = os.path.join(BASE_DIR, 'models')
-        self._load_model()
+    @property
+    def artifacts(self):
+        """Süreç içinde paylaşılan model (bkz. model_registry)"""
+        return get_model_artifacts()
 
-    def _load_model(self):
-        """ML modelini yükle"""
-        try:
-            model_path = os.path.join(self.model_dir, 'personalized_health_model.joblib')
-            scaler_path = os.path.join(self.model_dir, 'health_scaler.joblib') 
-            features_path = os.path.join(self.model_dir, 'health_feature_columns.joblib')
+    @property
+    def model(self):
+        return self.artifacts.model
 
-            if all(os.path.exists(path) for path in [model_path, scaler_path, features_path]):
-                self.model = joblib.load(model_path)
-                self.scaler = joblib.load(scaler_path)
-                self.feature_columns = joblib.load(features_path)
-                logger.info("✅ ML score model yüklendi")
-            else:
-                logger.warning("⚠️ ML model dosyaları bulunamadı")
-                
-        except Exception as e:
-            logger.error(f"❌ Model yükleme hatası: {e}")
+    @property
+    def scaler(self):
+        return self.artifacts.scaler
+
+    @property
+    def feature_columns(self):
+        return self.artifacts.feature_columns
 
     def get_personalized_score(self, user_profile: Dict[str, Any], product_code: str) -> Optional[Dict[str, Any]]:
         """
@@ -61,24 +54,8 @@ class MLProductScoreService:
             # Ürünü bul
             product = ProductFeatures.objects.get(product_code=product_code)
             
-            # ML ile skor hesapla
-            ml_score = self._calculate_ml_score(user_profile, product)
-            
-            # Detaylı analiz
-            analysis = self._get_score_analysis(user_profile, product, ml_score)
-            
-            return {
-                'personalized_score': round(ml_score, 2),
-                'score_level': self._get_score_level(ml_score),
-                'analysis': analysis,
-                'product_info': {
-                    'name': product.product_name,
-                    'category': product.main_category,
-                    'health_score': product.health_score,
-                    'nutrition_quality': product.nutrition_quality_score,
-                    'product_code': product_code
-                }
-            }
+            # Toplu skorlama ile aynı yol (tek ürünlük batch)
+            return self.score_products(user_profile, [product])[product.product_code]
             
         except ProductFeatures.DoesNotExist:
             logger.error(f"Ürün bulunamadı: {product_code}")
@@ -90,106 +67,105 @@ class MLProductScoreService:
     def calculate_bulk_scores(self, user_profile: Dict[str, Any], product_codes: List[str]) -> Dict[str, Optional[Dict[str, Any]]]:
         """
         Birden fazla ürün için toplu skor hesaplama
+        Ürünler tek sorguda (product_code__in) alınır, skorlar tek transform/predict ile hesaplanır
         
         Args:
             user_profile: Kullanıcı profil verisi
             product_codes: Ürün kodları listesi
             
         Returns:
-            Dict: Her ürün kodu için skor bilgileri
+            Dict: Her ürün kodu için skor bilgileri (bulunamayan ürünler için None)
+        """
+        results = {product_code: None for product_code in product_codes}
+        if not results:
+            return results
+        
+        try:
+            products = list(ProductFeatures.objects.filter(product_code__in=list(results)))
+        except Exception as e:
+            logger.error(f"Bulk skor hesaplama hatası: {e}")
+            return results
+        
+        found_codes = {product.product_code for product in products}
+        for product_code in results:
+            if product_code not in found_codes:
+                logger.error(f"Ürün bulunamadı: {product_code}")
+        
+        results.update(self.score_products(user_profile, products))
+        return results
+
+    def score_products(self, user_profile: Dict[str, Any], products: List[ProductFeatures]) -> Dict[str, Optional[Dict[str, Any]]]:
+        """
+        Önceden alınmış ürünler için toplu skor ve analiz (veritabanı sorgusu yapmaz)
+        
+        Args:
+            user_profile: Kullanıcı profil verisi
+            products: ProductFeatures nesneleri
+            
+        Returns:
+            Dict: Her ürün kodu için get_personalized_score ile aynı formatta sonuç
         """
         results = {}
+        # Tüm ürünlerin matris satırları tek seferde; skorlama ve analiz bu önbellekten okur
+        prefetch_matrix_values(products)
+        scores = self._calculate_ml_scores(user_profile, products)
         
-        for product_code in product_codes:
+        for product, ml_score in zip(products, scores):
             try:
-                result = self.get_personalized_score(user_profile, product_code)
-                results[product_code] = result
+                results[product.product_code] = {
+                    'personalized_score': round(ml_score, 2),
+                    'score_level': self._get_score_level(ml_score),
+                    'analysis': self._get_score_analysis(user_profile, product, ml_score),
+                    'product_info': {
+                        'name': product.product_name,
+                        'category': product.main_category,
+                        'health_score': product.health_score,
+                        'nutrition_quality': product.nutrition_quality_score,
+                        'product_code': product.product_code
+                    }
+                }
             except Exception as e:
-                logger.error(f"Bulk skor hesaplama hatası ({product_code}): {e}")
-                results[product_code] = None
-                
+                logger.error(f"Skor hesaplama hatası ({product.product_code}): {e}")
+                results[product.product_code] = None
+        
         return results
 
     def _calculate_ml_score(self, user_profile: Dict[str, Any], product: ProductFeatures) -> float:
         """ML model ile kişiselleştirilmiş skor hesapla"""
-        if self.model is None:
-            return self._fallback_score(user_profile, product)
+        return self._calculate_ml_scores(user_profile, [product])[0]
+
+    def _calculate_ml_scores(self, user_profile: Dict[str, Any], products: List[ProductFeatures]) -> List[float]:
+        """ML model ile kişiselleştirilmiş skorlar - tüm ürünler için tek feature matrisi ve tek predict"""
+        artifacts = self.artifacts
+        if not artifacts.is_loaded:
+            return [self._fallback_score(user_profile, product) for product in products]
+        if not products:
+            return []
         
         try:
-            # Feature vektörü oluştur
-            features = self._create_feature_vector(user_profile, product)
-            
-            # DataFrame'e çevir ve eksik kolonları ekle
-            df = pd.DataFrame([features])
-            for col in self.feature_columns:
-                if col not in df.columns:
-                    df[col] = 0
-            df = df[self.feature_columns]
-            
-            # Normalize et ve tahmin yap
-            features_scaled = self.scaler.transform(df)
-            prediction = self.model.predict(features_scaled)[0]
-            
-            return max(0, min(10, prediction))
+            # Kullanıcı özellikleri bir kez hesaplanır
+            user_features = self._create_user_features(user_profile)
+            rows = [self._create_feature_vector(user_profile, product, user_features) for product in products]
+            return artifacts.predict(rows).tolist()
             
         except Exception as e:
             logger.error(f"ML skorlama hatası: {e}")
-            return self._fallback_score(user_profile, product)
+            return [self._fallback_score(user_profile, product) for product in products]
 
-    def _create_feature_vector(self, user_profile: Dict[str, Any], product: ProductFeatures) -> Dict[str, float]:
-        """Training model ile uyumlu feature vektörü oluştur"""
-        features = {}
-        
-        # Kullanıcı özellikleri
-        features['user_age'] = user_profile.get('age', 30)
-        features['user_bmi'] = self._calculate_bmi(user_profile)
-        features['user_gender_male'] = 1 if user_profile.get('gender') == 'Male' else 0
-        features['user_activity_high'] = 1 if user_profile.get('activity_level') == 'high' else 0
-        features['user_activity_moderate'] = 1 if user_profile.get('activity_level') == 'moderate' else 0
-        
-        # Sağlık durumu
-        conditions = user_profile.get('medical_conditions', [])
-        features['has_diabetes'] = 1 if 'diabetes_type_2' in conditions else 0
-        features['has_kidney_disease'] = 1 if 'chronic_kidney_disease' in conditions else 0
-        features['has_hyperthyroidism'] = 1 if 'hyperthyroidism' in conditions else 0
-        features['has_osteoporosis'] = 1 if 'osteoporosis' in conditions else 0
-        
-        # Diyet tercihleri
-        diet_prefs = user_profile.get('dietary_preferences', [])
-        features['prefers_high_protein'] = 1 if 'high_protein' in diet_prefs else 0
-        features['prefers_low_fat'] = 1 if 'low_fat' in diet_prefs else 0
-        features['is_vegan'] = 1 if 'vegan' in diet_prefs else 0
-        
-        # Sağlık hedefleri
-        goals = user_profile.get('health_goals', [])
-        features['goal_muscle_gain'] = 1 if 'muscle_gain' in goals else 0
-        features['goal_heart_health'] = 1 if 'heart_health' in goals else 0
-        features['goal_boost_energy'] = 1 if 'boost_energy' in goals else 0
-        
-        # Ürün özellikleri - safe getter metotları kullan
-        features['product_energy'] = self._safe_get_nutrient(product, 'get_energy_kcal')
-        features['product_protein'] = self._safe_get_nutrient(product, 'get_protein')
-        features['product_fat'] = self._safe_get_nutrient(product, 'get_fat')
-        features['product_sugar'] = self._safe_get_nutrient(product, 'get_sugar')
-        features['product_salt'] = self._safe_get_nutrient(product, 'get_salt')
-        features['product_fiber'] = self._safe_get_nutrient(product, 'get_fiber')
-        features['product_processing_level'] = getattr(product, 'processing_level', 2)
-        features['product_nutrition_quality'] = getattr(product, 'nutrition_quality_score', 5.0)
-        features['product_health_score'] = getattr(product, 'health_score', 5.0)
-        features['product_additives_count'] = self._safe_get_nutrient(product, 'get_additives_count')
-        
-        # Binary ürün özellikleri - safe checker metotları kullan
-        features['product_high_sugar'] = 1 if self._safe_check_property(product, 'is_high_sugar') else 0
-        features['product_high_salt'] = 1 if self._safe_check_property(product, 'is_high_salt') else 0
-        features['product_high_fat'] = 1 if self._safe_check_property(product, 'is_high_fat') else 0
-        features['product_high_protein'] = 1 if self._safe_check_property(product, 'is_high_protein') else 0
-        features['product_high_fiber'] = 1 if self._safe_check_property(product, 'is_high_fiber') else 0
-        features['product_has_risky_additives'] = 1 if self._safe_check_property(product, 'has_risky_additives') else 0
-        
-        return features
+    def _create_user_features(self, user_profile: Dict[str, Any]) -> Dict[str, float]:
+        """Feature vektörünün kullanıcıya ait kısmı (toplu skorlamada bir kez hesaplanır)"""
+        return create_user_features(user_profile)
+
+    def _create_feature_vector(self, user_profile: Dict[str, Any], product: ProductFeatures,
+                               user_features: Optional[Dict[str, float]] = None) -> Dict[str, float]:
+        """Training model ile ortak feature vektörü (feature_builder)"""
+        return create_feature_vector(user_profile, product_to_data(product), user_features)
 
     def _safe_get_nutrient(self, product: ProductFeatures, method_name: str) -> float:
-        """Güvenli besin değeri alma"""
+        """Güvenli besin değeri alma (varsa özellik matrisinden)"""
+        values = product_matrix_values(product) if method_name in METHOD_COLUMNS else None
+        if values is not None:
+            return values[METHOD_COLUMNS[method_name]]
         try:
             if hasattr(product, method_name):
                 method = getattr(product, method_name)
@@ -199,7 +175,10 @@ class MLProductScoreService:
             return 0.0
 
     def _safe_check_property(self, product: ProductFeatures, method_name: str) -> bool:
-        """Güvenli özellik kontrolü"""
+        """Güvenli özellik kontrolü (varsa özellik matrisinden)"""
+        values = product_matrix_values(product) if method_name in METHOD_COLUMNS else None
+        if values is not None:
+            return values[METHOD_COLUMNS[method_name]] == 1
         try:
             if hasattr(product, method_name):
                 method = getattr(product, method_name)
@@ -312,16 +291,7 @@ class MLProductScoreService:
 
     def _calculate_bmi(self, user_profile: Dict[str, Any]) -> float:
         """BMI hesapla"""
-        if user_profile.get('bmi'):
-            return float(user_profile['bmi'])
-        
-        height = user_profile.get('height', 170)
-        weight = user_profile.get('weight', 70)
-        
-        if height and weight:
-            return weight / ((height/100) ** 2)
-        
-        return 24.0  # Varsayılan BMI
+        return calculate_bmi(user_profile)
 
     def get_score_comparison(self, user_profile: Dict[str, Any], product_codes: List[str]) -> Dict[str, Any]:
         """
@@ -0,0 +1,93 @@
+# aimodels/ml_models/model_registry.py
+
+import os
+import logging
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import joblib
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = Path(__file__).resolve().parent.parent.parent
+DEFAULT_MODEL_DIR = os.path.join(BASE_DIR, 'models')
+
+MODEL_FILE = 'personalized_health_model.joblib'
+SCALER_FILE = 'health_scaler.joblib'
+FEATURE_COLUMNS_FILE = 'health_feature_columns.joblib'
+ARTIFACT_FILES = [MODEL_FILE, SCALER_FILE, FEATURE_COLUMNS_FILE]
+
+
+class ModelArtifacts:
+    """
+    Kişiselleştirilmiş sağlık skoru modeli, scaler ve feature sütunları.
+    Süreç başına bir kez yüklenir; öneri, skor servisleri ve eğitim kodu aynı nesneyi kullanır.
+    """
+
+    def __init__(self, model: Any = None, scaler: Any = None, feature_columns: Optional[List[str]] = None):
+        self.model = model
+        self.scaler = scaler
+        self.feature_columns = list(feature_columns or [])
+
+    @property
+    def is_loaded(self) -> bool:
+        return self.model is not None and self.scaler is not None and bool(self.feature_columns)
+
+    @classmethod
+    def load(cls, model_dir: str = DEFAULT_MODEL_DIR) -> 'ModelArtifacts':
+        """Model dosyalarını yükle; eksik veya hatalıysa boş (fallback) nesne"""
+        paths = [os.path.join(model_dir, name) for name in ARTIFACT_FILES]
+        if not all(os.path.exists(path) for path in paths):
+            logger.warning("ML model dosyaları bulunamadı, fallback moduna geçiliyor")
+            return cls()
+        try:
+            model, scaler, feature_columns = (joblib.load(path) for path in paths)
+            logger.info("ML model başarıyla yüklendi")
+            return cls(model, scaler, feature_columns)
+        except Exception as e:
+            logger.error(f"Model yükleme hatası: {str(e)}")
+            return cls()
+
+    def predict(self, feature_rows: List[Dict[str, float]]) -> np.ndarray:
+        """Feature sözlükleri için tek transform/predict (eksik sütunlar 0, skorlar 0-10 aralığında)"""
+        features_df = pd.DataFrame(feature_rows).reindex(columns=self.feature_columns, fill_value=0)
+        predictions = self.model.predict(self.scaler.transform(features_df))
+        return np.clip(np.asarray(predictions, dtype=float), 0, 10)
+
+    def save(self, model_dir: str = DEFAULT_MODEL_DIR):
+        """Dosyaları yaz - çalışan süreçler değişikliği dosya zamanlarından anlayıp yeniden yükler"""
+        os.makedirs(model_dir, exist_ok=True)
+        for name, artifact in zip(ARTIFACT_FILES, [self.model, self.scaler, self.feature_columns]):
+            joblib.dump(artifact, os.path.join(model_dir, name))
+
+
+# Süreç başına bir kez yüklenen model; dosyalar değişince (yeniden eğitim) yeniden yüklenir
+_loaded_artifacts: Dict[str, Any] = {'directory': None, 'mtimes': None, 'artifacts': None}
+_load_lock = threading.Lock()
+
+
+def _artifact_mtimes(model_dir: str) -> tuple:
+    mtimes = []
+    for name in ARTIFACT_FILES:
+        try:
+            mtimes.append(os.stat(os.path.join(model_dir, name)).st_mtime)
+        except OSError:
+            mtimes.append(None)
+    return tuple(mtimes)
+
+
+def get_model_artifacts(model_dir: str = DEFAULT_MODEL_DIR) -> ModelArtifacts:
+    """Süreç içinde paylaşılan model nesneleri (dosyalar yoksa is_loaded=False)"""
+    mtimes = _artifact_mtimes(model_dir)
+    if _loaded_artifacts['directory'] != model_dir or _loaded_artifacts['mtimes'] != mtimes:
+        with _load_lock:
+            if _loaded_artifacts['directory'] != model_dir or _loaded_artifacts['mtimes'] != mtimes:
+                _loaded_artifacts.update({
+                    'directory': model_dir,
+                    'mtimes': mtimes,
+                    'artifacts': ModelArtifacts.load(model_dir),
+                })
+    return _loaded_artifacts['artifacts']
@@ -3,64 +3,72 @@
 import os
 import logging
 import numpy as np
-import pandas as pd
 from pathlib import Path
 import django
 from django.conf import settings
-import joblib
 
 # Django setup
 BASE_DIR = Path(__file__).resolve().parent.parent.parent
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
 django.setup()
 
-from api.models.product_features import ProductFeatures
+from api.models.product_features import ProductFeatures, ProductSimilarity
+from api.pipeline.knn_index import get_knn_index
+from api.pipeline.candidate_retrieval import get_candidate_retriever
+from api.pipeline.product_flags import exclude_flagged, profile_exclusion_mask
+from api.pipeline.feature_matrix import prefetch_matrix_values
+from api.pipeline.diversity import DEFAULT_DIVERSITY, mmr_rerank
+from api.pipeline.similarity_graph import NUTRIENT_COLUMNS, normalize_nutrient_vectors
+from .feature_builder import calculate_bmi, create_feature_vector, create_user_features, product_to_data, safe_float
+from .model_registry import get_model_artifacts
 
 logger = logging.getLogger(__name__)
 
+# Özellik matrisinden oluşturulan ürün sözlüklerinin sütunları (_convert_product_to_dict ile aynı anahtarlar)
+MATRIX_PRODUCT_COLUMNS = [
+    'processing_level', 'nutrition_quality_score', 'health_score',
+    'energy_kcal', 'protein', 'fat', 'sugar', 'salt', 'fiber',
+    'is_high_sugar', 'is_high_salt', 'is_high_fat', 'is_high_protein', 'is_high_fiber',
+    'has_risky_additives', 'additives_count',
+]
+MATRIX_INT_COLUMNS = [
+    'processing_level', 'is_high_sugar', 'is_high_salt', 'is_high_fat', 'is_high_protein', 'is_high_fiber',
+    'has_risky_additives', 'additives_count',
+]
+
 class MLRecommendationService:
     """
     ML Model tabanlı ürün önerisi servisi
     """
     _instance = None
-    _model_loaded = False
 
     def __new__(cls):
         if cls._instance is None:
             cls._instance = super().__new__(cls)
         return cls._instance
 
-    def __init__(self):
-        if not self._model_loaded:
-            self.model = None
-            self.scaler = None
-            self.feature_columns = []
-            self.model_dir = os.path.join(BASE_DIR, 'models')
-            self._load_model()
-            self.__class__._model_loaded = True
-
-    def _load_model(self):
-        """Eğitilmiş modeli yükle"""
-        try:
-            model_path = os.path.join(self.model_dir, 'personalized_health_model.joblib')
-            scaler_path = os.path.join(self.model_dir, 'health_scaler.joblib')
-            features_path = os.path.join(self.model_dir, 'health_feature_columns.joblib')
-
-            if all(os.path.exists(path) for path in [model_path, scaler_path, features_path]):
-                self.model = joblib.load(model_path)
-                self.scaler = joblib.load(scaler_path)
-                self.feature_columns = joblib.load(features_path)
-                logger.info("ML model başarıyla yüklendi")
-            else:
-                logger.warning("ML model dosyaları bulunamadı, fallback moduna geçiliyor")
-                self.model = None
-        except Exception as e:
-            logger.error(f"Model yükleme hatası: {str(e)}")
-            self.model = None
+    @property
+    def artifacts(self):
+        """Süreç içinde paylaşılan model (bkz. model_registry)"""
+        return get_model_artifacts()
+
+    @property
+    def model(self):
+        return self.artifacts.model
+
+    @property
+    def scaler(self):
+        return self.artifacts.scaler
 
-    def get_product_alternatives(self, user_profile, product_code, limit=6, min_score_threshold=6.0):
+    @property
+    def feature_columns(self):
+        return self.artifacts.feature_columns
+
+    def get_product_alternatives(self, user_profile, product_code, limit=6, min_score_threshold=6.0,
+                                 diversity=DEFAULT_DIVERSITY, category_cap=None):
         """
         VIEW'e uyumlu alternatif ürün önerisi
+        diversity ve category_cap sonuçların çeşitliliğini ayarlar (bkz. _ensure_diversity)
         """
         try:
             # Hedef ürünü bul
@@ -74,55 +82,56 @@ class MLRecommendationService:
 
             target_product_dict = self._convert_product_to_dict(target_product)
             
-            # Benzer ürünleri bul
-            category = target_product.main_category
-            similar_products = ProductFeatures.objects.filter(
-                main_category__icontains=category.split()[0] if category else '',
-                is_valid_for_analysis=True
-            ).exclude(product_code=product_code)[:100]
-
-            if len(similar_products) < 20:
-                similar_products = ProductFeatures.objects.filter(
+            # Kullanıcının alerji/diyet tercihleriyle çelişen ürünler skorlamadan önce elenir
+            exclude_flags = profile_exclusion_mask(user_profile)
+
+            # Benzer ürünleri bul - önce bellek içi k-NN indeksi, sonra önceden hesaplanmış benzerlik grafiği
+            similar_products = self._get_knn_candidates(target_product, exclude_flags=exclude_flags)
+            if not similar_products:
+                similar_products = self._get_similarity_graph_candidates(target_product, exclude_flags=exclude_flags)
+
+            if not similar_products:
+                category = target_product.main_category
+                similar_products = exclude_flagged(ProductFeatures.objects.filter(
+                    main_category__icontains=category.split()[0] if category else '',
                     is_valid_for_analysis=True
-                ).exclude(product_code=product_code)[:100]
+                ), exclude_flags).exclude(product_code=product_code)[:100]
+
+                if len(similar_products) < 20:
+                    similar_products = exclude_flagged(ProductFeatures.objects.filter(
+                        is_valid_for_analysis=True
+                    ), exclude_flags).exclude(product_code=product_code)[:100]
 
-            # Skorlama ve filtreleme
+            # Skorlama ve filtreleme - hedef bir kez, adaylar tek predict ile skorlanır
+            candidates = list(similar_products)
+            prefetch_matrix_values(candidates)
+            candidate_dicts = [self._convert_product_to_dict(product) for product in candidates]
+            
+            target_score = self.get_personalized_score(user_profile, target_product_dict)
+            ml_scores = np.asarray(self.get_personalized_scores(user_profile, candidate_dicts), dtype=float)
+            similarity_bonuses = self._calculate_similarity_bonuses(target_product_dict, candidate_dicts)
+            improvement_bonuses = np.maximum(0, ml_scores - target_score) * 0.5
+            final_scores = np.clip(ml_scores + similarity_bonuses + improvement_bonuses, 0, 10)
+            
             alternatives = []
-            for product in similar_products:
-                try:
-                    product_dict = self._convert_product_to_dict(product)
-                    
-                    # ML skoru
-                    ml_score = self.get_personalized_score(user_profile, product_dict)
-                    target_score = self.get_personalized_score(user_profile, target_product_dict)
-                    
-                    # Bonuslar
-                    similarity_bonus = self._calculate_similarity_bonus(target_product_dict, product_dict)
-                    improvement_bonus = max(0, ml_score - target_score) * 0.5
-                    
-                    # Final skor
-                    final_score = ml_score + similarity_bonus + improvement_bonus
-                    final_score = max(0, min(10, final_score))
-                    
-                    if final_score >= min_score_threshold:
-                        alternatives.append({
-                            'product': product,
-                            'final_score': round(final_score, 2),
-                            'ml_score': round(ml_score, 2),
-                            'target_score': round(target_score, 2),
-                            'score_improvement': round(ml_score - target_score, 2),
-                            'similarity_bonus': round(similarity_bonus, 2),
-                            'improvement_bonus': round(improvement_bonus, 2),
-                            'reason': self._get_recommendation_reason(target_product_dict, product_dict, final_score),
-                            'category_match': target_product.main_category == product.main_category
-                        })
-                except Exception as e:
-                    logger.error(f"Ürün skorlama hatası {product.product_code}: {str(e)}")
-                    continue
+            for i in np.flatnonzero(final_scores >= min_score_threshold):
+                product, product_dict = candidates[i], candidate_dicts[i]
+                ml_score, final_score = ml_scores[i], final_scores[i]
+                alternatives.append({
+                    'product': product,
+                    'final_score': round(final_score, 2),
+                    'ml_score': round(ml_score, 2),
+                    'target_score': round(target_score, 2),
+                    'score_improvement': round(ml_score - target_score, 2),
+                    'similarity_bonus': round(similarity_bonuses[i], 2),
+                    'improvement_bonus': round(improvement_bonuses[i], 2),
+                    'reason': self._get_recommendation_reason(target_product_dict, product_dict, final_score),
+                    'category_match': target_product.main_category == product.main_category
+                })
 
             # Sıralama ve çeşitlilik
             alternatives.sort(key=lambda x: x['final_score'], reverse=True)
-            diverse_alternatives = self._ensure_diversity(alternatives, limit)
+            diverse_alternatives = self._ensure_diversity(alternatives, limit, diversity, category_cap)
 
             return {
                 'alternatives': diverse_alternatives,
@@ -142,62 +151,149 @@ class MLRecommendationService:
             logger.error(f"Alternatif ürün önerisi hatası: {str(e)}")
             return None
 
-    def get_user_recommendations(self, user_data, categories=None, limit=6):
+    def _get_knn_candidates(self, target_product, limit=100, exclude_flags=0):
+        """k-NN indeksindeki en yakın analize uygun ürünler (tek in_bulk sorgusu); indeks yoksa boş liste"""
+        index = get_knn_index()
+        neighbour_ids = index.query(target_product.id, k=limit, exclude_flags=exclude_flags) if index is not None else None
+        if not neighbour_ids:
+            return []
+        products = ProductFeatures.objects.filter(is_valid_for_analysis=True).in_bulk(neighbour_ids)
+        return [products[product_id] for product_id in neighbour_ids if product_id in products]
+
+    def _get_similarity_graph_candidates(self, target_product, limit=100, exclude_flags=0):
+        """ProductSimilarity'deki komşular (product_1 indeksi üzerinden tek sorgu); grafik yoksa boş liste"""
+        similarities = exclude_flagged(ProductSimilarity.objects.filter(
+            product_1=target_product,
+            product_2__is_valid_for_analysis=True
+        ), exclude_flags, field='product_2__product_flags').select_related('product_2').order_by('-overall_similarity')[:limit]
+        return [similarity.product_2 for similarity in similarities]
+
+    def _rank_product_pool(self, user_data, categories=None):
+        """Aday indeksi yoksa: veritabanından ilk 200 ürünü skorla"""
+        # Ürün havuzunu belirle - alerji/diyet tercihleriyle çelişen ürünler SQL'de elenir
+        products_query = exclude_flagged(
+            ProductFeatures.objects.filter(is_valid_for_analysis=True), profile_exclusion_mask(user_data)
+        )
+        
+        if categories:
+            category_filters = categories.split(',')
+            category_q = None
+            from django.db.models import Q
+            for cat in category_filters:
+                if category_q is None:
+                    category_q = Q(main_category__icontains=cat.strip())
+                else:
+                    category_q |= Q(main_category__icontains=cat.strip())
+            products_query = products_query.filter(category_q)
+
+        products = products_query[:200]  # Performans için sınırla
+
+        # Skorlama - tüm ürünler tek predict ile
+        products = list(products)
+        prefetch_matrix_values(products)
+        product_dicts = [self._convert_product_to_dict(product) for product in products]
+        ml_scores = self.get_personalized_scores(user_data, product_dicts)
+        
+        recommendations = []
+        for product, product_dict, ml_score in zip(products, product_dicts, ml_scores):
+            try:
+                # Kişiselleştirme bonusu
+                personalization_bonus = self._calculate_personalization_bonus(user_data, product_dict)
+                
+                final_score = ml_score + personalization_bonus
+                final_score = max(0, min(10, final_score))
+                
+                recommendations.append({
+                    'product': product,
+                    'final_score': round(final_score, 2),
+                    'ml_score': round(ml_score, 2),
+                    'personalization_bonus': round(personalization_bonus, 2),
+                    'recommendation_reason': self._get_personalization_reason(user_data, product_dict),
+                    'health_benefits': self._get_health_benefits(user_data, product_dict)
+                })
+            except Exception as e:
+                logger.error(f"Ürün skorlama hatası {product.product_code}: {str(e)}")
+                continue
+
+        return recommendations, len(products)
+
+    def _rank_retrieved_candidates(self, user_data, retriever, categories=None, limit=6):
+        """
+        Aday indeksinden gelen ürünleri özellik matrisi üzerinden toplu skorla.
+        ORM nesneleri sadece en iyi limit * 2 ürün için alınır.
+        """
+        category_terms = [cat.strip() for cat in categories.split(',')] if categories else None
+        rows = retriever.retrieve(category_terms, exclude_flags=profile_exclusion_mask(user_data))
+        if len(rows) == 0:
+            return [], 0
+
+        matrix = retriever.matrix
+        candidate_dicts = self._matrix_product_dicts(matrix, rows)
+        ml_scores = np.asarray(self.get_personalized_scores(user_data, candidate_dicts), dtype=float)
+        bonuses = np.array([
+            self._calculate_personalization_bonus(user_data, product_dict) for product_dict in candidate_dicts
+        ])
+        final_scores = np.clip(ml_scores + bonuses, 0, 10)
+
+        top = np.argsort(-final_scores, kind='stable')[:limit * 2]
+        product_ids = [int(product_id) for product_id in matrix.ids[rows[top]]]
+        products = ProductFeatures.objects.filter(is_valid_for_analysis=True).in_bulk(product_ids)
+
+        recommendations = []
+        for i, product_id in zip(top, product_ids):
+            product = products.get(product_id)
+            if product is None:
+                continue
+            product_dict = candidate_dicts[i]
+            recommendations.append({
+                'product': product,
+                'final_score': round(final_scores[i], 2),
+                'ml_score': round(ml_scores[i], 2),
+                'personalization_bonus': round(bonuses[i], 2),
+                'recommendation_reason': self._get_personalization_reason(user_data, product_dict),
+                'health_benefits': self._get_health_benefits(user_data, product_dict)
+            })
+        return recommendations, len(rows)
+
+    def _matrix_product_dicts(self, matrix, rows):
+        """_convert_product_to_dict ile aynı anahtarlar (kod/ad hariç), özellik matrisi satırlarından"""
+        values = matrix.values(rows, MATRIX_PRODUCT_COLUMNS).tolist()
+        category_names = matrix.category_names
+        categories = np.asarray(matrix.category_codes[rows]).tolist()
+
+        product_dicts = []
+        for row_values, category in zip(values, categories):
+            product_dict = dict(zip(MATRIX_PRODUCT_COLUMNS, row_values))
+            for name in MATRIX_INT_COLUMNS:
+                product_dict[name] = int(product_dict[name])
+            product_dict['main_category'] = category_names[category]
+            product_dicts.append(product_dict)
+        return product_dicts
+
+    def get_user_recommendations(self, user_data, categories=None, limit=6, diversity=DEFAULT_DIVERSITY,
+                                 category_cap=None):
         """
         VIEW'e uyumlu kişiselleştirilmiş öneriler
+        diversity ve category_cap sonuçların çeşitliliğini ayarlar (bkz. _ensure_diversity)
         """
         try:
-            # Ürün havuzunu belirle
-            products_query = ProductFeatures.objects.filter(is_valid_for_analysis=True)
-            
-            if categories:
-                category_filters = categories.split(',')
-                category_q = None
-                from django.db.models import Q
-                for cat in category_filters:
-                    if category_q is None:
-                        category_q = Q(main_category__icontains=cat.strip())
-                    else:
-                        category_q |= Q(main_category__icontains=cat.strip())
-                products_query = products_query.filter(category_q)
-
-            products = products_query[:200]  # Performans için sınırla
-
-            # Skorlama
-            recommendations = []
-            for product in products:
-                try:
-                    product_dict = self._convert_product_to_dict(product)
-                    ml_score = self.get_personalized_score(user_data, product_dict)
-                    
-                    # Kişiselleştirme bonusu
-                    personalization_bonus = self._calculate_personalization_bonus(user_data, product_dict)
-                    
-                    final_score = ml_score + personalization_bonus
-                    final_score = max(0, min(10, final_score))
-                    
-                    recommendations.append({
-                        'product': product,
-                        'final_score': round(final_score, 2),
-                        'ml_score': round(ml_score, 2),
-                        'personalization_bonus': round(personalization_bonus, 2),
-                        'recommendation_reason': self._get_personalization_reason(user_data, product_dict),
-                        'health_benefits': self._get_health_benefits(user_data, product_dict)
-                    })
-                except Exception as e:
-                    logger.error(f"Ürün skorlama hatası {product.product_code}: {str(e)}")
-                    continue
+            # İki aşamalı öneri: önceden sıralanmış aday indeksinden birkaç bin aday, sonra toplu ML sıralaması
+            retriever = get_candidate_retriever()
+            if retriever is not None:
+                recommendations, analyzed = self._rank_retrieved_candidates(user_data, retriever, categories, limit)
+            else:
+                recommendations, analyzed = self._rank_product_pool(user_data, categories)
 
             # En iyileri seç
             recommendations.sort(key=lambda x: x['final_score'], reverse=True)
             top_recommendations = recommendations[:limit * 2]  # Çeşitlilik için fazla al
-            diverse_recommendations = self._ensure_diversity(top_recommendations, limit)
+            diverse_recommendations = self._ensure_diversity(top_recommendations, limit, diversity, category_cap)
 
             return {
                 'recommendations': diverse_recommendations,
                 'user_profile_summary': self._get_user_summary(user_data),
                 'recommendation_stats': {
-                    'total_analyzed': len(recommendations),
+                    'total_analyzed': analyzed,
                     'returned': len(diverse_recommendations),
                     'avg_score': round(np.mean([rec['final_score'] for rec in diverse_recommendations]), 2) if diverse_recommendations else 0
                 }
@@ -282,105 +378,36 @@ class MLRecommendationService:
     # Mevcut yardımcı metodları koru
     def get_personalized_score(self, user_profile, product_data):
         """Kişiselleştirilmiş skor hesapla"""
-        if self.model is None:
-            return self._calculate_fallback_score(user_profile, product_data)
-
-        try:
-            features = self._create_feature_vector(user_profile, product_data)
-            features_df = pd.DataFrame([features])
-            
-            for col in self.feature_columns:
-                if col not in features_df.columns:
-                    features_df[col] = 0
+        return self.get_personalized_scores(user_profile, [product_data])[0]
 
-            features_df = features_df[self.feature_columns]
-            features_scaled = self.scaler.transform(features_df)
-            prediction = self.model.predict(features_scaled)
+    def get_personalized_scores(self, user_profile, products_data):
+        """Birden fazla ürün için kişiselleştirilmiş skorlar - tek feature matrisi, tek transform/predict"""
+        artifacts = self.artifacts
+        if not artifacts.is_loaded:
+            return [self._calculate_fallback_score(user_profile, product_data) for product_data in products_data]
+        if not products_data:
+            return []
 
-            score = max(0, min(10, prediction[0]))
-            return round(score, 2)
+        try:
+            user_features = create_user_features(user_profile)
+            predictions = artifacts.predict([
+                create_feature_vector(user_profile, product_data, user_features) for product_data in products_data
+            ])
+            return [round(prediction, 2) for prediction in predictions]
 
         except Exception as e:
             logger.error(f"ML skorlama hatası: {str(e)}")
-            return self._calculate_fallback_score(user_profile, product_data)
+            return [self._calculate_fallback_score(user_profile, product_data) for product_data in products_data]
 
     def _create_feature_vector(self, user_profile, product_data):
-        """Feature vektörü oluştur"""
-        features = {}
-
-        # Kullanıcı özellikleri
-        features['user_age'] = user_profile.get('age', 30)
-        features['user_bmi'] = self._calculate_bmi(user_profile)
-        features['user_gender_male'] = 1 if user_profile.get('gender') == 'Male' else 0
-        features['user_activity_high'] = 1 if user_profile.get('activity_level') == 'high' else 0
-        features['user_activity_moderate'] = 1 if user_profile.get('activity_level') == 'moderate' else 0
-
-        # Sağlık durumu
-        medical_conditions = user_profile.get('medical_conditions', [])
-        features['has_diabetes'] = 1 if 'diabetes_type_2' in medical_conditions else 0
-        features['has_kidney_disease'] = 1 if 'chronic_kidney_disease' in medical_conditions else 0
-        features['has_hyperthyroidism'] = 1 if 'hyperthyroidism' in medical_conditions else 0
-        features['has_osteoporosis'] = 1 if 'osteoporosis' in medical_conditions else 0
-
-        # Diyet tercihleri
-        diet_prefs = user_profile.get('dietary_preferences', [])
-        features['prefers_high_protein'] = 1 if 'high_protein' in diet_prefs else 0
-        features['prefers_low_fat'] = 1 if 'low_fat' in diet_prefs else 0
-        features['is_vegan'] = 1 if 'vegan' in diet_prefs else 0
-
-        # Sağlık hedefleri
-        health_goals = user_profile.get('health_goals', [])
-        features['goal_muscle_gain'] = 1 if 'muscle_gain' in health_goals else 0
-        features['goal_heart_health'] = 1 if 'heart_health' in health_goals else 0
-        features['goal_boost_energy'] = 1 if 'boost_energy' in health_goals else 0
-
-        # Ürün özellikleri
-        features['product_energy'] = self._safe_float(product_data.get('energy_kcal', 0))
-        features['product_protein'] = self._safe_float(product_data.get('protein', 0))
-        features['product_fat'] = self._safe_float(product_data.get('fat', 0))
-        features['product_sugar'] = self._safe_float(product_data.get('sugar', 0))
-        features['product_salt'] = self._safe_float(product_data.get('salt', 0))
-        features['product_fiber'] = self._safe_float(product_data.get('fiber', 0))
-        features['product_processing_level'] = product_data.get('processing_level', 3)
-        features['product_nutrition_quality'] = product_data.get('nutrition_quality_score', 5)
-        features['product_health_score'] = product_data.get('health_score', 5)
-        features['product_additives_count'] = product_data.get('additives_count', 0)
-
-        # Binary ürün özellikleri
-        features['product_high_sugar'] = product_data.get('is_high_sugar', 0)
-        features['product_high_salt'] = product_data.get('is_high_salt', 0)
-        features['product_high_fat'] = product_data.get('is_high_fat', 0)
-        features['product_high_protein'] = product_data.get('is_high_protein', 0)
-        features['product_high_fiber'] = product_data.get('is_high_fiber', 0)
-        features['product_has_risky_additives'] = product_data.get('has_risky_additives', 0)
-
-        return features
+        """Feature vektörü oluştur (eğitimle ortak builder; model nesnesi de kabul edilir)"""
+        if not isinstance(product_data, dict):
+            product_data = product_to_data(product_data)
+        return create_feature_vector(user_profile, product_data)
 
     def _convert_product_to_dict(self, product_obj):
-        """ProductFeatures nesnesini dict'e çevir"""
-        return {
-            'product_code': product_obj.product_code,
-            'product_name': product_obj.product_name,
-            'main_category': product_obj.main_category,
-            'processing_level': product_obj.processing_level,
-            'nutrition_quality_score': product_obj.nutrition_quality_score,
-            'health_score': product_obj.health_score,
-            
-            'energy_kcal': product_obj.get_energy_kcal(),
-            'protein': product_obj.get_protein(),
-            'fat': product_obj.get_fat(),
-            'sugar': product_obj.get_sugar(),
-            'salt': product_obj.get_salt(),
-            'fiber': product_obj.get_fiber(),
-            
-            'is_high_sugar': 1 if product_obj.is_high_sugar() else 0,
-            'is_high_salt': 1 if product_obj.is_high_salt() else 0,
-            'is_high_fat': 1 if product_obj.is_high_fat() else 0,
-            'is_high_protein': 1 if product_obj.is_high_protein() else 0,
-            'is_high_fiber': 1 if product_obj.is_high_fiber() else 0,
-            'has_risky_additives': 1 if product_obj.has_risky_additives() else 0,
-            'additives_count': product_obj.get_additives_count(),
-        }
+        """ProductFeatures nesnesini dict'e çevir (besin değerleri varsa özellik matrisinden)"""
+        return product_to_data(product_obj)
 
     def _calculate_similarity_bonus(self, searched_product, recommended_product):
         """Benzerlik bonusu hesapla"""
@@ -401,6 +428,36 @@ class MLRecommendationService:
         
         return min(1.0, bonus)
 
+    def _calculate_similarity_bonuses(self, searched_product, recommended_products):
+        """_calculate_similarity_bonus'un dizi versiyonu - tüm adaylar için tek seferde"""
+        if not recommended_products:
+            return np.zeros(0)
+
+        nutrients = ['energy_kcal', 'protein', 'fat', 'sugar', 'salt', 'fiber']
+        target = np.array([self._safe_float(searched_product.get(nutrient, 0)) for nutrient in nutrients])
+        values = np.array([
+            [self._safe_float(product.get(nutrient, 0)) for nutrient in nutrients]
+            for product in recommended_products
+        ])
+
+        # Besin benzerliği: ikisi de 0 -> 1, biri 0 -> 0, aksi halde küçük / büyük
+        max_values = np.maximum(values, target)
+        min_values = np.minimum(values, target)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            ratios = np.where(max_values > 0, min_values / max_values, 1.0)
+        similarities = np.where(
+            (values == 0) & (target == 0), 1.0,
+            np.where((values == 0) | (target == 0), 0.0, ratios)
+        ).mean(axis=1)
+
+        category = searched_product.get('main_category')
+        category_match = np.array([product.get('main_category') == category for product in recommended_products])
+        processing_levels = np.array([product.get('processing_level', 3) for product in recommended_products])
+        processing_close = np.abs(searched_product.get('processing_level', 3) - processing_levels) <= 1
+
+        bonuses = 0.5 * category_match + similarities * 0.3 + 0.2 * processing_close
+        return np.minimum(1.0, bonuses)
+
     def _calculate_nutritional_similarity(self, product1, product2):
         """Besin değerleri benzerliği"""
         nutrients = ['energy_kcal', 'protein', 'fat', 'sugar', 'salt', 'fiber']
@@ -422,35 +479,23 @@ class MLRecommendationService:
         
         return np.mean(similarities)
 
-    def _ensure_diversity(self, scored_products, limit):
-        """Çeşitlilik sağla"""
+    def _ensure_diversity(self, scored_products, limit, diversity=DEFAULT_DIVERSITY, category_cap=None):
+        """
+        Çeşitlilik sağla - besin vektörleri üzerinde MMR + kategori kotası (O(n·k)).
+        diversity: benzerlik cezasının ağırlığı (0-1), category_cap: kategori başına en fazla ürün (None: limit'in yarısı)
+        """
         if len(scored_products) <= limit:
             return scored_products
-        
-        diverse_products = []
-        seen_categories = set()
-        
-        diverse_products.append(scored_products[0])
-        seen_categories.add(scored_products[0]['product'].main_category)
-        
-        for product in scored_products[1:]:
-            if len(diverse_products) >= limit:
-                break
-                
-            category = product['product'].main_category
-            if category not in seen_categories or len(diverse_products) < limit // 2:
-                diverse_products.append(product)
-                seen_categories.add(category)
-        
-        while len(diverse_products) < limit and len(diverse_products) < len(scored_products):
-            for product in scored_products:
-                if len(diverse_products) >= limit:
-                    break
-                if product not in diverse_products:
-                    diverse_products.append(product)
-                    break
-        
-        return diverse_products[:limit]
+
+        product_dicts = [self._convert_product_to_dict(item['product']) for item in scored_products]
+        vectors = normalize_nutrient_vectors([
+            [self._safe_float(product_dict.get(column)) for column in NUTRIENT_COLUMNS] for product_dict in product_dicts
+        ])
+        relevance = np.array([float(item['final_score']) for item in scored_products]) / 10.0
+        categories = [item['product'].main_category for item in scored_products]
+
+        order = mmr_rerank(relevance, vectors, categories, limit, diversity=diversity, category_cap=category_cap)
+        return [scored_products[i] for i in order]
 
     def _get_recommendation_reason(self, searched_product, recommended_product, score):
         """Öneri sebebi"""
@@ -500,23 +545,11 @@ class MLRecommendationService:
 
     def _calculate_bmi(self, user_profile):
         """BMI hesapla"""
-        if user_profile.get('bmi'):
-            return user_profile['bmi']
-        
-        height = user_profile.get('height', 170)
-        weight = user_profile.get('weight', 70)
-        
-        if height and weight and height > 0:
-            return round(weight / ((height/100) ** 2), 1)
-        
-        return 24  # Varsayılan
+        return calculate_bmi(user_profile)
 
     def _safe_float(self, value):
         """Güvenli float dönüşümü"""
-        try:
-            return float(value) if value is not None else 0.0
-        except (ValueError, TypeError):
-            return 0.0
+        return safe_float(value)
 
 
 # Singleton instance
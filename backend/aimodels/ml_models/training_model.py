@@ -22,9 +22,29 @@ from sklearn.ensemble import RandomForestRegressor
 from sklearn.model_selection import train_test_split, GridSearchCV
 from sklearn.preprocessing import StandardScaler
 from sklearn.metrics import mean_squared_error, r2_score, mean_absolute_error
-import joblib
 
 from api.models.product_features import ProductFeatures
+from aimodels.ml_models.feature_builder import create_feature_vector
+from aimodels.ml_models.model_registry import ModelArtifacts
+
+# Snapshot'tan eğitimde okunan sütunlar (diğer sütunlar diskten okunmaz)
+TRAINING_SNAPSHOT_COLUMNS = [
+    'product_code', 'product_name', 'main_category', 'processing_level', 'nutrition_quality_score',
+    'health_score', 'data_completeness_score', 'nutrition_vector', 'health_indicators',
+    'nutriscore_data', 'additives_info', 'is_valid_for_analysis',
+]
+
+# Özellik matrisinden eğitime alınan sayısal sütunlar (load_product_data çıktısındaki sırayla)
+TRAINING_MATRIX_COLUMNS = [
+    'processing_level', 'nutrition_quality_score', 'health_score', 'data_completeness_score',
+    'energy_kcal', 'protein', 'fat', 'sugar', 'salt', 'fiber',
+    'is_high_sugar', 'is_high_salt', 'is_high_fat', 'is_high_protein', 'is_high_fiber',
+    'nutriscore_numeric', 'additives_count', 'has_risky_additives',
+]
+TRAINING_MATRIX_INT_COLUMNS = [
+    'processing_level', 'is_high_sugar', 'is_high_salt', 'is_high_fat', 'is_high_protein',
+    'is_high_fiber', 'has_risky_additives',
+]
 
 class PersonalizedHealthScoreModel:
     """
@@ -50,11 +70,27 @@ class PersonalizedHealthScoreModel:
         print(f"Toplam {len(users_df)} kullanıcı yüklendi")
         return users_df
     
-    def load_product_data(self):
-        """Django modelinden ürün verilerini yükle"""
-        print("Ürün verileri Django modelinden yükleniyor...")
+    def load_product_data(self, snapshot_path=None):
+        """
+        Django modelinden ürün verilerini yükle
+        snapshot_path verilirse process_openfoodfacts --features-output-path ile yazılmış Parquet snapshot okunur
+        """
+        if snapshot_path:
+            from api.pipeline.columnar_store import read_snapshot
+            
+            print(f"Ürün verileri snapshot'tan yükleniyor: {snapshot_path}")
+            snapshot_df = read_snapshot(snapshot_path, columns=TRAINING_SNAPSHOT_COLUMNS)
+            snapshot_df = snapshot_df[snapshot_df['is_valid_for_analysis']]
+            # Kaydedilmeyen model nesneleri - yardımcı metotlar (get_energy_kcal vb.) aynen kullanılır
+            products = [ProductFeatures(**values) for values in snapshot_df.to_dict('records')]
+        else:
+            products_df = self._load_product_data_from_matrix()
+            if products_df is not None:
+                return products_df
+            
+            print("Ürün verileri Django modelinden yükleniyor...")
+            products = ProductFeatures.objects.filter(is_valid_for_analysis=True)
         
-        products = ProductFeatures.objects.filter(is_valid_for_analysis=True)
         product_data = []
         
         for product in products:
@@ -95,6 +131,47 @@ class PersonalizedHealthScoreModel:
         print(f"Toplam {len(products_df)} ürün yüklendi")
         return products_df
     
+    def _load_product_data_from_matrix(self):
+        """
+        Sayısal sütunları özellik matrisinden dilimle (JSON alanları okunmaz).
+        Matris yoksa veya oluşturulduktan sonra ürünler değiştiyse None - model nesneleri kullanılır.
+        """
+        from api.pipeline.feature_matrix import get_feature_matrix
+        
+        matrix = get_feature_matrix()
+        if matrix is None:
+            return None
+        if matrix.is_stale():
+            print("Özellik matrisi güncel değil, Django modeline dönülüyor (build_feature_matrix çalıştırın)")
+            return None
+        
+        products = ProductFeatures.objects.filter(is_valid_for_analysis=True).order_by('id')
+        ids, codes, names, categories = [], [], [], []
+        for product_id, code, name, category in products.values_list(
+            'id', 'product_code', 'product_name', 'main_category'
+        ).iterator(chunk_size=10000):
+            ids.append(product_id)
+            codes.append(code)
+            names.append(name)
+            categories.append(category)
+        
+        rows = matrix.rows_for_ids(ids)
+        if (rows < 0).any():
+            print("Özellik matrisinde eksik ürünler var, Django modeline dönülüyor")
+            return None
+        
+        print("Ürün verileri özellik matrisinden yükleniyor...")
+        products_df = pd.DataFrame(
+            matrix.values(rows, TRAINING_MATRIX_COLUMNS).astype(np.float64), columns=TRAINING_MATRIX_COLUMNS
+        )
+        products_df[TRAINING_MATRIX_INT_COLUMNS] = products_df[TRAINING_MATRIX_INT_COLUMNS].astype('int64')
+        products_df.insert(0, 'product_code', codes)
+        products_df.insert(1, 'product_name', names)
+        products_df.insert(2, 'main_category', categories)
+        
+        print(f"Toplam {len(products_df)} ürün yüklendi")
+        return products_df
+    
     def generate_personalized_scores(self, users_df, products_df):
         """Her kullanıcı-ürün çifti için kişiselleştirilmiş sağlık skoru hesapla"""
         print("Kişiselleştirilmiş sağlık skorları hesaplanıyor...")
@@ -262,56 +339,30 @@ class PersonalizedHealthScoreModel:
         return adjustment
     
     def _create_combined_features(self, user, product):
-        """Kullanıcı ve ürün özelliklerini birleştir"""
-        features = {}
-        
-        # Kullanıcı özellikleri
-        features['user_age'] = user['age']
-        features['user_bmi'] = user['bmi']
-        features['user_gender_male'] = 1 if user['gender'] == 'Male' else 0
-        features['user_activity_high'] = 1 if user['activity_level'] == 'high' else 0
-        features['user_activity_moderate'] = 1 if user['activity_level'] == 'moderate' else 0
-        
-        # Sağlık durumu binary features
-        medical_conditions = user['medical_conditions_list'] if user['medical_conditions_list'] != [''] else []
-        features['has_diabetes'] = 1 if 'diabetes_type_2' in medical_conditions else 0
-        features['has_kidney_disease'] = 1 if 'chronic_kidney_disease' in medical_conditions else 0
-        features['has_hyperthyroidism'] = 1 if 'hyperthyroidism' in medical_conditions else 0
-        features['has_osteoporosis'] = 1 if 'osteoporosis' in medical_conditions else 0
-        
-        # Diyet tercihleri
-        diet_prefs = user['dietary_preferences_list'] if user['dietary_preferences_list'] != [''] else []
-        features['prefers_high_protein'] = 1 if 'high_protein' in diet_prefs else 0
-        features['prefers_low_fat'] = 1 if 'low_fat' in diet_prefs else 0
-        features['is_vegan'] = 1 if 'vegan' in diet_prefs else 0
+        """Kullanıcı ve ürün özelliklerini birleştir (servislerle aynı feature_builder)"""
+        return create_feature_vector(self._user_profile(user), product)
+    
+    def _user_profile(self, user):
+        """Eğitim verisindeki kullanıcı satırını servislerin kullandığı profil sözlüğüne çevir"""
+        def selections(key):
+            # Eksik değerler pandas satırında NaN (float) gelir; liste olmayan her şey boş seçim sayılır
+            values = user.get(f'{key}_list')
+            if not isinstance(values, (list, tuple)):
+                values = user.get(key)
+                values = values.split('|') if isinstance(values, str) else values
+            if not isinstance(values, (list, tuple)):
+                values = []
+            return [value for value in values if value]
         
-        # Sağlık hedefleri
-        health_goals = user['health_goals_list'] if user['health_goals_list'] != [''] else []
-        features['goal_muscle_gain'] = 1 if 'muscle_gain' in health_goals else 0
-        features['goal_heart_health'] = 1 if 'heart_health' in health_goals else 0
-        features['goal_boost_energy'] = 1 if 'boost_energy' in health_goals else 0
-        
-        # Ürün özellikleri (direkt)
-        features['product_energy'] = product['energy_kcal']
-        features['product_protein'] = product['protein']
-        features['product_fat'] = product['fat']
-        features['product_sugar'] = product['sugar']
-        features['product_salt'] = product['salt']
-        features['product_fiber'] = product['fiber']
-        features['product_processing_level'] = product['processing_level']
-        features['product_nutrition_quality'] = product['nutrition_quality_score']
-        features['product_health_score'] = product['health_score']
-        features['product_additives_count'] = product['additives_count']
-        
-        # Ürün binary features
-        features['product_high_sugar'] = product['is_high_sugar']
-        features['product_high_salt'] = product['is_high_salt']
-        features['product_high_fat'] = product['is_high_fat']
-        features['product_high_protein'] = product['is_high_protein']
-        features['product_high_fiber'] = product['is_high_fiber']
-        features['product_has_risky_additives'] = product['has_risky_additives']
-        
-        return features
+        return {
+            'age': user.get('age'),
+            'bmi': user.get('bmi'),
+            'gender': user.get('gender'),
+            'activity_level': user.get('activity_level'),
+            'medical_conditions': selections('medical_conditions'),
+            'dietary_preferences': selections('dietary_preferences'),
+            'health_goals': selections('health_goals'),
+        }
     
     def train_model(self, training_df):
         """Modeli eğit"""
@@ -381,34 +432,18 @@ class PersonalizedHealthScoreModel:
         if self.model is None:
             raise ValueError("Model henüz eğitilmedi!")
         
-        # Feature vektörü oluştur
+        # Feature vektörü oluştur, eksik kolonları 0 ile tamamlayıp tahmin yap
         combined_features = self._create_combined_features(user_features, product_features)
-        
-        # DataFrame'e çevir ve eksik kolonları ekle
-        features_df = pd.DataFrame([combined_features])
-        for col in self.feature_columns:
-            if col not in features_df.columns:
-                features_df[col] = 0
-        
-        # Sıralamayı düzelt
-        features_df = features_df[self.feature_columns]
-        
-        # Normalize et ve tahmin yap
-        features_scaled = self.scaler.transform(features_df)
-        prediction = self.model.predict(features_scaled)
-        
-        return max(0, min(10, prediction[0]))
+        return float(self._artifacts().predict([combined_features])[0])
+    
+    def _artifacts(self):
+        return ModelArtifacts(self.model, self.scaler, self.feature_columns)
     
     def save_model(self, model_dir='models'):
         """Eğitilmiş modeli kaydet"""
-        if not os.path.exists(model_dir):
-            os.makedirs(model_dir)
-        
         print(f"Model {model_dir} klasörüne kaydediliyor...")
         
-        joblib.dump(self.model, f'{model_dir}/personalized_health_model.joblib')
-        joblib.dump(self.scaler, f'{model_dir}/health_scaler.joblib')
-        joblib.dump(self.feature_columns, f'{model_dir}/health_feature_columns.joblib')
+        self._artifacts().save(model_dir)
         
         print("Model başarıyla kaydedildi!")
     
@@ -416,12 +451,16 @@ class PersonalizedHealthScoreModel:
         """Kaydedilmiş modeli yükle"""
         print("Model yükleniyor...")
         
-        self.model = joblib.load(f'{model_dir}/personalized_health_model.joblib')
-        self.scaler = joblib.load(f'{model_dir}/health_scaler.joblib')
-        self.feature_columns = joblib.load(f'{model_dir}/health_feature_columns.joblib')
+        artifacts = ModelArtifacts.load(model_dir)
+        if not artifacts.is_loaded:
+            raise FileNotFoundError(f"Model dosyaları yüklenemedi: {model_dir}")
+        self.model = artifacts.model
+        self.scaler = artifacts.scaler
+        self.feature_columns = artifacts.feature_columns
         
         print("Model başarıyla yüklendi!")
 
+
 def main():
     """Ana eğitim fonksiyonu"""
     print("=== Kişiselleştirilmiş Sağlık Skoru Modeli Eğitimi ===")
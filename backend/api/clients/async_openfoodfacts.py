@@ -0,0 +1,182 @@
+# backend/api/clients/async_openfoodfacts.py
+
+import asyncio
+import logging
+import random
+import weakref
+from typing import Any, Dict, Optional
+
+import requests
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+try:
+    import httpx
+except ImportError:  # httpx opsiyonel - yoksa senkron istemci thread havuzunda çalıştırılır
+    httpx = None
+
+from .openfoodfacts import (
+    DEFAULT_API_BASE,
+    DEFAULT_BACKOFF_FACTOR,
+    DEFAULT_BACKOFF_JITTER,
+    DEFAULT_BACKOFF_MAX,
+    DEFAULT_CONNECT_TIMEOUT,
+    DEFAULT_MAX_RETRIES,
+    DEFAULT_READ_TIMEOUT,
+    PRODUCT_PATH,
+    RETRY_STATUS_CODES,
+    SEARCH_PATH,
+    USER_AGENT,
+    CircuitBreaker,
+    CircuitOpenError,
+    OpenFoodFactsClient,
+    get_openfoodfacts_client,
+)
+
+logger = logging.getLogger(__name__)
+
+# Event loop başına açık tutulan en fazla bağlantı - bekleyen istekler thread değil coroutine olduğundan
+# tek worker yüzlerce upstream isteğini aynı anda taşıyabilir
+DEFAULT_MAX_CONNECTIONS = 200
+DEFAULT_MAX_KEEPALIVE_CONNECTIONS = 50
+
+
+class AsyncOpenFoodFactsClient:
+    """
+    OpenFoodFacts API için asenkron istemci (httpx): senkron istemciyle aynı zaman aşımları, jitter'lı tekrar
+    denemeleri ve devre kesici. Hatalar yine requests.RequestException olarak yükselir, böylece çağıran kod
+    iki istemci için aynıdır. Bağlantı havuzu event loop'a bağlıdır (get_async_openfoodfacts_client).
+    """
+
+    def __init__(self, base_url: str = DEFAULT_API_BASE,
+                 connect_timeout: float = DEFAULT_CONNECT_TIMEOUT,
+                 read_timeout: float = DEFAULT_READ_TIMEOUT,
+                 max_connections: int = DEFAULT_MAX_CONNECTIONS,
+                 max_retries: int = DEFAULT_MAX_RETRIES,
+                 backoff_factor: float = DEFAULT_BACKOFF_FACTOR,
+                 backoff_jitter: float = DEFAULT_BACKOFF_JITTER,
+                 breaker: Optional[CircuitBreaker] = None):
+        self.base_url = base_url.rstrip('/')
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.backoff_jitter = backoff_jitter
+        self.breaker = breaker or CircuitBreaker()
+        self.session = httpx.AsyncClient(
+            timeout=httpx.Timeout(read_timeout, connect=connect_timeout),
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=min(max_connections, DEFAULT_MAX_KEEPALIVE_CONNECTIONS),
+            ),
+            headers={'User-Agent': USER_AGENT, 'Accept': 'application/json'},
+        )
+
+    def _backoff(self, attempt: int) -> float:
+        return min(DEFAULT_BACKOFF_MAX, self.backoff_factor * (2 ** attempt) + random.uniform(0, self.backoff_jitter))
+
+    async def get_json(self, path: str, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        GET isteği ve JSON gövdesi. Bağlantı hataları ve RETRY_STATUS_CODES tekrar denenir
+        (okuma zaman aşımı en fazla bir kez); devre kesiciye istek başına tek sonuç yazılır.
+        """
+        if not self.breaker.allow_request():
+            raise CircuitOpenError("OpenFoodFacts circuit is open, request skipped")
+
+        url = f"{self.base_url}{path}"
+        read_retries = min(self.max_retries, 1)
+        attempt = 0
+        while True:
+            try:
+                response = await self.session.get(url, params=params)
+            except httpx.TransportError as e:
+                retries = read_retries if isinstance(e, httpx.ReadTimeout) else self.max_retries
+                if attempt < retries:
+                    await asyncio.sleep(self._backoff(attempt))
+                    attempt += 1
+                    continue
+                self.breaker.record_failure()
+                if isinstance(e, httpx.TimeoutException):
+                    raise requests.Timeout(f"{url}: {e!r}") from e
+                raise requests.ConnectionError(f"{url}: {e!r}") from e
+
+            if response.status_code in RETRY_STATUS_CODES and attempt < self.max_retries:
+                await asyncio.sleep(self._backoff(attempt))
+                attempt += 1
+                continue
+            break
+
+        if response.status_code >= 500 or response.status_code == 429:
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success()
+        if response.status_code >= 400:
+            raise requests.HTTPError(f"{response.status_code} Error for url: {response.url}")
+        try:
+            return response.json()
+        except ValueError as e:
+            raise requests.RequestException(f"Invalid JSON from {url}: {e}") from e
+
+    async def search(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        return await self.get_json(SEARCH_PATH, params=params)
+
+    async def get_product(self, product_code: str) -> Dict[str, Any]:
+        return await self.get_json(f"{PRODUCT_PATH}/{product_code}.json")
+
+    async def close(self):
+        await self.session.aclose()
+
+
+class ThreadedOpenFoodFactsClient:
+    """httpx kurulu değilse aynı arayüz: senkron istemcinin istekleri thread havuzunda çalıştırılır"""
+
+    def __init__(self, client: OpenFoodFactsClient):
+        self.client = client
+        self.breaker = client.breaker
+
+    async def get_json(self, path: str, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        return await sync_to_async(self.client.get_json, thread_sensitive=False)(path, params)
+
+    async def search(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        return await self.get_json(SEARCH_PATH, params=params)
+
+    async def get_product(self, product_code: str) -> Dict[str, Any]:
+        return await self.get_json(f"{PRODUCT_PATH}/{product_code}.json")
+
+    async def close(self):
+        pass
+
+
+# httpx bağlantıları oluşturuldukları event loop'a bağlıdır: ASGI worker'da tek loop (tek havuz) olur.
+# WSGI altında async view'lar her istekte yeni bir loop'ta çalışır; o istemci istek sonunda
+# close_async_openfoodfacts_client() ile kapatılır (api/views/async_product_views.py)
+_clients = weakref.WeakKeyDictionary()
+
+
+def get_async_openfoodfacts_client():
+    """
+    Çalışan event loop için paylaşılan asenkron OpenFoodFacts istemcisi.
+    Devre kesici senkron istemciyle ortaktır - süreç içinde upstream sağlığı tek yerde tutulur.
+    """
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+    if client is None:
+        sync_client = get_openfoodfacts_client()
+        if httpx is None:
+            client = ThreadedOpenFoodFactsClient(sync_client)
+        else:
+            client = AsyncOpenFoodFactsClient(
+                base_url=getattr(settings, 'OPENFOODFACTS_API_BASE', DEFAULT_API_BASE),
+                connect_timeout=getattr(settings, 'OPENFOODFACTS_CONNECT_TIMEOUT', DEFAULT_CONNECT_TIMEOUT),
+                read_timeout=getattr(settings, 'OPENFOODFACTS_READ_TIMEOUT', DEFAULT_READ_TIMEOUT),
+                max_connections=getattr(settings, 'OPENFOODFACTS_ASYNC_MAX_CONNECTIONS', DEFAULT_MAX_CONNECTIONS),
+                max_retries=getattr(settings, 'OPENFOODFACTS_MAX_RETRIES', DEFAULT_MAX_RETRIES),
+                breaker=sync_client.breaker,
+            )
+        _clients[loop] = client
+    return client
+
+
+async def close_async_openfoodfacts_client():
+    """Çalışan event loop'un istemcisini (varsa) kapat ve bağlantı havuzunu bırak"""
+    client = _clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.close()
@@ -0,0 +1,154 @@
+# backend/api/clients/fake_openfoodfacts.py
+
+import json
+import logging
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Iterable, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+from .openfoodfacts import PRODUCT_PATH, SEARCH_PATH
+
+logger = logging.getLogger(__name__)
+
+# search_terms'ün aranacağı ürün alanları
+SEARCH_FIELDS = ['product_name', 'brands', 'categories']
+
+# Bekleyen bağlantı kuyruğu - async istemcinin yüzlerce eşzamanlı isteği SYN tekrarına düşmeden kabul edilsin
+LISTEN_BACKLOG = 512
+
+
+class _FakeHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = LISTEN_BACKLOG
+
+
+class FakeOpenFoodFactsServer:
+    """
+    Testler ve yerel geliştirme için OpenFoodFacts taklidi (sadece /cgi/search.pl ve /api/v0/product/<kod>.json).
+    latency ile yavaş upstream, failure_rate/fail_status ile hata veren upstream canlandırılır;
+    request_count ve connection_count istemcinin tekrar denemelerini ve keep-alive kullanımını doğrulamak içindir.
+    """
+
+    def __init__(self, products: Iterable[Dict[str, Any]], host: str = '127.0.0.1', port: int = 0,
+                 latency: float = 0.0, failure_rate: float = 0.0, fail_status: int = 503, seed: Optional[int] = None):
+        self.products: Dict[str, Dict[str, Any]] = {}
+        for product in products:
+            code = str(product.get('code') or product.get('_id') or '')
+            if code:
+                self.products[code] = product
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.fail_status = fail_status
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.request_count = 0
+        self.connection_count = 0
+
+        self._server = _FakeHTTPServer((host, port), self._handler_class())
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _handler_class(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            # Keep-alive: istemci aynı bağlantıyı tekrar kullanabilir
+            protocol_version = 'HTTP/1.1'
+
+            def setup(self):
+                super().setup()
+                with fake._lock:
+                    fake.connection_count += 1
+
+            def do_GET(self):
+                status, body = fake.handle(self.path)
+                payload = json.dumps(body).encode('utf-8')
+                try:
+                    self.send_response(status)
+                    self.send_header('Content-Type', 'application/json')
+                    self.send_header('Content-Length', str(len(payload)))
+                    self.end_headers()
+                    self.wfile.write(payload)
+                except (BrokenPipeError, ConnectionResetError):
+                    # İstemci zaman aşımıyla bağlantıyı kapatmış
+                    self.close_connection = True
+
+            def log_message(self, format, *args):
+                logger.debug(f"Fake OpenFoodFacts: {format % args}")
+
+        return Handler
+
+    def handle(self, raw_path: str):
+        """İstek yolu -> (HTTP durum kodu, JSON gövdesi)"""
+        with self._lock:
+            self.request_count += 1
+            fail = self.failure_rate > 0 and self._random.random() < self.failure_rate
+        if self.latency:
+            time.sleep(self.latency)
+        if fail:
+            return self.fail_status, {'status': 0, 'status_verbose': 'simulated failure'}
+
+        parsed = urlparse(raw_path)
+        query = {key: values[-1] for key, values in parse_qs(parsed.query).items()}
+        if parsed.path == SEARCH_PATH:
+            return 200, self.search(query)
+        if parsed.path.startswith(f"{PRODUCT_PATH}/") and parsed.path.endswith('.json'):
+            code = parsed.path[len(PRODUCT_PATH) + 1:-len('.json')]
+            product = self.products.get(code)
+            if product is None:
+                return 200, {'code': code, 'status': 0, 'status_verbose': 'product not found'}
+            return 200, {'code': code, 'status': 1, 'status_verbose': 'product found', 'product': product}
+        return 404, {'status': 0, 'status_verbose': 'not found'}
+
+    def search(self, query: Dict[str, str]) -> Dict[str, Any]:
+        """search_terms alt dize eşleşmesi ve page/page_size sayfalama (gerçek API'nin yanıt biçiminde)"""
+        terms = query.get('search_terms', '').lower().split()
+        matches: List[Dict[str, Any]] = [
+            product for product in self.products.values()
+            if all(any(term in str(product.get(field) or '').lower() for field in SEARCH_FIELDS) for term in terms)
+        ]
+
+        try:
+            page = max(1, int(query.get('page', 1)))
+            page_size = max(1, int(query.get('page_size', 20)))
+        except ValueError:
+            page, page_size = 1, 20
+        start = (page - 1) * page_size
+        page_products = matches[start:start + page_size]
+
+        fields = [field for field in query.get('fields', '').split(',') if field]
+        if fields:
+            page_products = [{field: product[field] for field in fields if field in product} for product in page_products]
+
+        return {'count': len(matches), 'page': page, 'page_size': page_size, 'products': page_products}
+
+    def start(self) -> str:
+        """Sunucuyu arka plan thread'inde başlat, base_url döndür"""
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self.base_url
+
+    def serve_forever(self):
+        self._server.serve_forever()
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
@@ -0,0 +1,203 @@
+# backend/api/clients/openfoodfacts.py
+
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_API_BASE = "https://world.openfoodfacts.org"
+SEARCH_PATH = "/cgi/search.pl"
+PRODUCT_PATH = "/api/v0/product"
+
+# Bağlantı kurulamıyorsa hızlı vazgeç; yanıt için daha uzun bekle (eski tek timeout=30 yerine)
+DEFAULT_CONNECT_TIMEOUT = 3.05
+DEFAULT_READ_TIMEOUT = 10.0
+
+# Worker (süreç) başına açık tutulan bağlantı sayısı - worker içindeki eşzamanlı istek sayısı kadar olmalı
+DEFAULT_POOL_SIZE = 10
+
+# Tekrar denemeleri: 2 tekrar, 0.3 sn'den başlayan üstel bekleme + 0-0.2 sn rastgele jitter
+DEFAULT_MAX_RETRIES = 2
+DEFAULT_BACKOFF_FACTOR = 0.3
+DEFAULT_BACKOFF_JITTER = 0.2
+DEFAULT_BACKOFF_MAX = 2.0
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+
+# Art arda bu kadar hata olursa devre açılır ve reset_timeout boyunca upstream'e istek atılmaz
+DEFAULT_FAILURE_THRESHOLD = 5
+DEFAULT_RESET_TIMEOUT = 30.0
+
+USER_AGENT = "HealthyProductsBackend/1.0 (+https://world.openfoodfacts.org)"
+
+
+class CircuitOpenError(requests.RequestException):
+    """Devre açıkken upstream'e gitmeden dönen hata (requests.RequestException yakalayan kod aynen çalışır)"""
+
+
+class CircuitBreaker:
+    """
+    Basit devre kesici: closed -> (failure_threshold art arda hata) -> open -> (reset_timeout) -> half_open.
+    half_open durumunda tek bir deneme isteğine izin verilir; başarılıysa devre kapanır, değilse yeniden açılır.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold: int = DEFAULT_FAILURE_THRESHOLD,
+                 reset_timeout: float = DEFAULT_RESET_TIMEOUT,
+                 clock: Callable[[], float] = time.monotonic):
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._probe_in_flight = False
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._state()
+
+    def _state(self) -> str:
+        if self._opened_at is None:
+            return self.CLOSED
+        if self._clock() - self._opened_at >= self.reset_timeout:
+            return self.HALF_OPEN
+        return self.OPEN
+
+    def allow_request(self) -> bool:
+        """İstek atılabilir mi? half_open durumunda sadece ilk çağırana True döner"""
+        with self._lock:
+            state = self._state()
+            if state == self.CLOSED:
+                return True
+            if state == self.HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            if self._opened_at is not None:
+                logger.info("OpenFoodFacts devresi kapandı")
+            self._failures = 0
+            self._opened_at = None
+            self._probe_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._probe_in_flight or (self._opened_at is None and self._failures >= self.failure_threshold):
+                logger.warning(f"OpenFoodFacts devresi açıldı ({self._failures} art arda hata, "
+                               f"{self.reset_timeout:.0f} sn istek atılmayacak)")
+                self._opened_at = self._clock()
+            self._probe_in_flight = False
+
+
+class OpenFoodFactsClient:
+    """
+    OpenFoodFacts API istemcisi: keep-alive bağlantı havuzu, ayrı bağlantı/okuma zaman aşımları,
+    jitter'lı tekrar denemeleri ve devre kesici. Süreç başına tek nesne kullanılır (get_openfoodfacts_client).
+    """
+
+    def __init__(self, base_url: str = DEFAULT_API_BASE,
+                 connect_timeout: float = DEFAULT_CONNECT_TIMEOUT,
+                 read_timeout: float = DEFAULT_READ_TIMEOUT,
+                 pool_size: int = DEFAULT_POOL_SIZE,
+                 max_retries: int = DEFAULT_MAX_RETRIES,
+                 backoff_factor: float = DEFAULT_BACKOFF_FACTOR,
+                 backoff_jitter: float = DEFAULT_BACKOFF_JITTER,
+                 breaker: Optional[CircuitBreaker] = None):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = (connect_timeout, read_timeout)
+        self.breaker = breaker or CircuitBreaker()
+        self.session = self._build_session(pool_size, max_retries, backoff_factor, backoff_jitter)
+
+    @staticmethod
+    def _build_session(pool_size: int, max_retries: int, backoff_factor: float,
+                       backoff_jitter: float) -> requests.Session:
+        retry = Retry(
+            total=max_retries,
+            connect=max_retries,
+            # Okuma zaman aşımında en fazla bir tekrar - yavaş upstream worker'ı timeout'un katları kadar bekletmesin
+            read=min(max_retries, 1),
+            status=max_retries,
+            status_forcelist=RETRY_STATUS_CODES,
+            allowed_methods=frozenset(['GET']),
+            backoff_factor=backoff_factor,
+            backoff_jitter=backoff_jitter,
+            backoff_max=DEFAULT_BACKOFF_MAX,
+            respect_retry_after_header=True,
+            # Son yanıt döner; hata durumu raise_for_status ile ayrıştırılır
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=retry)
+
+        session = requests.Session()
+        session.headers.update({'User-Agent': USER_AGENT, 'Accept': 'application/json'})
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        return session
+
+    def get_json(self, path: str, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        GET isteği ve JSON gövdesi. Hatalar requests.RequestException olarak yükselir:
+        bağlantı/zaman aşımı ve 5xx devre kesicide hata sayılır, 4xx upstream sağlıklı demektir.
+        """
+        if not self.breaker.allow_request():
+            raise CircuitOpenError("OpenFoodFacts circuit is open, request skipped")
+
+        try:
+            response = self.session.get(f"{self.base_url}{path}", params=params, timeout=self.timeout)
+        except requests.RequestException:
+            self.breaker.record_failure()
+            raise
+
+        if response.status_code >= 500 or response.status_code == 429:
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success()
+        response.raise_for_status()
+        return response.json()
+
+    def search(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        return self.get_json(SEARCH_PATH, params=params)
+
+    def get_product(self, product_code: str) -> Dict[str, Any]:
+        return self.get_json(f"{PRODUCT_PATH}/{product_code}.json")
+
+    def close(self):
+        self.session.close()
+
+
+# Süreç başına bir istemci; ilk kullanımda oluşturulur (fork'tan sonra, her worker kendi havuzunu açar)
+_client: Dict[str, Optional[OpenFoodFactsClient]] = {'client': None}
+_client_lock = threading.Lock()
+
+
+def get_openfoodfacts_client() -> OpenFoodFactsClient:
+    """Süreç içinde paylaşılan OpenFoodFacts istemcisi (ayarlar settings.OPENFOODFACTS_* ile değiştirilebilir)"""
+    if _client['client'] is None:
+        with _client_lock:
+            if _client['client'] is None:
+                _client['client'] = OpenFoodFactsClient(
+                    base_url=getattr(settings, 'OPENFOODFACTS_API_BASE', DEFAULT_API_BASE),
+                    connect_timeout=getattr(settings, 'OPENFOODFACTS_CONNECT_TIMEOUT', DEFAULT_CONNECT_TIMEOUT),
+                    read_timeout=getattr(settings, 'OPENFOODFACTS_READ_TIMEOUT', DEFAULT_READ_TIMEOUT),
+                    pool_size=getattr(settings, 'OPENFOODFACTS_POOL_SIZE', DEFAULT_POOL_SIZE),
+                    max_retries=getattr(settings, 'OPENFOODFACTS_MAX_RETRIES', DEFAULT_MAX_RETRIES),
+                    breaker=CircuitBreaker(
+                        failure_threshold=getattr(settings, 'OPENFOODFACTS_FAILURE_THRESHOLD', DEFAULT_FAILURE_THRESHOLD),
+                        reset_timeout=getattr(settings, 'OPENFOODFACTS_RESET_TIMEOUT', DEFAULT_RESET_TIMEOUT),
+                    ),
+                )
+    return _client['client']
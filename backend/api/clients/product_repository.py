@@ -0,0 +1,90 @@
+# backend/api/clients/product_repository.py
+
+import logging
+from typing import Any, Dict, Optional
+
+from api.models.product_document import ProductDocument
+
+from .async_openfoodfacts import get_async_openfoodfacts_client
+from .openfoodfacts import OpenFoodFactsClient, get_openfoodfacts_client
+
+logger = logging.getLogger(__name__)
+
+
+class ProductRepository:
+    """
+    Yerel öncelikli ürün kaynağı: belge önce product_documents tablosundan (tek indeksli okuma),
+    bulunamazsa OpenFoodFacts API'den alınır ve sonraki istekler için tabloya yazılır.
+    """
+
+    def __init__(self, client: Optional[OpenFoodFactsClient] = None):
+        self._client = client
+
+    @property
+    def client(self) -> OpenFoodFactsClient:
+        return self._client or get_openfoodfacts_client()
+
+    def get_local(self, product_code: str) -> Optional[Dict[str, Any]]:
+        return ProductDocument.objects.filter(product_code=product_code).values_list('document', flat=True).first()
+
+    def get(self, product_code: str) -> Optional[Dict[str, Any]]:
+        """
+        Ürün belgesi; ne yerelde ne API'de varsa None.
+        API hataları (requests.RequestException) çağırana iletilir.
+        """
+        document = self.get_local(product_code)
+        if document is not None:
+            return document
+
+        data = self.client.get_product(product_code)
+        if data.get('status') != 1 or not data.get('product'):
+            return None
+
+        document = data['product']
+        self._write_back(product_code, document)
+        return document
+
+    def _write_back(self, product_code: str, document: Dict[str, Any]):
+        """API'den gelen belgeyi sakla - yazılamazsa istek yine de belgeyle yanıtlanır"""
+        try:
+            ProductDocument.objects.update_or_create(
+                product_code=product_code,
+                defaults={'document': document, 'source': ProductDocument.SOURCE_API},
+            )
+        except Exception as e:
+            logger.warning(f"Ürün belgesi kaydedilemedi ({product_code}): {e}")
+
+    # Async view'lar için aynı akış: API isteği event loop'u bloklamaz (api/clients/async_openfoodfacts.py)
+
+    async def aget_local(self, product_code: str) -> Optional[Dict[str, Any]]:
+        return await ProductDocument.objects.filter(product_code=product_code).values_list('document', flat=True).afirst()
+
+    async def aget(self, product_code: str) -> Optional[Dict[str, Any]]:
+        document = await self.aget_local(product_code)
+        if document is not None:
+            return document
+
+        data = await get_async_openfoodfacts_client().get_product(product_code)
+        if data.get('status') != 1 or not data.get('product'):
+            return None
+
+        document = data['product']
+        await self._awrite_back(product_code, document)
+        return document
+
+    async def _awrite_back(self, product_code: str, document: Dict[str, Any]):
+        try:
+            await ProductDocument.objects.aupdate_or_create(
+                product_code=product_code,
+                defaults={'document': document, 'source': ProductDocument.SOURCE_API},
+            )
+        except Exception as e:
+            logger.warning(f"Ürün belgesi kaydedilemedi ({product_code}): {e}")
+
+
+# Süreç başına bir repository (API istemcisi de süreç başına paylaşılır)
+_repository = ProductRepository()
+
+
+def get_product_repository() -> ProductRepository:
+    return _repository
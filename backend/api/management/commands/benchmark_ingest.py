@@ -0,0 +1,269 @@
+# management/commands/benchmark_ingest.py
+from django.core.management.base import BaseCommand, CommandError
+import multiprocessing
+import os
+import queue
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+try:
+    import resource  # Sadece Unix
+except ImportError:
+    resource = None
+
+
+def _generate_synthetic_dump(file_path: str, rows: int, extra_columns: int, seed: int = 42,
+                             chunk_rows: int = 100000):
+    """OpenFoodFacts benzeri sentetik TSV dump üret (parça parça yazılır)"""
+    from aimodels.ml_models.data_preprocessing import OpenFoodFactsPreprocessor
+
+    preprocessor = OpenFoodFactsPreprocessor()
+    rng = np.random.default_rng(seed)
+
+    columns = ['url', 'creator', 'created_t'] + preprocessor.all_required_columns + [
+        f'extra_field_{i}' for i in range(extra_columns)
+    ]
+    vocabulary = np.array([
+        'milk', 'wheat flour', 'sugar', 'eggs', 'soya lecithin', 'peanuts', 'hazelnuts',
+        'sesame', 'salt', 'water', 'fish', 'süt', 'buğday', 'fındık', 'café', 'crème', 'naïve',
+        'en:milk', 'en:gluten', 'E330', 'E471', 'palm oil', 'cocoa butter', 'Ürün', 'ÇİLEK',
+        'ﬁbre', '½ cup', 'bio\u00a0', 'x\ufffd', 'ding\x07'
+    ])
+
+    written = 0
+    first = True
+    while written < rows:
+        n = min(chunk_rows, rows - written)
+        data = {}
+        for col in columns:
+            if col == 'code':
+                data[col] = np.char.zfill(np.arange(written, written + n).astype(str), 13)
+            elif preprocessor.is_numeric_column(col):
+                upper = 3000.0 if col == 'energy_100g' else 120.0
+                values = np.round(rng.uniform(-1.0, upper, n), 3)
+                if col == 'additives_n':
+                    values = rng.integers(0, 10, n).astype(float)
+                values[rng.random(n) < 0.4] = np.nan
+                data[col] = values
+            else:
+                # Gerçek dump'taki gibi yüksek kardinalite: her hücreye satıra özgü rastgele bir belirteç eklenir,
+                # böylece okuyucu aynı birkaç string nesnesini tekrar kullanamaz ve bellek ölçümü anlamlı olur
+                words = vocabulary[rng.integers(0, len(vocabulary), (n, 3))]
+                tokens = np.char.mod('%011x', rng.integers(0, 2 ** 44, n))
+                text = np.char.add(np.char.add(words[:, 0], ', '), np.char.add(words[:, 1], ', '))
+                text = np.char.add(np.char.add(text, words[:, 2]), np.char.add(' ', tokens)).astype(object)
+                text[rng.random(n) < 0.3] = None
+                data[col] = text
+        pd.DataFrame(data, columns=columns).to_csv(
+            file_path, sep='\t', index=False, mode='w' if first else 'a', header=first, encoding='utf-8'
+        )
+        written += n
+        first = False
+
+
+# Ölçüm süreci sonucu bu aralıklarla beklenir; arada sürecin hâlâ çalıştığı kontrol edilir
+RESULT_POLL_SECONDS = 5
+
+
+def _measure_reader(reader_name: str, file_path: str, result_queue):
+    """
+    Okuyucuyu temiz bir süreçte çalıştır: süre ve tepe RSS artışı (ru_maxrss). tracemalloc kullanılmaz -
+    pandas'ın C ayrıştırıcısının tamponlarını ve string'lerini görmediği için okuyucular arasında ters sonuç verir.
+    """
+    import logging
+    from aimodels.ml_models.data_preprocessing import OpenFoodFactsPreprocessor
+
+    logging.disable(logging.WARNING)
+    preprocessor = OpenFoodFactsPreprocessor()
+    reader = preprocessor.load_tsv if reader_name == 'legacy' else preprocessor.load_tsv_projected
+
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss if resource else None
+    start = time.perf_counter()
+
+    df = reader(file_path)
+
+    duration = time.perf_counter() - start
+    rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss if resource else None
+
+    result_queue.put({
+        'reader': reader_name,
+        'seconds': duration,
+        'rows': len(df),
+        'columns': len(df.columns),
+        'frame_mb': df.memory_usage(deep=True).sum() / 1024 / 1024,
+        # ru_maxrss Linux'ta KB cinsinden
+        'rss_peak_delta_mb': (rss_after - rss_before) / 1024 if resource else None,
+    })
+
+
+def _run_measurement(reader_name: str, file_path: str) -> dict:
+    """
+    Ölçümü temiz bir süreçte çalıştır ve sonucunu bekle.
+    Süreç sonuç vermeden ölürse (ör. pandas yolunda bellek yetmezliği) CommandError - sonsuza kadar beklenmez.
+    """
+    result_queue = multiprocessing.Queue()
+    process = multiprocessing.Process(target=_measure_reader, args=(reader_name, file_path, result_queue))
+    process.start()
+    try:
+        while True:
+            try:
+                return result_queue.get(timeout=RESULT_POLL_SECONDS)
+            except queue.Empty:
+                if process.is_alive():
+                    continue
+            # Süreç bitti: sonucu çıkmadan hemen önce yazmış olabilir
+            try:
+                return result_queue.get(timeout=1)
+            except queue.Empty:
+                raise CommandError(
+                    f'{reader_name} okuyucu ölçümü sonuç vermeden sonlandı '
+                    f'(çıkış kodu: {process.exitcode}; negatif ise sinyal, ör. -9 bellek yetmezliği)'
+                )
+    finally:
+        process.join(timeout=RESULT_POLL_SECONDS)
+        if process.is_alive():
+            process.terminate()
+            process.join()
+
+
+def _measure_unicode_cleaning(file_path: str) -> dict:
+    """Hücre bazlı (apply) ve vektörel Unicode temizliğini aynı önişlenmiş veri üzerinde karşılaştır"""
+    import logging
+    from aimodels.ml_models.data_preprocessing import OpenFoodFactsPreprocessor
+    from api.pipeline.product_data_pipeline import ProductDataPipeline
+
+    logging.disable(logging.WARNING)
+    df = OpenFoodFactsPreprocessor().preprocess(file_path)
+    pipeline = ProductDataPipeline()
+
+    start = time.perf_counter()
+    legacy = pipeline._clean_dataframe_unicode_rows(df.copy())
+    legacy_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    vectorized = pipeline._clean_dataframe_unicode(df.copy())
+    vectorized_seconds = time.perf_counter() - start
+
+    # Eşitlik: kaydedilen özellikler aynı olmalı
+    legacy_features = pipeline._apply_feature_extraction(pipeline._clean_null_values(legacy))
+    vectorized_features = pipeline._apply_feature_extraction(pipeline._clean_null_values(vectorized))
+    equal = legacy_features.astype(str).equals(vectorized_features.astype(str))
+
+    return {
+        'rows': len(df),
+        'legacy_seconds': legacy_seconds,
+        'vectorized_seconds': vectorized_seconds,
+        'features_equal': equal,
+    }
+
+
+class Command(BaseCommand):
+    help = 'Ham TSV okuyucularını ve Unicode temizliğini sentetik OpenFoodFacts dump üzerinde karşılaştır'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rows',
+            type=int,
+            default=1000000,
+            help='Sentetik dump satır sayısı (varsayılan: 1.000.000)'
+        )
+
+        parser.add_argument(
+            '--extra-columns',
+            type=int,
+            default=110,
+            help='Gerekli sütunlara ek doldurma sütunu sayısı (varsayılan: 110, toplam ~160 sütun)'
+        )
+
+        parser.add_argument(
+            '--input-file',
+            type=str,
+            default=None,
+            help='Sentetik dump yerine mevcut bir TSV dosyası kullan'
+        )
+
+        parser.add_argument(
+            '--keep-file',
+            action='store_true',
+            default=False,
+            help='Üretilen sentetik dump dosyasını silme'
+        )
+
+        parser.add_argument(
+            '--stage',
+            choices=['readers', 'unicode', 'all'],
+            default='readers',
+            help='Ölçülecek aşama: readers (TSV okuma), unicode (Unicode temizliği) veya all (varsayılan: readers)'
+        )
+
+    def handle(self, *args, **options):
+        input_file = options['input_file']
+        generated = False
+
+        if input_file:
+            if not os.path.exists(input_file):
+                raise CommandError(f'Dosya bulunamadı: {input_file}')
+        else:
+            fd, input_file = tempfile.mkstemp(suffix='.tsv', prefix='off_benchmark_')
+            os.close(fd)
+            generated = True
+            self.stdout.write(f'Sentetik dump üretiliyor: {options["rows"]:,} satır -> {input_file}')
+            start = time.perf_counter()
+            _generate_synthetic_dump(input_file, options['rows'], options['extra_columns'])
+            self.stdout.write(f'Üretildi ({time.perf_counter() - start:.1f} sn, '
+                              f'{os.path.getsize(input_file) / 1024 / 1024:.1f} MB)')
+
+        try:
+            if options['stage'] in ['readers', 'all']:
+                self._benchmark_readers(input_file)
+            if options['stage'] in ['unicode', 'all']:
+                self._benchmark_unicode_cleaning(input_file)
+        finally:
+            if generated and not options['keep_file']:
+                os.remove(input_file)
+
+    def _benchmark_readers(self, input_file: str):
+        """
+        Her okuyucu ayrı bir temiz süreçte ölçülür. Bellek oranı tepe RSS artışından hesaplanır;
+        resource modülü yoksa (Windows) DataFrame boyutları karşılaştırılır.
+        """
+        results = [_run_measurement(reader_name, input_file) for reader_name in ['legacy', 'projected']]
+
+        self.stdout.write('\n' + '=' * 70)
+        self.stdout.write(self.style.SUCCESS('TSV OKUYUCU KARŞILAŞTIRMASI'))
+        self.stdout.write('=' * 70)
+        for result in results:
+            rss = f'{result["rss_peak_delta_mb"]:.1f} MB' if result['rss_peak_delta_mb'] is not None else 'n/a'
+            self.stdout.write(
+                f'{result["reader"]:<10} süre: {result["seconds"]:.2f} sn | '
+                f'satır×sütun: {result["rows"]:,}×{result["columns"]} | '
+                f'DataFrame: {result["frame_mb"]:.1f} MB | tepe RSS artışı: {rss}'
+            )
+
+        legacy, projected = results
+        if projected['seconds'] > 0:
+            self.stdout.write(f'\n⚡ Hızlanma: {legacy["seconds"] / projected["seconds"]:.2f}x')
+        if legacy['rss_peak_delta_mb'] is not None and projected['rss_peak_delta_mb'] > 0:
+            self.stdout.write(f'💾 Tepe bellek (RSS) oranı: {legacy["rss_peak_delta_mb"] / projected["rss_peak_delta_mb"]:.2f}x')
+        if projected['frame_mb'] > 0:
+            self.stdout.write(f'📦 DataFrame boyutu oranı: {legacy["frame_mb"] / projected["frame_mb"]:.2f}x')
+
+    def _benchmark_unicode_cleaning(self, input_file: str):
+        """Unicode temizliğini ölç ve özellik çıktısının değişmediğini doğrula"""
+        result = _measure_unicode_cleaning(input_file)
+
+        self.stdout.write('\n' + '=' * 70)
+        self.stdout.write(self.style.SUCCESS('UNICODE TEMİZLİĞİ KARŞILAŞTIRMASI'))
+        self.stdout.write('=' * 70)
+        self.stdout.write(f'Satır: {result["rows"]:,}')
+        self.stdout.write(f'{"legacy":<10} süre: {result["legacy_seconds"]:.2f} sn (tüm metin sütunları, hücre bazlı)')
+        self.stdout.write(f'{"vectorized":<10} süre: {result["vectorized_seconds"]:.2f} sn (kaydedilen sütunlar, .str)')
+        if result['vectorized_seconds'] > 0:
+            self.stdout.write(f'\n⚡ Hızlanma: {result["legacy_seconds"] / result["vectorized_seconds"]:.2f}x')
+        if result['features_equal']:
+            self.stdout.write(self.style.SUCCESS('✅ Özellik çıktısı aynı'))
+        else:
+            self.stdout.write(self.style.ERROR('❌ Özellik çıktısı farklı'))
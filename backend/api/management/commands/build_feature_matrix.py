@@ -0,0 +1,30 @@
+# management/commands/build_feature_matrix.py
+from django.core.management.base import BaseCommand, CommandError
+
+from api.pipeline.feature_matrix import DEFAULT_MATRIX_DIR, build_feature_matrix
+
+
+class Command(BaseCommand):
+    help = 'ProductFeatures tablosundan bellek eşlemeli (.npy) ürün özellik matrisini oluştur'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--output-dir',
+            type=str,
+            default=DEFAULT_MATRIX_DIR,
+            help=f'Matris dosyalarının yazılacağı dizin (varsayılan: {DEFAULT_MATRIX_DIR})'
+        )
+
+    def handle(self, *args, **options):
+        output_dir = options['output_dir']
+        self.stdout.write(f'Özellik matrisi oluşturuluyor -> {output_dir}')
+
+        try:
+            info = build_feature_matrix(output_dir)
+        except Exception as e:
+            raise CommandError(f'Özellik matrisi oluşturulamadı: {e}')
+
+        self.stdout.write(f'Ürün Sayısı: {info["rows"]:,}')
+        self.stdout.write(f'Sütunlar: {", ".join(info["columns"])}')
+        self.stdout.write(f'Süre: {info["seconds"]:.2f} sn')
+        self.stdout.write(self.style.SUCCESS('Özellik matrisi hazır.'))
@@ -0,0 +1,48 @@
+# management/commands/build_similarity_graph.py
+from django.core.management.base import BaseCommand, CommandError
+
+from api.pipeline.similarity_graph import DEFAULT_BLOCK_SIZE, DEFAULT_TOP_K, build_similarity_graph
+
+
+class Command(BaseCommand):
+    help = 'Her ürün için kategori içi en benzer K ürünü hesaplayıp ProductSimilarity tablosunu yeniden oluştur'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--top-k',
+            type=int,
+            default=DEFAULT_TOP_K,
+            help=f'Ürün başına saklanacak komşu sayısı (varsayılan: {DEFAULT_TOP_K})'
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=1,
+            help='Benzerlik hesaplayan süreç sayısı (varsayılan: 1)'
+        )
+        parser.add_argument(
+            '--block-size',
+            type=int,
+            default=DEFAULT_BLOCK_SIZE,
+            help=f'Matris çarpımı blok boyutu (varsayılan: {DEFAULT_BLOCK_SIZE})'
+        )
+
+    def handle(self, *args, **options):
+        top_k = options['top_k']
+        workers = options['workers']
+        block_size = options['block_size']
+
+        if top_k < 1 or workers < 1 or block_size < 1:
+            raise CommandError('--top-k, --workers ve --block-size en az 1 olmalı')
+
+        self.stdout.write(f'Benzerlik grafiği oluşturuluyor (top_k={top_k}, {workers} worker)...')
+        try:
+            summary = build_similarity_graph(top_k=top_k, workers=workers, block_size=block_size)
+        except Exception as e:
+            raise CommandError(f'Benzerlik grafiği oluşturulamadı: {e}')
+
+        self.stdout.write(f'Ürün Sayısı: {summary["products"]:,}')
+        self.stdout.write(f'Kategori Sayısı: {summary["categories"]:,}')
+        self.stdout.write(f'Benzerlik Kaydı: {summary["edges"]:,}')
+        self.stdout.write(f'Süre: {summary["seconds"]:.2f} sn')
+        self.stdout.write(self.style.SUCCESS('ProductSimilarity tablosu güncellendi.'))
@@ -10,6 +10,9 @@ from api.pipeline.product_data_pipeline import (
     process_raw_tsv,
     ProductDataPipeline  #  Pipeline sınıfını da import et
 )
+from api.pipeline.parallel_ingest import run_parallel_pipeline
+from api.pipeline.columnar_store import snapshot_writer
+from api.pipeline.feature_matrix import build_feature_matrix
 from api.models.product_features import ProductFeatures, ProductSimilarity
 import os
 import time
@@ -30,9 +33,9 @@ class Command(BaseCommand):
         parser.add_argument(
             '--file-type',
             type=str,
-            choices=['raw_tsv', 'processed_csv', 'processed_tsv', 'processed_parquet'],
+            choices=['raw_tsv', 'processed_csv', 'processed_tsv', 'processed_parquet', 'features_parquet'],
             default='raw_tsv',
-            help='Dosya türü (varsayılan: raw_tsv)'
+            help='Dosya türü (varsayılan: raw_tsv); features_parquet: --features-output-path ile yazılmış özellik snapshot\'ı'
         )
         
         # Temel parametreler
@@ -50,6 +53,56 @@ class Command(BaseCommand):
             help='Batch boyutu (varsayılan: 1000)'
         )
         
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=None,
+            help='Ham TSV\'yi bu kadar satırlık parçalar halinde streaming işle (sadece raw_tsv için, bellek sınırlı; --workers > 1 ile kullanılamaz)'
+        )
+        
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=1,
+            help='Ham TSV\'yi byte aralıklarına bölüp bu kadar süreçte paralel işle (sadece raw_tsv için, varsayılan: 1)'
+        )
+        
+        parser.add_argument(
+            '--db-writers',
+            type=int,
+            default=None,
+            help='Paralel modda veritabanına yazan süreç sayısı (varsayılan: workers/4, en az 1)'
+        )
+        
+        parser.add_argument(
+            '--loader',
+            type=str,
+            choices=['orm', 'copy'],
+            default='orm',
+            help='Veritabanı yükleyici: orm (bulk_create) veya copy (PostgreSQL COPY + ON CONFLICT, varsayılan: orm)'
+        )
+        
+        parser.add_argument(
+            '--upsert',
+            action='store_true',
+            default=False,
+            help='Mevcut ürünleri güncelle (içerik özeti değişmeyen ürünler atlanır); varsayılan: mevcutlar korunur'
+        )
+        
+        parser.add_argument(
+            '--checkpoint',
+            action='store_true',
+            default=False,
+            help='Her commit edilen batch sonrası dosya için checkpoint kaydet (sadece raw_tsv, baştan başlar)'
+        )
+        
+        parser.add_argument(
+            '--resume',
+            action='store_true',
+            default=False,
+            help='Dosyanın kayıtlı checkpoint\'inden devam et (checkpoint yoksa veya dosya değiştiyse baştan başlar)'
+        )
+        
         # Veri yönetimi seçenekleri
         parser.add_argument(
             '--clear-existing',
@@ -69,7 +122,22 @@ class Command(BaseCommand):
             '--processed-output-path',
             type=str,
             default=None,
-            help='Önişlenmiş verinin kaydedileceği yol (save-processed ile birlikte)'
+            help='Önişlenmiş verinin kaydedileceği yol (save-processed ile birlikte); .parquet ile biterse '
+                 'main_category\'ye göre bölümlenmiş Parquet snapshot dizini yazılır'
+        )
+        
+        parser.add_argument(
+            '--features-output-path',
+            type=str,
+            default=None,
+            help='Çıkarılan özellikleri bu dizine bölümlenmiş Parquet snapshot olarak da kaydet (.parquet)'
+        )
+        
+        parser.add_argument(
+            '--skip-feature-matrix',
+            action='store_true',
+            default=False,
+            help='Pipeline sonrasında ürün özellik matrisini (models/feature_matrix) yeniden oluşturma'
         )
         
         # Sadece rapor
@@ -85,10 +153,19 @@ class Command(BaseCommand):
         file_type = options['file_type']
         sample_size = options['sample_size']
         batch_size = options['batch_size']  #  Batch size'ı al
+        chunk_size = options['chunk_size']
+        workers = options['workers']
+        db_writers = options['db_writers']
+        loader = options['loader']
+        upsert = options['upsert']
+        # None: checkpoint yok, False: checkpoint'li baştan, True: checkpoint'ten devam
+        resume = True if options['resume'] else (False if options['checkpoint'] else None)
         clear_existing = options['clear_existing']
         save_processed = options['save_processed']
         processed_output_path = options['processed_output_path']
+        features_output_path = options['features_output_path']
         only_quality_report = options['only_quality_report']
+        skip_feature_matrix = options['skip_feature_matrix']
         
         # Sadece kalite raporu isteniyor
         if only_quality_report:
@@ -106,12 +183,27 @@ class Command(BaseCommand):
         self.stdout.write(f'Giriş Dosyası: {input_file}')
         self.stdout.write(f'Dosya Türü: {file_type}')
         self.stdout.write(f'Batch Boyutu: {batch_size}')
+        self.stdout.write(f'Yükleyici: {loader}')
+        self.stdout.write(f'Yazma Modu: {"upsert" if upsert else "sadece yeni ürünler"}')
         
         if file_type == 'raw_tsv':
             self.stdout.write(f'Örnek Boyutu: {sample_size or "Tümü"}')
+            self.stdout.write(f'Parça Boyutu: {chunk_size or "Yok (tüm dosya bellekte)"}')
+            self.stdout.write(f'Worker Sayısı: {workers}')
             self.stdout.write(f'Önişlenmiş Veriyi Kaydet: {"Evet" if save_processed else "Hayır"}')
+            self.stdout.write(f'Checkpoint: {"devam et" if resume else ("baştan" if resume is False else "Yok")}')
         
         # Mevcut verileri temizle
+        if workers < 1:
+            raise CommandError('--workers en az 1 olmalı')
+
+        # Paralel modda bellek byte aralığı boyutuyla sınırlanır; --chunk-size orada uygulanmaz
+        if file_type == 'raw_tsv' and workers > 1 and chunk_size and not (sample_size or save_processed or features_output_path):
+            raise CommandError('--chunk-size ile --workers > 1 birlikte kullanılamaz (paralel mod dosyayı byte aralıklarına böler)')
+
+        if resume and clear_existing:
+            raise CommandError('--resume ile --clear-existing birlikte kullanılamaz')
+        
         if clear_existing:
             self.stdout.write('Mevcut veriler temizleniyor...')
             self._clear_existing_data()
@@ -123,10 +215,15 @@ class Command(BaseCommand):
             # Dosya türüne göre uygun pipeline'ı çalıştır
             if file_type == 'raw_tsv':
                 results = self._process_raw_tsv(
-                    input_file, sample_size, save_processed, processed_output_path, batch_size  #  batch_size ekle
+                    input_file, sample_size, save_processed, processed_output_path, batch_size,  #  batch_size ekle
+                    chunk_size, workers, db_writers, loader, upsert, resume, features_output_path
                 )
             elif file_type in ['processed_csv', 'processed_tsv', 'processed_parquet']:
-                results = self._process_preprocessed_file(input_file, batch_size)  #  batch_size ekle
+                results = self._process_preprocessed_file(
+                    input_file, batch_size, loader, upsert, features_output_path
+                )  #  batch_size ekle
+            elif file_type == 'features_parquet':
+                results = self._process_features_snapshot(input_file, batch_size, loader, upsert)
             else:
                 raise CommandError(f'Desteklenmeyen dosya türü: {file_type}')
             
@@ -137,6 +234,15 @@ class Command(BaseCommand):
             if results.get('total_processed', 0) > 0:
                 self._generate_and_display_quality_report()
             
+            # Servislerin okuduğu özellik matrisini yeni verilerle güncelle
+            if not skip_feature_matrix and results.get('total_processed', 0) > 0:
+                self._rebuild_feature_matrix()
+            
+            # Yazılamayan aralıklar varsa komut başarısız sayılır (checkpoint son temiz aralıkta kalır)
+            if results.get('failed_ranges'):
+                hint = ' --resume ile kaldığı yerden tekrar deneyin' if 'checkpoint' in results else ''
+                raise CommandError(f'{results["failed_ranges"]} byte aralığı işlenemedi veya tam kaydedilemedi.{hint}')
+            
         except Exception as e:
             self.stdout.write(
                 self.style.ERROR(f'Pipeline hatası: {str(e)}')
@@ -159,35 +265,80 @@ class Command(BaseCommand):
             self.stdout.write(
                 self.style.WARNING(f'Uyarı: {file_type} için {file_extension} uzantısı beklenmedik')
             )
-        elif file_type == 'processed_parquet' and file_extension != '.parquet':
+        elif file_type in ['processed_parquet', 'features_parquet'] and file_extension != '.parquet':
             self.stdout.write(
                 self.style.WARNING(f'Uyarı: {file_type} için {file_extension} uzantısı beklenmedik')
             )
     
-    def _process_raw_tsv(self, tsv_path: str, sample_size: int, save_processed: bool, output_path: str, batch_size: int):
+    def _process_raw_tsv(self, tsv_path: str, sample_size: int, save_processed: bool, output_path: str, batch_size: int,
+                         chunk_size: int = None, workers: int = 1, db_writers: int = None, loader: str = 'orm',
+                         upsert: bool = False, resume: bool = None, features_output_path: str = None):
         """Ham TSV dosyasını işle"""
         self.stdout.write('Ham TSV dosyası işleniyor (preprocessing + feature extraction + database save)...')
         
+        if resume is not None and (sample_size or save_processed or chunk_size or features_output_path):
+            self.stdout.write(
+                self.style.WARNING('Uyarı: --sample-size/--save-processed/--chunk-size/--features-output-path checkpoint ile desteklenmiyor, checkpoint kapatıldı')
+            )
+            resume = None
+        
+        if workers > 1:
+            if sample_size or save_processed or features_output_path:
+                self.stdout.write(
+                    self.style.WARNING('Uyarı: --sample-size/--save-processed/--features-output-path paralel modda desteklenmiyor, tek süreçle devam ediliyor')
+                )
+            else:
+                self.stdout.write(f'Paralel mod: {workers} worker')
+                return run_parallel_pipeline(
+                    raw_tsv_path=tsv_path,
+                    workers=workers,
+                    db_writers=db_writers,
+                    batch_size=batch_size,
+                    loader=loader,
+                    upsert=upsert,
+                    resume=resume
+                )
+        
+        if resume is not None:
+            self.stdout.write('Checkpoint\'li mod: dosya byte aralıkları halinde işleniyor')
+            pipeline = ProductDataPipeline(batch_size=batch_size, loader=loader, upsert=upsert)
+            return pipeline.process_raw_tsv_checkpointed(tsv_path, resume=resume)
+        
         #  Özel pipeline fonksiyonu - batch_size desteği ile
         return self._run_full_pipeline_with_batch_size(
             raw_tsv_path=tsv_path,
             sample_size=sample_size,
             save_processed=save_processed,
             processed_output_path=output_path,
-            batch_size=batch_size
+            batch_size=batch_size,
+            chunk_size=chunk_size,
+            loader=loader,
+            upsert=upsert,
+            features_output_path=features_output_path
         )
     
-    def _process_preprocessed_file(self, file_path: str, batch_size: int):
+    def _process_preprocessed_file(self, file_path: str, batch_size: int, loader: str = 'orm', upsert: bool = False,
+                                   features_output_path: str = None):
         """Önişlenmiş dosyayı işle"""
         self.stdout.write('Önişlenmiş dosya işleniyor (feature extraction + database save)...')
         
         #  Pipeline'ı batch_size ile oluştur
-        pipeline = ProductDataPipeline(batch_size=batch_size)
+        pipeline = ProductDataPipeline(
+            batch_size=batch_size, loader=loader, upsert=upsert, features_output_path=features_output_path
+        )
         return pipeline.process_from_file(file_path)
     
+    def _process_features_snapshot(self, snapshot_path: str, batch_size: int, loader: str = 'orm', upsert: bool = False):
+        """Özellik snapshot'ını doğrudan veritabanına yükle"""
+        self.stdout.write('Özellik snapshot\'ı yükleniyor (database save)...')
+        
+        pipeline = ProductDataPipeline(batch_size=batch_size, loader=loader, upsert=upsert)
+        return pipeline.process_features_snapshot(snapshot_path)
+    
     def _run_full_pipeline_with_batch_size(self, raw_tsv_path: str, sample_size: int = None, 
                                          save_processed: bool = True, processed_output_path: str = None,
-                                         batch_size: int = 1000):
+                                         batch_size: int = 1000, chunk_size: int = None, loader: str = 'orm',
+                                         upsert: bool = False, features_output_path: str = None):
         """Full pipeline'ı batch_size desteği ile çalıştır"""
         from aimodels.ml_models.data_preprocessing import OpenFoodFactsPreprocessor
         
@@ -196,17 +347,40 @@ class Command(BaseCommand):
         # 1. Preprocessor ile veriyi hazırla
         self.stdout.write("1. Veri önişleme başlatılıyor...")
         preprocessor = OpenFoodFactsPreprocessor()
+        # '.parquet' yolu snapshot olarak yazılır (bkz. columnar_store.snapshot_writer), diğerleri CSV
+        output_path = processed_output_path if save_processed else None
+        
+        if chunk_size:
+            # Streaming mod: her parça önişlenip hemen kaydedilir
+            chunks = preprocessor.preprocess_chunked(
+                file_path=raw_tsv_path,
+                output_path=output_path,
+                writer=snapshot_writer(output_path),
+                sample_size=sample_size,
+                chunksize=chunk_size
+            )
+            self.stdout.write("2. Feature extraction ve veritabanı kaydı (streaming) başlatılıyor...")
+            pipeline = ProductDataPipeline(
+                batch_size=batch_size, loader=loader, upsert=upsert, features_output_path=features_output_path
+            )
+            pipeline_result = pipeline.process_preprocessed_chunks(chunks)
+            
+            self.stdout.write("Full pipeline tamamlandı!")
+            return pipeline_result
         
         # Geçici dosya oluşturmadan direkt DataFrame'i al
         df_preprocessed = preprocessor.preprocess(
             file_path=raw_tsv_path,
-            output_path=processed_output_path if save_processed else None,
+            output_path=output_path,
+            writer=snapshot_writer(output_path),
             sample_size=sample_size
         )
         
         # 2. Pipeline ile feature extraction ve kaydetme - batch_size ile
         self.stdout.write("2. Feature extraction ve veritabanı kaydı başlatılıyor...")
-        pipeline = ProductDataPipeline(batch_size=batch_size)  #  batch_size ile oluştur
+        pipeline = ProductDataPipeline(
+            batch_size=batch_size, loader=loader, upsert=upsert, features_output_path=features_output_path
+        )  #  batch_size ile oluştur
         pipeline_result = pipeline.process_preprocessed_data(df_preprocessed)
         
         self.stdout.write("Full pipeline tamamlandı!")
@@ -247,6 +421,20 @@ class Command(BaseCommand):
                 self.style.ERROR(f'❌ Veri temizleme hatası: {str(e)}')
             )
     
+    def _rebuild_feature_matrix(self):
+        """Ürün özellik matrisini yeniden oluştur - hata pipeline sonucunu etkilemez"""
+        self.stdout.write('Ürün özellik matrisi yeniden oluşturuluyor...')
+        try:
+            info = build_feature_matrix()
+            self.stdout.write(
+                self.style.SUCCESS(f'🧮 Özellik Matrisi: {info["rows"]:,} ürün × {len(info["columns"])} sütun '
+                                   f'({info["seconds"]:.1f} sn) -> {info["directory"]}')
+            )
+        except Exception as e:
+            self.stdout.write(
+                self.style.WARNING(f'Özellik matrisi oluşturulamadı (servisler model alanlarını kullanacak): {e}')
+            )
+    
     def _display_results(self, results: dict, start_time: float):
         """Pipeline sonuçlarını göster"""
         duration = time.time() - start_time
@@ -260,12 +448,30 @@ class Command(BaseCommand):
         self.stdout.write(f'✅ İşlenen Ürün: {results.get("total_processed", 0):,}')
         self.stdout.write(f'❌ Hatalı Ürün: {results.get("total_errors", 0):,}')
         self.stdout.write(f'📊 Başarı Oranı: %{results.get("success_rate", 0):.2f}')
+        if results.get('failed_ranges'):
+            self.stdout.write(self.style.ERROR(f'⚠️  Hatalı Byte Aralığı: {results["failed_ranges"]:,}'))
         
         # Veri şekli bilgisi
         if 'final_data_shape' in results:
             shape = results['final_data_shape']
             self.stdout.write(f'📋 İşlenen Veri: {shape[0]:,} satır × {shape[1]} sütun')
         
+        # Upsert istatistikleri
+        if 'upsert_stats' in results:
+            upsert_stats = results['upsert_stats']
+            self.stdout.write(
+                f'🔄 Upsert: {upsert_stats["inserted"]:,} yeni, {upsert_stats["updated"]:,} güncellenen, '
+                f'{upsert_stats["unchanged"]:,} değişmeyen (atlandı)'
+            )
+        
+        # Checkpoint bilgisi
+        if 'checkpoint' in results:
+            checkpoint = results['checkpoint']
+            self.stdout.write(
+                f'📍 Checkpoint: byte {checkpoint["byte_offset"]:,}, batch {checkpoint["batch_number"]}, '
+                f'{"tamamlandı" if checkpoint["completed"] else "devam edilebilir (--resume)"}'
+            )
+        
         # Database istatistikleri
         self._display_database_stats()
         
@@ -279,7 +485,8 @@ class Command(BaseCommand):
         self._save_summary_json(results, duration)
         
         self.stdout.write('\n' + '='*70)
-        self.stdout.write(self.style.SUCCESS('Pipeline başarıyla tamamlandı! 🚀'))
+        if not results.get('failed_ranges'):
+            self.stdout.write(self.style.SUCCESS('Pipeline başarıyla tamamlandı! 🚀'))
     
     def _display_database_stats(self):
         """Veritabanı istatistiklerini göster"""
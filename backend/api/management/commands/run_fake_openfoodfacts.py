@@ -0,0 +1,87 @@
+# management/commands/run_fake_openfoodfacts.py
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.clients.fake_openfoodfacts import FakeOpenFoodFactsServer
+from api.models.product_features import ProductFeatures
+from api.pipeline.product_documents import document_from_features
+
+
+class Command(BaseCommand):
+    help = ('Yerel sahte OpenFoodFacts sunucusu başlat (settings.OPENFOODFACTS_API_BASE bu adrese '
+            'yönlendirilerek arama/ürün uç noktaları internete çıkmadan denenebilir)')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--products',
+            type=str,
+            help='Ürün belgeleri: JSON listesi, {"products": [...]} veya satır başına bir ürün (JSONL). '
+                 'Verilmezse ProductFeatures tablosundan oluşturulur'
+        )
+        parser.add_argument(
+            '--limit',
+            type=int,
+            default=5000,
+            help='Veritabanından alınacak en fazla ürün (varsayılan: 5000)'
+        )
+        parser.add_argument('--host', type=str, default='127.0.0.1', help='Dinlenecek adres (varsayılan: 127.0.0.1)')
+        parser.add_argument('--port', type=int, default=8765, help='Dinlenecek port (varsayılan: 8765)')
+        parser.add_argument(
+            '--latency',
+            type=float,
+            default=0.0,
+            help='Her yanıttan önce beklenecek süre, sn (yavaş upstream için)'
+        )
+        parser.add_argument(
+            '--failure-rate',
+            type=float,
+            default=0.0,
+            help='Hata dönen isteklerin oranı, 0-1 (tekrar deneme ve devre kesici için)'
+        )
+        parser.add_argument(
+            '--fail-status',
+            type=int,
+            default=503,
+            help='Hata yanıtlarının HTTP durum kodu (varsayılan: 503)'
+        )
+
+    def handle(self, *args, **options):
+        if not 0 <= options['failure_rate'] <= 1:
+            raise CommandError('--failure-rate 0 ile 1 arasında olmalı')
+
+        if options['products']:
+            products = self._load_products(options['products'])
+        else:
+            products = [document_from_features(product) for product in ProductFeatures.objects.all()[:options['limit']]]
+
+        try:
+            server = FakeOpenFoodFactsServer(
+                products,
+                host=options['host'],
+                port=options['port'],
+                latency=options['latency'],
+                failure_rate=options['failure_rate'],
+                fail_status=options['fail_status'],
+            )
+        except OSError as e:
+            raise CommandError(f'Sunucu başlatılamadı: {e}')
+
+        self.stdout.write(f'Ürün Sayısı: {len(server.products):,}')
+        self.stdout.write(self.style.SUCCESS(f'Sahte OpenFoodFacts sunucusu: {server.base_url} (durdurmak için Ctrl+C)'))
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.stop()
+
+    def _load_products(self, path):
+        try:
+            with open(path, encoding='utf-8') as f:
+                if path.endswith('.jsonl'):
+                    return [json.loads(line) for line in f if line.strip()]
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            raise CommandError(f'Ürün dosyası okunamadı: {e}')
+        return data.get('products', []) if isinstance(data, dict) else data
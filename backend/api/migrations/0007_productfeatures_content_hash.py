@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-17 03:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0006_productfeatures_productsimilarity'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='productfeatures',
+            name='content_hash',
+            field=models.CharField(blank=True, default='', help_text="Kaydedilen alanların sha256 özeti (upsert'te değişmeyen ürünler atlanır)", max_length=64),
+        ),
+    ]
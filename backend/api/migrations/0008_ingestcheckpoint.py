@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-17 03:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0007_productfeatures_content_hash'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IngestCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('file_path', models.CharField(help_text='Giriş dosyasının mutlak yolu', max_length=500, unique=True)),
+                ('file_size', models.BigIntegerField()),
+                ('file_mtime', models.FloatField()),
+                ('byte_offset', models.BigIntegerField(default=0, help_text="Son commit edilen batch'in bittiği byte")),
+                ('rows_committed', models.BigIntegerField(default=0, help_text='Commit edilen özellik satırı sayısı')),
+                ('batch_number', models.IntegerField(default=0, help_text='Son commit edilen batch numarası')),
+                ('completed', models.BooleanField(default=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'ingest_checkpoints',
+            },
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-17 04:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0008_ingestcheckpoint'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='productsimilarity',
+            index=models.Index(fields=['product_1', '-overall_similarity'], name='product_sim_p1_overall_idx'),
+        ),
+    ]
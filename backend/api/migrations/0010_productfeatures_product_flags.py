@@ -0,0 +1,88 @@
+# Generated by Django 5.2.18 on 2026-10-17 06:02
+
+from django.db import migrations, models
+
+
+BACKFILL_BATCH_SIZE = 2000
+
+# Bu migration'ın yazdığı bit düzeni (api/pipeline/product_flags.py'nin o anki hali). Migration'lar uygulama
+# kodunu import etmez: modül sonradan değişse de eski veritabanları aynı maskelerle doldurulur.
+ALLERGEN_BITS = {
+    'contains_gluten': 1 << 0,
+    'contains_milk': 1 << 1,
+    'contains_eggs': 1 << 2,
+    'contains_soy': 1 << 3,
+    'contains_nuts': 1 << 4,
+    'contains_peanuts': 1 << 5,
+    'contains_fish': 1 << 6,
+    'contains_shellfish': 1 << 7,
+    'contains_sesame': 1 << 8,
+    'contains_celery': 1 << 9,
+    'contains_mustard': 1 << 10,
+    'contains_sulphites': 1 << 11,
+}
+
+HEALTH_INDICATOR_BITS = {
+    'high_calorie': 1 << 12,
+    'high_fat': 1 << 13,
+    'high_sugar': 1 << 14,
+    'high_salt': 1 << 15,
+    'high_protein': 1 << 16,
+    'high_fiber': 1 << 17,
+}
+
+PROCESSING_LEVEL_BITS = {
+    1: 1 << 18,
+    2: 1 << 19,
+    3: 1 << 20,
+    4: 1 << 21,
+}
+
+
+def compute_product_flags(allergen_vector, health_indicators, processing_level):
+    flags = 0
+    for key, bit in ALLERGEN_BITS.items():
+        if (allergen_vector or {}).get(key, 0) == 1:
+            flags |= bit
+    for key, bit in HEALTH_INDICATOR_BITS.items():
+        if (health_indicators or {}).get(key, 0) == 1:
+            flags |= bit
+    try:
+        flags |= PROCESSING_LEVEL_BITS.get(int(processing_level), 0)
+    except (TypeError, ValueError):
+        pass
+    return flags
+
+
+def backfill_product_flags(apps, schema_editor):
+    """Mevcut ürünlerin bit maskesini JSON alanlarından doldur"""
+    ProductFeatures = apps.get_model('api', 'ProductFeatures')
+    queryset = ProductFeatures.objects.only('id', 'allergen_vector', 'health_indicators', 'processing_level')
+
+    batch = []
+    for product in queryset.iterator(chunk_size=BACKFILL_BATCH_SIZE):
+        product.product_flags = compute_product_flags(
+            product.allergen_vector, product.health_indicators, product.processing_level
+        )
+        batch.append(product)
+        if len(batch) >= BACKFILL_BATCH_SIZE:
+            ProductFeatures.objects.bulk_update(batch, ['product_flags'])
+            batch = []
+    if batch:
+        ProductFeatures.objects.bulk_update(batch, ['product_flags'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0009_productsimilarity_product_1_overall_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='productfeatures',
+            name='product_flags',
+            field=models.BigIntegerField(default=0, help_text='Alerjen, sağlık göstergesi ve işlenmişlik bit maskesi (pipeline/product_flags.py)'),
+        ),
+        migrations.RunPython(backfill_product_flags, migrations.RunPython.noop),
+    ]
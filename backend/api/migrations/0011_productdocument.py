@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-17 04:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0010_productfeatures_product_flags'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductDocument',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('product_code', models.CharField(db_index=True, max_length=50, unique=True)),
+                ('document', models.JSONField(default=dict, help_text='nutriments, ingredients_text, allergens_tags, additives_tags, labels_tags, ...')),
+                ('source', models.CharField(choices=[('ingest', 'Veri dosyası (ingest)'), ('api', 'OpenFoodFacts API')], default='ingest', max_length=10)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'product_documents',
+            },
+        ),
+    ]
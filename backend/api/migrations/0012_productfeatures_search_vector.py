@@ -0,0 +1,55 @@
+# Generated by Django 5.2.18 on 2026-10-17 05:10
+
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+
+# Ad (A), marka ve kategori (B), içerik (C) ağırlıklı arama vektörü - satır yazılırken PostgreSQL hesaplar,
+# bu yüzden ORM, COPY ve upsert yolları ayrıca bir şey yapmaz. Alan modelde tanımlı değildir (pipeline/product_search.py).
+SEARCH_VECTOR_SQL = """
+ALTER TABLE product_features ADD COLUMN search_vector tsvector GENERATED ALWAYS AS (
+    setweight(to_tsvector('simple', coalesce(product_name, '')), 'A') ||
+    setweight(to_tsvector('simple', coalesce(main_brand, '')), 'B') ||
+    setweight(to_tsvector('simple', coalesce(main_category, '')), 'B') ||
+    setweight(to_tsvector('simple', coalesce(ingredients_text, '')), 'C')
+) STORED
+"""
+
+SEARCH_INDEX_SQL = [
+    "CREATE INDEX product_features_search_idx ON product_features USING gin (search_vector)",
+    "CREATE INDEX product_features_name_trgm_idx ON product_features USING gin (product_name gin_trgm_ops)",
+]
+
+DROP_SQL = [
+    "DROP INDEX IF EXISTS product_features_name_trgm_idx",
+    "DROP INDEX IF EXISTS product_features_search_idx",
+    "ALTER TABLE product_features DROP COLUMN IF EXISTS search_vector",
+]
+
+
+def add_search_vector(apps, schema_editor):
+    """Sadece PostgreSQL - diğer veritabanlarında arama icontains ile yapılır"""
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(SEARCH_VECTOR_SQL)
+    for sql in SEARCH_INDEX_SQL:
+        schema_editor.execute(sql)
+
+
+def drop_search_vector(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for sql in DROP_SQL:
+        schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0011_productdocument'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.RunPython(add_search_vector, drop_search_vector),
+    ]
@@ -2,5 +2,7 @@
 
 from .user_profile import User, Profile  
 from .product_features import ProductFeatures, ProductSimilarity
+from .ingest_checkpoint import IngestCheckpoint
+from .product_document import ProductDocument
 
-__all__ = ['User', 'Profile', 'ProductFeatures', 'ProductSimilarity']
\ No newline at end of file
+__all__ = ['User', 'Profile', 'ProductFeatures', 'ProductSimilarity', 'IngestCheckpoint', 'ProductDocument']
\ No newline at end of file
@@ -0,0 +1,70 @@
+# backend/api/models/ingest_checkpoint.py
+
+import os
+
+from django.db import models
+
+
+class IngestCheckpoint(models.Model):
+    """
+    Ham TSV ingest'inin dosya bazında en son commit edilen noktası (process_openfoodfacts --resume)
+    """
+    file_path = models.CharField(max_length=500, unique=True, help_text="Giriş dosyasının mutlak yolu")
+    
+    # Dosya kimliği - dosya değiştiyse checkpoint geçersizdir
+    file_size = models.BigIntegerField()
+    file_mtime = models.FloatField()
+    
+    # İlerleme
+    byte_offset = models.BigIntegerField(default=0, help_text="Son commit edilen batch'in bittiği byte")
+    rows_committed = models.BigIntegerField(default=0, help_text="Commit edilen özellik satırı sayısı")
+    batch_number = models.IntegerField(default=0, help_text="Son commit edilen batch numarası")
+    completed = models.BooleanField(default=False)
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        db_table = 'ingest_checkpoints'
+    
+    def __str__(self):
+        return f"{self.file_path}: {self.byte_offset}/{self.file_size} byte, batch {self.batch_number}"
+    
+    @staticmethod
+    def file_identity(file_path: str):
+        """(mutlak yol, boyut, değiştirilme zamanı)"""
+        stat = os.stat(file_path)
+        return os.path.abspath(file_path), stat.st_size, stat.st_mtime
+    
+    @classmethod
+    def start(cls, file_path: str, resume: bool) -> 'IngestCheckpoint':
+        """
+        Dosya için checkpoint'i getir veya sıfırla.
+        resume=False ise ya da dosya checkpoint'ten sonra değiştiyse baştan başlanır.
+        """
+        path, size, mtime = cls.file_identity(file_path)
+        checkpoint = cls.objects.filter(file_path=path).first()
+        
+        if checkpoint and resume and checkpoint.file_size == size and checkpoint.file_mtime == mtime:
+            return checkpoint
+        
+        checkpoint, _ = cls.objects.update_or_create(
+            file_path=path,
+            defaults={
+                'file_size': size,
+                'file_mtime': mtime,
+                'byte_offset': 0,
+                'rows_committed': 0,
+                'batch_number': 0,
+                'completed': False,
+            }
+        )
+        return checkpoint
+    
+    def advance(self, byte_offset: int, rows: int, batch_number: int) -> None:
+        """Bir batch commit edildikten sonra ilerlemeyi kaydet"""
+        self.byte_offset = byte_offset
+        self.rows_committed += rows
+        self.batch_number = batch_number
+        self.completed = byte_offset >= self.file_size
+        self.save(update_fields=['byte_offset', 'rows_committed', 'batch_number', 'completed', 'updated_at'])
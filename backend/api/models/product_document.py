@@ -0,0 +1,29 @@
+# backend/api/models/product_document.py
+
+from django.db import models
+
+
+class ProductDocument(models.Model):
+    """
+    Ürünün ham OpenFoodFacts belgesi (API'deki 'product' nesnesi biçiminde).
+    Ürün detayı ve kural tabanlı analiz bu tablodan okunur; API sadece bulunamayan ürünlerde kullanılır.
+    """
+    SOURCE_INGEST = 'ingest'
+    SOURCE_API = 'api'
+    SOURCE_CHOICES = [
+        (SOURCE_INGEST, 'Veri dosyası (ingest)'),
+        (SOURCE_API, 'OpenFoodFacts API'),
+    ]
+
+    product_code = models.CharField(max_length=50, unique=True, db_index=True)
+    document = models.JSONField(default=dict, help_text="nutriments, ingredients_text, allergens_tags, additives_tags, labels_tags, ...")
+    source = models.CharField(max_length=10, choices=SOURCE_CHOICES, default=SOURCE_INGEST)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'product_documents'
+
+    def __str__(self):
+        return f"{self.document.get('product_name', '')} ({self.product_code}, {self.source})"
@@ -51,6 +51,8 @@ class ProductFeatures(models.Model):
     # Kalite kontrol
     data_completeness_score = models.FloatField(default=0.0, help_text="Veri tamlık skoru (0-1)")
     is_valid_for_analysis = models.BooleanField(default=True, help_text="Analiz için geçerli mi?")
+    content_hash = models.CharField(max_length=64, blank=True, default='', help_text="Kaydedilen alanların sha256 özeti (upsert'te değişmeyen ürünler atlanır)")
+    product_flags = models.BigIntegerField(default=0, help_text="Alerjen, sağlık göstergesi ve işlenmişlik bit maskesi (pipeline/product_flags.py)")
     
     # Zaman damgaları
     created_at = models.DateTimeField(auto_now_add=True)
@@ -198,6 +200,8 @@ class ProductSimilarity(models.Model):
         indexes = [
             models.Index(fields=['overall_similarity']),
             models.Index(fields=['nutritional_similarity']),
+            # Alternatif önerileri: bir ürünün komşuları benzerlik sırasıyla
+            models.Index(fields=['product_1', '-overall_similarity'], name='product_sim_p1_overall_idx'),
         ]
     
     def __str__(self):
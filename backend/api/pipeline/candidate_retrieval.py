@@ -0,0 +1,121 @@
+# backend/api/pipeline/candidate_retrieval.py
+
+import logging
+import time
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from .feature_matrix import ProductFeatureMatrix, get_feature_matrix
+from .product_flags import compatible_rows
+
+logger = logging.getLogger(__name__)
+
+# Sıralama aşamasına gönderilen en fazla aday sayısı
+DEFAULT_CANDIDATE_COUNT = 2000
+
+# Bundan fazla kategori eşleşirse kategori listelerini birleştirmek yerine sıralı listeyi maskele
+MAX_MERGED_CATEGORIES = 64
+
+
+class CandidateRetriever:
+    """
+    Öneri sisteminin aday seçme aşaması.
+    Analize uygun ürünler health_score, ardından nutrition_quality_score'a göre bir kez sıralanır;
+    her kategori için bu sıradaki satırlar önceden ayrılır. Sorgu sadece dilimleme ve birleştirmedir.
+    """
+
+    def __init__(self, matrix: ProductFeatureMatrix):
+        start = time.perf_counter()
+        self.matrix = matrix
+
+        rows = np.flatnonzero(matrix.column('is_valid_for_analysis') == 1)
+        health = matrix.values(rows, ['health_score'])[:, 0]
+        quality = matrix.values(rows, ['nutrition_quality_score'])[:, 0]
+        # En iyi ürün önce; eşitlikte id sırası (lexsort son anahtara göre sıralar)
+        ranked = rows[np.lexsort((rows, -quality, -health))]
+        self.ranked_rows = ranked
+        self.rank = np.empty(len(matrix), dtype=np.int64)
+        self.rank[ranked] = np.arange(len(ranked))
+
+        # Kategori bazında aynı sıradaki satırlar: category_order[start:end] bir kategorinin listesi
+        categories = np.asarray(matrix.category_codes[ranked], dtype=np.int64)
+        self.ranked_categories = categories
+        flags = np.asarray(matrix.flags, dtype=np.int64)
+        self.ranked_flags = flags[ranked]
+        by_category = np.argsort(categories, kind='stable')
+        self.category_order = ranked[by_category]
+        self.category_order_flags = flags[self.category_order]
+        sorted_categories = categories[by_category]
+        codes = np.arange(len(matrix.category_names))
+        self.category_start = np.searchsorted(sorted_categories, codes, side='left')
+        self.category_end = np.searchsorted(sorted_categories, codes, side='right')
+
+        self.category_names_lower = [name.lower() for name in matrix.category_names]
+        self._term_cache: Dict[str, np.ndarray] = {}
+
+        logger.info(f"Aday indeksi oluşturuldu: {len(ranked)} ürün, {len(codes)} kategori, "
+                    f"{time.perf_counter() - start:.2f} sn")
+
+    def _categories_for_term(self, term: str) -> np.ndarray:
+        """Adında terimi içeren kategori kodları (main_category__icontains ile aynı)"""
+        term = term.strip().lower()
+        if term not in self._term_cache:
+            self._term_cache[term] = np.array(
+                [code for code, name in enumerate(self.category_names_lower) if term in name], dtype=np.int64
+            )
+        return self._term_cache[term]
+
+    def _category_slice(self, code: int, limit: int, exclude_flags: int) -> np.ndarray:
+        """Kategorinin sıralı listesinden (bayrak filtresi sonrası) ilk limit satır"""
+        start, end = self.category_start[code], self.category_end[code]
+        if not exclude_flags:
+            return self.category_order[start:min(end, start + limit)]
+        rows = self.category_order[start:end]
+        return rows[compatible_rows(self.category_order_flags[start:end], exclude_flags)][:limit]
+
+    def retrieve(self, categories: Optional[List[str]] = None, limit: int = DEFAULT_CANDIDATE_COUNT,
+                 exclude_flags: int = 0) -> np.ndarray:
+        """
+        En iyi sıradaki en fazla limit aday (matris satır numaraları, sıralı).
+        categories verilirse sadece adı bu terimlerden birini içeren kategoriler;
+        exclude_flags verilirse bu bitlerden birini taşıyan ürünler sıralamadan önce elenir.
+        """
+        if not categories:
+            if not exclude_flags:
+                return self.ranked_rows[:limit]
+            return self.ranked_rows[compatible_rows(self.ranked_flags, exclude_flags)][:limit]
+
+        codes = np.unique(np.concatenate([self._categories_for_term(term) for term in categories]))
+        if len(codes) == 0:
+            return self.ranked_rows[:0]
+        if len(codes) > MAX_MERGED_CATEGORIES:
+            selected = np.isin(self.ranked_categories, codes) & compatible_rows(self.ranked_flags, exclude_flags)
+            return self.ranked_rows[selected][:limit]
+
+        # Her kategorinin ilk limit satırı yeterli; birleşik listeden global sıraya göre ilk limit
+        parts = [self._category_slice(code, limit, exclude_flags) for code in codes]
+        candidates = np.concatenate(parts)
+        if len(candidates) > limit:
+            candidates = candidates[np.argpartition(self.rank[candidates], limit - 1)[:limit]]
+        return candidates[np.argsort(self.rank[candidates], kind='stable')]
+
+
+# Süreç başına bir indeks; özellik matrisi yeniden yüklendiğinde yeniden oluşturulur
+_loaded_retriever: Dict[str, Any] = {'matrix': None, 'retriever': None}
+
+
+def get_candidate_retriever() -> Optional[CandidateRetriever]:
+    """Süreç içinde paylaşılan aday indeksi (özellik matrisi yoksa None)"""
+    matrix = get_feature_matrix()
+    if matrix is None:
+        return None
+
+    if _loaded_retriever['matrix'] is not matrix:
+        try:
+            retriever = CandidateRetriever(matrix)
+        except Exception as e:
+            logger.error(f"Aday indeksi oluşturulamadı: {e}")
+            retriever = None
+        _loaded_retriever.update({'matrix': matrix, 'retriever': retriever})
+    return _loaded_retriever['retriever']
@@ -0,0 +1,194 @@
+# backend/api/pipeline/columnar_store.py
+
+import json
+import logging
+import os
+import shutil
+import zlib
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    import pyarrow.fs as pafs
+except ImportError:  # pyarrow opsiyonel - sadece Parquet snapshot için gerekli
+    pa = None
+    ds = None
+    pafs = None
+
+from .copy_loader import _json_safe
+
+logger = logging.getLogger(__name__)
+
+# Snapshot main_category'nin hash'ine göre sabit sayıda bölüme ayrılır: bir kategori her zaman tek bir bölümdedir,
+# binlerce farklı kategori binlerce küçük dosya üretmez
+PARTITION_SOURCE_COLUMN = 'main_category'
+PARTITION_KEY_COLUMN = 'category_bucket'
+PARTITION_BUCKETS = 64
+
+# Bölümlere dağılan satırların orijinal sırası (ilk geçen kayıt korunur)
+POSITION_COLUMN = '_snapshot_position'
+
+# Snapshot dizinini işaretleyen meta dosyası ('_' ile başlayan dosyaları pyarrow veri olarak okumaz)
+SNAPSHOT_MARKER = '_snapshot.json'
+
+COMPRESSION = 'zstd'
+
+
+def is_available() -> bool:
+    return ds is not None
+
+
+def is_snapshot_path(path: Optional[str]) -> bool:
+    """Parquet snapshot hedefi mi (dizin olarak yazılır, .parquet uzantılı)"""
+    return bool(path) and path.rstrip('/\\').endswith('.parquet')
+
+
+def _require_pyarrow():
+    if ds is None:
+        raise ImportError("Parquet snapshot için pyarrow gerekli: pip install pyarrow")
+
+
+def partition_key(category: Any) -> str:
+    """main_category değerinin bölümü (süreçler arası kararlı crc32 hash'i; eksik değerler tek bölümde)"""
+    if category is None or category is pd.NA or (isinstance(category, float) and np.isnan(category)):
+        category = ''
+    return f"{zlib.crc32(str(category).encode('utf-8')) % PARTITION_BUCKETS:02d}"
+
+
+def _prepare_snapshot_dir(root_path: str, metadata: Dict[str, Any]):
+    """Yeni snapshot için dizini hazırla - sadece daha önce yazılmış bir snapshot'ın üzerine yazılır"""
+    if os.path.isdir(root_path) and os.listdir(root_path):
+        if not os.path.exists(os.path.join(root_path, SNAPSHOT_MARKER)):
+            raise ValueError(f"Hedef dizin boş değil ve bir snapshot değil, üzerine yazılmıyor: {root_path}")
+        shutil.rmtree(root_path)
+
+    os.makedirs(root_path, exist_ok=True)
+    with open(os.path.join(root_path, SNAPSHOT_MARKER), 'w', encoding='utf-8') as f:
+        json.dump(metadata, f, ensure_ascii=False)
+
+
+def write_snapshot(
+    df: pd.DataFrame,
+    root_path: str,
+    part_number: int = 0,
+    row_offset: int = 0,
+    json_columns: Iterable[str] = ()
+) -> int:
+    """
+    DataFrame'i main_category'ye göre bölümlenmiş, sıkıştırılmış Parquet veri kümesine yaz.
+    part_number=0 yeni snapshot başlatır; sonraki parçalar (streaming) aynı dizine eklenir.
+    json_columns (dict/list içeren sütunlar) JSON metni olarak saklanır, okurken geri çözülür.
+    """
+    _require_pyarrow()
+    json_columns = list(json_columns)
+
+    if part_number == 0:
+        _prepare_snapshot_dir(root_path, {
+            'partition_column': PARTITION_SOURCE_COLUMN,
+            'json_columns': json_columns,
+        })
+
+    if df.empty:
+        return 0
+
+    frame = df.reset_index(drop=True)
+    extra = {POSITION_COLUMN: np.arange(row_offset, row_offset + len(frame), dtype='int64')}
+    if PARTITION_SOURCE_COLUMN in frame.columns:
+        extra[PARTITION_KEY_COLUMN] = [partition_key(value) for value in frame[PARTITION_SOURCE_COLUMN]]
+    else:
+        extra[PARTITION_KEY_COLUMN] = [partition_key(None)] * len(frame)
+    for name in [name for name in json_columns if name in frame.columns]:
+        extra[name] = [json.dumps(_json_safe(value), ensure_ascii=False) for value in frame[name]]
+    frame = frame.assign(**extra)
+
+    table = pa.Table.from_pandas(frame, preserve_index=False)
+    n_partitions = len(set(extra[PARTITION_KEY_COLUMN]))
+    ds.write_dataset(
+        table,
+        root_path,
+        format='parquet',
+        partitioning=ds.partitioning(pa.schema([(PARTITION_KEY_COLUMN, pa.string())]), flavor='hive'),
+        basename_template=f'part-{part_number:05d}-{{i}}.parquet',
+        existing_data_behavior='overwrite_or_ignore',
+        file_options=ds.ParquetFileFormat().make_write_options(compression=COMPRESSION),
+    )
+
+    logger.info(f"Snapshot parçası yazıldı: {len(frame)} satır, {n_partitions} bölüm -> {root_path}")
+    return len(frame)
+
+
+def snapshot_writer(output_path: Optional[str]) -> Optional[Callable[..., int]]:
+    """
+    Önişleme çıktısı için yazıcı (OpenFoodFactsPreprocessor.preprocess(writer=...)): '.parquet' ile biten yol
+    main_category'ye göre bölümlenmiş snapshot olarak yazılır (tipler korunur), diğerleri için None (CSV)
+    """
+    return write_snapshot if is_snapshot_path(output_path) else None
+
+
+def read_snapshot(
+    root_path: str,
+    columns: Optional[List[str]] = None,
+    categories: Optional[List[str]] = None
+) -> pd.DataFrame:
+    """
+    Parquet snapshot'ı bellek eşlemeli (mmap) oku.
+    columns verilirse sadece o sütunlar diskten okunur; categories verilirse sadece ilgili bölümler taranır.
+    Satırlar yazıldıkları sırayla döner.
+    """
+    _require_pyarrow()
+    dataset = ds.dataset(
+        root_path,
+        format='parquet',
+        partitioning='hive',
+        filesystem=pafs.LocalFileSystem(use_mmap=True),
+    )
+    available = dataset.schema.names
+    if POSITION_COLUMN not in available:
+        logger.warning(f"Snapshot boş: {root_path}")
+        return pd.DataFrame()
+
+    if columns is None:
+        read_columns = [name for name in available if name != PARTITION_KEY_COLUMN]
+    else:
+        missing = [name for name in columns if name not in available]
+        if missing:
+            logger.warning(f"Snapshot'ta olmayan sütunlar atlandı: {missing}")
+        read_columns = [name for name in columns if name in available and name != POSITION_COLUMN]
+        read_columns.append(POSITION_COLUMN)
+    if categories is not None and PARTITION_SOURCE_COLUMN not in read_columns:
+        read_columns.append(PARTITION_SOURCE_COLUMN)
+
+    row_filter = None
+    if categories is not None:
+        row_filter = ds.field(PARTITION_KEY_COLUMN).isin(sorted({partition_key(c) for c in categories}))
+
+    df = dataset.to_table(columns=read_columns, filter=row_filter).to_pandas()
+
+    if categories is not None:
+        # Aynı bölümde başka kategoriler de var - gerçek değerle süz
+        df = df[df[PARTITION_SOURCE_COLUMN].isin(categories)]
+        if columns is not None and PARTITION_SOURCE_COLUMN not in columns:
+            df = df.drop(columns=[PARTITION_SOURCE_COLUMN])
+
+    df = df.sort_values(POSITION_COLUMN, kind='stable').drop(columns=[POSITION_COLUMN]).reset_index(drop=True)
+
+    json_columns = _read_marker(root_path).get('json_columns', [])
+    for name in json_columns:
+        if name in df.columns:
+            df[name] = [json.loads(value) if isinstance(value, str) else value for value in df[name]]
+
+    logger.info(f"Snapshot okundu: {len(df)} satır, {len(df.columns)} sütun <- {root_path}")
+    return df
+
+
+def _read_marker(root_path: str) -> Dict[str, Any]:
+    try:
+        with open(os.path.join(root_path, SNAPSHOT_MARKER), encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        logger.warning(f"Snapshot meta dosyası okunamadı: {e}")
+        return {}
@@ -0,0 +1,227 @@
+# backend/api/pipeline/copy_loader.py
+
+import hashlib
+import io
+import json
+import logging
+import math
+from typing import Any, Dict, List
+
+import numpy as np
+import pandas as pd
+from django.db import connection, transaction
+
+from api.models.product_features import ProductFeatures
+from .product_flags import compute_product_flags
+
+logger = logging.getLogger(__name__)
+
+# COPY ile yazılan sütunlar (id, created_at ve updated_at veritabanında doldurulur)
+COPY_COLUMNS = [
+    'product_code', 'product_name', 'main_category', 'main_brand', 'main_country',
+    'nutrition_vector', 'allergen_vector', 'additives_info', 'nutriscore_data',
+    'processing_level', 'health_indicators', 'nutrition_quality_score', 'health_score',
+    'macro_ratios', 'ingredients_text', 'ingredients_text_length', 'ingredients_word_count',
+    'data_completeness_score', 'is_valid_for_analysis', 'product_flags',
+]
+
+# Feature extraction çıktısında olmayan, yüklemede diğer sütunlardan hesaplanan sütunlar
+DERIVED_COLUMNS = ['product_flags']
+
+# Yükleme sırasında yazılan tüm sütunlar (COPY_COLUMNS + özet)
+LOAD_COLUMNS = COPY_COLUMNS + ['content_hash']
+
+JSON_COLUMNS = [
+    'nutrition_vector', 'allergen_vector', 'additives_info', 'nutriscore_data',
+    'health_indicators', 'macro_ratios',
+]
+
+STAGING_TABLE = 'product_features_staging'
+
+# COPY text formatında NULL işareti
+COPY_NULL = '\\N'
+
+
+def _json_safe(value: Any) -> Any:
+    """JSONB'nin kabul etmediği NaN/Infinity değerlerini null yap, numpy tiplerini Python tiplerine çevir"""
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    if isinstance(value, dict):
+        return {str(key): _json_safe(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_json_safe(item) for item in value]
+    return value
+
+
+def _escape_copy_text(text: str) -> str:
+    """COPY text formatı için ters eğik çizgi, tab ve satır sonlarını kaçır"""
+    return (
+        text.replace('\\', '\\\\')
+        .replace('\t', '\\t')
+        .replace('\n', '\\n')
+        .replace('\r', '\\r')
+    )
+
+
+def compute_content_hash(values: Dict[str, Any]) -> str:
+    """
+    COPY_COLUMNS alanlarının kanonik JSON temsilinin sha256 özeti.
+    ORM ve COPY yolları aynı değerler için aynı özeti üretir; upsert'te değişmeyen ürünler atlanır.
+    """
+    canonical = json.dumps(
+        [_json_safe(values[name]) for name in COPY_COLUMNS],
+        sort_keys=True, ensure_ascii=False, separators=(',', ':')
+    )
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+class ProductFeaturesCopyLoader:
+    """
+    Feature extraction çıktısını COPY ... FROM STDIN ile geçici bir staging tablosuna akıtıp
+    INSERT ... ON CONFLICT (product_code) ile product_features tablosuna birleştirir (sadece PostgreSQL).
+    """
+
+    def __init__(self):
+        self.table = ProductFeatures._meta.db_table
+        self.max_code_length = ProductFeatures._meta.get_field('product_code').max_length
+
+    @staticmethod
+    def is_supported() -> bool:
+        return connection.vendor == 'postgresql'
+
+    def prepare_frame(self, features_df: pd.DataFrame) -> pd.DataFrame:
+        """
+        _create_product_feature_from_extracted ile aynı dönüşümleri sütun bazında uygula.
+        Kodu boş/'unknown' veya sütuna sığmayan satırlar atlanır.
+        """
+        def column(name: str, default: Any) -> pd.Series:
+            if name in features_df.columns:
+                return features_df[name]
+            return pd.Series([default] * len(features_df), index=features_df.index, dtype=object)
+
+        def optional_text(name: str, limit: int) -> pd.Series:
+            values = column(name, None)
+            present = values.notna() & (values.astype(str) != '')
+            return values.astype(str).str.slice(0, limit).astype(object).where(present, None)
+
+        frame = pd.DataFrame({
+            'product_code': column('product_code', '').astype(str).str.slice(0, 100),
+            'product_name': column('product_name', '').astype(str).str.slice(0, 500),
+            'main_category': column('main_category', 'unknown').astype(str).str.slice(0, 200),
+            'main_brand': optional_text('main_brand', 200),
+            'main_country': optional_text('main_country', 100),
+            'processing_level': column('processing_level', 1).astype('int64'),
+            'nutrition_quality_score': column('nutrition_quality_score', 5.0).astype('float64'),
+            'health_score': column('health_score', 0.0).astype('float64'),
+            'ingredients_text': column('ingredients_text', '').astype(str).str.slice(0, 2000),
+            'ingredients_text_length': column('ingredients_text_length', 0).astype('int64'),
+            'ingredients_word_count': column('ingredients_word_count', 0).astype('int64'),
+            'data_completeness_score': column('data_completeness_score', 0.0).astype('float64'),
+            'is_valid_for_analysis': column('is_valid_for_analysis', False).astype(bool),
+        }, index=features_df.index)
+        for name in JSON_COLUMNS:
+            frame[name] = column(name, {})
+        frame['product_flags'] = pd.Series([
+            compute_product_flags(allergens, indicators, level)
+            for allergens, indicators, level in zip(
+                frame['allergen_vector'].tolist(), frame['health_indicators'].tolist(),
+                frame['processing_level'].tolist()
+            )
+        ], index=frame.index, dtype='int64')
+
+        codes = frame['product_code']
+        valid = (codes != '') & (codes != 'unknown') & (codes.str.len() <= self.max_code_length)
+        skipped = int((~valid).sum())
+        if skipped:
+            logger.warning(f"COPY: {skipped} satır geçersiz ürün kodu nedeniyle atlandı")
+
+        frame = frame.loc[valid, COPY_COLUMNS].copy()
+        frame['content_hash'] = [
+            compute_content_hash(dict(zip(COPY_COLUMNS, values)))
+            for values in zip(*(frame[name].tolist() for name in COPY_COLUMNS))
+        ]
+        return frame
+
+    def to_copy_buffer(self, frame: pd.DataFrame) -> io.StringIO:
+        """Hazırlanmış DataFrame'i COPY text formatına çevir (son sütun: dosya sırası)"""
+        encoded_columns: List[List[str]] = []
+        for name in LOAD_COLUMNS:
+            values = frame[name].tolist()
+            if name in JSON_COLUMNS:
+                encoded = [
+                    _escape_copy_text(json.dumps(_json_safe(value), ensure_ascii=False, allow_nan=False))
+                    for value in values
+                ]
+            elif name == 'is_valid_for_analysis':
+                encoded = ['t' if value else 'f' for value in values]
+            elif frame[name].dtype.kind == 'f':
+                encoded = [repr(float(value)) for value in values]
+            elif frame[name].dtype.kind == 'i':
+                encoded = [str(value) for value in values]
+            else:
+                encoded = [COPY_NULL if value is None else _escape_copy_text(value) for value in values]
+            encoded_columns.append(encoded)
+
+        encoded_columns.append([str(position) for position in range(len(frame))])
+
+        buffer = io.StringIO()
+        buffer.writelines('\t'.join(fields) + '\n' for fields in zip(*encoded_columns))
+        buffer.seek(0)
+        return buffer
+
+    def _merge_sql(self, upsert: bool) -> str:
+        """
+        Staging tablosundan ana tabloya birleştirme - aynı kod birden fazla geçerse ilki alınır.
+        upsert=True ise mevcut ürünler, sadece içerik özeti değiştiyse güncellenir.
+        RETURNING (xmax = 0): eklenen satırlarda true, güncellenenlerde false.
+        """
+        columns = ', '.join(LOAD_COLUMNS)
+        if upsert:
+            assignments = ', '.join(f"{name} = EXCLUDED.{name}" for name in LOAD_COLUMNS if name != 'product_code')
+            conflict = (
+                f"DO UPDATE SET {assignments}, updated_at = now() "
+                f"WHERE {self.table}.content_hash IS DISTINCT FROM EXCLUDED.content_hash"
+            )
+        else:
+            conflict = "DO NOTHING"
+        return (
+            f"INSERT INTO {self.table} ({columns}, created_at, updated_at) "
+            f"SELECT DISTINCT ON (product_code) {columns}, now(), now() "
+            f"FROM {STAGING_TABLE} ORDER BY product_code, copy_position "
+            f"ON CONFLICT (product_code) {conflict} "
+            f"RETURNING (xmax = 0)"
+        )
+
+    def load(self, features_df: pd.DataFrame, upsert: bool = False) -> Dict[str, int]:
+        """
+        Tek bir parçayı COPY + ON CONFLICT ile yükle (tek transaction).
+        Dönen sözlük: copied (staging'e yazılan), inserted (yeni eklenen) ve updated (güncellenen) satır sayıları.
+        """
+        frame = self.prepare_frame(features_df)
+        if frame.empty:
+            return {'copied': 0, 'inserted': 0, 'updated': 0}
+
+        buffer = self.to_copy_buffer(frame)
+        columns = ', '.join(LOAD_COLUMNS)
+
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f"CREATE TEMP TABLE {STAGING_TABLE} ON COMMIT DROP AS "
+                    f"SELECT {columns} FROM {self.table} WITH NO DATA"
+                )
+                cursor.execute(f"ALTER TABLE {STAGING_TABLE} ADD COLUMN copy_position bigint")
+                cursor.copy_expert(
+                    f"COPY {STAGING_TABLE} ({columns}, copy_position) FROM STDIN",
+                    buffer
+                )
+                cursor.execute(self._merge_sql(upsert))
+                merged = [row[0] for row in cursor.fetchall()]
+                # ON COMMIT DROP sadece en dıştaki transaction'da çalışır; dış bir atomic() içinde
+                # (savepoint) bir sonraki load() aynı tabloyu yeniden oluşturabilsin
+                cursor.execute(f"DROP TABLE {STAGING_TABLE}")
+
+        inserted = sum(1 for is_insert in merged if is_insert)
+        return {'copied': len(frame), 'inserted': inserted, 'updated': len(merged) - inserted}
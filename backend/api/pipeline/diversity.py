@@ -0,0 +1,58 @@
+# backend/api/pipeline/diversity.py
+
+from typing import List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+# MMR'de benzerlik cezasının ağırlığı (0: sadece skor, 1: sadece çeşitlilik)
+DEFAULT_DIVERSITY = 0.3
+
+
+def mmr_rerank(
+    relevance: Sequence[float],
+    vectors: np.ndarray,
+    categories: Sequence[str],
+    limit: int,
+    diversity: float = DEFAULT_DIVERSITY,
+    category_cap: Optional[int] = None
+) -> List[int]:
+    """
+    Maximal Marginal Relevance ile kategori kotalı yeniden sıralama; seçilen ilk limit ürünün indeksleri.
+    Her adımda (1 - diversity) * skor - diversity * (seçilenlere en yüksek benzerlik) en büyük olan ürün alınır.
+    En yüksek benzerlik her seçimden sonra tek matris-vektör çarpımıyla güncellenir: O(n·k).
+
+    relevance 0-1 aralığında, vectors birim uzunlukta olmalıdır (iç çarpım = kosinüs benzerliği).
+    category_cap: bir kategoriden en fazla kaç ürün (None ise limit'in yarısı); kota tüm adayları
+    dışarıda bırakırsa kalan ürünler kotasız seçilir.
+    """
+    relevance = np.asarray(relevance, dtype=np.float64)
+    vectors = np.asarray(vectors, dtype=np.float32)
+    n = len(relevance)
+    limit = min(limit, n)
+    if limit <= 0:
+        return []
+
+    diversity = min(max(float(diversity), 0.0), 1.0)
+    if category_cap is None:
+        category_cap = max(1, limit // 2)
+    codes, uniques = pd.factorize(pd.Series(list(categories), dtype=object))
+    counts = np.zeros(len(uniques) + 1, dtype=np.int64)
+
+    max_similarity = np.zeros(n, dtype=np.float64)
+    available = np.ones(n, dtype=bool)
+    selected: List[int] = []
+    for _ in range(limit):
+        allowed = available & (counts[codes] < category_cap)
+        if not allowed.any():
+            allowed = available
+        scores = np.where(allowed, (1.0 - diversity) * relevance - diversity * max_similarity, -np.inf)
+        # Eşitlikte ilk indeks - girdi skor sırasıyla geldiğinde eski sıra korunur
+        best = int(np.argmax(scores))
+
+        selected.append(best)
+        available[best] = False
+        counts[codes[best]] += 1
+        max_similarity = np.maximum(max_similarity, vectors @ vectors[best])
+
+    return selected
@@ -3,10 +3,111 @@
 import pandas as pd
 import numpy as np
 import logging
+import re
 from typing import Dict, List, Any, Optional
 
 logger = logging.getLogger(__name__)
 
+# Satır bazlı dönüşümlerde satırı tamamen düşüren hatalar için işaretçi (ör. int(inf) -> OverflowError)
+_ROW_ERROR = object()
+
+
+def _nutrient_value(value) -> float:
+    """extract_nutrition_vector ile aynı kurallarla tek hücreyi float'a çevir"""
+    try:
+        if pd.notna(value) and value != '' and str(value).lower() != 'nan':
+            return float(value)
+    except (ValueError, TypeError):
+        pass
+    return 0.0
+
+
+def _float_or_none(value):
+    """notna ise float(value), dönüştürülemezse None"""
+    try:
+        if pd.notna(value):
+            return float(value)
+    except (ValueError, TypeError):
+        pass
+    return None
+
+
+def _int_or_none(value):
+    """notna ise int(value), dönüştürülemezse None - OverflowError satırı düşürür"""
+    try:
+        if pd.notna(value):
+            return int(value)
+    except (ValueError, TypeError):
+        pass
+    except OverflowError:
+        return _ROW_ERROR
+    return None
+
+
+# Alerjen kelimeleri - preprocessor'da alerjen sütunları yok, bu yüzden text'ten çıkaracağız
+ALLERGEN_KEYWORDS = {
+    'contains_gluten': ['gluten', 'wheat', 'buğday', 'glüten'],
+    'contains_milk': ['milk', 'dairy', 'süt', 'laktoz', 'lactose'],
+    'contains_eggs': ['egg', 'yumurta', 'albumin'],
+    'contains_soy': ['soy', 'soja', 'soya'],
+    'contains_nuts': ['nuts', 'nut', 'fındık', 'ceviz', 'badem'],
+    'contains_peanuts': ['peanut', 'yer fıstığı'],
+    'contains_fish': ['fish', 'balık'],
+    'contains_shellfish': ['shellfish', 'kabuklu', 'shrimp', 'karides'],
+    'contains_sesame': ['sesame', 'susam'],
+    'contains_celery': ['celery', 'kereviz'],
+    'contains_mustard': ['mustard', 'hardal'],
+    'contains_sulphites': ['sulphite', 'sülfür', 'sulfur']
+}
+
+
+class AllergenMatcher:
+    """
+    Tüm alerjen gruplarının anahtar kelimelerini tek bir derlenmiş regex ile tarar.
+    
+    Desen, her pozisyonda en uzun eşleşen kelimeyi yakalayan bir lookahead alternation'dır;
+    böylece iç içe geçen kelimeler de (ör. 'peanut' içindeki 'nut') bulunur. Bir kelime
+    bulunduğunda, alt string olarak içerdiği tüm grupların kelimeleri de eşleşmiş sayılır -
+    sonuç `any(keyword in text ...)` ile birebir aynıdır.
+    """
+    
+    def __init__(self, allergen_keywords: Dict[str, List[str]]):
+        self.groups = list(allergen_keywords.keys())
+        self.keywords = sorted(
+            {keyword for keywords in allergen_keywords.values() for keyword in keywords},
+            key=lambda keyword: (-len(keyword), keyword)
+        )
+        self.pattern = re.compile('(?=(' + '|'.join(re.escape(keyword) for keyword in self.keywords) + '))')
+        
+        # Her kelime için: içinde alt string olarak geçen kelimelerin grupları
+        self.keyword_index = {keyword: i for i, keyword in enumerate(self.keywords)}
+        self.keyword_groups = np.zeros((len(self.keywords), len(self.groups)), dtype='int64')
+        for i, keyword in enumerate(self.keywords):
+            for j, group in enumerate(self.groups):
+                if any(group_keyword in keyword for group_keyword in allergen_keywords[group]):
+                    self.keyword_groups[i, j] = 1
+    
+    def match(self, text: str) -> Dict[str, int]:
+        """Tek bir metin için grup -> 0/1 sözlüğü"""
+        hits = np.zeros(len(self.groups), dtype='int64')
+        for keyword in set(self.pattern.findall(text)):
+            hits |= self.keyword_groups[self.keyword_index[keyword]]
+        return dict(zip(self.groups, hits.tolist()))
+    
+    def match_series(self, texts: pd.Series) -> Dict[str, np.ndarray]:
+        """String Series için grup -> 0/1 dizisi (her satır tek geçişte taranır)"""
+        hits = pd.Series(texts.str.findall(self.pattern).to_numpy()).explode().dropna()
+        matrix = np.zeros((len(texts), len(self.groups)), dtype='int64')
+        if len(hits):
+            keyword_codes = hits.map(self.keyword_index).to_numpy(dtype='int64')
+            np.maximum.at(matrix, hits.index.to_numpy(), self.keyword_groups[keyword_codes])
+        return {group: matrix[:, j] for j, group in enumerate(self.groups)}
+
+
+# Modül seviyesinde tek örnek - satırlar ve (fork edilen) süreçler arasında paylaşılır
+allergen_matcher = AllergenMatcher(ALLERGEN_KEYWORDS)
+
+
 class ProductFeatureExtractor:
     """
     İşlenmiş OpenFoodFacts verilerinden ProductFeatures modeli için özellik çıkarma sınıfı
@@ -31,21 +132,9 @@ class ProductFeatureExtractor:
             'potassium_100g': 'potassium_100g'
         }
         
-        # Alerjen kelimeleri - preprocessor'da alerjen sütunları yok, bu yüzden text'ten çıkaracağız
-        self.allergen_keywords = {
-            'contains_gluten': ['gluten', 'wheat', 'buğday', 'glüten'],
-            'contains_milk': ['milk', 'dairy', 'süt', 'laktoz', 'lactose'],
-            'contains_eggs': ['egg', 'yumurta', 'albumin'],
-            'contains_soy': ['soy', 'soja', 'soya'],
-            'contains_nuts': ['nuts', 'nut', 'fındık', 'ceviz', 'badem'],
-            'contains_peanuts': ['peanut', 'yer fıstığı'],
-            'contains_fish': ['fish', 'balık'],
-            'contains_shellfish': ['shellfish', 'kabuklu', 'shrimp', 'karides'],
-            'contains_sesame': ['sesame', 'susam'],
-            'contains_celery': ['celery', 'kereviz'],
-            'contains_mustard': ['mustard', 'hardal'],
-            'contains_sulphites': ['sulphite', 'sülfür', 'sulfur']
-        }
+        # Alerjen kelimeleri ve paylaşılan eşleştirici
+        self.allergen_keywords = ALLERGEN_KEYWORDS
+        self.allergen_matcher = allergen_matcher
     
     def extract_nutrition_vector(self, row: pd.Series) -> Dict[str, float]:
         """Besin değerleri vektörünü çıkar"""
@@ -75,7 +164,6 @@ class ProductFeatureExtractor:
     
     def extract_allergen_vector(self, row: pd.Series) -> Dict[str, int]:
         """Alerjen vektörünü çıkar - allergen text'lerden ve ingredients'tan"""
-        allergen_vector = {}
         
         # Alerjen text'leri birleştir
         allergen_text = ""
@@ -97,14 +185,9 @@ class ProductFeatureExtractor:
             except (KeyError, AttributeError):
                 pass
         
-        # Alerjen varlığını kontrol et
-        total_allergens = 0
-        for allergen_field, keywords in self.allergen_keywords.items():
-            contains_allergen = any(keyword in allergen_text for keyword in keywords)
-            allergen_vector[allergen_field] = 1 if contains_allergen else 0
-            total_allergens += allergen_vector[allergen_field]
-        
-        allergen_vector['total_allergens'] = total_allergens
+        # Alerjen varlığını kontrol et - tek geçişte tüm gruplar
+        allergen_vector = self.allergen_matcher.match(allergen_text)
+        allergen_vector['total_allergens'] = sum(allergen_vector.values())
         
         return allergen_vector
     
@@ -462,4 +545,333 @@ class ProductFeatureExtractor:
             
         except Exception as e:
             logger.error(f"Feature extraction hatası: {str(e)}")
-            return None
\ No newline at end of file
+            return None
+    
+    # --- DataFrame (vektörel) versiyonlar ---
+    
+    def _frame_float_column(self, df: pd.DataFrame, col: str):
+        """
+        Sütunu (değer dizisi, başarı maskesi) olarak döndür - _float_or_none ile aynı kurallar
+        """
+        series = df[col]
+        if pd.api.types.is_numeric_dtype(series):
+            values = series.astype('float64').to_numpy()
+            return values, ~np.isnan(values)
+        
+        converted = [_float_or_none(value) for value in series.tolist()]
+        ok = np.array([value is not None for value in converted], dtype=bool)
+        values = np.array([np.nan if value is None else value for value in converted], dtype='float64')
+        return values, ok
+    
+    def _frame_int_column(self, df: pd.DataFrame, col: str, default: int):
+        """
+        Sütunu (int dizisi, satır hatası maskesi) olarak döndür - _int_or_none ile aynı kurallar
+        """
+        series = df[col]
+        if pd.api.types.is_numeric_dtype(series):
+            values = series.astype('float64').to_numpy()
+            row_error = np.isinf(values)
+            usable = ~np.isnan(values) & ~row_error
+            result = np.full(len(values), default, dtype='int64')
+            result[usable] = np.trunc(values[usable]).astype('int64')
+            return result, row_error
+        
+        converted = [_int_or_none(value) for value in series.tolist()]
+        row_error = np.array([value is _ROW_ERROR for value in converted], dtype=bool)
+        result = np.array(
+            [default if value is None or value is _ROW_ERROR else value for value in converted],
+            dtype='int64'
+        )
+        return result, row_error
+    
+    def _frame_text_column(self, df: pd.DataFrame, col: str) -> pd.Series:
+        """
+        notna değerleri str(value) olarak, NA değerleri NaN olarak döndür.
+        object dtype korunur: .str işlemleri pyarrow kuruluyken de Python str semantiğiyle (split/strip) çalışır.
+        """
+        series = df[col]
+        text = series.astype(object).where(series.notna())
+        return text.map(str, na_action='ignore').astype(object)
+    
+    def extract_nutrition_frame(self, df: pd.DataFrame) -> Dict[str, np.ndarray]:
+        """Besin değerlerini sütun bazında çıkar (extract_nutrition_vector ile aynı kurallar)"""
+        nutrition = {}
+        for model_field, df_column in self.nutrition_mapping.items():
+            if df_column not in df.columns:
+                nutrition[model_field] = np.zeros(len(df))
+                continue
+            
+            series = df[df_column]
+            if pd.api.types.is_numeric_dtype(series):
+                nutrition[model_field] = np.nan_to_num(series.astype('float64').to_numpy(), nan=0.0, posinf=np.inf, neginf=-np.inf)
+            else:
+                nutrition[model_field] = series.map(_nutrient_value).astype('float64').to_numpy()
+        
+        return nutrition
+    
+    def _allergen_text_frame(self, df: pd.DataFrame) -> pd.Series:
+        """Alerjen ve içerik metinlerini satır bazında birleştir (extract_allergen_vector ile aynı)"""
+        allergen_text = pd.Series('', index=df.index, dtype=object)
+        
+        for col in ['allergens', 'allergens_en', 'traces', 'traces_en', 'ingredients_text']:
+            if col not in df.columns:
+                continue
+            lowered = self._frame_text_column(df, col).str.lower()
+            keep = lowered.notna()
+            if col != 'ingredients_text':
+                # İçerik metni dışında 'nan' string'leri atlanır
+                keep &= lowered != 'nan'
+            allergen_text = allergen_text + (' ' + lowered).where(keep, '')
+        
+        return allergen_text
+    
+    def extract_allergen_frame(self, df: pd.DataFrame) -> Dict[str, np.ndarray]:
+        """Alerjen bayraklarını sütun bazında çıkar"""
+        allergen_text = self._allergen_text_frame(df)
+        
+        return self.allergen_matcher.match_series(allergen_text)
+    
+    def extract_all_features_frame(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Tüm DataFrame için özellikleri sütun işlemleriyle çıkar.
+        Çıktı, her satır için extract_all_features ile birebir aynıdır
+        (product_name'i olmayan veya dönüştürülemeyen satırlar aynı şekilde atlanır).
+        """
+        if 'product_name' not in df.columns:
+            return pd.DataFrame()
+        
+        df = df[df['product_name'].notna()]
+        n = len(df)
+        if n == 0:
+            return pd.DataFrame()
+        
+        # Satırı düşüren hatalar (per-row path'te exception -> None)
+        row_error = np.zeros(n, dtype=bool)
+        
+        # Besin değerleri - tek seferde
+        nutrition = self.extract_nutrition_frame(df)
+        energy = nutrition['energy_100g']
+        has_energy_kcal = energy > 0
+        energy_kcal = energy / 4.184
+        
+        # Sağlık göstergeleri
+        salt = nutrition['salt_100g']
+        sodium = nutrition['sodium_100g']
+        salt_content = np.where((salt == 0) & (sodium > 0), sodium * 2.5, salt)
+        indicators = {
+            'high_calorie': (energy_kcal > 400).astype('int64'),
+            'high_fat': (nutrition['fat_100g'] > 20).astype('int64'),
+            'high_sugar': (nutrition['sugars_100g'] > 22.5).astype('int64'),
+            'high_salt': (salt_content > 1.5).astype('int64'),
+            'high_protein': (nutrition['proteins_100g'] > 12).astype('int64'),
+            'high_fiber': (nutrition['fiber_100g'] > 6).astype('int64'),
+        }
+        
+        # Katkı maddeleri
+        if 'additives_n' in df.columns:
+            additives_count, additives_error = self._frame_int_column(df, 'additives_n', 0)
+            row_error |= additives_error
+        else:
+            additives_count = np.zeros(n, dtype='int64')
+        has_risky_additives = (additives_count > 5).astype('int64')
+        
+        # Sağlık skoru (calculate_health_score ile aynı işlem sırası)
+        score = np.full(n, 5.0)
+        score -= np.where(indicators['high_calorie'] == 1, 1.0, 0.0)
+        score -= np.where(indicators['high_fat'] == 1, 1.0, 0.0)
+        score -= np.where(indicators['high_sugar'] == 1, 1.5, 0.0)
+        score -= np.where(indicators['high_salt'] == 1, 1.5, 0.0)
+        score -= np.where(additives_count > 0, np.minimum(additives_count * 0.2, 2.0), 0.0)
+        score += np.where(indicators['high_protein'] == 1, 1.0, 0.0)
+        score += np.where(indicators['high_fiber'] == 1, 1.0, 0.0)
+        vitamin_bonus = (
+            np.where(nutrition['vitamin-a_100g'] > 0, 0.5, 0.0) +
+            np.where(nutrition['vitamin-c_100g'] > 0, 0.5, 0.0)
+        )
+        score += np.minimum(vitamin_bonus, 1.0)
+        health_score = np.maximum(0.0, np.minimum(10.0, score))
+        
+        # Besin kalitesi skoru
+        present_nutrients = (
+            has_energy_kcal.astype('int64') +
+            (nutrition['fat_100g'] > 0) + (nutrition['carbohydrates_100g'] > 0) + (nutrition['proteins_100g'] > 0)
+        )
+        present_micros = (
+            (nutrition['vitamin-a_100g'] > 0).astype('int64') + (nutrition['vitamin-c_100g'] > 0) +
+            (nutrition['calcium_100g'] > 0) + (nutrition['iron_100g'] > 0)
+        )
+        base_score = (present_nutrients / 4) * 5.0
+        micro_bonus = (present_micros / 4) * 3.0
+        fiber_bonus = np.minimum(nutrition['fiber_100g'] / 10.0, 2.0)
+        nutrition_quality_score = np.minimum(10.0, base_score + micro_bonus + fiber_bonus)
+        
+        # Veri tamlık skoru (product_name her zaman mevcut)
+        extra_count = np.zeros(n, dtype='int64')
+        for field in ['main_category', 'brands', 'ingredients_text']:
+            if field in df.columns:
+                text = self._frame_text_column(df, field)
+                extra_count += (text.notna() & (text.str.strip() != '')).to_numpy()
+        data_completeness = (present_nutrients / 4) * 0.6 + (1 / 1) * 0.3 + (extra_count / 3) * 0.1
+        
+        # Makro oranları
+        ratio_columns = {}
+        for col in ['fat_ratio', 'carb_ratio', 'protein_ratio']:
+            if col in df.columns:
+                ratio_columns[col] = self._frame_float_column(df, col)
+            else:
+                ratio_columns[col] = (np.zeros(n), np.zeros(n, dtype=bool))
+        if 'sugar_intensity' in df.columns:
+            values, ok = self._frame_float_column(df, 'sugar_intensity')
+            sugar_carb_ratio = np.where(ok, values, 0.0)
+        else:
+            carbs = nutrition['carbohydrates_100g']
+            sugar_carb_ratio = np.divide(
+                nutrition['sugars_100g'], carbs, out=np.zeros(n), where=carbs > 0
+            )
+        
+        # Nutriscore
+        grades = pd.Series(None, index=df.index, dtype=object)
+        for grade_col in ['nutrition_grade_fr', 'nutrition_grade_uk']:
+            if grade_col in df.columns:
+                text = self._frame_text_column(df, grade_col)
+                fill = grades.isna() & text.notna()
+                grades[fill] = text[fill].str.upper()
+        nutriscore_numeric = np.full(n, np.nan)
+        has_numeric = np.zeros(n, dtype=bool)
+        for score_col in ['nutrition-score-fr_100g', 'nutrition-score-uk_100g']:
+            if score_col in df.columns:
+                values, ok = self._frame_float_column(df, score_col)
+                fill = ~has_numeric & ok
+                nutriscore_numeric[fill] = values[fill]
+                has_numeric |= fill
+        grade_to_numeric = {'A': 1.0, 'B': 2.0, 'C': 3.0, 'D': 4.0, 'E': 5.0}
+        grade_numeric = grades.map(grade_to_numeric).to_numpy(dtype='float64')
+        from_grade = ~has_numeric & ~np.isnan(grade_numeric)
+        nutriscore_numeric[from_grade] = grade_numeric[from_grade]
+        has_numeric |= from_grade
+        
+        # İşlenmişlik düzeyi
+        if 'estimated_processing_level' in df.columns:
+            processing_level, processing_error = self._frame_int_column(df, 'estimated_processing_level', 1)
+            row_error |= processing_error
+        else:
+            processing_level = np.ones(n, dtype='int64')
+        
+        # Kategori
+        if 'main_category' in df.columns:
+            main_category = self._frame_text_column(df, 'main_category').fillna('unknown')
+        elif 'categories' in df.columns:
+            categories = self._frame_text_column(df, 'categories')
+            main_category = categories.str.split(',', n=1).str[0].str.strip().fillna('unknown')
+        else:
+            main_category = pd.Series('unknown', index=df.index, dtype=object)
+        
+        # Marka
+        if 'brands' in df.columns:
+            brands = self._frame_text_column(df, 'brands')
+            main_brand = brands.str.split(',', n=1).str[0].str.strip().str.slice(0, 200)
+            main_brand = main_brand.astype(object).where(main_brand.notna(), None)
+        else:
+            main_brand = pd.Series(None, index=df.index, dtype=object)
+        
+        # İçerik analizi
+        if 'ingredients_text' in df.columns:
+            ingredients_text = self._frame_text_column(df, 'ingredients_text').fillna('')
+        else:
+            ingredients_text = pd.Series('', index=df.index, dtype=object)
+        ingredients_text_length = ingredients_text.str.len().to_numpy(dtype='int64')
+        ingredients_word_count = ingredients_text.str.count(r'\S+').to_numpy(dtype='int64')
+        
+        # Ürün kodu
+        if 'code' in df.columns:
+            product_code = self._frame_text_column(df, 'code').fillna('unknown')
+        else:
+            product_code = pd.Series('unknown', index=df.index, dtype=object)
+        
+        # Allerjenler
+        allergen_flags = self.extract_allergen_frame(df)
+        total_allergens = np.sum(list(allergen_flags.values()), axis=0)
+        
+        # --- JSON alanları için satır bazlı dict'ler ---
+        nutrition_fields = list(nutrition.keys())
+        nutrition_lists = [nutrition[field].tolist() for field in nutrition_fields]
+        energy_kcal_list = energy_kcal.tolist()
+        has_energy_kcal_list = has_energy_kcal.tolist()
+        nutrition_vectors = []
+        for i, values in enumerate(zip(*nutrition_lists)):
+            vector = dict(zip(nutrition_fields, values))
+            if has_energy_kcal_list[i]:
+                vector['energy_kcal_100g'] = energy_kcal_list[i]
+            nutrition_vectors.append(vector)
+        
+        allergen_fields = list(allergen_flags.keys()) + ['total_allergens']
+        allergen_lists = [allergen_flags[field].tolist() for field in allergen_fields[:-1]] + [total_allergens.tolist()]
+        allergen_vectors = [dict(zip(allergen_fields, values)) for values in zip(*allergen_lists)]
+        
+        additives_infos = [
+            {'additives_count': count, 'has_risky_additives': risky}
+            for count, risky in zip(additives_count.tolist(), has_risky_additives.tolist())
+        ]
+        
+        grade_list = grades.astype(object).where(grades.notna(), None).tolist()
+        numeric_list = nutriscore_numeric.tolist()
+        has_numeric_list = has_numeric.tolist()
+        nutriscore_datas = []
+        for grade, numeric, present in zip(grade_list, numeric_list, has_numeric_list):
+            data = {}
+            if grade is not None:
+                data['nutriscore_grade'] = grade
+            if present:
+                data['nutriscore_numeric'] = numeric
+            nutriscore_datas.append(data)
+        
+        indicator_fields = list(indicators.keys())
+        indicator_lists = [indicators[field].tolist() for field in indicator_fields]
+        health_indicators = [dict(zip(indicator_fields, values)) for values in zip(*indicator_lists)]
+        
+        fat_values, fat_ok = (arr.tolist() for arr in ratio_columns['fat_ratio'])
+        carb_values, carb_ok = (arr.tolist() for arr in ratio_columns['carb_ratio'])
+        protein_values, protein_ok = (arr.tolist() for arr in ratio_columns['protein_ratio'])
+        macro_ratios = []
+        for i, sugar_carb in enumerate(sugar_carb_ratio.tolist()):
+            ratios = {'fat_ratio': fat_values[i] if fat_ok[i] else 0.0}
+            if carb_ok[i]:
+                # carb_ratio'yu carbohydrates_ratio olarak kaydet (model ile uyumlu)
+                ratios['carbohydrates_ratio'] = carb_values[i]
+            else:
+                ratios['carb_ratio'] = 0.0
+            ratios['protein_ratio'] = protein_values[i] if protein_ok[i] else 0.0
+            ratios['sugar_carb_ratio'] = sugar_carb
+            macro_ratios.append(ratios)
+        
+        features_df = pd.DataFrame({
+            'product_code': product_code.tolist(),
+            'product_name': self._frame_text_column(df, 'product_name').str.slice(0, 500).tolist(),
+            'main_category': main_category.str.slice(0, 200).tolist(),
+            'main_brand': main_brand.tolist(),
+            'main_country': [None] * n,  # Bu bilgi preprocessor'da yok
+            
+            'nutrition_vector': nutrition_vectors,
+            'allergen_vector': allergen_vectors,
+            'additives_info': additives_infos,
+            'nutriscore_data': nutriscore_datas,
+            'health_indicators': health_indicators,
+            'macro_ratios': macro_ratios,
+            
+            'processing_level': processing_level,
+            'nutrition_quality_score': nutrition_quality_score,
+            'health_score': health_score,
+            
+            'ingredients_text': ingredients_text.str.slice(0, 2000).tolist(),
+            'ingredients_text_length': ingredients_text_length,
+            'ingredients_word_count': ingredients_word_count,
+            
+            'data_completeness_score': data_completeness,
+            'is_valid_for_analysis': data_completeness >= 0.5
+        })
+        
+        if row_error.any():
+            logger.warning(f"Feature extraction hatası: {int(row_error.sum())} satır atlandı")
+            features_df = features_df[~row_error].reset_index(drop=True)
+        
+        return features_df
@@ -0,0 +1,396 @@
+# backend/api/pipeline/feature_matrix.py
+
+import json
+import logging
+import math
+import os
+import shutil
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+from django.conf import settings
+
+from api.models.product_features import ProductFeatures
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MATRIX_DIR = os.path.join(settings.BASE_DIR, 'models', 'feature_matrix')
+
+MATRIX_FILE = 'feature_matrix.npy'
+IDS_FILE = 'feature_matrix_ids.npy'
+CODES_FILE = 'feature_matrix_codes.npy'
+CODE_ROWS_FILE = 'feature_matrix_code_rows.npy'
+# Satır başına main_category kodu (int32) ve kod -> kategori adı listesi
+CATEGORIES_FILE = 'feature_matrix_categories.npy'
+CATEGORY_NAMES_FILE = 'feature_matrix_category_names.json'
+# Satır başına product_flags bit maskesi (int64)
+FLAGS_FILE = 'feature_matrix_flags.npy'
+META_FILE = 'feature_matrix.json'
+# Her oluşturma kendi sürüm dizinine (v<zaman>-<pid>) yazılır; okuyucuların açtığı sürümü tek bir işaretçi
+# dosyası belirler. İşaretçi os.replace ile değiştirildiği için okuyucu hiçbir zaman iki sürümün karışımını görmez.
+CURRENT_FILE = 'CURRENT'
+VERSION_PREFIX = 'v'
+# Güncel sürüme ek olarak saklanan eski sürüm sayısı (yeni sürüme geçmemiş süreçler için)
+KEEP_OLD_VERSIONS = 1
+# Süreçteki matrisin güncelliği (işaretçi dosyasının inode/mtime'ı) en fazla bu aralıkla kontrol edilir
+POINTER_CHECK_SECONDS = 2.0
+
+# Sayısal değerler: (JSON alanı, anahtar) - getter metotları ile aynı kaynak (get_energy_kcal() vb.)
+JSON_VALUE_COLUMNS = {
+    'energy_kcal': ('nutrition_vector', 'energy_kcal_100g'),
+    'protein': ('nutrition_vector', 'proteins_100g'),
+    'fat': ('nutrition_vector', 'fat_100g'),
+    'sugar': ('nutrition_vector', 'sugars_100g'),
+    'salt': ('nutrition_vector', 'salt_100g'),
+    'fiber': ('nutrition_vector', 'fiber_100g'),
+    'additives_count': ('additives_info', 'additives_count'),
+    'nutriscore_numeric': ('nutriscore_data', 'nutriscore_numeric'),
+}
+
+# 0/1 bayraklar: (JSON alanı, anahtar) - is_high_*() / has_risky_additives() ile aynı kural (== 1)
+JSON_FLAG_COLUMNS = {
+    'is_high_sugar': ('health_indicators', 'high_sugar'),
+    'is_high_salt': ('health_indicators', 'high_salt'),
+    'is_high_fat': ('health_indicators', 'high_fat'),
+    'is_high_calorie': ('health_indicators', 'high_calorie'),
+    'is_high_protein': ('health_indicators', 'high_protein'),
+    'is_high_fiber': ('health_indicators', 'high_fiber'),
+    'has_risky_additives': ('additives_info', 'has_risky_additives'),
+}
+
+MODEL_FIELD_COLUMNS = [
+    'processing_level', 'nutrition_quality_score', 'health_score', 'data_completeness_score',
+    'is_valid_for_analysis',
+]
+
+FEATURE_MATRIX_COLUMNS = list(JSON_VALUE_COLUMNS) + list(JSON_FLAG_COLUMNS) + MODEL_FIELD_COLUMNS
+
+# ProductFeatures getter/kontrol metodu -> matris sütunu
+METHOD_COLUMNS = {
+    'get_energy_kcal': 'energy_kcal',
+    'get_protein': 'protein',
+    'get_fat': 'fat',
+    'get_sugar': 'sugar',
+    'get_salt': 'salt',
+    'get_fiber': 'fiber',
+    'get_additives_count': 'additives_count',
+    'is_high_sugar': 'is_high_sugar',
+    'is_high_salt': 'is_high_salt',
+    'is_high_fat': 'is_high_fat',
+    'is_high_calorie': 'is_high_calorie',
+    'is_high_protein': 'is_high_protein',
+    'is_high_fiber': 'is_high_fiber',
+    'has_risky_additives': 'has_risky_additives',
+}
+
+_JSON_SOURCE_FIELDS = sorted({field for field, _ in list(JSON_VALUE_COLUMNS.values()) + list(JSON_FLAG_COLUMNS.values())})
+_BUILD_CHUNK_SIZE = 10000
+
+
+def _safe_float(value: Any) -> float:
+    """None, sayıya çevrilemeyen ve sonlu olmayan (NaN/inf) değerler 0 (servislerdeki _safe_float gibi)"""
+    try:
+        value = float(value) if value is not None else 0.0
+    except (TypeError, ValueError):
+        return 0.0
+    return value if math.isfinite(value) else 0.0
+
+
+def _product_row(json_values: Dict[str, Any], field_values: List[Any]) -> List[float]:
+    """Tek ürünün matris satırı (FEATURE_MATRIX_COLUMNS sırasıyla)"""
+    row = []
+    for field, key in JSON_VALUE_COLUMNS.values():
+        row.append(_safe_float((json_values[field] or {}).get(key, 0)))
+    for field, key in JSON_FLAG_COLUMNS.values():
+        row.append(1.0 if (json_values[field] or {}).get(key, 0) == 1 else 0.0)
+    row.extend(_safe_float(value) for value in field_values)
+    return row
+
+
+def _current_version(directory: str) -> Optional[str]:
+    """İşaretçi dosyasındaki güncel sürüm dizininin adı (henüz oluşturulmadıysa None)"""
+    try:
+        with open(os.path.join(directory, CURRENT_FILE), encoding='utf-8') as f:
+            return f.read().strip() or None
+    except OSError:
+        return None
+
+
+def _pointer_stamp(directory: str) -> Optional[tuple]:
+    """İşaretçi dosyasının kimliği (inode, mtime) - os.replace her geçişte yeni bir dosya bırakır"""
+    try:
+        stat = os.stat(os.path.join(directory, CURRENT_FILE))
+    except OSError:
+        return None
+    return stat.st_ino, stat.st_mtime_ns
+
+
+def _switch_version(directory: str, version: str):
+    """İşaretçiyi yeni sürüme çevir ve eski sürümleri sil (açık mmap'ler silinen dosyaları görmeye devam eder)"""
+    tmp_pointer = os.path.join(directory, f'.{CURRENT_FILE}.tmp')
+    with open(tmp_pointer, 'w', encoding='utf-8') as f:
+        f.write(version)
+    os.replace(tmp_pointer, os.path.join(directory, CURRENT_FILE))
+
+    versions = sorted(
+        name for name in os.listdir(directory)
+        if name.startswith(VERSION_PREFIX) and name != version and os.path.isdir(os.path.join(directory, name))
+    )
+    for name in versions[:max(0, len(versions) - KEEP_OLD_VERSIONS)]:
+        shutil.rmtree(os.path.join(directory, name), ignore_errors=True)
+
+
+def _fill_rows(queryset, n_rows: int):
+    """
+    Kayıtları iterator(chunk_size) ile okuyup count() ile önceden ayrılmış dizilere satır satır yaz
+    (JSON alanları çözülmüş kayıtlar bellekte birikmez).
+    count() ile okuma arasında eklenen satırlar için diziler büyütülür, silinenler için sonda kırpılır.
+    """
+    matrix = np.zeros((n_rows, len(FEATURE_MATRIX_COLUMNS)), dtype=np.float32)
+    ids = np.zeros(n_rows, dtype=np.int64)
+    flags = np.zeros(n_rows, dtype=np.int64)
+    codes: List[str] = []
+    categories: List[str] = []
+
+    n_json = len(_JSON_SOURCE_FIELDS)
+    position = 0
+    for record in queryset.iterator(chunk_size=_BUILD_CHUNK_SIZE):
+        if position == len(ids):
+            capacity = len(ids) + _BUILD_CHUNK_SIZE
+            matrix = np.resize(matrix, (capacity, matrix.shape[1]))
+            ids, flags = np.resize(ids, capacity), np.resize(flags, capacity)
+
+        ids[position] = record[0]
+        flags[position] = record[3] or 0
+        matrix[position] = _product_row(dict(zip(_JSON_SOURCE_FIELDS, record[4:4 + n_json])), record[4 + n_json:])
+        codes.append(record[1])
+        categories.append(record[2] or '')
+        position += 1
+
+    return matrix[:position], ids[:position], flags[:position], codes, categories
+
+
+def build_feature_matrix(directory: str = DEFAULT_MATRIX_DIR) -> Dict[str, Any]:
+    """
+    ProductFeatures tablosundan yoğun float32 özellik matrisini (id sırasıyla) ve indeksini oluşturup kaydet.
+    Ingest sonrası yeniden oluşturulur; servisler satırları JSON alanlarına dokunmadan okur.
+    """
+    start = time.perf_counter()
+    built_at = datetime.now(timezone.utc)
+
+    queryset = ProductFeatures.objects.order_by('id').values_list(
+        'id', 'product_code', 'main_category', 'product_flags', *_JSON_SOURCE_FIELDS, *MODEL_FIELD_COLUMNS
+    )
+    matrix, id_array, flag_array, codes, categories = _fill_rows(queryset, queryset.count())
+
+    # Kod indeksi: sıralı kodlar + her kodun matris satırı (searchsorted ile arama, dict gerekmez)
+    encoded_codes = np.asarray([code.encode('utf-8') for code in codes], dtype=bytes)
+    code_order = np.argsort(encoded_codes, kind='stable')
+    category_codes, category_names = pd.factorize(pd.Series(categories, dtype=object))
+
+    version = f'{VERSION_PREFIX}{built_at:%Y%m%dT%H%M%S%f}-{os.getpid()}'
+    version_dir = os.path.join(directory, version)
+    os.makedirs(version_dir)
+    try:
+        for file_name, array in [
+            (MATRIX_FILE, matrix),
+            (IDS_FILE, id_array),
+            (CODES_FILE, encoded_codes[code_order]),
+            (CODE_ROWS_FILE, code_order.astype(np.int64)),
+            (CATEGORIES_FILE, category_codes.astype(np.int32)),
+            (FLAGS_FILE, flag_array),
+        ]:
+            np.save(os.path.join(version_dir, file_name), array)
+        with open(os.path.join(version_dir, CATEGORY_NAMES_FILE), 'w', encoding='utf-8') as f:
+            json.dump([str(name) for name in category_names], f, ensure_ascii=False)
+
+        meta = {
+            'columns': FEATURE_MATRIX_COLUMNS,
+            'rows': len(id_array),
+            'built_at': built_at.isoformat(),
+        }
+        with open(os.path.join(version_dir, META_FILE), 'w', encoding='utf-8') as f:
+            json.dump(meta, f)
+    except BaseException:
+        shutil.rmtree(version_dir, ignore_errors=True)
+        raise
+
+    _switch_version(directory, version)
+    # Bu süreç yeni sürümü POINTER_CHECK_SECONDS beklemeden görsün
+    _loaded_matrix['checked_at'] = None
+
+    duration = time.perf_counter() - start
+    logger.info(f"Özellik matrisi oluşturuldu: {matrix.shape[0]} ürün × {matrix.shape[1]} sütun, "
+                f"{matrix.nbytes / 1024 / 1024:.1f} MB, {duration:.1f} sn -> {version_dir}")
+    return {**meta, 'seconds': duration, 'directory': version_dir}
+
+
+class ProductFeatureMatrix:
+    """
+    Bellek eşlemeli (mmap) ürün özellik matrisi.
+    Satırlar ürün id'si veya ürün kodu ile bulunur; değerler get_*()/is_high_*() metotlarıyla aynıdır.
+    """
+
+    def __init__(self, matrix: np.ndarray, ids: np.ndarray, codes: np.ndarray, code_rows: np.ndarray,
+                 category_codes: np.ndarray, category_names: List[str], flags: np.ndarray, columns: List[str],
+                 built_at: datetime):
+        self.matrix = matrix
+        self.ids = ids
+        self.codes = codes
+        self.code_rows = code_rows
+        self.category_codes = category_codes
+        self.category_names = category_names
+        self.flags = flags
+        self.columns = columns
+        self.column_index = {name: i for i, name in enumerate(columns)}
+        self.built_at = built_at
+
+    @classmethod
+    def load(cls, directory: str = DEFAULT_MATRIX_DIR, version: Optional[str] = None) -> Optional['ProductFeatureMatrix']:
+        """Sürümün (varsayılan: güncel sürüm) matris dosyalarını mmap ile aç; eksik veya tutarsızsa None"""
+        version = version or _current_version(directory)
+        if version is None:
+            logger.warning(f"Özellik matrisi bulunamadı ({directory})")
+            return None
+        directory = os.path.join(directory, version)
+        try:
+            with open(os.path.join(directory, META_FILE), encoding='utf-8') as f:
+                meta = json.load(f)
+
+            matrix = np.load(os.path.join(directory, MATRIX_FILE), mmap_mode='r')
+            ids = np.load(os.path.join(directory, IDS_FILE), mmap_mode='r')
+            codes = np.load(os.path.join(directory, CODES_FILE), mmap_mode='r')
+            code_rows = np.load(os.path.join(directory, CODE_ROWS_FILE), mmap_mode='r')
+            category_codes = np.load(os.path.join(directory, CATEGORIES_FILE), mmap_mode='r')
+            flags = np.load(os.path.join(directory, FLAGS_FILE), mmap_mode='r')
+            with open(os.path.join(directory, CATEGORY_NAMES_FILE), encoding='utf-8') as f:
+                category_names = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Özellik matrisi yüklenemedi ({directory}): {e}")
+            return None
+
+        if meta.get('columns') != FEATURE_MATRIX_COLUMNS or not (
+            matrix.shape[0] == len(ids) == len(codes) == len(code_rows) == len(category_codes) == len(flags) == meta.get('rows')
+        ):
+            logger.warning(f"Özellik matrisi eski veya tutarsız, yeniden oluşturulmalı: {directory}")
+            return None
+
+        return cls(matrix, ids, codes, code_rows, category_codes, category_names, flags, meta['columns'],
+                   datetime.fromisoformat(meta['built_at']))
+
+    def __len__(self) -> int:
+        return self.matrix.shape[0]
+
+    def is_stale(self) -> bool:
+        """Matris oluşturulduktan sonra ürün eklendi/güncellendi/silindiyse True"""
+        return (
+            ProductFeatures.objects.filter(updated_at__gt=self.built_at).exists()
+            or ProductFeatures.objects.count() != len(self)
+        )
+
+    def column(self, name: str) -> np.ndarray:
+        """Tek bir sütunun tüm ürünler için kopyası"""
+        return np.array(self.matrix[:, self.column_index[name]])
+
+    def rows_for_ids(self, product_ids: Iterable[int]) -> np.ndarray:
+        """Ürün id'lerinin satır numaraları (matriste olmayanlar -1)"""
+        product_ids = np.asarray(list(product_ids), dtype=np.int64)
+        positions = np.searchsorted(self.ids, product_ids)
+        positions = np.minimum(positions, max(len(self.ids) - 1, 0))
+        found = len(self.ids) > 0 and (self.ids[positions] == product_ids)
+        return np.where(found, positions, -1)
+
+    def rows_for_codes(self, product_codes: Iterable[str]) -> np.ndarray:
+        """Ürün kodlarının satır numaraları (matriste olmayanlar -1)"""
+        encoded = np.asarray([str(code).encode('utf-8') for code in product_codes], dtype=bytes)
+        if len(self.codes) == 0 or len(encoded) == 0:
+            return np.full(len(encoded), -1, dtype=np.int64)
+        positions = np.minimum(np.searchsorted(self.codes, encoded), len(self.codes) - 1)
+        found = self.codes[positions] == encoded
+        return np.where(found, self.code_rows[positions], -1)
+
+    def values(self, rows: np.ndarray, columns: Optional[List[str]] = None) -> np.ndarray:
+        """Verilen satırların (isteğe bağlı sütun alt kümesi) kopyası"""
+        block = self.matrix[np.asarray(rows, dtype=np.int64)]
+        if columns is not None:
+            block = block[:, [self.column_index[name] for name in columns]]
+        return np.array(block)
+
+    def product_values(self, product: ProductFeatures) -> Optional[Dict[str, float]]:
+        """
+        Model nesnesinin matris değerleri - matriste yoksa veya matris oluşturulduktan sonra
+        güncellendiyse None (çağıran getter metotlarına döner)
+        """
+        return self.products_values([product])[0]
+
+    def products_values(self, products: List[ProductFeatures]) -> List[Optional[Dict[str, float]]]:
+        """product_values'un toplu hali: tüm ürünlerin satırları tek searchsorted ve tek blok okumayla alınır"""
+        rows = self.rows_for_ids([product.pk if product.pk is not None else -1 for product in products])
+        usable = [
+            row >= 0 and (getattr(product, 'updated_at', None) is None or product.updated_at <= self.built_at)
+            for product, row in zip(products, rows)
+        ]
+        block = iter(self.values(rows[np.asarray(usable, dtype=bool)]))
+        # float32'nin en kısa gösterimi (12.3 -> 12.300000190734863 olmasın)
+        return [
+            {name: float(str(value)) for name, value in zip(self.columns, next(block))} if ok else None
+            for ok in usable
+        ]
+
+
+# Süreç (worker) başına bir kez yüklenen matris; işaretçi yeni bir sürümü gösterince yeniden açılır
+_loaded_matrix: Dict[str, Any] = {
+    'directory': None, 'version': None, 'matrix': None, 'pointer': None, 'checked_at': None,
+}
+
+
+def get_feature_matrix(directory: str = DEFAULT_MATRIX_DIR) -> Optional[ProductFeatureMatrix]:
+    """
+    Süreç içinde paylaşılan özellik matrisi (yoksa None).
+    İşaretçi dosyası en fazla POINTER_CHECK_SECONDS'ta bir stat edilir ve sadece değiştiyse okunur.
+    """
+    now = time.monotonic()
+    if (_loaded_matrix['directory'] == directory and _loaded_matrix['checked_at'] is not None
+            and now - _loaded_matrix['checked_at'] < POINTER_CHECK_SECONDS):
+        return _loaded_matrix['matrix']
+
+    pointer = _pointer_stamp(directory)
+    if _loaded_matrix['directory'] != directory or _loaded_matrix['pointer'] != pointer:
+        version = _current_version(directory) if pointer is not None else None
+        if _loaded_matrix['directory'] != directory or _loaded_matrix['version'] != version:
+            _loaded_matrix.update({
+                'directory': directory,
+                'version': version,
+                'matrix': ProductFeatureMatrix.load(directory, version) if version is not None else None,
+            })
+        _loaded_matrix['pointer'] = pointer
+    _loaded_matrix['checked_at'] = now
+    return _loaded_matrix['matrix']
+
+
+def prefetch_matrix_values(products: Iterable[ProductFeatures]) -> None:
+    """
+    Ürünlerin matris değerlerini tek vektörel aramayla alıp nesnelerde önbelleğe al;
+    ardından product_matrix_values (product_to_data, getter'lar) matrise tekrar gitmez.
+    """
+    pending = [product for product in products if '_feature_matrix_values' not in vars(product)]
+    if not pending:
+        return
+    matrix = get_feature_matrix()
+    values = matrix.products_values(pending) if matrix is not None else [None] * len(pending)
+    for product, product_values in zip(pending, values):
+        vars(product)['_feature_matrix_values'] = product_values
+
+
+def product_matrix_values(product: ProductFeatures) -> Optional[Dict[str, float]]:
+    """
+    Ürünün matris değerleri (nesne üzerinde önbelleğe alınır, toplu kullanımda bkz. prefetch_matrix_values).
+    Matris yoksa, ürün matriste değilse veya sonradan güncellendiyse None.
+    """
+    cache = vars(product)
+    if '_feature_matrix_values' not in cache:
+        prefetch_matrix_values([product])
+    return cache['_feature_matrix_values']
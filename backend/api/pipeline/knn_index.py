@@ -0,0 +1,100 @@
+# backend/api/pipeline/knn_index.py
+
+import logging
+import time
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from .feature_matrix import ProductFeatureMatrix, get_feature_matrix
+from .product_flags import compatible_rows
+from .similarity_graph import (
+    CATEGORY_WEIGHT,
+    NUTRIENT_COLUMNS,
+    NUTRITION_WEIGHT,
+    PROCESSING_WEIGHT,
+    UNCATEGORIZED,
+    normalize_nutrient_vectors,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class ProductKNNIndex:
+    """
+    Analize uygun ürünler üzerinde bellek içi, kesin (brute force) k-NN indeksi.
+    Skor benzerlik grafiğiyle aynıdır: kategori eşleşmesi + besin kosinüs benzerliği + işlenmişlik yakınlığı.
+    """
+
+    def __init__(self, matrix: ProductFeatureMatrix):
+        start = time.perf_counter()
+        rows = np.flatnonzero(matrix.column('is_valid_for_analysis') == 1)
+
+        self.ids = np.asarray(matrix.ids[rows], dtype=np.int64)
+        self.vectors = normalize_nutrient_vectors(matrix.values(rows, NUTRIENT_COLUMNS))
+        self.processing = matrix.values(rows, ['processing_level'])[:, 0]
+        self.flags = np.asarray(matrix.flags[rows], dtype=np.int64)
+
+        # Kategorisi olmayan ürünler hiçbir ürünle aynı kategoride sayılmaz (-1)
+        categories = np.asarray(matrix.category_codes[rows], dtype=np.int32)
+        uncategorized = [i for i, name in enumerate(matrix.category_names) if name.strip() in UNCATEGORIZED]
+        self.categories = np.where(np.isin(categories, uncategorized), -1, categories)
+
+        logger.info(f"k-NN indeksi oluşturuldu: {len(self.ids)} ürün, {time.perf_counter() - start:.2f} sn")
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def _position(self, product_id: int) -> int:
+        position = int(np.searchsorted(self.ids, product_id))
+        if position < len(self.ids) and self.ids[position] == product_id:
+            return position
+        return -1
+
+    def query(self, product_id: int, k: int = 100, exclude_flags: int = 0) -> Optional[List[int]]:
+        """
+        Ürüne en benzer k ürünün id'leri (benzerlik sırasıyla, ürünün kendisi hariç).
+        exclude_flags bitlerinden birini taşıyan ürünler komşu olarak dönmez. Ürün indekste yoksa None.
+        """
+        position = self._position(product_id)
+        if position < 0:
+            return None
+
+        nutrition = np.clip(self.vectors @ self.vectors[position], 0.0, 1.0)
+        scores = NUTRITION_WEIGHT * nutrition + PROCESSING_WEIGHT * (
+            np.abs(self.processing - self.processing[position]) <= 1
+        )
+        category = self.categories[position]
+        if category >= 0:
+            scores = scores + CATEGORY_WEIGHT * (self.categories == category)
+        if exclude_flags:
+            scores[~compatible_rows(self.flags, exclude_flags)] = -1.0
+        scores[position] = -1.0
+
+        k = min(k, len(scores) - 1)
+        if k <= 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind='stable')]
+        top = top[scores[top] >= 0]
+        return self.ids[top].tolist()
+
+
+# Süreç başına bir indeks; özellik matrisi yeniden yüklendiğinde (ingest sonrası) yeniden oluşturulur
+_loaded_index: Dict[str, Any] = {'matrix': None, 'index': None}
+
+
+def get_knn_index() -> Optional[ProductKNNIndex]:
+    """Süreç içinde paylaşılan k-NN indeksi (özellik matrisi yoksa None)"""
+    matrix = get_feature_matrix()
+    if matrix is None:
+        return None
+
+    if _loaded_index['matrix'] is not matrix:
+        try:
+            index = ProductKNNIndex(matrix)
+        except Exception as e:
+            logger.error(f"k-NN indeksi oluşturulamadı: {e}")
+            index = None
+        _loaded_index.update({'matrix': matrix, 'index': index})
+    return _loaded_index['index']
@@ -0,0 +1,377 @@
+# backend/api/pipeline/parallel_ingest.py
+
+import logging
+import multiprocessing
+import os
+import queue
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Bir byte aralığının hedef boyutu - aralık sayısı en az workers * RANGES_PER_WORKER olur
+TARGET_RANGE_BYTES = 64 * 1024 * 1024
+RANGES_PER_WORKER = 4
+
+# Writer kuyruğunda bekleyebilecek en fazla parça (bellek için geri basınç)
+WRITER_QUEUE_SIZE = 8
+
+# Kuyruk/sonuç beklemelerinde karşı sürecin hâlâ çalıştığı bu aralıklarla kontrol edilir
+POLL_SECONDS = 5
+
+# Extraction worker'larında bir kez oluşturulan nesneler
+_worker_state: Dict[str, Any] = {}
+
+
+def _ensure_django():
+    """spawn ile başlatılan süreçlerde Django'yu hazırla (fork'ta zaten hazırdır)"""
+    import django
+    from django.apps import apps
+
+    if not apps.ready:
+        os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
+        django.setup()
+
+
+def _init_extract_worker(file_path: str, encoding: str, read_options: Dict[str, Any], work_queues, abort):
+    """Extraction worker başlangıcı - preprocessor ve pipeline süreç başına bir kez oluşturulur"""
+    _ensure_django()
+    from aimodels.ml_models.data_preprocessing import OpenFoodFactsPreprocessor
+    from api.pipeline.product_data_pipeline import ProductDataPipeline
+
+    _worker_state.update({
+        'file_path': file_path,
+        'encoding': encoding,
+        'read_options': read_options,
+        'work_queues': work_queues,
+        'abort': abort,
+        'preprocessor': OpenFoodFactsPreprocessor(),
+        'pipeline': ProductDataPipeline(),
+    })
+
+
+def _extract_byte_range(task: Tuple[int, Tuple[int, int]]) -> Dict[str, Any]:
+    """
+    Bir byte aralığını önişleyip özelliklerini çıkar ve product_code hash'ine göre doğrudan writer
+    kuyruklarına koy. Ardından her writer'a ('range_done', i, ok) işareti gönderilir; ana sürece
+    sadece satır sayısı döner (veri ana süreçten geçmez).
+    """
+    range_index, (start, end) = task
+    work_queues = _worker_state['work_queues']
+    abort = _worker_state['abort']
+    rows, columns, error = 0, 0, None
+    try:
+        df_processed = _worker_state['preprocessor'].preprocess_byte_range(
+            _worker_state['file_path'], start, end,
+            encoding=_worker_state['encoding'],
+            read_options=_worker_state['read_options']
+        )
+        features = _worker_state['pipeline'].extract_features(df_processed) if len(df_processed) else pd.DataFrame()
+        rows, columns = features.shape
+    except Exception as e:
+        logger.error(f"Byte aralığı işleme hatası ({start}-{end}): {e}")
+        features, error = pd.DataFrame(), str(e)
+
+    try:
+        if not features.empty:
+            for writer_id, part in route_to_writers(features, len(work_queues)).items():
+                _put_to_writer(work_queues[writer_id], ('part', range_index, part), lambda: not abort.is_set())
+        del features
+        for work_queue in work_queues:
+            _put_to_writer(work_queue, ('range_done', range_index, error is None), lambda: not abort.is_set())
+    except RuntimeError as e:
+        error = error or str(e)
+
+    return {'range_index': range_index, 'start': start, 'end': end, 'rows': rows, 'columns': columns, 'error': error}
+
+
+class RangeReorderBuffer:
+    """
+    Writer'a farklı worker'lardan sırasız gelen aralık parçalarını dosya sırasına koyar.
+    Bir aralık, kendisi ve önceki tüm aralıklar bittiğinde (range_done) yazılmaya hazırdır; böylece
+    aynı ürün kodu birden fazla aralıkta geçse de kayıtlar sıralı ingest'teki sırayla yazılır.
+    """
+
+    def __init__(self, first_range: int = 0):
+        self.next_range = first_range
+        self.parts: Dict[int, List[pd.DataFrame]] = {}
+        self.done: Dict[int, bool] = {}
+
+    def add_part(self, range_index: int, part: pd.DataFrame):
+        self.parts.setdefault(range_index, []).append(part)
+
+    def mark_done(self, range_index: int, ok: bool) -> List[Tuple[int, List[pd.DataFrame], bool]]:
+        """Aralığı bitmiş işaretle; sırası gelen (range_index, parçalar, extraction başarılı mı) listesini döndür"""
+        self.done[range_index] = ok
+        ready = []
+        while self.next_range in self.done:
+            ready.append((self.next_range, self.parts.pop(self.next_range, []), self.done.pop(self.next_range)))
+            self.next_range += 1
+        return ready
+
+    @property
+    def pending(self) -> int:
+        """Henüz yazılmamış (sırası gelmemiş) aralık sayısı"""
+        return len(set(self.parts) | set(self.done))
+
+
+def _db_writer(writer_id: int, batch_size: int, loader: str, upsert: bool, work_queue, result_queue,
+               ack_queue):
+    """
+    Extraction worker'larından gelen özellik parçalarını veritabanına yaz.
+    Her writer kendi süreç ve veritabanı bağlantısı ile çalışır. Parçalar RangeReorderBuffer ile dosya sırasıyla
+    yazılır; her aralık yazıldığında hatasız olup olmadığı ack_queue'ya (writer_id, i, ok) olarak bildirilir.
+    """
+    _ensure_django()
+    from django.db import connection
+    from api.pipeline.product_data_pipeline import ProductDataPipeline
+
+    pipeline = ProductDataPipeline(batch_size=batch_size, loader=loader, upsert=upsert)
+    buffer = RangeReorderBuffer()
+    # Kaydetme metotları DB hatalarını yutup error_count'u artırır; aralık, son onaydan beri hata yoksa temizdir
+    errors_at_last_ack = 0
+    try:
+        while True:
+            item = work_queue.get()
+            if item is None:
+                break
+            kind, range_index, payload = item
+            if kind == 'part':
+                buffer.add_part(range_index, payload)
+                continue
+            for ready_index, parts, extracted in buffer.mark_done(range_index, payload):
+                for part in parts:
+                    pipeline._save_to_database(part)
+                ack_queue.put((writer_id, ready_index, extracted and pipeline.error_count == errors_at_last_ack))
+                errors_at_last_ack = pipeline.error_count
+        if buffer.pending:
+            logger.warning(f"DB writer {writer_id}: {buffer.pending} aralık tamamlanmadığı için yazılmadı")
+    except Exception as e:
+        logger.error(f"DB writer {writer_id} hatası: {e}")
+    finally:
+        connection.close()
+        result_queue.put({
+            'writer_id': writer_id,
+            'processed': pipeline.processed_count,
+            'errors': pipeline.error_count,
+            'upsert_stats': pipeline.upsert_stats,
+        })
+
+
+def _put_to_writer(work_queue, item, writer_alive: Callable[[], bool]):
+    """Writer kuyruğuna ekle - writer ölmüşse sonsuza kadar bekleme"""
+    while True:
+        try:
+            work_queue.put(item, timeout=POLL_SECONDS)
+            return
+        except queue.Full:
+            if not writer_alive():
+                raise RuntimeError("DB writer süreci beklenmedik şekilde sonlandı")
+
+
+def _collect_writer_results(writers: List[multiprocessing.Process], result_queue) -> List[Dict[str, Any]]:
+    """Writer'ların sonuçlarını topla ve süreçleri bekle"""
+    results = []
+    while len(results) < len(writers):
+        try:
+            results.append(result_queue.get(timeout=5))
+        except queue.Empty:
+            if not any(writer.is_alive() for writer in writers) and result_queue.empty():
+                logger.error(f"{len(writers) - len(results)} DB writer sonuç döndürmeden sonlandı")
+                break
+
+    for writer in writers:
+        writer.join()
+    return results
+
+
+def _collect_acks(ack_queue, acks: Dict[int, set], failed: set) -> None:
+    """Writer onaylarını topla - hatalı yazılan aralıklar failed'a eklenir"""
+    while True:
+        try:
+            writer_id, range_index, ok = ack_queue.get_nowait()
+        except queue.Empty:
+            break
+        acks.setdefault(range_index, set()).add(writer_id)
+        if not ok:
+            failed.add(range_index)
+
+
+def _advance_checkpoint(checkpoint, byte_ranges: List[Tuple[int, int]], range_rows: Dict[int, int],
+                        acks: Dict[int, set], failed: set, next_range: int, n_writers: int) -> int:
+    """
+    Tüm writer'ların hatasız onayladığı aralıklar için checkpoint'i dosya sırasıyla ilerlet.
+    Hatalı (extraction/yazma) veya onaylanmamış bir aralıkta durulur; devam edildiğinde o aralıktan başlanır.
+    Onaylar worker sonucundan önce gelebilir; satır sayısı (range_rows) henüz bilinmeyen aralıkta da beklenir.
+    """
+    while (next_range < len(byte_ranges) and next_range not in failed and next_range in range_rows
+           and len(acks.get(next_range, ())) == n_writers):
+        checkpoint.advance(byte_ranges[next_range][1], range_rows.get(next_range, 0), checkpoint.batch_number + 1)
+        next_range += 1
+    return next_range
+
+
+def route_to_writers(features: pd.DataFrame, n_writers: int) -> Dict[int, pd.DataFrame]:
+    """
+    Satırları product_code hash'ine göre writer'lara dağıt.
+    Aynı ürün kodu her zaman aynı writer'a gider; writer'lar arasında çakışma (ve kilitlenme) olmaz,
+    dosyada ilk geçen kayıt (ignore_conflicts ile) korunur.
+    """
+    if n_writers == 1:
+        return {0: features}
+
+    codes = features['product_code'].astype(str)
+    writer_ids = pd.util.hash_pandas_object(codes, index=False).to_numpy() % n_writers
+    return {int(writer_id): part for writer_id, part in features.groupby(writer_ids, sort=False)}
+
+
+def run_parallel_pipeline(
+    raw_tsv_path: str,
+    workers: int,
+    db_writers: Optional[int] = None,
+    batch_size: int = 1000,
+    loader: str = 'orm',
+    upsert: bool = False,
+    resume: Optional[bool] = None
+) -> Dict[str, Any]:
+    """
+    Ham TSV'yi byte aralıklarına bölüp önişleme + feature extraction'ı süreç havuzunda,
+    veritabanı kaydını ayrı writer süreçlerinde yap.
+    resume verilirse (True/False) checkpoint tutulur; True ise kayıtlı checkpoint'ten devam edilir.
+    """
+    from django.db import connections
+    from aimodels.ml_models.data_preprocessing import OpenFoodFactsPreprocessor
+    from api.models.ingest_checkpoint import IngestCheckpoint
+
+    db_writers = db_writers or max(1, workers // 4)
+    logger.info(f"Paralel pipeline başlatılıyor: {workers} worker, {db_writers} DB writer")
+
+    preprocessor = OpenFoodFactsPreprocessor()
+    encoding = preprocessor.detect_encoding(raw_tsv_path)
+    read_options = preprocessor.get_projected_read_options(raw_tsv_path, encoding)
+
+    checkpoint = IngestCheckpoint.start(raw_tsv_path, resume) if resume is not None else None
+    start_offset = checkpoint.byte_offset if checkpoint else 0
+    if checkpoint and checkpoint.completed:
+        logger.info(f"Dosya zaten tamamen işlenmiş (checkpoint): {checkpoint}")
+        byte_ranges = []
+    else:
+        if start_offset:
+            logger.info(f"Checkpoint'ten devam ediliyor: byte {start_offset}/{checkpoint.file_size}, "
+                        f"batch {checkpoint.batch_number}")
+        remaining = os.path.getsize(raw_tsv_path) - start_offset
+        n_ranges = max(workers * RANGES_PER_WORKER, remaining // TARGET_RANGE_BYTES + 1)
+        byte_ranges = preprocessor.split_byte_ranges(raw_tsv_path, n_ranges, start_offset=start_offset or None)
+    logger.info(f"Dosya {len(byte_ranges)} byte aralığına bölündü")
+
+    # Alt süreçler ebeveynin veritabanı bağlantısını paylaşmasın
+    connections.close_all()
+
+    context = multiprocessing.get_context()
+    result_queue = context.Queue()
+    ack_queue = context.Queue()
+    # Bir writer ölürse worker'ların kuyruğa koyma beklemesini bitirir
+    abort = context.Event()
+    work_queues = [context.Queue(maxsize=WRITER_QUEUE_SIZE) for _ in range(db_writers)]
+    writers = [
+        context.Process(
+            target=_db_writer,
+            args=(writer_id, batch_size, loader, upsert, work_queues[writer_id], result_queue, ack_queue),
+            name=f'db-writer-{writer_id}'
+        )
+        for writer_id in range(db_writers)
+    ]
+    for writer in writers:
+        writer.start()
+
+    total_rows = 0
+    feature_columns = 0
+    range_rows: Dict[int, int] = {}
+    acks: Dict[int, set] = {}
+    failed: set = set()
+    next_range = 0
+    try:
+        with context.Pool(
+            processes=workers,
+            initializer=_init_extract_worker,
+            initargs=(raw_tsv_path, encoding, read_options, work_queues, abort)
+        ) as pool:
+            # Veriyi worker'lar writer'lara doğrudan gönderir; ana süreç sadece aralık sayımı ve onaylarla ilgilenir
+            results = pool.imap_unordered(_extract_byte_range, enumerate(byte_ranges))
+            for completed in range(1, len(byte_ranges) + 1):
+                while True:
+                    try:
+                        result = results.next(timeout=POLL_SECONDS)
+                        break
+                    except multiprocessing.TimeoutError:
+                        dead = [writer.name for writer in writers if not writer.is_alive()]
+                        if dead:
+                            abort.set()
+                            raise RuntimeError(f"DB writer süreci beklenmedik şekilde sonlandı: {dead[0]}")
+                    finally:
+                        _collect_acks(ack_queue, acks, failed)
+                        if checkpoint:
+                            next_range = _advance_checkpoint(
+                                checkpoint, byte_ranges, range_rows, acks, failed, next_range, db_writers
+                            )
+
+                range_index = result['range_index']
+                if result['error']:
+                    failed.add(range_index)
+                    continue
+
+                total_rows += result['rows']
+                feature_columns = max(feature_columns, result['columns'])
+                range_rows[range_index] = result['rows']
+                logger.info(f"Aralık {completed}/{len(byte_ranges)} işlendi: toplam {total_rows} ürün")
+
+            # terminate() (with çıkışı) kuyruk besleme thread'leri boşalmadan worker'ları öldürür ve writer
+            # kuyruklarını bozabilir; worker'lar normal sonlanıp bekleyen parçaları kuyruğa yazsın
+            pool.close()
+            pool.join()
+    finally:
+        for writer_id, writer in enumerate(writers):
+            if writer.is_alive():
+                _put_to_writer(work_queues[writer_id], None, writer.is_alive)
+        writer_results = _collect_writer_results(writers, result_queue)
+        # Writer'lar bittiğine göre tüm onaylar kuyrukta
+        _collect_acks(ack_queue, acks, failed)
+        if checkpoint:
+            next_range = _advance_checkpoint(
+                checkpoint, byte_ranges, range_rows, acks, failed, next_range, db_writers
+            )
+            if not byte_ranges and not checkpoint.completed:
+                checkpoint.advance(checkpoint.file_size, 0, checkpoint.batch_number)
+
+    # Extraction'ı ya da yazması hatalı olan veya tüm writer'larca onaylanmayan (writer öldü) aralıklar
+    failed_ranges = sum(
+        1 for range_index in range(len(byte_ranges))
+        if range_index in failed or len(acks.get(range_index, ())) < db_writers
+    )
+    processed = sum(result['processed'] for result in writer_results)
+    errors = sum(result['errors'] for result in writer_results)
+    summary = {
+        'total_processed': processed,
+        'total_errors': errors,
+        'success_rate': (processed / (processed + errors)) * 100 if (processed + errors) > 0 else 0,
+        'final_data_shape': (total_rows, feature_columns),
+        'workers': workers,
+        'db_writers': db_writers,
+        'byte_ranges': len(byte_ranges),
+        'failed_ranges': failed_ranges,
+    }
+    if checkpoint:
+        summary['checkpoint'] = {
+            'byte_offset': checkpoint.byte_offset,
+            'batch_number': checkpoint.batch_number,
+            'completed': checkpoint.completed,
+        }
+    if upsert:
+        summary['upsert_stats'] = {
+            key: sum(result['upsert_stats'][key] for result in writer_results)
+            for key in ['inserted', 'updated', 'unchanged']
+        }
+
+    logger.info(f"Paralel pipeline tamamlandı: {summary}")
+    return summary
@@ -0,0 +1,142 @@
+# backend/api/pipeline/product_comparison.py
+
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional
+
+from django.conf import settings
+from django.db import connection
+
+from aimodels.ml_models.ml_product_score_service import ml_product_score_service
+from aimodels.product_analysis import ProductAnalyzer
+from api.clients.openfoodfacts import DEFAULT_POOL_SIZE
+from api.clients.product_repository import get_product_repository
+from api.models.product_features import ProductFeatures
+
+logger = logging.getLogger(__name__)
+
+# Yerelde olmayan ürünler süreç başına paylaşılan bir thread havuzunda alınır. Boyutu OpenFoodFacts bağlantı
+# havuzu kadardır: aynı anda gelen karşılaştırmalar da upstream'e en fazla bu kadar eşzamanlı istek atar
+_executor: Dict[str, Optional[ThreadPoolExecutor]] = {'executor': None}
+_executor_lock = threading.Lock()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    if _executor['executor'] is None:
+        with _executor_lock:
+            if _executor['executor'] is None:
+                _executor['executor'] = ThreadPoolExecutor(
+                    max_workers=getattr(settings, 'OPENFOODFACTS_POOL_SIZE', DEFAULT_POOL_SIZE),
+                    thread_name_prefix='product-compare',
+                )
+    return _executor['executor']
+
+
+def get_local_products(product_codes: Iterable[str]) -> Dict[str, ProductFeatures]:
+    """Analiz için geçerli ürünler tek product_code__in sorgusunda (ürün kodu -> ProductFeatures)"""
+    products = ProductFeatures.objects.filter(product_code__in=list(product_codes), is_valid_for_analysis=True)
+    return {product.product_code: product for product in products}
+
+
+def _fetch_remote_document(product_code: str) -> Optional[Dict[str, Any]]:
+    """Yerelde olmayan ürünün belgesi (product_documents veya API); bulunamazsa ya da hata olursa None"""
+    try:
+        return get_product_repository().get(product_code)
+    except Exception as e:
+        logger.warning(f"Karşılaştırma için ürün alınamadı ({product_code}): {e}")
+        return None
+    finally:
+        # Havuz thread'inin veritabanı bağlantısı (belge okuma/yazma) açık kalmasın
+        connection.close()
+
+
+def score_local_products(user_profile: Dict[str, Any], products: List[ProductFeatures]) -> Dict[str, Optional[Dict[str, Any]]]:
+    """Yerel ürünlerin ML skorları tek transform/predict ile (veritabanı sorgusu yapmaz)"""
+    if not products:
+        return {}
+    try:
+        return ml_product_score_service.score_products(user_profile, products)
+    except Exception as e:
+        logger.warning(f"Karşılaştırma skorlama hatası: {e}")
+        return {}
+
+
+def _first(value: Any) -> str:
+    return str(value).split(',')[0].strip() if value else ''
+
+
+def _basic_compared_product(product_code: str, document: Dict[str, Any], user_profile: Dict[str, Any],
+                            analyzer: ProductAnalyzer) -> ProductFeatures:
+    """
+    Sadece API'de bulunan ürün: belgeden kaydedilmeyen bir ProductFeatures (yanıt serializer'ı yerel ürünlerle
+    aynı) ve kural tabanlı sağlık skoru (0-10)
+    """
+    try:
+        processing_level = int(document.get('nova_group') or 1)
+    except (TypeError, ValueError):
+        processing_level = 1
+    product = ProductFeatures(
+        product_code=product_code,
+        product_name=document.get('product_name', ''),
+        main_category=_first(document.get('categories')),
+        main_brand=_first(document.get('brands')),
+        nutrition_vector=dict(document.get('nutriments') or {}),
+        nutriscore_data={'nutriscore_grade': str(document.get('nutriscore_grade') or '').lower()},
+        processing_level=processing_level,
+        ingredients_text=document.get('ingredients_text') or '',
+    )
+
+    basic_analysis = analyzer.analyze_product_complete(document, user_profile)
+    product.final_score = basic_analysis.get('health_score', 50) / 10.0
+    product.ml_analysis = {'basic_analysis': True}
+    return product
+
+
+def build_compared_products(product_codes: Iterable[str], local_products: Dict[str, ProductFeatures],
+                            score_results: Dict[str, Optional[Dict[str, Any]]],
+                            remote_documents: Dict[str, Optional[Dict[str, Any]]],
+                            user_profile: Dict[str, Any]) -> List[Any]:
+    """
+    Karşılaştırılacak ürünler, istek sırasıyla: yerel ürünlere final_score/ml_analysis eklenir,
+    uzak belgeler kural tabanlı analiz edilir (tek analyzer). Hiçbir yerde bulunamayan ürünler atlanır.
+    """
+    compared_products = []
+    analyzer = None
+    for product_code in dict.fromkeys(product_codes):
+        try:
+            product = local_products.get(product_code)
+            if product is not None:
+                score_result = score_results.get(product_code)
+                product.final_score = score_result.get('personalized_score', 5.0) if score_result else 5.0
+                product.ml_analysis = score_result.get('analysis', {}) if score_result else {}
+                compared_products.append(product)
+            elif remote_documents.get(product_code):
+                if analyzer is None:
+                    analyzer = ProductAnalyzer()
+                compared_products.append(
+                    _basic_compared_product(product_code, remote_documents[product_code], user_profile, analyzer)
+                )
+        except Exception as e:
+            logger.warning(f"Ürün karşılaştırma hatası ({product_code}): {e}")
+    return compared_products
+
+
+def get_compared_products(user_profile: Dict[str, Any], product_codes: Iterable[str]) -> List[Any]:
+    """
+    Karşılaştırma: tüm kodlar tek sorguda çözülür, yerelde olmayanlar sınırlı havuzda paralel alınırken
+    yerel ürünler toplu skorlanır. Süre, ürün sayısının toplamı yerine en yavaş uzak istek kadardır.
+    """
+    product_codes = list(dict.fromkeys(product_codes))
+    local_products = get_local_products(product_codes)
+
+    executor = _get_executor()
+    futures = {
+        product_code: executor.submit(_fetch_remote_document, product_code)
+        for product_code in product_codes if product_code not in local_products
+    }
+
+    score_results = score_local_products(user_profile, list(local_products.values()))
+    remote_documents = {product_code: future.result() for product_code, future in futures.items()}
+
+    return build_compared_products(product_codes, local_products, score_results, remote_documents, user_profile)
@@ -2,28 +2,64 @@ import pandas as pd
 import numpy as np
 import logging
 from django.db import models
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Iterable
 from django.db import transaction, IntegrityError
 from api.models.product_features import ProductFeatures, ProductSimilarity
+from api.models.ingest_checkpoint import IngestCheckpoint
 import json
+import os
 import unicodedata
 import re
 
 # Feature extractor'ı import et
 from .feature_extractor import ProductFeatureExtractor
+from .copy_loader import COPY_COLUMNS, DERIVED_COLUMNS, JSON_COLUMNS, LOAD_COLUMNS, ProductFeaturesCopyLoader, compute_content_hash
+from .product_flags import compute_product_flags
+from .product_documents import DOCUMENT_COLUMN, build_product_documents, save_product_documents
+from .columnar_store import read_snapshot, snapshot_writer, write_snapshot
 
 # Configure logger
 logger = logging.getLogger(__name__)
 
+# COPY loader'ın tek transaction'da yazdığı en fazla satır
+COPY_BATCH_SIZE = 50000
+
+# Checkpoint'li ingest'te bir batch'in (byte aralığı) yaklaşık boyutu
+CHECKPOINT_RANGE_BYTES = 64 * 1024 * 1024
+
+# Kaydedilen özellikleri besleyen metin sütunları - Unicode temizliği sadece bunlara uygulanır
+PERSISTED_TEXT_COLUMNS = [
+    'code', 'product_name', 'main_category', 'categories', 'brands', 'ingredients_text',
+    'allergens', 'allergens_en', 'traces', 'traces_en', 'nutrition_grade_fr', 'nutrition_grade_uk',
+]
+
+# Kontrol karakterleri, null byte, U+FFFD ve tek başına kalmış surrogate'ler (utf-8'e kodlanamaz)
+UNICODE_JUNK_PATTERN = re.compile('[\x00-\x1f\x7f-\x9f\ufffd\ud800-\udfff]')
+
+# Upsert'te mevcut üründe güncellenen alanlar (created_at korunur)
+UPSERT_UPDATE_FIELDS = [name for name in LOAD_COLUMNS if name != 'product_code'] + ['updated_at']
+
 class ProductDataPipeline:
     """
     Önişlenmiş OpenFoodFacts verilerini ProductFeatures modeline kaydetme pipeline'ı
     """
     
-    def __init__(self, batch_size: int = 1000):
+    def __init__(self, batch_size: int = 1000, vectorized_features: bool = True, loader: str = 'orm',
+                 upsert: bool = False, features_output_path: Optional[str] = None):
         self.batch_size = batch_size
+        # True: Unicode temizliği ve özellikler sütun işlemleriyle yapılır, False: eski hücre/satır bazlı yol
+        self.vectorized_features = vectorized_features
+        # 'orm': bulk_create, 'copy': PostgreSQL COPY + ON CONFLICT
+        self.loader = loader
+        # True: mevcut ürünler güncellenir (içerik özeti değişmeyenler atlanır), False: mevcutlar korunur
+        self.upsert = upsert
+        # Verilirse çıkarılan özellikler main_category'ye göre bölümlenmiş Parquet snapshot'a da yazılır
+        self.features_output_path = features_output_path
+        self._snapshot_parts = 0
+        self._snapshot_rows = 0
         self.processed_count = 0
         self.error_count = 0
+        self.upsert_stats = {'inserted': 0, 'updated': 0, 'unchanged': 0}
         # Feature extractor'ı başlat
         self.feature_extractor = ProductFeatureExtractor()
     
@@ -68,6 +104,18 @@ class ProductDataPipeline:
             # Son çare: sadece ASCII karakterleri tut
             return ''.join(char for char in str(text) if ord(char) < 128).strip()
     
+    def clean_unicode_series(self, series: pd.Series) -> pd.Series:
+        """
+        clean_unicode_text'in sütun bazlı karşılığı (aynı çıktı):
+        NFKD normalizasyonu, tek regex ile kontrol/problemli karakter temizliği ve strip
+        """
+        empty = ~series.fillna(0).astype(bool)
+        # object dtype: pyarrow kuruluyken de Python str semantiği (strip, surrogate'ler) korunur
+        values = [value if type(value) is str else str(value) for value in series.to_numpy(dtype=object)]
+        text = pd.Series(values, index=series.index, dtype=object).str.normalize('NFKD')
+        text = text.str.replace(UNICODE_JUNK_PATTERN, '', regex=True).str.strip()
+        return text.where(~empty, '')
+    
     def process_preprocessed_data(self, df_processed: pd.DataFrame) -> Dict[str, Any]:
         """
         Zaten önişlenmiş DataFrame'i alıp feature extraction ve veritabanına kaydet
@@ -75,14 +123,11 @@ class ProductDataPipeline:
         logger.info(f"Önişlenmiş veri işleniyor: {len(df_processed)} satır")
         
         try:
-            # Unicode temizleme - daha agresif
-            df_processed = self._clean_dataframe_unicode(df_processed)
-            
-            # Null değerleri temizle
-            df_processed = self._clean_null_values(df_processed)
+            # Temizlik + feature extraction
+            df_with_features = self.extract_features(df_processed)
             
-            # Feature extraction ile işle
-            df_with_features = self._apply_feature_extraction(df_processed)
+            if self.features_output_path:
+                self._write_features_snapshot(df_with_features)
             
             # Veritabanına kaydet
             self._save_to_database(df_with_features)
@@ -94,6 +139,8 @@ class ProductDataPipeline:
                 'success_rate': (self.processed_count / (self.processed_count + self.error_count)) * 100 if (self.processed_count + self.error_count) > 0 else 0,
                 'final_data_shape': df_with_features.shape
             }
+            if self.upsert:
+                summary['upsert_stats'] = dict(self.upsert_stats)
             
             logger.info(f"Pipeline tamamlandı: {summary}")
             return summary
@@ -102,9 +149,167 @@ class ProductDataPipeline:
             logger.error(f"Pipeline hatası: {str(e)}")
             raise
     
+    def extract_features(self, df_processed: pd.DataFrame) -> pd.DataFrame:
+        """
+        Önişlenmiş DataFrame'i temizleyip özelliklerini çıkar (veritabanına yazmadan)
+        """
+        # Unicode temizleme - daha agresif
+        df_processed = self._clean_dataframe_unicode(df_processed)
+        
+        # Null değerleri temizle
+        df_processed = self._clean_null_values(df_processed)
+        
+        # Feature extraction ile işle
+        features_df = self._apply_feature_extraction(df_processed)
+        
+        # Ham ürün belgeleri (detay/analiz uç noktaları için) özelliklerle birlikte taşınır
+        if not features_df.empty:
+            documents = build_product_documents(df_processed, features_df['product_code'])
+            features_df[DOCUMENT_COLUMN] = features_df['product_code'].map(documents)
+        return features_df
+    
+    def process_preprocessed_chunks(self, chunks: Iterable[pd.DataFrame]) -> Dict[str, Any]:
+        """
+        Streaming önişlemeden gelen parçaları sırayla işle - bellekte aynı anda tek parça tutulur
+        """
+        total_rows = 0
+        feature_columns = 0
+        
+        for chunk_number, chunk in enumerate(chunks, 1):
+            if chunk.empty:
+                continue
+            
+            logger.info(f"Parça {chunk_number} işleniyor: {len(chunk)} satır")
+            summary = self.process_preprocessed_data(chunk)
+            total_rows += summary['final_data_shape'][0]
+            feature_columns = max(feature_columns, summary['final_data_shape'][1])
+        
+        summary = {
+            'total_processed': self.processed_count,
+            'total_errors': self.error_count,
+            'success_rate': (self.processed_count / (self.processed_count + self.error_count)) * 100 if (self.processed_count + self.error_count) > 0 else 0,
+            'final_data_shape': (total_rows, feature_columns)
+        }
+        if self.upsert:
+            summary['upsert_stats'] = dict(self.upsert_stats)
+        
+        logger.info(f"Streaming pipeline tamamlandı: {summary}")
+        return summary
+    
+    def process_raw_tsv_checkpointed(
+        self,
+        raw_tsv_path: str,
+        resume: bool = True,
+        range_bytes: int = CHECKPOINT_RANGE_BYTES
+    ) -> Dict[str, Any]:
+        """
+        Ham TSV'yi sıralı byte aralıkları (batch) halinde işle; her batch veritabanına yazıldıktan sonra
+        checkpoint'e bitiş byte'ını kaydet. resume=True ise kayıtlı checkpoint'ten devam edilir.
+        Yeniden işlenen son batch'ler ignore_conflicts/upsert sayesinde çift kayıt oluşturmaz.
+        """
+        from aimodels.ml_models.data_preprocessing import OpenFoodFactsPreprocessor
+        
+        checkpoint = IngestCheckpoint.start(raw_tsv_path, resume)
+        if checkpoint.completed:
+            logger.info(f"Dosya zaten tamamen işlenmiş (checkpoint): {checkpoint}")
+            return {
+                'total_processed': 0,
+                'total_errors': 0,
+                'success_rate': 0,
+                'final_data_shape': (0, 0),
+                'checkpoint': {'byte_offset': checkpoint.byte_offset, 'batch_number': checkpoint.batch_number, 'completed': True}
+            }
+        if checkpoint.byte_offset:
+            logger.info(f"Checkpoint'ten devam ediliyor: byte {checkpoint.byte_offset}/{checkpoint.file_size}, "
+                        f"batch {checkpoint.batch_number}, {checkpoint.rows_committed} ürün")
+        
+        preprocessor = OpenFoodFactsPreprocessor()
+        encoding = preprocessor.detect_encoding(raw_tsv_path)
+        read_options = preprocessor.get_projected_read_options(raw_tsv_path, encoding)
+        
+        remaining = checkpoint.file_size - checkpoint.byte_offset
+        byte_ranges = preprocessor.split_byte_ranges(
+            raw_tsv_path, max(1, remaining // range_bytes + 1), start_offset=checkpoint.byte_offset or None
+        )
+        
+        total_rows = 0
+        feature_columns = 0
+        failed_ranges = 0
+        for start, end in byte_ranges:
+            df_processed = preprocessor.preprocess_byte_range(raw_tsv_path, start, end, encoding, read_options)
+            features = self.extract_features(df_processed) if len(df_processed) else pd.DataFrame()
+            
+            # Kaydetme metotları DB hatalarını yutup error_count'u artırır; hatalı batch'te checkpoint ilerlerse
+            # --resume o satırları bir daha denemez. Bu yüzden durulur, devam edildiğinde bu batch baştan yazılır.
+            errors_before = self.error_count
+            if not features.empty:
+                self._save_to_database(features)
+            if self.error_count > errors_before:
+                failed_ranges += 1
+                logger.error(f"Batch {checkpoint.batch_number + 1} tam kaydedilemedi ({self.error_count - errors_before} hata), "
+                             f"checkpoint byte {checkpoint.byte_offset}'de bırakıldı")
+                break
+            
+            checkpoint.advance(end, len(features), checkpoint.batch_number + 1)
+            total_rows += len(features)
+            feature_columns = max(feature_columns, features.shape[1])
+            logger.info(f"Batch {checkpoint.batch_number} commit edildi: byte {end}/{checkpoint.file_size}")
+        
+        if not checkpoint.completed and not failed_ranges:
+            # Sadece başlık satırı kalmışsa
+            checkpoint.advance(checkpoint.file_size, 0, checkpoint.batch_number)
+        
+        summary = {
+            'total_processed': self.processed_count,
+            'total_errors': self.error_count,
+            'success_rate': (self.processed_count / (self.processed_count + self.error_count)) * 100 if (self.processed_count + self.error_count) > 0 else 0,
+            'final_data_shape': (total_rows, feature_columns),
+            'failed_ranges': failed_ranges,
+            'checkpoint': {'byte_offset': checkpoint.byte_offset, 'batch_number': checkpoint.batch_number, 'completed': checkpoint.completed}
+        }
+        if self.upsert:
+            summary['upsert_stats'] = dict(self.upsert_stats)
+        
+        logger.info(f"Checkpoint'li pipeline tamamlandı: {summary}")
+        return summary
+    
+    def _write_features_snapshot(self, df_with_features: pd.DataFrame) -> None:
+        """Özellik parçasını snapshot'a ekle (ilk parça snapshot'ı yeniden oluşturur)"""
+        self._snapshot_rows += write_snapshot(
+            df_with_features.drop(columns=[DOCUMENT_COLUMN], errors='ignore'),
+            self.features_output_path,
+            part_number=self._snapshot_parts,
+            row_offset=self._snapshot_rows,
+            json_columns=JSON_COLUMNS
+        )
+        self._snapshot_parts += 1
+    
+    def process_features_snapshot(self, snapshot_path: str) -> Dict[str, Any]:
+        """
+        Daha önce çıkarılmış özellik snapshot'ını (Parquet) doğrudan veritabanına yükle - extraction atlanır
+        """
+        logger.info(f"Özellik snapshot'ı okunuyor: {snapshot_path}")
+        features_df = read_snapshot(
+            snapshot_path, columns=[name for name in COPY_COLUMNS if name not in DERIVED_COLUMNS]
+        )
+        
+        self._save_to_database(features_df)
+        
+        summary = {
+            'total_processed': self.processed_count,
+            'total_errors': self.error_count,
+            'success_rate': (self.processed_count / (self.processed_count + self.error_count)) * 100 if (self.processed_count + self.error_count) > 0 else 0,
+            'final_data_shape': features_df.shape
+        }
+        if self.upsert:
+            summary['upsert_stats'] = dict(self.upsert_stats)
+        
+        logger.info(f"Snapshot yükleme tamamlandı: {summary}")
+        return summary
+    
     def process_from_file(self, processed_file_path: str) -> Dict[str, Any]:
         """
-        Önişlenmiş CSV/TSV dosyasını okuyup kaydet
+        Önişlenmiş CSV/TSV dosyasını veya Parquet snapshot'ını okuyup kaydet
         """
         logger.info(f"Önişlenmiş dosya okunuyor: {processed_file_path}")
         
@@ -114,6 +319,9 @@ class ProductDataPipeline:
                 df_processed = pd.read_csv(processed_file_path)
             elif processed_file_path.endswith('.tsv'):
                 df_processed = pd.read_csv(processed_file_path, sep='\t')
+            elif processed_file_path.endswith('.parquet') and os.path.isdir(processed_file_path):
+                # Bölümlenmiş snapshot: mmap ile, tipler korunarak okunur
+                df_processed = read_snapshot(processed_file_path)
             elif processed_file_path.endswith('.parquet'):
                 df_processed = pd.read_parquet(processed_file_path)
             else:
@@ -134,6 +342,23 @@ class ProductDataPipeline:
         """
         logger.info("Feature extraction başlatılıyor...")
         
+        if self.vectorized_features:
+            try:
+                features_df = self.feature_extractor.extract_all_features_frame(df)
+                if features_df.empty:
+                    logger.error("Hiç feature çıkarılamadı!")
+                else:
+                    logger.info(f"Feature extraction tamamlandı: {len(features_df)} ürün")
+                return features_df
+            except Exception as e:
+                logger.error(f"Vektörel feature extraction hatası, satır bazlı yola geçiliyor: {e}")
+        
+        return self._apply_feature_extraction_rows(df)
+    
+    def _apply_feature_extraction_rows(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Satır bazlı (eski) feature extraction - vektörel yol başarısız olursa kullanılır
+        """
         extracted_features = []
         
         for idx, row in df.iterrows():
@@ -179,6 +404,30 @@ class ProductDataPipeline:
         return df
     
     def _clean_dataframe_unicode(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Kaydedilen özellikleri besleyen metin sütunlarında vektörel Unicode temizliği yap.
+        Diğer sütunlar özellik çıktısını etkilemediği için atlanır.
+        """
+        if not self.vectorized_features:
+            return self._clean_dataframe_unicode_rows(df)
+        
+        logger.info("Unicode temizliği başlatılıyor (vektörel)...")
+        
+        for col in PERSISTED_TEXT_COLUMNS:
+            if col not in df.columns or not (
+                pd.api.types.is_object_dtype(df[col]) or pd.api.types.is_string_dtype(df[col])
+            ):
+                continue
+            try:
+                df[col] = self.clean_unicode_series(df[col])
+            except Exception as e:
+                logger.warning(f"Sütun {col} vektörel Unicode temizliği hatası, hücre bazlı temizleniyor: {e}")
+                df[col] = df[col].apply(self.clean_unicode_text)
+        
+        logger.info("Unicode temizliği tamamlandı")
+        return df
+    
+    def _clean_dataframe_unicode_rows(self, df: pd.DataFrame) -> pd.DataFrame:
         """DataFrame'deki tüm string sütunlarda Unicode temizliği yap - geliştirilmiş"""
         logger.info("Unicode temizliği başlatılıyor...")
         
@@ -210,6 +459,15 @@ class ProductDataPipeline:
         """
         logger.info(f"Veritabanına kaydetme başlıyor: {len(df)} ürün")
         
+        if DOCUMENT_COLUMN in df.columns:
+            self._save_documents(df)
+        
+        if self.loader == 'copy':
+            if ProductFeaturesCopyLoader.is_supported():
+                self._copy_to_database(df)
+                return
+            logger.warning("COPY loader sadece PostgreSQL'de desteklenir, ORM ile devam ediliyor")
+        
         # Batch'ler halinde işle
         for i in range(0, len(df), self.batch_size):
             batch_df = df.iloc[i:i + self.batch_size]
@@ -223,6 +481,45 @@ class ProductDataPipeline:
                 logger.info("Tek tek kaydetme deneniyor...")
                 self._save_batch_individually(batch_df)
     
+    def _save_documents(self, df: pd.DataFrame) -> None:
+        """
+        Ürün belgelerini product_documents tablosuna yaz (ekleme/upsert modu ProductFeatures ile aynı).
+        Belge yazılamazsa özellikler yine kaydedilir; detay istekleri API'ye düşer.
+        """
+        documents = {
+            code: document
+            for code, document in zip(df['product_code'].tolist(), df[DOCUMENT_COLUMN].tolist())
+            if isinstance(document, dict)
+        }
+        try:
+            saved = save_product_documents(documents, upsert=self.upsert)
+            logger.info(f"Ürün belgeleri kaydedildi: {saved}")
+        except Exception as e:
+            logger.error(f"Ürün belgeleri kaydedilemedi: {e}")
+    
+    def _copy_to_database(self, df: pd.DataFrame) -> None:
+        """
+        COPY loader ile kaydet - başarısız olan parça ORM yoluna (bulk_create) düşer
+        """
+        copy_loader = ProductFeaturesCopyLoader()
+        copy_batch_size = max(self.batch_size, COPY_BATCH_SIZE)
+        
+        for i in range(0, len(df), copy_batch_size):
+            batch_df = df.iloc[i:i + copy_batch_size]
+            try:
+                result = copy_loader.load(batch_df, upsert=self.upsert)
+                self.processed_count += result['copied']
+                if self.upsert:
+                    self.upsert_stats['inserted'] += result['inserted']
+                    self.upsert_stats['updated'] += result['updated']
+                    self.upsert_stats['unchanged'] += result['copied'] - result['inserted'] - result['updated']
+                logger.info(f"COPY batch {i//copy_batch_size + 1}: {result['copied']} satır, {result['inserted']} yeni, {result['updated']} güncellenen ürün")
+            except Exception as e:
+                logger.error(f"COPY batch {i//copy_batch_size + 1} hatası: {e}")
+                logger.info("ORM ile kaydetme deneniyor...")
+                for j in range(0, len(batch_df), self.batch_size):
+                    self._save_batch(batch_df.iloc[j:j + self.batch_size])
+    
     def _save_batch(self, batch_df: pd.DataFrame) -> None:
         """
         Tek bir batch'i veritabanına kaydet
@@ -242,6 +539,15 @@ class ProductDataPipeline:
                 self.error_count += 1
                 continue
         
+        if product_features_list and self.upsert:
+            try:
+                self._upsert_features(product_features_list)
+            except Exception as e:
+                logger.error(f"Upsert hatası: {str(e)}")
+                logger.warning("Upsert başarısız, tek tek kaydetme deneniyor...")
+                self._save_individually(product_features_list)
+            return
+        
         # Bulk create
         if product_features_list:
             try:
@@ -260,6 +566,40 @@ class ProductDataPipeline:
                 logger.warning("Bulk create başarısız, tek tek kaydetme deneniyor...")
                 self._save_individually(product_features_list)
     
+    def _upsert_features(self, product_features_list: List[ProductFeatures]) -> None:
+        """
+        Yeni ürünleri ekle, içerik özeti değişen mevcut ürünleri güncelle, değişmeyenleri atla
+        """
+        # Aynı kod batch'te birden fazla geçerse ilki alınır (ekleme modu ile aynı)
+        unique_features = {}
+        for product_feature in product_features_list:
+            unique_features.setdefault(product_feature.product_code, product_feature)
+        
+        existing_hashes = dict(
+            ProductFeatures.objects.filter(product_code__in=list(unique_features))
+            .values_list('product_code', 'content_hash')
+        )
+        changed = [
+            product_feature for code, product_feature in unique_features.items()
+            if existing_hashes.get(code) != product_feature.content_hash
+        ]
+        
+        if changed:
+            with transaction.atomic():
+                ProductFeatures.objects.bulk_create(
+                    changed,
+                    update_conflicts=True,
+                    unique_fields=['product_code'],
+                    update_fields=UPSERT_UPDATE_FIELDS,
+                    batch_size=min(100, len(changed))
+                )
+        
+        inserted = sum(1 for product_feature in changed if product_feature.product_code not in existing_hashes)
+        self.upsert_stats['inserted'] += inserted
+        self.upsert_stats['updated'] += len(changed) - inserted
+        self.upsert_stats['unchanged'] += len(product_features_list) - len(changed)
+        self.processed_count += len(product_features_list)
+    
     def _save_batch_individually(self, batch_df: pd.DataFrame) -> None:
         """
         Batch'teki her ürünü tek tek kaydet
@@ -270,8 +610,11 @@ class ProductDataPipeline:
                 if product_feature:
                     # Tek tek kaydet
                     try:
-                        product_feature.save()
-                        self.processed_count += 1
+                        if self.upsert:
+                            self._upsert_features([product_feature])
+                        else:
+                            product_feature.save()
+                            self.processed_count += 1
                     except IntegrityError:
                         # Duplicate key hatası - görmezden gel
                         pass
@@ -288,8 +631,11 @@ class ProductDataPipeline:
         """
         for product_feature in product_features_list:
             try:
-                product_feature.save()
-                self.processed_count += 1
+                if self.upsert:
+                    self._upsert_features([product_feature])
+                else:
+                    product_feature.save()
+                    self.processed_count += 1
             except IntegrityError:
                 # Duplicate key - görmezden gel
                 pass
@@ -327,7 +673,7 @@ class ProductDataPipeline:
                 logger.warning("Ürün kodu boş veya 'unknown', atlanıyor")
                 return None
             
-            return ProductFeatures(
+            product_feature = ProductFeatures(
                 product_code=product_code,
                 product_name=str(row.get('product_name', ''))[:500],
                 main_category=str(row.get('main_category', 'unknown'))[:200],
@@ -357,6 +703,17 @@ class ProductDataPipeline:
                 is_valid_for_analysis=bool(row.get('is_valid_for_analysis', False))
             )
             
+            # Öneri ön filtresi için bit maskesi (COPY loader ile aynı)
+            product_feature.product_flags = compute_product_flags(
+                product_feature.allergen_vector, product_feature.health_indicators, product_feature.processing_level
+            )
+            
+            # Upsert'te değişmeyen ürünleri atlamak için içerik özeti (COPY loader ile aynı)
+            product_feature.content_hash = compute_content_hash(
+                {name: getattr(product_feature, name) for name in COPY_COLUMNS}
+            )
+            return product_feature
+            
         except KeyError as e:
             logger.error(f"Eksik alan: {str(e)}")
             return None
@@ -395,23 +752,48 @@ def run_full_pipeline(
     raw_tsv_path: str,
     sample_size: Optional[int] = None,
     save_processed: bool = True,
-    processed_output_path: str = None
+    processed_output_path: str = None,
+    chunk_size: Optional[int] = None,
+    resume: bool = False
 ) -> Dict[str, Any]:
     """
     Ham TSV dosyasından başlayarak tüm pipeline'ı çalıştır
+    chunk_size verilirse dosya parça parça okunur ve her parça ayrı işlenir (streaming mod)
+    resume=True ise checkpoint'li çalışılır ve kayıtlı checkpoint'ten devam edilir
     """
     from aimodels.ml_models.data_preprocessing import OpenFoodFactsPreprocessor
     
     logger.info("Full pipeline başlatılıyor...")
     
+    if resume:
+        return ProductDataPipeline().process_raw_tsv_checkpointed(raw_tsv_path, resume=True)
+    
     # 1. Preprocessor ile veriyi hazırla
     logger.info("1. Veri önişleme başlatılıyor...")
     preprocessor = OpenFoodFactsPreprocessor()
+    # '.parquet' yolu snapshot olarak yazılır (bkz. columnar_store.snapshot_writer), diğerleri CSV
+    output_path = processed_output_path if save_processed else None
+    
+    if chunk_size:
+        # Streaming mod: önişleme ve kaydetme parça parça ilerler
+        chunks = preprocessor.preprocess_chunked(
+            file_path=raw_tsv_path,
+            output_path=output_path,
+            writer=snapshot_writer(output_path),
+            sample_size=sample_size,
+            chunksize=chunk_size
+        )
+        logger.info("2. Feature extraction ve veritabanı kaydı (streaming) başlatılıyor...")
+        pipeline_result = ProductDataPipeline().process_preprocessed_chunks(chunks)
+        
+        logger.info("Full pipeline tamamlandı!")
+        return pipeline_result
     
     # Geçici dosya oluşturmadan direkt DataFrame'i al
     df_preprocessed = preprocessor.preprocess(
         file_path=raw_tsv_path,
-        output_path=processed_output_path if save_processed else None,
+        output_path=output_path,
+        writer=snapshot_writer(output_path),
         sample_size=sample_size
     )
     
@@ -0,0 +1,145 @@
+# backend/api/pipeline/product_documents.py
+
+import logging
+from typing import Any, Dict, Iterable, List, Optional
+
+import pandas as pd
+
+from api.models.product_document import ProductDocument
+
+logger = logging.getLogger(__name__)
+
+# Belgeye aynen (metin olarak) alınan sütunlar - API'deki alan adlarıyla
+DOCUMENT_TEXT_FIELDS = {
+    'product_name': 'product_name',
+    'generic_name': 'generic_name',
+    'brands': 'brands',
+    'categories': 'categories',
+    'quantity': 'quantity',
+    'ingredients_text': 'ingredients_text',
+    'allergens': 'allergens',
+    'traces': 'traces',
+    'additives': 'additives',
+    'image_url': 'image_url',
+    'image_small_url': 'image_small_url',
+}
+
+# Veri dosyasında virgülle ayrılmış, API'de liste olan alanlar (alan -> kaynak sütun)
+DOCUMENT_TAG_FIELDS = {
+    'allergens_tags': 'allergens',
+    'traces_tags': 'traces',
+    'additives_tags': 'additives_tags',
+    'labels_tags': 'labels_tags',
+}
+
+# API'de 'nutriscore_grade' olarak dönen alanın veri dosyasındaki karşılığı
+NUTRISCORE_GRADE_COLUMN = 'nutrition_grade_fr'
+
+# Özellik DataFrame'inde belgeyi taşıyan sütun (kaydedilmez, product_documents tablosuna yazılır)
+DOCUMENT_COLUMN = 'product_document'
+
+# Tek transaction'da yazılan belge sayısı
+DOCUMENT_BATCH_SIZE = 1000
+
+
+def _present(value: Any) -> bool:
+    return value is not None and not (isinstance(value, float) and pd.isna(value)) and value != ''
+
+
+def _split_tags(value: Any) -> List[str]:
+    if not _present(value):
+        return []
+    return [tag.strip() for tag in str(value).split(',') if tag.strip()]
+
+
+def build_product_documents(df: pd.DataFrame, product_codes: Optional[Iterable[str]] = None) -> Dict[str, Dict[str, Any]]:
+    """
+    Önişlenmiş OpenFoodFacts satırlarından API biçiminde ürün belgeleri (ürün kodu -> belge).
+    product_codes verilirse sadece bu kodlar (ör. özellikleri çıkarılıp kaydedilen ürünler) alınır.
+    Ürün kodu feature extractor ile aynı kuralla (str(code)) oluşturulur; tekrar eden kodlarda ilk satır alınır.
+    """
+    if df.empty or 'code' not in df.columns:
+        return {}
+
+    wanted = set(product_codes) if product_codes is not None else None
+    nutrient_columns = [col for col in df.columns if col.endswith('_100g')]
+    text_fields = {field: col for field, col in DOCUMENT_TEXT_FIELDS.items() if col in df.columns}
+    tag_fields = {field: col for field, col in DOCUMENT_TAG_FIELDS.items() if col in df.columns}
+
+    documents = {}
+    for record in df.to_dict('records'):
+        code = record.get('code')
+        if not _present(code):
+            continue
+        code = str(code)
+        if (wanted is not None and code not in wanted) or code in documents:
+            continue
+
+        document = {'code': code, '_id': code}
+        for field, col in text_fields.items():
+            value = record.get(col)
+            document[field] = str(value) if _present(value) else ''
+        for field, col in tag_fields.items():
+            document[field] = _split_tags(record.get(col))
+
+        grade = record.get(NUTRISCORE_GRADE_COLUMN)
+        document['nutriscore_grade'] = str(grade).lower() if _present(grade) else ''
+        try:
+            document['nova_group'] = int(float(record.get('nova_group')))
+        except (TypeError, ValueError):
+            pass
+        try:
+            document['additives_n'] = int(record.get('additives_n'))
+        except (TypeError, ValueError):
+            pass
+
+        document['nutriments'] = {
+            col: float(record[col]) for col in nutrient_columns if _present(record.get(col))
+        }
+        documents[code] = document
+
+    return documents
+
+
+def document_from_features(product) -> Dict[str, Any]:
+    """Belgesi olmayan ürünler için ProductFeatures kaydından API biçiminde (eksik alanlı) belge"""
+    return {
+        'code': product.product_code,
+        '_id': product.product_code,
+        'product_name': product.product_name,
+        'brands': product.main_brand or '',
+        'categories': product.main_category,
+        'countries': product.main_country or '',
+        'nutriscore_grade': (product.nutriscore_data or {}).get('nutriscore_grade', ''),
+        'nova_group': product.processing_level,
+        'nutriments': dict(product.nutrition_vector or {}),
+        'ingredients_text': product.ingredients_text,
+        'allergens_tags': [],
+        'additives_tags': [],
+        'labels_tags': [],
+        'completeness': product.data_completeness_score,
+    }
+
+
+def save_product_documents(documents: Dict[str, Dict[str, Any]], source: str = ProductDocument.SOURCE_INGEST,
+                           upsert: bool = False) -> int:
+    """
+    Belgeleri product_documents tablosuna yaz. upsert=True ise mevcut belgeler güncellenir,
+    False ise mevcutlar korunur (ProductFeatures ekleme moduyla aynı).
+    """
+    objects = [
+        ProductDocument(product_code=code, document=document, source=source)
+        for code, document in documents.items()
+    ]
+    for i in range(0, len(objects), DOCUMENT_BATCH_SIZE):
+        batch = objects[i:i + DOCUMENT_BATCH_SIZE]
+        if upsert:
+            ProductDocument.objects.bulk_create(
+                batch,
+                update_conflicts=True,
+                unique_fields=['product_code'],
+                update_fields=['document', 'source', 'updated_at'],
+            )
+        else:
+            ProductDocument.objects.bulk_create(batch, ignore_conflicts=True)
+    return len(objects)
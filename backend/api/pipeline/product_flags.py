@@ -0,0 +1,132 @@
+# backend/api/pipeline/product_flags.py
+
+from typing import Any, Dict, Iterable, Optional
+
+import numpy as np
+from django.db.models import F, QuerySet
+
+# Ürün başına bit maskesi (ProductFeatures.product_flags).
+# Bit numaraları veritabanında saklanır - mevcut bitler değiştirilmez, yeni bayraklar sona eklenir.
+ALLERGEN_BITS = {
+    'contains_gluten': 1 << 0,
+    'contains_milk': 1 << 1,
+    'contains_eggs': 1 << 2,
+    'contains_soy': 1 << 3,
+    'contains_nuts': 1 << 4,
+    'contains_peanuts': 1 << 5,
+    'contains_fish': 1 << 6,
+    'contains_shellfish': 1 << 7,
+    'contains_sesame': 1 << 8,
+    'contains_celery': 1 << 9,
+    'contains_mustard': 1 << 10,
+    'contains_sulphites': 1 << 11,
+}
+
+HEALTH_INDICATOR_BITS = {
+    'high_calorie': 1 << 12,
+    'high_fat': 1 << 13,
+    'high_sugar': 1 << 14,
+    'high_salt': 1 << 15,
+    'high_protein': 1 << 16,
+    'high_fiber': 1 << 17,
+}
+
+# İşlenmişlik düzeyi tek bit (one-hot): "ultra işlenmiş olmasın" gibi koşullar da tek AND ile kontrol edilir
+PROCESSING_LEVEL_BITS = {
+    1: 1 << 18,
+    2: 1 << 19,
+    3: 1 << 20,
+    4: 1 << 21,
+}
+
+# Profil seçimi -> ürün bu bitlerden birini taşıyorsa kullanıcıya uygun değil
+ALLERGY_EXCLUSIONS = {
+    'peanuts': ['contains_peanuts'],
+    'tree_nuts': ['contains_nuts'],
+    'milk': ['contains_milk'],
+    'lactose': ['contains_milk'],
+    'eggs': ['contains_eggs'],
+    'wheat': ['contains_gluten'],
+    'gluten': ['contains_gluten'],
+    'soy': ['contains_soy'],
+    'fish': ['contains_fish'],
+    'shellfish': ['contains_shellfish'],
+    'sesame': ['contains_sesame'],
+}
+
+DIETARY_PREFERENCE_EXCLUSIONS = {
+    'vegan': ['contains_milk', 'contains_eggs', 'contains_fish', 'contains_shellfish'],
+    'vegetarian': ['contains_fish', 'contains_shellfish'],
+    'gluten_free': ['contains_gluten'],
+    'lactose_free': ['contains_milk'],
+    'low_sodium': ['high_salt'],
+    'low_fat': ['high_fat'],
+}
+
+MEDICAL_CONDITION_EXCLUSIONS = {
+    'celiac_disease': ['contains_gluten'],
+    'lactose_intolerance': ['contains_milk'],
+}
+
+FLAG_BITS = {**ALLERGEN_BITS, **HEALTH_INDICATOR_BITS}
+
+
+def compute_product_flags(allergen_vector: Optional[Dict[str, Any]], health_indicators: Optional[Dict[str, Any]],
+                          processing_level: Any) -> int:
+    """Alerjen, sağlık göstergesi ve işlenmişlik bilgisini tek bir tam sayıya kodla (contains_allergen() ile aynı kural: == 1)"""
+    flags = 0
+    for key, bit in ALLERGEN_BITS.items():
+        if (allergen_vector or {}).get(key, 0) == 1:
+            flags |= bit
+    for key, bit in HEALTH_INDICATOR_BITS.items():
+        if (health_indicators or {}).get(key, 0) == 1:
+            flags |= bit
+    try:
+        flags |= PROCESSING_LEVEL_BITS.get(int(processing_level), 0)
+    except (TypeError, ValueError):
+        pass
+    return flags
+
+
+def flags_mask(names: Iterable[str]) -> int:
+    """Bayrak adlarından (contains_milk, high_salt, ...) maske"""
+    mask = 0
+    for name in names:
+        mask |= FLAG_BITS.get(name, 0)
+    return mask
+
+
+def profile_exclusion_mask(user_profile: Dict[str, Any]) -> int:
+    """
+    Kullanıcının alerjileri, diyet tercihleri ve ilgili sağlık durumlarıyla çelişen bayrakların maskesi.
+    (product_flags & maske) != 0 olan ürünler kullanıcıya önerilmez.
+    """
+    if not isinstance(user_profile, dict):
+        return 0
+
+    names = []
+    for selections, exclusions in [
+        (user_profile.get('allergies'), ALLERGY_EXCLUSIONS),
+        (user_profile.get('dietary_preferences'), DIETARY_PREFERENCE_EXCLUSIONS),
+        (user_profile.get('medical_conditions'), MEDICAL_CONDITION_EXCLUSIONS),
+    ]:
+        for selection in selections or []:
+            names.extend(exclusions.get(selection, []))
+    return flags_mask(names)
+
+
+def exclude_flagged(queryset: QuerySet, mask: int, field: str = 'product_flags') -> QuerySet:
+    """
+    SQL tarafında tek bitwise AND: (product_flags & mask) = 0 olan ürünler.
+    field ilişkili modeller için değiştirilebilir (ör. ProductSimilarity'de 'product_2__product_flags').
+    """
+    if not mask:
+        return queryset
+    return queryset.alias(conflicting_flags=F(field).bitand(mask)).filter(conflicting_flags=0)
+
+
+def compatible_rows(flags: np.ndarray, mask: int) -> np.ndarray:
+    """NumPy tarafında aynı filtre: maskeyle çakışmayan satırlar için True"""
+    if not mask:
+        return np.ones(len(flags), dtype=bool)
+    return (np.asarray(flags, dtype=np.int64) & mask) == 0
@@ -0,0 +1,131 @@
+# backend/api/pipeline/product_search.py
+
+import re
+from typing import Any, Dict, List, Optional
+
+from django.db import connection
+from django.db.models import BooleanField, FloatField, Q, QuerySet
+from django.db.models.expressions import RawSQL
+
+from api.models.product_document import ProductDocument
+from api.models.product_features import ProductFeatures
+
+from .product_documents import document_from_features
+
+# Arama metni yapılandırması - çok dilli veri için kök bulma/stop word yok
+SEARCH_CONFIG = 'simple'
+
+# Sorgu en fazla bu kadar terime bölünür
+MAX_QUERY_TERMS = 8
+
+# Tam metin eşleşmesi (önek) veya ürün adında yazım hatası toleranslı kelime benzerliği (pg_trgm <%).
+# search_vector ve product_name üzerindeki GIN indeksleri kullanılır (migration 0012).
+MATCH_SQL = (
+    f"(product_features.search_vector @@ to_tsquery('{SEARCH_CONFIG}', %s) "
+    f"OR %s <%% product_features.product_name)"
+)
+RANK_SQL = (
+    f"ts_rank_cd(product_features.search_vector, to_tsquery('{SEARCH_CONFIG}', %s)) "
+    f"+ word_similarity(%s, product_features.product_name)"
+)
+
+# sort_by -> ORDER BY (personalized_score view'da sayfa skorlandıktan sonra sıralanır)
+SORT_ORDERINGS = {
+    'nutrition_quality_score': ['-nutrition_quality_score', 'id'],
+    'health_score': ['-health_score', 'id'],
+    'product_name': ['product_name', 'id'],
+}
+DEFAULT_ORDERING = ['-health_score', 'id']
+
+
+def query_terms(query: str) -> List[str]:
+    """Sorgudaki kelimeler (tsquery sözdizimine giren karakterler atılır)"""
+    return re.findall(r'\w+', (query or '').lower())[:MAX_QUERY_TERMS]
+
+
+def _split_values(value: Any) -> List[str]:
+    if isinstance(value, (list, tuple)):
+        return [str(item).strip() for item in value if str(item).strip()]
+    return [item.strip() for item in str(value or '').split(',') if item.strip()]
+
+
+def apply_search_filters(queryset: QuerySet, filters: Optional[Dict[str, Any]]) -> QuerySet:
+    """category, brand, nutriscore_grade ve nova_group filtreleri (virgülle birden fazla değer) SQL'e eklenir"""
+    filters = filters or {}
+    lookups = [
+        ('category', 'main_category__icontains'),
+        ('brand', 'main_brand__icontains'),
+        ('nutriscore_grade', 'nutriscore_data__nutriscore_grade__iexact'),
+    ]
+    for key, lookup in lookups:
+        values = _split_values(filters.get(key))
+        if values:
+            condition = Q()
+            for value in values:
+                condition |= Q(**{lookup: value})
+            queryset = queryset.filter(condition)
+
+    nova_groups = [int(value) for value in _split_values(filters.get('nova_group')) if value.isdigit()]
+    if nova_groups:
+        # NOVA grubu pipeline'da processing_level olarak saklanır
+        queryset = queryset.filter(processing_level__in=nova_groups)
+    return queryset
+
+
+def _postgres_text_search(queryset: QuerySet, terms: List[str]) -> QuerySet:
+    tsquery = ' & '.join(f'{term}:*' for term in terms)
+    text = ' '.join(terms)
+    return queryset.filter(
+        RawSQL(MATCH_SQL, (tsquery, text), output_field=BooleanField())
+    ).annotate(
+        search_rank=RawSQL(RANK_SQL, (tsquery, text), output_field=FloatField())
+    )
+
+
+def _fallback_text_search(queryset: QuerySet, terms: List[str]) -> QuerySet:
+    """PostgreSQL dışı veritabanları: her terim ad, marka, kategori veya içerikte geçmeli (sıralama skor yok)"""
+    for term in terms:
+        queryset = queryset.filter(
+            Q(product_name__icontains=term) | Q(main_brand__icontains=term)
+            | Q(main_category__icontains=term) | Q(ingredients_text__icontains=term)
+        )
+    return queryset
+
+
+def search_products(query: str = '', filters: Optional[Dict[str, Any]] = None, page: int = 1,
+                    page_size: int = 20, sort_by: str = 'relevance') -> Dict[str, Any]:
+    """
+    Yerel katalogda arama. OpenFoodFacts search.pl yanıtıyla aynı biçim:
+    {'count', 'page', 'page_size', 'products': [ürün belgesi, ...]}
+    Ürün belgesi product_documents tablosundan, yoksa ProductFeatures kaydından oluşturulur.
+    """
+    queryset = apply_search_filters(ProductFeatures.objects.all(), filters)
+
+    terms = query_terms(query)
+    ranked = False
+    if terms:
+        if connection.vendor == 'postgresql':
+            queryset = _postgres_text_search(queryset, terms)
+            ranked = True
+        else:
+            queryset = _fallback_text_search(queryset, terms)
+
+    if sort_by in SORT_ORDERINGS:
+        ordering = SORT_ORDERINGS[sort_by]
+    elif ranked:
+        ordering = ['-search_rank', '-health_score', 'id']
+    else:
+        ordering = DEFAULT_ORDERING
+
+    count = queryset.count()
+    start = (page - 1) * page_size
+    page_products = list(queryset.order_by(*ordering)[start:start + page_size])
+
+    documents = dict(
+        ProductDocument.objects.filter(
+            product_code__in=[product.product_code for product in page_products]
+        ).values_list('product_code', 'document')
+    )
+    products = [documents.get(product.product_code) or document_from_features(product) for product in page_products]
+
+    return {'count': count, 'page': page, 'page_size': page_size, 'products': products}
@@ -0,0 +1,209 @@
+# backend/api/pipeline/similarity_graph.py
+
+import logging
+import multiprocessing
+import os
+import tempfile
+import time
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+from django.db import transaction
+
+from api.models.product_features import ProductSimilarity
+from .feature_matrix import build_feature_matrix, get_feature_matrix
+
+logger = logging.getLogger(__name__)
+
+# Benzerlikte kullanılan besin değerleri (_calculate_nutritional_similarity ile aynı)
+NUTRIENT_COLUMNS = ['energy_kcal', 'protein', 'fat', 'sugar', 'salt', 'fiber']
+
+# Her sütun bu yüzdelik değere bölünür - birkaç aşırı değer (ör. 9000 kcal) ölçeği bozmasın
+SCALE_PERCENTILE = 99
+
+# Genel benzerlik ağırlıkları (_calculate_similarity_bonus ile aynı, toplam 1.0)
+CATEGORY_WEIGHT = 0.5
+NUTRITION_WEIGHT = 0.3
+PROCESSING_WEIGHT = 0.2
+
+# Kategorisi olmayan ürünler aynı kategoride sayılmaz (alternatifleri sorgu ile bulunur)
+UNCATEGORIZED = {'', 'unknown'}
+
+DEFAULT_TOP_K = 20
+DEFAULT_BLOCK_SIZE = 1024
+INSERT_BATCH_SIZE = 5000
+
+# Worker süreçlerinde bir kez açılan (mmap) diziler
+_worker_state: Dict[str, Any] = {}
+
+
+def normalize_nutrient_vectors(values: np.ndarray) -> np.ndarray:
+    """
+    Besin değerlerini negatif olmayan, sütun bazında ölçeklenmiş ve birim uzunlukta vektörlere çevir.
+    Birim vektörlerin iç çarpımı kosinüs benzerliğidir (0-1); besin değeri olmayan ürünler sıfır vektör olur.
+    """
+    values = np.clip(np.nan_to_num(np.asarray(values, dtype=np.float32)), 0, None)
+    if len(values) == 0:
+        return values
+    scale = np.percentile(values, SCALE_PERCENTILE, axis=0).astype(np.float32)
+    scale[scale <= 0] = 1.0
+    values = np.minimum(values / scale, 1.0)
+    norms = np.linalg.norm(values, axis=1, keepdims=True)
+    return np.divide(values, norms, out=np.zeros_like(values), where=norms > 0)
+
+
+def _init_graph_worker(vectors_path: str, processing_path: str):
+    """Worker başlangıcı - vektörler her görevde kopyalanmaz, diskten mmap ile okunur"""
+    _worker_state['vectors'] = np.load(vectors_path, mmap_mode='r')
+    _worker_state['processing'] = np.load(processing_path, mmap_mode='r')
+
+
+def _top_k_block(task: Tuple[np.ndarray, int, int, int, int]) -> Tuple[np.ndarray, ...]:
+    """
+    Bir kategorinin [start, end) satır bloğu için kategori içindeki en benzer top_k ürünü bul.
+    Kategori sütun blokları halinde taranır; bellek kullanımı block_size × (block_size + top_k) ile sınırlı.
+    """
+    members, start, end, top_k, block_size = task
+    vectors = _worker_state['vectors']
+    processing = _worker_state['processing']
+
+    query_rows = members[start:end]
+    query = np.asarray(vectors[query_rows])
+    query_processing = np.asarray(processing[query_rows])
+
+    best_scores = np.empty((len(query_rows), 0), dtype=np.float32)
+    best_nutrition = np.empty((len(query_rows), 0), dtype=np.float32)
+    best_rows = np.empty((len(query_rows), 0), dtype=np.int64)
+
+    for column_start in range(0, len(members), block_size):
+        column_rows = members[column_start:column_start + block_size]
+        nutrition = np.clip(query @ np.asarray(vectors[column_rows]).T, 0.0, 1.0)
+        processing_close = np.abs(query_processing[:, None] - np.asarray(processing[column_rows])[None, :]) <= 1
+        scores = CATEGORY_WEIGHT + NUTRITION_WEIGHT * nutrition + PROCESSING_WEIGHT * processing_close
+        # Ürünün kendisi komşu olmasın
+        scores[query_rows[:, None] == column_rows[None, :]] = -1.0
+
+        scores = np.concatenate([best_scores, scores.astype(np.float32)], axis=1)
+        nutrition = np.concatenate([best_nutrition, nutrition.astype(np.float32)], axis=1)
+        rows = np.concatenate([best_rows, np.broadcast_to(column_rows, (len(query_rows), len(column_rows)))], axis=1)
+
+        if scores.shape[1] > top_k:
+            keep = np.argpartition(-scores, top_k - 1, axis=1)[:, :top_k]
+            scores = np.take_along_axis(scores, keep, axis=1)
+            nutrition = np.take_along_axis(nutrition, keep, axis=1)
+            rows = np.take_along_axis(rows, keep, axis=1)
+        best_scores, best_nutrition, best_rows = scores, nutrition, rows
+
+    found = best_scores >= 0
+    source_rows = np.broadcast_to(query_rows[:, None], best_rows.shape)
+    return source_rows[found], best_rows[found], best_nutrition[found], best_scores[found]
+
+
+def _category_tasks(categories: np.ndarray, top_k: int, block_size: int) -> List[Tuple[np.ndarray, int, int, int, int]]:
+    """Her kategoriyi satır bloklarına böl (büyük kategoriler önce - süreçler arasında dengeli dağılım)"""
+    codes, uniques = pd.factorize(categories)
+    excluded = [i for i, category in enumerate(uniques) if str(category).strip() in UNCATEGORIZED]
+    order = np.argsort(codes, kind='stable')
+    order = order[~np.isin(codes[order], excluded)]
+    boundaries = np.flatnonzero(np.diff(codes[order])) + 1
+    groups = sorted(np.split(order, boundaries), key=len, reverse=True)
+
+    tasks = []
+    for members in groups:
+        if len(members) < 2:
+            continue
+        members = members.astype(np.int64)
+        for start in range(0, len(members), block_size):
+            tasks.append((members, start, min(start + block_size, len(members)), top_k, block_size))
+    return tasks
+
+
+def _load_graph_inputs() -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """Analize uygun, besin değeri olan ürünlerin id, kategori, normalize vektör ve işlenmişlik düzeyleri"""
+    matrix = get_feature_matrix()
+    if matrix is None or matrix.is_stale():
+        logger.info("Özellik matrisi yok veya güncel değil, yeniden oluşturuluyor")
+        build_feature_matrix()
+        matrix = get_feature_matrix()
+        if matrix is None:
+            raise RuntimeError("Özellik matrisi yüklenemedi")
+
+    rows = np.flatnonzero(matrix.column('is_valid_for_analysis') == 1)
+    vectors = normalize_nutrient_vectors(matrix.values(rows, NUTRIENT_COLUMNS))
+    has_nutrients = vectors.any(axis=1)
+    skipped = int((~has_nutrients).sum())
+    if skipped:
+        logger.info(f"{skipped} ürün besin değeri olmadığı için benzerlik grafiğine alınmadı")
+    rows, vectors = rows[has_nutrients], vectors[has_nutrients]
+
+    ids = np.asarray(matrix.ids[rows], dtype=np.int64)
+    categories = np.asarray(matrix.category_names, dtype=object)[np.asarray(matrix.category_codes[rows])]
+    processing = matrix.values(rows, ['processing_level'])[:, 0]
+    return ids, categories, vectors, processing
+
+
+def build_similarity_graph(
+    top_k: int = DEFAULT_TOP_K,
+    workers: int = 1,
+    block_size: int = DEFAULT_BLOCK_SIZE
+) -> Dict[str, Any]:
+    """
+    Her ürün için aynı kategorideki en benzer top_k ürünü hesaplayıp ProductSimilarity tablosunu yeniden oluştur.
+    Benzerlik, normalize besin vektörleri üzerinde bloklu matris çarpımıyla hesaplanır; kategoriler süreçlere dağıtılır.
+    """
+    start_time = time.perf_counter()
+    ids, categories, vectors, processing = _load_graph_inputs()
+    tasks = _category_tasks(categories, top_k, block_size)
+    logger.info(f"Benzerlik grafiği: {len(ids)} ürün, {len(tasks)} blok, top_k={top_k}, {workers} worker")
+
+    edges = 0
+    with tempfile.TemporaryDirectory(prefix='similarity_graph_') as tmp_dir:
+        vectors_path = os.path.join(tmp_dir, 'vectors.npy')
+        processing_path = os.path.join(tmp_dir, 'processing.npy')
+        np.save(vectors_path, vectors)
+        np.save(processing_path, processing)
+
+        if workers > 1:
+            pool = multiprocessing.get_context().Pool(
+                processes=workers, initializer=_init_graph_worker, initargs=(vectors_path, processing_path)
+            )
+            results = pool.imap_unordered(_top_k_block, tasks)
+        else:
+            pool = None
+            _init_graph_worker(vectors_path, processing_path)
+            results = map(_top_k_block, tasks)
+
+        try:
+            # Okuyucular, işlem bitene kadar eski grafiği görür
+            with transaction.atomic():
+                ProductSimilarity.objects.all().delete()
+                for source_rows, target_rows, nutrition, overall in results:
+                    similarities = [
+                        ProductSimilarity(
+                            product_1_id=int(ids[source]),
+                            product_2_id=int(ids[target]),
+                            nutritional_similarity=round(float(nutritional), 4),
+                            category_similarity=1.0,
+                            overall_similarity=round(float(score), 4),
+                        )
+                        for source, target, nutritional, score in zip(source_rows, target_rows, nutrition, overall)
+                    ]
+                    ProductSimilarity.objects.bulk_create(similarities, batch_size=INSERT_BATCH_SIZE)
+                    edges += len(similarities)
+        finally:
+            if pool is not None:
+                pool.close()
+                pool.join()
+            _worker_state.clear()
+
+    summary = {
+        'products': len(ids),
+        'categories': int(len(pd.unique(categories))),
+        'blocks': len(tasks),
+        'edges': edges,
+        'top_k': top_k,
+        'seconds': time.perf_counter() - start_time,
+    }
+    logger.info(f"Benzerlik grafiği oluşturuldu: {summary}")
+    return summary
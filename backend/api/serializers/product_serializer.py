@@ -2,8 +2,6 @@
 
 from rest_framework import serializers
 from api.models.product_features import ProductFeatures
-from aimodels.ml_models.ml_recommendation_service import ml_recommendation_service
-from aimodels.ml_models.ml_product_score_service import ml_product_score_service
 # Profile serializer'ı import et
 from api.serializers.profile_serializer import ProfileSerializer
 
@@ -324,13 +322,12 @@ class ProductComparisonSerializer(serializers.Serializer):
     )
     
     def validate_product_codes(self, value):
-        # Tüm ürünlerin mevcut olduğunu kontrol et
-        for code in value:
-            try:
-                ProductFeatures.objects.get(product_code=code, is_valid_for_analysis=True)
-            except ProductFeatures.DoesNotExist:
-                raise serializers.ValidationError(f"Ürün bulunamadı: {code}")
-        return value
+        # Ürünler burada sorgulanmaz: yerelde olmayanlar karşılaştırmada API'den alınır
+        # (api/pipeline/product_comparison.py), hiçbir yerde bulunamayanlar atlanır
+        product_codes = list(dict.fromkeys(value))
+        if len(product_codes) < 2:
+            raise serializers.ValidationError("En az iki farklı ürün kodu gerekli")
+        return product_codes
 
 
 class ProductComparisonResponseSerializer(serializers.Serializer):
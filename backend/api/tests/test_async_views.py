@@ -0,0 +1,80 @@
+# api/tests/test_async_views.py
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import AsyncClient, TestCase, override_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+ANALYZE_URL = '/api/async/products/analyze/'
+SYNC_ANALYZE_URL = '/api/products/analyze/'
+
+SESSION_ONLY = {
+    **settings.REST_FRAMEWORK,
+    'DEFAULT_AUTHENTICATION_CLASSES': ['rest_framework.authentication.SessionAuthentication'],
+}
+
+
+class AsyncApiViewTests(TestCase):
+    """async_api_view: @api_view + IsAuthenticated ile aynı yöntem kontrolü ve kimlik doğrulama yanıtları"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(
+            email='async@example.com', username='async', password='parola-123'
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def bearer(self, token=None):
+        return {'Authorization': f'Bearer {token or AccessToken.for_user(self.user)}'}
+
+    async def test_missing_credentials_is_401_with_challenge(self):
+        response = await self.async_client.post(ANALYZE_URL, {'product_code': '1'}, content_type='application/json')
+        self.assertEqual(response.status_code, 401)
+        self.assertTrue(response['WWW-Authenticate'].startswith('Bearer'))
+        self.assertIn('detail', response.json())
+
+    async def test_invalid_token_is_401(self):
+        response = await self.async_client.post(ANALYZE_URL, {'product_code': '1'}, content_type='application/json',
+                                                headers=self.bearer('not-a-token'))
+        self.assertEqual(response.status_code, 401)
+
+    async def test_matches_sync_view_without_credentials(self):
+        async_response = await self.async_client.post(ANALYZE_URL, {}, content_type='application/json')
+        sync_response = await self.async_client.post(SYNC_ANALYZE_URL, {}, content_type='application/json')
+        self.assertEqual(async_response.status_code, sync_response.status_code)
+        self.assertEqual(async_response['WWW-Authenticate'], sync_response['WWW-Authenticate'])
+        self.assertEqual(async_response.json(), sync_response.json())
+
+    async def test_without_authenticate_header_is_403(self):
+        with override_settings(REST_FRAMEWORK=SESSION_ONLY):
+            response = await self.async_client.post(ANALYZE_URL, {}, content_type='application/json')
+        self.assertEqual(response.status_code, 403)
+        self.assertFalse(response.has_header('WWW-Authenticate'))
+
+    async def test_session_authentication_enforces_csrf(self):
+        client = AsyncClient(enforce_csrf_checks=True)
+        await client.aforce_login(self.user)
+        with override_settings(REST_FRAMEWORK=SESSION_ONLY):
+            response = await client.post(ANALYZE_URL, {'product_code': '1'}, content_type='application/json')
+        self.assertEqual(response.status_code, 403)
+        self.assertIn('CSRF', response.json()['detail'])
+
+    async def test_authenticated_request_reaches_the_view(self):
+        response = await self.async_client.post(ANALYZE_URL, {}, content_type='application/json',
+                                                headers=self.bearer())
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {'error': 'Product code is required'})
+
+    async def test_method_not_allowed(self):
+        for method, url in [
+            ('get', ANALYZE_URL),
+            ('put', '/api/async/products/compare/'),
+            ('post', '/api/async/products/search/'),
+            ('delete', '/api/async/products/detail/123/'),
+        ]:
+            response = await getattr(self.async_client, method)(url, headers=self.bearer())
+            self.assertEqual(response.status_code, 405, f'{method} {url}')
+            self.assertEqual(response.json(), {'detail': f'Method "{method.upper()}" not allowed.'})
@@ -0,0 +1,79 @@
+# api/tests/test_candidate_retrieval.py
+
+import logging
+from unittest import mock
+
+import numpy as np
+from django.test import SimpleTestCase
+
+from api.pipeline import candidate_retrieval
+from api.pipeline.candidate_retrieval import CandidateRetriever
+from api.pipeline.product_flags import FLAG_BITS
+
+from .utils import synthetic_feature_matrix
+
+
+def reference_candidates(matrix, categories=None, limit=100, exclude_flags=0):
+    """Doğrudan tanım: uygun ürünleri filtrele, health_score > nutrition_quality_score > id sırasıyla ilk limit"""
+    health = matrix.column('health_score')
+    quality = matrix.column('nutrition_quality_score')
+    rows = []
+    for row in range(len(matrix)):
+        if matrix.column('is_valid_for_analysis')[row] != 1 or int(matrix.flags[row]) & exclude_flags:
+            continue
+        name = matrix.category_names[matrix.category_codes[row]].lower()
+        if categories and not any(term.strip().lower() in name for term in categories):
+            continue
+        rows.append(row)
+    rows.sort(key=lambda row: (-health[row], -quality[row], int(matrix.ids[row])))
+    return rows[:limit]
+
+
+class CandidateRetrieverTests(SimpleTestCase):
+    """Önceden sıralanmış kategori listelerinden seçilen adaylar, tüm ürünleri sıralamakla aynı olmalı"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        logging.disable(logging.INFO)
+        try:
+            cls.matrix = synthetic_feature_matrix(400, seed=9)
+            cls.retriever = CandidateRetriever(cls.matrix)
+        finally:
+            logging.disable(logging.NOTSET)
+
+    def assertMatchesReference(self, categories=None, limit=100, exclude_flags=0):
+        rows = self.retriever.retrieve(categories, limit=limit, exclude_flags=exclude_flags)
+        self.assertEqual(rows.tolist(), reference_candidates(self.matrix, categories, limit, exclude_flags))
+        return rows
+
+    def test_all_products(self):
+        for limit in (1, 10, 1000):
+            self.assertMatchesReference(limit=limit)
+
+    def test_category_terms(self):
+        # 'biscuit' iki kategoriyle eşleşir (Biscuits, Dark chocolate biscuits)
+        for categories in (['biscuit'], [' Chees '], ['soda', 'cheeses'], ['CHOCOLATE', 'biscuits']):
+            for limit in (3, 25, 1000):
+                self.assertTrue(len(self.assertMatchesReference(categories, limit)))
+
+    def test_unknown_category(self):
+        self.assertEqual(len(self.assertMatchesReference(['no-such-category'])), 0)
+
+    def test_exclude_flags(self):
+        mask = FLAG_BITS['contains_gluten'] | FLAG_BITS['contains_eggs']
+        for categories in (None, ['biscuit'], ['soda', 'cheeses']):
+            for limit in (5, 1000):
+                rows = self.assertMatchesReference(categories, limit, mask)
+                self.assertFalse((self.matrix.flags[rows] & mask).any())
+
+    def test_many_categories_use_the_ranked_mask(self):
+        with mock.patch.object(candidate_retrieval, 'MAX_MERGED_CATEGORIES', 1):
+            for exclude_flags in (0, FLAG_BITS['contains_milk']):
+                self.assertMatchesReference(['biscuit'], 20, exclude_flags)
+                self.assertMatchesReference(['s'], 1000, exclude_flags)
+
+    def test_invalid_products_are_never_candidates(self):
+        rows = self.retriever.retrieve(limit=len(self.matrix))
+        self.assertTrue((self.matrix.column('is_valid_for_analysis')[rows] == 1).all())
+        self.assertEqual(len(rows), int(self.matrix.column('is_valid_for_analysis').sum()))
@@ -0,0 +1,428 @@
+# api/tests/test_data_pipeline.py
+
+import logging
+import os
+import queue
+import random
+import tempfile
+from unittest import mock, skipUnless
+
+import numpy as np
+import pandas as pd
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, TransactionTestCase
+
+from api.models.ingest_checkpoint import IngestCheckpoint
+from api.models.product_features import ProductFeatures
+from api.pipeline.copy_loader import COPY_COLUMNS, ProductFeaturesCopyLoader
+from api.pipeline.parallel_ingest import (
+    RangeReorderBuffer,
+    _advance_checkpoint,
+    _collect_acks,
+    route_to_writers,
+    run_parallel_pipeline,
+)
+from api.pipeline.product_data_pipeline import ProductDataPipeline
+
+from .utils import sample_features, write_sample_tsv
+
+
+def stored_products():
+    """Kaydedilen alanlar (id ve zaman damgaları hariç), ürün koduna göre sıralı"""
+    return list(ProductFeatures.objects.order_by('product_code').values_list(*COPY_COLUMNS, 'content_hash'))
+
+
+class SampleFeaturesMixin:
+    """Sınıf başına bir kez: sentetik dökümün özellikleri (self.features)"""
+
+    n_rows = 400
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        logging.disable(logging.WARNING)
+        with tempfile.TemporaryDirectory() as directory:
+            cls.features = sample_features(directory, cls.n_rows, seed=7)
+
+    @classmethod
+    def tearDownClass(cls):
+        logging.disable(logging.NOTSET)
+        super().tearDownClass()
+
+    def save(self, features: pd.DataFrame, **pipeline_options) -> ProductDataPipeline:
+        pipeline = ProductDataPipeline(batch_size=100, **pipeline_options)
+        pipeline._save_to_database(features)
+        return pipeline
+
+
+class UnicodeCleaningTests(SimpleTestCase):
+    """Sütun bazlı clean_unicode_series, hücre bazlı clean_unicode_text ile aynı sonucu vermeli"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        rng = random.Random(1)
+        # Kontrol karakterleri, C1 aralığı, NFKD ile ayrışan harfler/ligatürler, BOM, boşluk türleri, emoji
+        special = [0x3000, 0xfeff, 0xfb01, 0xfffd, 0x1f600, 0x85, 0xa0, 0x1680, 0x200b, 0xac00, 0x130, 0x131]
+        pool = [chr(code) for code in list(range(0, 0x250)) + list(range(0x2000, 0x2100)) + special]
+        cls.values = [''.join(rng.choice(pool) for _ in range(rng.randint(0, 12))) for _ in range(20000)]
+        cls.values += [None, np.nan, '', ' ', '\x00', '�', '  café  ', 'ﬁne\x1f']
+
+    def setUp(self):
+        self.pipeline = ProductDataPipeline()
+
+    def assertSameCleaning(self, series: pd.Series):
+        expected = series.apply(self.pipeline.clean_unicode_text).astype(object).tolist()
+        self.assertEqual(self.pipeline.clean_unicode_series(series).astype(object).tolist(), expected)
+
+    def test_object_series(self):
+        self.assertSameCleaning(pd.Series(self.values, dtype=object))
+
+    def test_string_dtype_series(self):
+        self.assertSameCleaning(pd.Series(self.values, dtype='str'))
+
+    def test_mixed_object_values(self):
+        self.assertSameCleaning(pd.Series(self.values[:500] + [0, 1.5, False, True], dtype=object))
+
+    def test_keeps_index(self):
+        series = pd.Series([' a ', None, 'b\x00'], index=[10, 5, 7])
+        cleaned = self.pipeline.clean_unicode_series(series)
+        self.assertEqual(list(cleaned.index), [10, 5, 7])
+        self.assertEqual(cleaned.tolist(), ['a', '', 'b'])
+
+    def test_dataframe_cleaning_matches_row_cleaning(self):
+        logging.disable(logging.WARNING)
+        self.addCleanup(logging.disable, logging.NOTSET)
+        df = pd.DataFrame({
+            'product_name': self.values[:1000],
+            'ingredients_text': self.values[1000:2000],
+            'energy_100g': np.arange(1000, dtype=float),
+        })
+        vectorized = ProductDataPipeline()._clean_dataframe_unicode(df.copy())
+        rows = ProductDataPipeline(vectorized_features=False)._clean_dataframe_unicode(df.copy())
+        for column in ['product_name', 'ingredients_text']:
+            self.assertEqual(vectorized[column].tolist(), rows[column].tolist())
+        self.assertTrue(vectorized['energy_100g'].equals(df['energy_100g']))
+
+
+class CopyLoaderFrameTests(SampleFeaturesMixin, SimpleTestCase):
+    """COPY için hazırlanan satırlar ORM yolunun oluşturduğu nesnelerle aynı değerleri taşımalı"""
+
+    def test_prepared_frame_matches_orm_objects(self):
+        pipeline = ProductDataPipeline()
+        frame = ProductFeaturesCopyLoader().prepare_frame(self.features)
+        self.assertGreater(len(frame), 0)
+
+        orm_objects = {}
+        for _, row in self.features.iterrows():
+            product = pipeline._create_product_feature_from_extracted(row)
+            if product is not None:
+                orm_objects.setdefault(product.product_code, product)
+
+        for values in frame.to_dict('records'):
+            product = orm_objects[values['product_code']]
+            self.assertEqual(values['content_hash'], product.content_hash, values['product_code'])
+            self.assertEqual(values['product_flags'], product.product_flags, values['product_code'])
+
+
+class CopyLoaderTests(SampleFeaturesMixin, TestCase):
+
+    def test_copy_falls_back_to_orm_without_postgresql(self):
+        if ProductFeaturesCopyLoader.is_supported():
+            self.skipTest('PostgreSQL: COPY yolu kullanılır')
+        pipeline = self.save(self.features, loader='copy')
+        self.assertEqual(pipeline.error_count, 0)
+        valid_codes = ProductFeaturesCopyLoader().prepare_frame(self.features)['product_code']
+        self.assertEqual(ProductFeatures.objects.count(), valid_codes.nunique())
+
+    @skipUnless(connection.vendor == 'postgresql', 'COPY sadece PostgreSQL')
+    def test_copy_stores_same_rows_as_orm(self):
+        self.save(self.features, loader='orm')
+        orm_rows = stored_products()
+        ProductFeatures.objects.all().delete()
+
+        pipeline = self.save(self.features, loader='copy')
+        self.assertEqual(pipeline.error_count, 0)
+        self.assertEqual(stored_products(), orm_rows)
+
+    @skipUnless(connection.vendor == 'postgresql', 'COPY sadece PostgreSQL')
+    def test_copy_insert_is_idempotent(self):
+        loader = ProductFeaturesCopyLoader()
+        first = loader.load(self.features)
+        rows = stored_products()
+        second = loader.load(self.features)
+
+        self.assertEqual(first['inserted'], len(rows))
+        self.assertEqual(second['inserted'], 0)
+        self.assertEqual(second['updated'], 0)
+        self.assertEqual(stored_products(), rows)
+
+
+class UpsertTests(SampleFeaturesMixin, TestCase):
+    """Upsert: yeni ürünler eklenir, içerik özeti değişenler güncellenir, değişmeyenler hiç yazılmaz"""
+
+    loader = 'orm'
+
+    def setUp(self):
+        if self.loader == 'copy' and not ProductFeaturesCopyLoader.is_supported():
+            self.skipTest('COPY sadece PostgreSQL')
+
+    def refreshed_features(self, codes):
+        """Verilen ürünlerin adı değişmiş yeni döküm"""
+        features = self.features.copy()
+        changed = features['product_code'].isin(codes)
+        features.loc[changed, 'product_name'] = features.loc[changed, 'product_name'] + ' (yeni)'
+        return features
+
+    def test_reingest_unchanged_dump_skips_all_rows(self):
+        first = self.save(self.features, loader=self.loader, upsert=True)
+        rows = stored_products()
+        updated_at = dict(ProductFeatures.objects.values_list('product_code', 'updated_at'))
+
+        second = self.save(self.features, loader=self.loader, upsert=True)
+        self.assertEqual(first.upsert_stats['inserted'], len(rows))
+        self.assertEqual(second.upsert_stats['inserted'], 0)
+        self.assertEqual(second.upsert_stats['updated'], 0)
+        self.assertGreaterEqual(second.upsert_stats['unchanged'], len(rows))
+        self.assertEqual(stored_products(), rows)
+        self.assertEqual(dict(ProductFeatures.objects.values_list('product_code', 'updated_at')), updated_at)
+
+    def test_reingest_updates_only_changed_products(self):
+        self.save(self.features, loader=self.loader, upsert=True)
+        before = {row[0]: row for row in stored_products()}
+        codes = sorted(before)[:3]
+
+        pipeline = self.save(self.refreshed_features(codes), loader=self.loader, upsert=True)
+        after = {row[0]: row for row in stored_products()}
+
+        self.assertEqual(pipeline.upsert_stats['inserted'], 0)
+        self.assertEqual(pipeline.upsert_stats['updated'], len(codes))
+        name_index = COPY_COLUMNS.index('product_name')
+        content_hash_index = len(COPY_COLUMNS)
+        for code in before:
+            if code in codes:
+                self.assertTrue(after[code][name_index].endswith(' (yeni)'))
+                self.assertNotEqual(after[code][content_hash_index], before[code][content_hash_index])
+            else:
+                self.assertEqual(after[code], before[code])
+
+    def test_insert_mode_keeps_existing_rows(self):
+        self.save(self.features, loader=self.loader)
+        rows = stored_products()
+        self.save(self.refreshed_features([rows[0][0]]), loader=self.loader)
+        self.assertEqual(stored_products(), rows)
+
+
+class CopyUpsertTests(UpsertTests):
+
+    loader = 'copy'
+
+
+class CheckpointResumeTests(TestCase):
+    """Checkpoint sadece hatasız kaydedilen batch'lerden sonra ilerlemeli; --resume kalan satırları tamamlamalı"""
+
+    range_bytes = 40000
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        logging.disable(logging.WARNING)
+        cls.directory = tempfile.TemporaryDirectory()
+        cls.path = write_sample_tsv(os.path.join(cls.directory.name, 'dump.tsv'), 600, seed=11)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.directory.cleanup()
+        logging.disable(logging.NOTSET)
+        super().tearDownClass()
+
+    def ingest(self, resume: bool):
+        return ProductDataPipeline(batch_size=50).process_raw_tsv_checkpointed(
+            self.path, resume=resume, range_bytes=self.range_bytes
+        )
+
+    def test_failed_batch_is_retried_on_resume(self):
+        summary = self.ingest(resume=False)
+        self.assertTrue(summary['checkpoint']['completed'])
+        self.assertGreater(summary['checkpoint']['batch_number'], 2)
+        expected = stored_products()
+        ProductFeatures.objects.all().delete()
+
+        # Üçüncü kayıt çağrısı DB hatası gibi davranır: hata yutulur, sadece error_count artar
+        original_save_batch = ProductDataPipeline._save_batch
+        calls = []
+
+        def failing_save_batch(pipeline, batch_df):
+            calls.append(len(batch_df))
+            if len(calls) == 3:
+                pipeline.error_count += len(batch_df)
+                return
+            original_save_batch(pipeline, batch_df)
+
+        with mock.patch.object(ProductDataPipeline, '_save_batch', failing_save_batch):
+            summary = self.ingest(resume=False)
+
+        checkpoint = IngestCheckpoint.objects.get()
+        self.assertEqual(summary['failed_ranges'], 1)
+        self.assertFalse(checkpoint.completed)
+        self.assertEqual(summary['checkpoint']['byte_offset'], checkpoint.byte_offset)
+        self.assertLess(checkpoint.byte_offset, checkpoint.file_size)
+        self.assertLess(ProductFeatures.objects.count(), len(expected))
+
+        summary = self.ingest(resume=True)
+        self.assertEqual(summary['failed_ranges'], 0)
+        self.assertTrue(summary['checkpoint']['completed'])
+        self.assertEqual(stored_products(), expected)
+
+    def test_completed_file_is_skipped(self):
+        self.ingest(resume=False)
+        rows = stored_products()
+        with mock.patch.object(ProductDataPipeline, '_save_to_database') as save:
+            summary = self.ingest(resume=True)
+        save.assert_not_called()
+        self.assertEqual(summary['total_processed'], 0)
+        self.assertEqual(stored_products(), rows)
+
+
+class FakeCheckpoint:
+    def __init__(self):
+        self.byte_offset = 0
+        self.batch_number = 0
+        self.rows_committed = 0
+
+    def advance(self, byte_offset: int, rows: int, batch_number: int):
+        self.byte_offset = byte_offset
+        self.rows_committed += rows
+        self.batch_number = batch_number
+
+
+class ParallelCheckpointTests(SimpleTestCase):
+    """Paralel ingest: checkpoint, tüm writer'ların hatasız onayladığı aralıklarda dosya sırasıyla ilerler"""
+
+    byte_ranges = [(0, 100), (100, 200), (200, 300), (300, 400)]
+    range_rows = {0: 10, 1: 20, 2: 30, 3: 40}
+
+    def advance(self, acks_received, failed=None, n_writers=2):
+        ack_queue = queue.Queue()
+        for ack in acks_received:
+            ack_queue.put(ack)
+        acks, failed = {}, set(failed or ())
+        _collect_acks(ack_queue, acks, failed)
+        checkpoint = FakeCheckpoint()
+        next_range = _advance_checkpoint(checkpoint, self.byte_ranges, self.range_rows, acks, failed, 0, n_writers)
+        return checkpoint, next_range, failed
+
+    def test_advances_in_file_order(self):
+        checkpoint, next_range, _ = self.advance([(0, 0, True), (1, 0, True), (0, 1, True), (1, 2, True), (0, 2, True)])
+        # 1. aralığı writer 1 henüz onaylamadı: 2. aralık onaylansa da checkpoint 1. aralığın başında kalır
+        self.assertEqual(next_range, 1)
+        self.assertEqual((checkpoint.byte_offset, checkpoint.rows_committed, checkpoint.batch_number), (100, 10, 1))
+
+    def test_failed_write_blocks_checkpoint(self):
+        acks = [(writer_id, range_index, True) for range_index in range(4) for writer_id in range(2)]
+        acks[3] = (1, 1, False)
+        checkpoint, next_range, failed = self.advance(acks)
+        self.assertEqual(failed, {1})
+        self.assertEqual(next_range, 1)
+        self.assertEqual(checkpoint.byte_offset, 100)
+
+    def test_failed_extraction_blocks_checkpoint(self):
+        acks = [(writer_id, range_index, True) for range_index in (0, 1, 3) for writer_id in range(2)]
+        checkpoint, next_range, _ = self.advance(acks, failed={2})
+        self.assertEqual(next_range, 2)
+        self.assertEqual((checkpoint.byte_offset, checkpoint.rows_committed), (200, 30))
+
+    def test_ack_before_worker_result_waits(self):
+        # Writer onayı, worker'ın sonucu (satır sayısı) ana sürece ulaşmadan gelebilir
+        acks = [(writer_id, range_index, True) for range_index in range(4) for writer_id in range(2)]
+        range_rows, self.range_rows = self.range_rows, {0: 10, 2: 30, 3: 40}
+        try:
+            checkpoint, next_range, _ = self.advance(acks)
+        finally:
+            self.range_rows = range_rows
+        self.assertEqual(next_range, 1)
+        self.assertEqual(checkpoint.byte_offset, 100)
+
+    def test_all_ranges_committed(self):
+        acks = [(writer_id, range_index, True) for range_index in range(4) for writer_id in range(2)]
+        checkpoint, next_range, failed = self.advance(acks)
+        self.assertEqual(next_range, 4)
+        self.assertEqual(failed, set())
+        self.assertEqual((checkpoint.byte_offset, checkpoint.rows_committed, checkpoint.batch_number), (400, 100, 4))
+
+
+class ParallelWriterRoutingTests(SimpleTestCase):
+    """Paralel ingest: ürün kodu hash'i ile writer seçimi ve writer'da dosya sırasına dizme"""
+
+    def frame(self, codes, range_index=0):
+        return pd.DataFrame({'product_code': codes, 'range': [range_index] * len(codes)})
+
+    def test_route_to_writers(self):
+        features = self.frame([str(code) for code in range(1000, 1300)] + ['1000', '1001'])
+        parts = route_to_writers(features, 3)
+        self.assertEqual(sorted(pd.concat(parts.values()).index), list(features.index))
+        writer_of = {code: writer_id for writer_id, part in parts.items() for code in part['product_code']}
+        # Aynı kod her zaman aynı writer'a gider (çağrılar ve aralıklar arasında da)
+        again = route_to_writers(self.frame(['1001', '1000', '1150']), 3)
+        self.assertEqual({code: writer_id for writer_id, part in again.items() for code in part['product_code']},
+                         {code: writer_of[code] for code in ['1001', '1000', '1150']})
+        self.assertEqual(len(parts[writer_of['1000']].query("product_code == '1000'")), 2)
+
+    def test_single_writer(self):
+        features = self.frame(['1', '2'])
+        self.assertIs(route_to_writers(features, 1)[0], features)
+
+    def test_reorder_buffer_releases_ranges_in_file_order(self):
+        buffer = RangeReorderBuffer()
+        buffer.add_part(2, self.frame(['c'], 2))
+        self.assertEqual(buffer.mark_done(2, True), [])
+        buffer.add_part(0, self.frame(['a'], 0))
+        buffer.add_part(0, self.frame(['a2'], 0))
+        self.assertEqual(buffer.pending, 2)
+
+        ready = buffer.mark_done(0, True)
+        self.assertEqual([(index, [list(part['product_code']) for part in parts], ok) for index, parts, ok in ready],
+                         [(0, [['a'], ['a2']], True)])
+
+        # 1. aralığın extraction'ı başarısız: parçası yok, 2. aralık ardından serbest kalır
+        ready = buffer.mark_done(1, False)
+        self.assertEqual([(index, len(parts), ok) for index, parts, ok in ready], [(1, 0, False), (2, 1, True)])
+        self.assertEqual(buffer.pending, 0)
+        self.assertEqual(buffer.next_range, 3)
+
+
+@skipUnless(connection.vendor == 'postgresql', 'Writer süreçleri aynı veritabanını görmeli (PostgreSQL)')
+class ParallelIngestTests(TransactionTestCase):
+    """Paralel ingest, sıralı checkpoint'li ingest ile aynı ürünleri kaydetmeli (tekrar eden kodlarda ilk kayıt)"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        logging.disable(logging.WARNING)
+        cls.directory = tempfile.TemporaryDirectory()
+        # İkinci yarı ilk yarının son 300 koduyla çakışır: aynı kod farklı byte aralıklarında geçer
+        first = write_sample_tsv(os.path.join(cls.directory.name, 'first.tsv'), 600, seed=12)
+        second = write_sample_tsv(os.path.join(cls.directory.name, 'second.tsv'), 600, seed=13, code_offset=1000300)
+        cls.path = os.path.join(cls.directory.name, 'dump.tsv')
+        with open(cls.path, 'wb') as out, open(first, 'rb') as f, open(second, 'rb') as g:
+            out.write(f.read())
+            g.readline()
+            out.write(g.read())
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.directory.cleanup()
+        logging.disable(logging.NOTSET)
+        super().tearDownClass()
+
+    def test_matches_sequential_ingest(self):
+        ProductDataPipeline(batch_size=50).process_raw_tsv_checkpointed(self.path, resume=False)
+        expected = stored_products()
+        ProductFeatures.objects.all().delete()
+        IngestCheckpoint.objects.all().delete()
+
+        summary = run_parallel_pipeline(self.path, workers=3, db_writers=2, batch_size=50, resume=False)
+        self.assertGreater(summary['byte_ranges'], 3)
+        self.assertEqual(summary['failed_ranges'], 0)
+        self.assertTrue(summary['checkpoint']['completed'])
+        self.assertEqual(stored_products(), expected)
@@ -0,0 +1,131 @@
+# api/tests/test_diversity.py
+
+import importlib
+from collections import Counter
+from unittest import mock
+
+import numpy as np
+from django.test import SimpleTestCase
+
+from api.pipeline.diversity import mmr_rerank
+from api.pipeline.similarity_graph import NUTRIENT_COLUMNS
+
+recommendation_module = importlib.import_module('aimodels.ml_models.recommendation_service')
+
+
+def unit_vectors(n, dim=6, seed=0):
+    vectors = np.random.default_rng(seed).random((n, dim))
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def reference_mmr(relevance, vectors, categories, limit, diversity, category_cap):
+    """mmr_rerank'in doğrudan (O(n·k²)) tanımı - her adımda seçilenlere benzerlik baştan hesaplanır"""
+    selected = []
+    counts = Counter()
+    for _ in range(min(limit, len(relevance))):
+        candidates = [i for i in range(len(relevance)) if i not in selected]
+        allowed = [i for i in candidates if counts[categories[i]] < category_cap] or candidates
+
+        def mmr_score(i):
+            similarity = max((float(vectors[i] @ vectors[j]) for j in selected), default=0.0)
+            return (1.0 - diversity) * relevance[i] - diversity * similarity
+
+        best = max(allowed, key=lambda i: (mmr_score(i), -i))
+        selected.append(best)
+        counts[categories[best]] += 1
+    return selected
+
+
+class MMRRerankTests(SimpleTestCase):
+
+    def test_matches_reference_implementation(self):
+        rng = np.random.default_rng(3)
+        for seed in range(5):
+            n = 40
+            relevance = rng.random(n)
+            vectors = unit_vectors(n, seed=seed)
+            categories = list(rng.choice(['a', 'b', 'c', 'd'], size=n))
+            for diversity, cap in [(0.0, 10), (0.3, 3), (0.7, 2), (1.0, 5)]:
+                self.assertEqual(
+                    mmr_rerank(relevance, vectors, categories, 10, diversity=diversity, category_cap=cap),
+                    reference_mmr(relevance, vectors, categories, 10, diversity, cap),
+                )
+
+    def test_zero_diversity_keeps_score_order(self):
+        relevance = [0.9, 0.5, 0.8, 0.8, 0.1]
+        order = mmr_rerank(relevance, unit_vectors(5), ['a', 'b', 'c', 'd', 'e'], 5, diversity=0.0, category_cap=5)
+        # Eşitlikte önce gelen indeks
+        self.assertEqual(order, [0, 2, 3, 1, 4])
+
+    def test_similarity_penalty_prefers_different_products(self):
+        vectors = np.array([[1.0, 0.0], [1.0, 0.0], [0.0, 1.0]])
+        relevance = [1.0, 0.95, 0.7]
+        self.assertEqual(mmr_rerank(relevance, vectors, ['a', 'b', 'c'], 2, diversity=0.0, category_cap=2), [0, 1])
+        self.assertEqual(mmr_rerank(relevance, vectors, ['a', 'b', 'c'], 2, diversity=0.5, category_cap=2), [0, 2])
+
+    def test_category_cap(self):
+        relevance = [1.0, 0.99, 0.98, 0.97, 0.2, 0.1]
+        categories = ['a', 'a', 'a', 'a', 'b', 'c']
+        order = mmr_rerank(relevance, unit_vectors(6), categories, 4, diversity=0.0, category_cap=2)
+        self.assertEqual(order, [0, 1, 4, 5])
+
+    def test_default_cap_is_half_the_limit(self):
+        categories = ['a'] * 6 + ['b'] * 6
+        relevance = np.linspace(1.0, 0.5, 12)
+        order = mmr_rerank(relevance, unit_vectors(12), categories, 6, diversity=0.0)
+        self.assertEqual(Counter(categories[i] for i in order), {'a': 3, 'b': 3})
+
+    def test_cap_is_relaxed_when_it_excludes_everything(self):
+        order = mmr_rerank([0.9, 0.8, 0.7, 0.6], unit_vectors(4), ['a'] * 4, 3, diversity=0.0, category_cap=1)
+        self.assertEqual(order, [0, 1, 2])
+
+    def test_missing_categories_share_one_bucket(self):
+        categories = [None, None, float('nan'), 'a']
+        order = mmr_rerank([0.9, 0.8, 0.7, 0.1], unit_vectors(4), categories, 2, diversity=0.0, category_cap=1)
+        self.assertEqual(order, [0, 3])
+
+    def test_limits(self):
+        self.assertEqual(mmr_rerank([], np.zeros((0, 6)), [], 5), [])
+        self.assertEqual(mmr_rerank([0.5, 0.4], unit_vectors(2), ['a', 'b'], 0), [])
+        order = mmr_rerank([0.5, 0.4, 0.3], unit_vectors(3), ['a', 'b', 'c'], 10, category_cap=1)
+        self.assertEqual(sorted(order), [0, 1, 2])
+
+    def test_diversity_is_clamped(self):
+        relevance, vectors, categories = np.random.default_rng(1).random(20), unit_vectors(20, seed=1), ['a', 'b'] * 10
+        self.assertEqual(mmr_rerank(relevance, vectors, categories, 8, diversity=2.0, category_cap=8),
+                         mmr_rerank(relevance, vectors, categories, 8, diversity=1.0, category_cap=8))
+        self.assertEqual(mmr_rerank(relevance, vectors, categories, 8, diversity=-1.0, category_cap=8),
+                         mmr_rerank(relevance, vectors, categories, 8, diversity=0.0, category_cap=8))
+
+
+class EnsureDiversityTests(SimpleTestCase):
+
+    def scored(self, rows):
+        items = []
+        for code, category, score, nutrients in rows:
+            product = mock.Mock(product_code=code, main_category=category)
+            product.data = dict(zip(NUTRIENT_COLUMNS, nutrients))
+            items.append({'product': product, 'final_score': score})
+        return items
+
+    def rerank(self, items, limit, **options):
+        service = recommendation_module.MLRecommendationService()
+        with mock.patch.object(service, '_convert_product_to_dict', side_effect=lambda product: product.data):
+            return [item['product'].product_code for item in service._ensure_diversity(items, limit, **options)]
+
+    def test_short_lists_are_returned_unchanged(self):
+        items = self.scored([('1', 'a', 9.0, [100, 1, 1, 1, 0.1, 1]), ('2', 'a', 8.0, [100, 1, 1, 1, 0.1, 1])])
+        self.assertIs(recommendation_module.MLRecommendationService()._ensure_diversity(items, 2), items)
+
+    def test_category_cap_and_near_duplicates(self):
+        items = self.scored([
+            ('cola', 'drinks', 9.5, [42, 0, 0, 10.6, 0, 0]),
+            ('cola-zero', 'drinks', 9.4, [42, 0, 0, 10.6, 0, 0]),
+            ('cola-light', 'drinks', 9.3, [42, 0, 0, 10.5, 0, 0]),
+            ('yoghurt', 'dairy', 8.0, [60, 4, 3, 4, 0.1, 0]),
+            ('oats', 'cereals', 7.0, [380, 13, 7, 1, 0, 10]),
+        ])
+        self.assertEqual(self.rerank(items, 3, diversity=0.0, category_cap=1), ['cola', 'yoghurt', 'oats'])
+        self.assertEqual(self.rerank(items, 3, diversity=0.0, category_cap=3), ['cola', 'cola-zero', 'cola-light'])
+        # Aynı besin profili kotasız da cezalandırılır
+        self.assertNotIn('cola-zero', self.rerank(items, 3, diversity=0.6, category_cap=3))
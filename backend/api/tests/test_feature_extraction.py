@@ -0,0 +1,142 @@
+# api/tests/test_feature_extraction.py
+
+import logging
+import math
+import os
+import random
+import tempfile
+
+import numpy as np
+import pandas as pd
+from django.test import SimpleTestCase
+
+from aimodels.ml_models.data_preprocessing import OpenFoodFactsPreprocessor
+from api.pipeline.feature_extractor import ALLERGEN_KEYWORDS, AllergenMatcher, allergen_matcher
+from api.pipeline.product_data_pipeline import ProductDataPipeline
+
+from .utils import write_sample_tsv
+
+
+def _same_value(a, b) -> bool:
+    if isinstance(a, dict) and isinstance(b, dict):
+        return list(a) == list(b) and all(_same_value(a[key], b[key]) for key in a)
+    if isinstance(a, float) and isinstance(b, float) and math.isnan(a) and math.isnan(b):
+        return True
+    return a == b
+
+
+class FrameFeatureExtractionTests(SimpleTestCase):
+    """Sütun bazlı extract_all_features_frame, satır bazlı extract_all_features ile aynı özellikleri üretmeli"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        logging.disable(logging.WARNING)
+        with tempfile.TemporaryDirectory() as directory:
+            path = write_sample_tsv(os.path.join(directory, 'sample.tsv'), 800, seed=3)
+            cls.preprocessed = OpenFoodFactsPreprocessor().preprocess(path)
+
+    @classmethod
+    def tearDownClass(cls):
+        logging.disable(logging.NOTSET)
+        super().tearDownClass()
+
+    def assertSameFeatures(self, df: pd.DataFrame):
+        pipeline = ProductDataPipeline()
+        rows = pipeline._apply_feature_extraction_rows(df)
+        frame = pipeline.feature_extractor.extract_all_features_frame(df)
+
+        self.assertEqual(list(rows.columns), list(frame.columns))
+        self.assertEqual(len(rows), len(frame))
+        self.assertGreater(len(frame), 0)
+        for i, (row_features, frame_features) in enumerate(zip(rows.to_dict('records'), frame.to_dict('records'))):
+            for column, value in row_features.items():
+                self.assertTrue(
+                    _same_value(value, frame_features[column]),
+                    f"satır {i}, {column}: {value!r} != {frame_features[column]!r}"
+                )
+
+    def test_pipeline_cleaned_frame(self):
+        pipeline = ProductDataPipeline()
+        cleaned = pipeline._clean_null_values(pipeline._clean_dataframe_unicode(self.preprocessed.copy()))
+        self.assertSameFeatures(cleaned)
+
+    def test_unparseable_and_infinite_values(self):
+        df = self.preprocessed.head(300).copy().reset_index(drop=True)
+        rng = np.random.default_rng(1)
+        junk = ['', 'nan', 'NaN', 'abc', '2.0', ' 3 ', 'inf', '-inf', None, np.nan, '1e3']
+        for column in ['fat_100g', 'sugars_100g', 'additives_n', 'estimated_processing_level']:
+            df[column] = df[column].astype(object)
+            rows = rng.choice(len(df), 40, replace=False)
+            df.loc[rows, column] = rng.choice(np.array(junk, dtype=object), 40)
+        df.loc[5, 'product_name'] = np.nan
+        df.loc[8, 'ingredients_text'] = 'a\x1cb  c'
+        self.assertSameFeatures(df)
+
+    def test_missing_optional_columns(self):
+        df = self.preprocessed.head(300).drop(
+            columns=['main_category', 'additives_n', 'nutrition_grade_fr'], errors='ignore'
+        )
+        self.assertSameFeatures(df)
+
+
+def _keyword_scan(text: str):
+    """Eski kural: grubun kelimelerinden biri metinde alt string olarak geçiyorsa 1"""
+    return {group: int(any(keyword in text for keyword in keywords)) for group, keywords in ALLERGEN_KEYWORDS.items()}
+
+
+class AllergenMatcherTests(SimpleTestCase):
+    """Tek regex'li AllergenMatcher, grup başına `keyword in text` taramasıyla aynı sonucu vermeli"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        rng = random.Random(0)
+        keywords = [keyword for group_keywords in ALLERGEN_KEYWORDS.values() for keyword in group_keywords]
+        alphabet = list('abcdefghijklmnopqrstuvwxyzğüşıöç ,')
+        cls.texts = [
+            ''.join(
+                rng.choice(keywords) if rng.random() < 0.5 else ''.join(rng.choices(alphabet, k=rng.randint(0, 6)))
+                for _ in range(rng.randint(0, 6))
+            )
+            for _ in range(5000)
+        ]
+        # İç içe geçen kelimeler: peanut/nut, shellfish/fish, yer fıstığı, bitişik kelimeler
+        cls.texts += ['peanut', 'shellfish', 'soyabean nuts', '', 'yer fıstığı', 'sülfürsulphite', 'SÜT', 'eggs']
+
+    def test_match_equals_keyword_scan(self):
+        for text in self.texts:
+            self.assertEqual(allergen_matcher.match(text), _keyword_scan(text), text)
+
+    def test_overlapping_keywords(self):
+        self.assertEqual(allergen_matcher.match('peanut')['contains_nuts'], 1)
+        self.assertEqual(allergen_matcher.match('shellfish')['contains_fish'], 1)
+        self.assertEqual(allergen_matcher.match('SÜT')['contains_milk'], 0)
+
+    def test_match_series_keeps_row_order(self):
+        # Sıralı olmayan index: sonuçlar konuma göre hizalanır
+        texts = pd.Series(self.texts, index=np.arange(len(self.texts))[::-1] * 3)
+        result = allergen_matcher.match_series(texts)
+        for i, text in enumerate(self.texts):
+            expected = _keyword_scan(text)
+            for group, value in expected.items():
+                self.assertEqual(result[group][i], value, (text, group))
+
+    def test_custom_keywords(self):
+        matcher = AllergenMatcher({'a': ['ab'], 'b': ['b', 'abc']})
+        self.assertEqual(matcher.match('xabcx'), {'a': 1, 'b': 1})
+        self.assertEqual(matcher.match('xb'), {'a': 0, 'b': 1})
+        self.assertEqual(matcher.match('ac'), {'a': 0, 'b': 0})
+
+    def test_row_and_frame_allergen_vectors(self):
+        extractor = ProductDataPipeline().feature_extractor
+        df = pd.DataFrame({
+            'allergens': ['Milk, eggs', np.nan, 'nan', ''],
+            'traces': [np.nan, 'peanuts', 'sesame', np.nan],
+            'ingredients_text': ['wheat flour', 'water', np.nan, 'soja'],
+        })
+        frame = extractor.extract_allergen_frame(df)
+        for i in range(len(df)):
+            row_vector = extractor.extract_allergen_vector(df.iloc[i])
+            self.assertEqual(row_vector.pop('total_allergens'), sum(row_vector.values()))
+            self.assertEqual(row_vector, {group: int(values[i]) for group, values in frame.items()})
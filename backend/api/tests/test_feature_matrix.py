@@ -0,0 +1,143 @@
+# api/tests/test_feature_matrix.py
+
+import logging
+import os
+import tempfile
+import time
+from unittest import mock
+
+import numpy as np
+from django.test import TestCase
+
+from api.models.product_features import ProductFeatures
+from api.pipeline import feature_matrix
+from api.pipeline.feature_matrix import (
+    CURRENT_FILE,
+    KEEP_OLD_VERSIONS,
+    METHOD_COLUMNS,
+    POINTER_CHECK_SECONDS,
+    VERSION_PREFIX,
+    ProductFeatureMatrix,
+    build_feature_matrix,
+    get_feature_matrix,
+)
+from api.pipeline.product_data_pipeline import ProductDataPipeline
+
+from .utils import sample_features
+
+
+class FeatureMatrixTests(TestCase):
+    """Matris değerleri getter'larla aynı olmalı; sürüm geçişi ve güncellik kontrolü"""
+
+    @classmethod
+    def setUpTestData(cls):
+        logging.disable(logging.WARNING)
+        try:
+            with tempfile.TemporaryDirectory() as directory:
+                ProductDataPipeline(batch_size=100)._save_to_database(sample_features(directory, 150, seed=11))
+        finally:
+            logging.disable(logging.NOTSET)
+
+    def setUp(self):
+        logging.disable(logging.WARNING)
+        self.addCleanup(logging.disable, logging.NOTSET)
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        self.directory = tmp_dir.name
+        # Süreç içindeki matris önbelleği testler arasında taşınmasın
+        patcher = mock.patch.dict(feature_matrix._loaded_matrix)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def versions(self):
+        return sorted(name for name in os.listdir(self.directory) if name.startswith(VERSION_PREFIX))
+
+    def test_values_match_getters(self):
+        build_feature_matrix(self.directory)
+        matrix = ProductFeatureMatrix.load(self.directory)
+        products = list(ProductFeatures.objects.order_by('id'))
+        self.assertEqual(len(matrix), len(products))
+        np.testing.assert_array_equal(matrix.ids, [product.id for product in products])
+
+        for product, values in zip(products, matrix.products_values(products)):
+            for method, column in METHOD_COLUMNS.items():
+                self.assertAlmostEqual(values[column], float(getattr(product, method)()), places=3,
+                                       msg=f'{product.product_code} {method}')
+            self.assertEqual(values['health_score'], float(str(np.float32(product.health_score))))
+            self.assertEqual(values['is_valid_for_analysis'], float(product.is_valid_for_analysis))
+
+    def test_row_lookups(self):
+        build_feature_matrix(self.directory)
+        matrix = ProductFeatureMatrix.load(self.directory)
+        products = list(ProductFeatures.objects.order_by('?')[:20])
+
+        rows = matrix.rows_for_codes([product.product_code for product in products] + ['missing-product'])
+        self.assertEqual(rows[-1], -1)
+        self.assertEqual(matrix.ids[rows[:-1]].tolist(), [product.id for product in products])
+        self.assertEqual(matrix.rows_for_ids([product.id for product in products] + [-5]).tolist(), rows.tolist())
+        self.assertEqual(matrix.rows_for_codes([]).tolist(), [])
+
+    def test_updated_products_fall_back_to_getters(self):
+        build_feature_matrix(self.directory)
+        matrix = ProductFeatureMatrix.load(self.directory)
+        self.assertFalse(matrix.is_stale())
+
+        products = list(ProductFeatures.objects.order_by('id')[:3])
+        products[1].save()
+        values = matrix.products_values(products)
+        self.assertIsNotNone(values[0])
+        self.assertIsNone(values[1])
+        self.assertIsNotNone(values[2])
+        self.assertIsNone(matrix.products_values([ProductFeatures(product_code='unsaved')])[0])
+        self.assertTrue(matrix.is_stale())
+
+    def test_deleted_products_make_the_matrix_stale(self):
+        build_feature_matrix(self.directory)
+        ProductFeatures.objects.order_by('id').first().delete()
+        self.assertTrue(ProductFeatureMatrix.load(self.directory).is_stale())
+
+    def test_version_switch_keeps_old_versions(self):
+        built = [build_feature_matrix(self.directory) for _ in range(KEEP_OLD_VERSIONS + 3)]
+        versions = self.versions()
+        self.assertEqual(len(versions), KEEP_OLD_VERSIONS + 1)
+
+        with open(os.path.join(self.directory, CURRENT_FILE), encoding='utf-8') as f:
+            current = f.read().strip()
+        self.assertEqual(os.path.join(self.directory, current), built[-1]['directory'])
+        self.assertEqual(versions[-1], current)
+        # Silinmemiş eski sürüm hâlâ açılabilir
+        self.assertIsNotNone(ProductFeatureMatrix.load(self.directory, versions[0]))
+
+    def test_missing_matrix(self):
+        self.assertIsNone(ProductFeatureMatrix.load(self.directory))
+        self.assertIsNone(get_feature_matrix(self.directory))
+
+    def test_pointer_is_checked_once_per_interval(self):
+        build_feature_matrix(self.directory)
+        matrix = get_feature_matrix(self.directory)
+        self.assertIsNotNone(matrix)
+
+        with mock.patch.object(feature_matrix, '_pointer_stamp', wraps=feature_matrix._pointer_stamp) as stamp:
+            for _ in range(5):
+                self.assertIs(get_feature_matrix(self.directory), matrix)
+        stamp.assert_not_called()
+
+        # Başka bir süreç yeni sürüme geçer: bu süreç aralık dolana kadar eski matrisi kullanır
+        with mock.patch.dict(feature_matrix._loaded_matrix):
+            build_feature_matrix(self.directory)
+        self.assertIs(get_feature_matrix(self.directory), matrix)
+
+        later = time.monotonic() + POINTER_CHECK_SECONDS + 1
+        with mock.patch.object(feature_matrix.time, 'monotonic', return_value=later):
+            reloaded = get_feature_matrix(self.directory)
+            self.assertIsNot(reloaded, matrix)
+            self.assertGreater(reloaded.built_at, matrix.built_at)
+            # İşaretçi değişmediyse aynı nesne
+            with mock.patch.object(feature_matrix.time, 'monotonic', return_value=later + POINTER_CHECK_SECONDS + 1):
+                self.assertIs(get_feature_matrix(self.directory), reloaded)
+
+    def test_build_in_this_process_is_seen_immediately(self):
+        build_feature_matrix(self.directory)
+        matrix = get_feature_matrix(self.directory)
+        build_feature_matrix(self.directory)
+        self.assertGreater(get_feature_matrix(self.directory).built_at, matrix.built_at)
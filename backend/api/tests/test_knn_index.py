@@ -0,0 +1,174 @@
+# api/tests/test_knn_index.py
+
+import importlib
+import logging
+from unittest import mock
+
+import numpy as np
+from django.test import SimpleTestCase, TestCase
+
+from aimodels.ml_models.model_registry import ModelArtifacts
+from api.models.product_features import ProductFeatures, ProductSimilarity
+from api.pipeline.knn_index import ProductKNNIndex
+from api.pipeline.product_flags import FLAG_BITS, compute_product_flags, profile_exclusion_mask
+from api.pipeline.similarity_graph import (
+    CATEGORY_WEIGHT,
+    NUTRIENT_COLUMNS,
+    NUTRITION_WEIGHT,
+    PROCESSING_WEIGHT,
+    SCALE_PERCENTILE,
+)
+
+from .utils import synthetic_feature_matrix
+
+recommendation_module = importlib.import_module('aimodels.ml_models.recommendation_service')
+
+
+def brute_force_scores(matrix, product_id, exclude_flags=0):
+    """Sorgu ürününün analize uygun diğer tüm ürünlerle benzerliği, her çift ayrı ayrı hesaplanır"""
+    valid = [row for row in range(len(matrix)) if matrix.column('is_valid_for_analysis')[row] == 1]
+    raw = np.clip(matrix.values(valid, NUTRIENT_COLUMNS).astype(np.float64), 0, None)
+    scale = np.percentile(raw, SCALE_PERCENTILE, axis=0)
+    scale[scale <= 0] = 1.0
+    scaled = np.minimum(raw / scale, 1.0)
+    processing = matrix.values(valid, ['processing_level'])[:, 0]
+
+    position = [int(matrix.ids[row]) for row in valid].index(product_id)
+    category = matrix.category_names[matrix.category_codes[valid[position]]]
+    scores = {}
+    for i, row in enumerate(valid):
+        if i == position or int(matrix.flags[row]) & exclude_flags:
+            continue
+        norms = np.linalg.norm(scaled[i]) * np.linalg.norm(scaled[position])
+        cosine = float(scaled[i] @ scaled[position] / norms) if norms > 0 else 0.0
+        same_category = category.strip() not in ('', 'unknown') and matrix.category_names[matrix.category_codes[row]] == category
+        scores[int(matrix.ids[row])] = (CATEGORY_WEIGHT * same_category + NUTRITION_WEIGHT * cosine
+                                        + PROCESSING_WEIGHT * (abs(processing[i] - processing[position]) <= 1))
+    return scores
+
+
+class KNNIndexTests(SimpleTestCase):
+    """k-NN indeksi, tüm ürünlerin tek tek skorlandığı brute force aramayla aynı komşuları bulmalı"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        logging.disable(logging.INFO)
+        try:
+            cls.matrix = synthetic_feature_matrix(300, seed=4)
+            cls.index = ProductKNNIndex(cls.matrix)
+        finally:
+            logging.disable(logging.NOTSET)
+        cls.valid_ids = cls.matrix.ids[cls.matrix.column('is_valid_for_analysis') == 1].tolist()
+
+    def assertMatchesBruteForce(self, product_id, k, exclude_flags=0):
+        neighbours = self.index.query(product_id, k=k, exclude_flags=exclude_flags)
+        scores = brute_force_scores(self.matrix, product_id, exclude_flags)
+        expected = sorted(scores.values(), reverse=True)[:k]
+
+        self.assertEqual(len(neighbours), len(expected))
+        self.assertEqual(len(set(neighbours)), len(neighbours))
+        self.assertNotIn(product_id, neighbours)
+        # Eşit skorlu ürünlerin sırası farklı olabilir; skor dizisi aynı olmalı
+        np.testing.assert_allclose([scores[neighbour] for neighbour in neighbours], expected, atol=1e-5)
+
+    def test_matches_brute_force(self):
+        for product_id in self.valid_ids[::15]:
+            for k in (1, 10, 50):
+                self.assertMatchesBruteForce(product_id, k)
+
+    def test_exclude_flags(self):
+        mask = FLAG_BITS['contains_milk'] | FLAG_BITS['contains_soy']
+        for product_id in self.valid_ids[::25]:
+            self.assertMatchesBruteForce(product_id, 40, exclude_flags=mask)
+            rows = self.matrix.rows_for_ids(self.index.query(product_id, k=40, exclude_flags=mask))
+            self.assertFalse((self.matrix.flags[rows] & mask).any())
+
+    def test_k_larger_than_index(self):
+        product_id = self.valid_ids[0]
+        neighbours = self.index.query(product_id, k=10000)
+        self.assertEqual(sorted(neighbours), sorted(set(self.valid_ids) - {product_id}))
+        self.assertMatchesBruteForce(product_id, 10000)
+
+    def test_unknown_and_invalid_products(self):
+        invalid_ids = set(self.matrix.ids.tolist()) - set(self.valid_ids)
+        self.assertTrue(invalid_ids)
+        self.assertIsNone(self.index.query(min(invalid_ids)))
+        self.assertIsNone(self.index.query(-1))
+        self.assertEqual(len(self.index), len(self.valid_ids))
+
+
+class AlternativeSourceOrderTests(TestCase):
+    """Alternatif adayları: önce k-NN indeksi, sonra benzerlik grafiği, en son kategori sorgusu"""
+
+    @classmethod
+    def setUpTestData(cls):
+        for number in range(30):
+            category = 'Biscuits au chocolat' if number < 22 else 'Cheeses'
+            allergens = {'contains_milk': 1} if number % 5 == 4 else {}
+            ProductFeatures.objects.create(
+                product_code=f'alt-{number}', product_name=f'Ürün {number}', main_category=category,
+                nutrition_vector={'proteins_100g': number, 'sugars_100g': 30 - number, 'energy_kcal_100g': 200},
+                allergen_vector=allergens, product_flags=compute_product_flags(allergens, {}, 1),
+                processing_level=1, health_score=5 + number / 10, is_valid_for_analysis=True,
+            )
+        cls.target = ProductFeatures.objects.get(product_code='alt-0')
+
+    def setUp(self):
+        self.service = recommendation_module.ml_recommendation_service
+        self.index = mock.Mock()
+        for patcher in [
+            mock.patch.object(recommendation_module, 'get_model_artifacts', return_value=ModelArtifacts()),
+            mock.patch.object(recommendation_module, 'get_knn_index', return_value=self.index),
+            mock.patch('api.pipeline.feature_matrix.get_feature_matrix', return_value=None),
+        ]:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def ids(self, *codes):
+        return list(ProductFeatures.objects.filter(product_code__in=codes).order_by('id').values_list('id', flat=True))
+
+    def alternative_codes(self, profile=None):
+        with mock.patch.object(self.service, '_get_similarity_graph_candidates',
+                               wraps=self.service._get_similarity_graph_candidates) as graph:
+            result = self.service.get_product_alternatives(profile or {}, 'alt-0', limit=30, min_score_threshold=0)
+        self.assertIsNotNone(result)
+        self.graph_called = graph.called
+        return {alternative['product'].product_code for alternative in result['alternatives']}
+
+    def add_graph_edges(self, *codes):
+        ProductSimilarity.objects.bulk_create([
+            ProductSimilarity(product_1=self.target, product_2=product, nutritional_similarity=0.9,
+                              category_similarity=1.0, overall_similarity=0.9)
+            for product in ProductFeatures.objects.filter(product_code__in=codes)
+        ])
+
+    def test_knn_neighbours_first(self):
+        self.index.query.return_value = self.ids('alt-25', 'alt-3', 'alt-7')
+        self.add_graph_edges('alt-1', 'alt-2')
+        self.assertEqual(self.alternative_codes(), {'alt-25', 'alt-3', 'alt-7'})
+        self.assertFalse(self.graph_called)
+        self.assertEqual(self.index.query.call_args.args[0], self.target.id)
+
+    def test_knn_exclusion_mask_follows_profile(self):
+        self.index.query.return_value = self.ids('alt-1')
+        profile = {'allergies': ['lactose']}
+        self.alternative_codes(profile)
+        self.assertEqual(self.index.query.call_args.kwargs['exclude_flags'], profile_exclusion_mask(profile))
+
+    def test_similarity_graph_when_index_has_no_neighbours(self):
+        self.index.query.return_value = None
+        self.add_graph_edges('alt-1', 'alt-2', 'alt-24')
+        self.assertEqual(self.alternative_codes(), {'alt-1', 'alt-2', 'alt-24'})
+        self.assertTrue(self.graph_called)
+
+    def test_similarity_graph_when_index_is_missing(self):
+        self.add_graph_edges('alt-5', 'alt-4')
+        with mock.patch.object(recommendation_module, 'get_knn_index', return_value=None):
+            self.assertEqual(self.alternative_codes({'allergies': ['lactose']}), {'alt-5'})
+
+    def test_category_query_last(self):
+        self.index.query.return_value = []
+        codes = self.alternative_codes()
+        self.assertTrue(self.graph_called)
+        self.assertEqual(codes, {f'alt-{number}' for number in range(1, 22)})
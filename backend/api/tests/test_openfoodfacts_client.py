@@ -0,0 +1,225 @@
+# api/tests/test_openfoodfacts_client.py
+
+import requests
+from asgiref.sync import async_to_sync
+from django.test import SimpleTestCase
+
+from api.clients.async_openfoodfacts import AsyncOpenFoodFactsClient, httpx
+from api.clients.fake_openfoodfacts import FakeOpenFoodFactsServer
+from api.clients.openfoodfacts import CircuitBreaker, CircuitOpenError, OpenFoodFactsClient
+
+PRODUCTS = [
+    {'code': '3017620422003', 'product_name': 'Nutella', 'brands': 'Ferrero', 'categories': 'Spreads'},
+    {'code': '5449000000996', 'product_name': 'Coca-Cola', 'brands': 'Coca-Cola', 'categories': 'Beverages'},
+    {'code': '8690504000000', 'product_name': 'Ayran', 'brands': 'Sütaş', 'categories': 'Beverages'},
+]
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeServerMixin:
+    """Her test için boş portta yeni bir sahte OpenFoodFacts sunucusu"""
+
+    def setUp(self):
+        super().setUp()
+        self.server = FakeOpenFoodFactsServer(PRODUCTS, seed=0)
+        self.server.start()
+        self.addCleanup(self.server.stop)
+
+    def make_client(self, **options):
+        options.setdefault('backoff_factor', 0)
+        options.setdefault('backoff_jitter', 0)
+        client = OpenFoodFactsClient(base_url=self.server.base_url, **options)
+        self.addCleanup(client.close)
+        return client
+
+
+class OpenFoodFactsClientTests(FakeServerMixin, SimpleTestCase):
+
+    def test_search_and_product(self):
+        client = self.make_client()
+        result = client.search({'search_terms': 'beverages', 'page_size': 1, 'fields': 'code,product_name'})
+        self.assertEqual(result['count'], 2)
+        self.assertEqual(result['products'], [{'code': '5449000000996', 'product_name': 'Coca-Cola'}])
+        self.assertEqual(client.get_product('3017620422003')['product']['product_name'], 'Nutella')
+        self.assertEqual(client.get_product('0000')['status'], 0)
+
+    def test_keep_alive_reuses_one_connection(self):
+        client = self.make_client()
+        for _ in range(10):
+            client.get_product('3017620422003')
+        self.assertEqual(self.server.request_count, 10)
+        self.assertEqual(self.server.connection_count, 1)
+
+    def test_retries_on_server_errors(self):
+        self.server.failure_rate = 1.0
+        client = self.make_client(max_retries=2)
+        with self.assertRaises(requests.HTTPError) as raised:
+            client.get_product('3017620422003')
+        self.assertEqual(raised.exception.response.status_code, 503)
+        self.assertEqual(self.server.request_count, 3)
+
+    def test_no_retry_on_client_errors(self):
+        client = self.make_client(max_retries=2)
+        with self.assertRaises(requests.HTTPError):
+            client.get_json('/unknown')
+        self.assertEqual(self.server.request_count, 1)
+        # 4xx upstream'in sağlıklı olduğunu gösterir
+        self.assertEqual(client.breaker.state, CircuitBreaker.CLOSED)
+
+    def test_retry_recovers_from_transient_failures(self):
+        self.server.failure_rate = 0.5
+        client = self.make_client(max_retries=5, breaker=CircuitBreaker(failure_threshold=100))
+        for _ in range(10):
+            self.assertEqual(client.get_product('5449000000996')['status'], 1)
+        self.assertGreater(self.server.request_count, 10)
+
+    def test_circuit_open_half_open_closed(self):
+        clock = FakeClock()
+        breaker = CircuitBreaker(failure_threshold=2, reset_timeout=30, clock=clock)
+        client = self.make_client(max_retries=0, breaker=breaker)
+
+        self.server.failure_rate = 1.0
+        for _ in range(2):
+            with self.assertRaises(requests.HTTPError):
+                client.get_product('3017620422003')
+        self.assertEqual(breaker.state, CircuitBreaker.OPEN)
+
+        # Devre açıkken upstream'e istek gitmez
+        with self.assertRaises(CircuitOpenError):
+            client.get_product('3017620422003')
+        self.assertEqual(self.server.request_count, 2)
+
+        clock.now = 29.9
+        self.assertEqual(breaker.state, CircuitBreaker.OPEN)
+        clock.now = 30
+        self.assertEqual(breaker.state, CircuitBreaker.HALF_OPEN)
+
+        self.server.failure_rate = 0.0
+        self.assertEqual(client.get_product('3017620422003')['status'], 1)
+        self.assertEqual(breaker.state, CircuitBreaker.CLOSED)
+        self.assertEqual(self.server.request_count, 3)
+
+    def test_failed_probe_reopens_circuit(self):
+        clock = FakeClock()
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10, clock=clock)
+        client = self.make_client(max_retries=0, breaker=breaker)
+        self.server.failure_rate = 1.0
+
+        with self.assertRaises(requests.HTTPError):
+            client.get_product('3017620422003')
+        clock.now = 10
+        self.assertEqual(breaker.state, CircuitBreaker.HALF_OPEN)
+        with self.assertRaises(requests.HTTPError):
+            client.get_product('3017620422003')
+        self.assertEqual(breaker.state, CircuitBreaker.OPEN)
+        clock.now = 19.9
+        self.assertEqual(breaker.state, CircuitBreaker.OPEN)
+        clock.now = 20
+        self.assertEqual(breaker.state, CircuitBreaker.HALF_OPEN)
+
+    def test_connection_errors_count_as_failures(self):
+        breaker = CircuitBreaker(failure_threshold=1)
+        client = self.make_client(max_retries=0, breaker=breaker)
+        base_url = self.server.base_url
+        self.server.stop()
+        client.base_url = base_url
+        with self.assertRaises(requests.ConnectionError):
+            client.get_product('3017620422003')
+        self.assertEqual(breaker.state, CircuitBreaker.OPEN)
+
+
+class CircuitBreakerTests(SimpleTestCase):
+
+    def test_half_open_allows_a_single_probe(self):
+        clock = FakeClock()
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=5, clock=clock)
+        breaker.record_failure()
+        self.assertFalse(breaker.allow_request())
+        clock.now = 5
+        self.assertTrue(breaker.allow_request())
+        self.assertFalse(breaker.allow_request())
+        breaker.record_success()
+        self.assertTrue(breaker.allow_request())
+        self.assertTrue(breaker.allow_request())
+
+    def test_success_resets_failure_count(self):
+        breaker = CircuitBreaker(failure_threshold=3)
+        for _ in range(2):
+            breaker.record_failure()
+        breaker.record_success()
+        for _ in range(2):
+            breaker.record_failure()
+        self.assertEqual(breaker.state, CircuitBreaker.CLOSED)
+        breaker.record_failure()
+        self.assertEqual(breaker.state, CircuitBreaker.OPEN)
+
+
+class AsyncOpenFoodFactsClientTests(FakeServerMixin, SimpleTestCase):
+
+    def setUp(self):
+        if httpx is None:
+            self.skipTest('httpx kurulu değil')
+        super().setUp()
+
+    def run_client(self, calls, **options):
+        """İstemciyi tek event loop'ta oluşturup calls(client) sonucunu döndür"""
+        options.setdefault('backoff_factor', 0)
+        options.setdefault('backoff_jitter', 0)
+
+        async def run():
+            client = AsyncOpenFoodFactsClient(base_url=self.server.base_url, **options)
+            try:
+                return await calls(client)
+            finally:
+                await client.close()
+
+        return async_to_sync(run)()
+
+    def test_keep_alive_reuses_one_connection(self):
+        async def calls(client):
+            return [await client.get_product('8690504000000') for _ in range(10)]
+
+        results = self.run_client(calls)
+        self.assertTrue(all(result['product']['product_name'] == 'Ayran' for result in results))
+        self.assertEqual(self.server.request_count, 10)
+        self.assertEqual(self.server.connection_count, 1)
+
+    def test_retries_on_server_errors(self):
+        self.server.failure_rate = 1.0
+        breaker = CircuitBreaker(failure_threshold=2)
+
+        async def calls(client):
+            with self.assertRaises(requests.HTTPError):
+                await client.get_product('8690504000000')
+
+        self.run_client(calls, max_retries=2, breaker=breaker)
+        self.assertEqual(self.server.request_count, 3)
+        # Tekrarlar dahil istek başına tek hata yazılır
+        self.assertEqual(breaker.state, CircuitBreaker.CLOSED)
+
+    def test_circuit_open_half_open_closed(self):
+        clock = FakeClock()
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30, clock=clock)
+
+        async def calls(client):
+            self.server.failure_rate = 1.0
+            with self.assertRaises(requests.HTTPError):
+                await client.get_product('8690504000000')
+            self.assertEqual(breaker.state, CircuitBreaker.OPEN)
+            with self.assertRaises(CircuitOpenError):
+                await client.get_product('8690504000000')
+
+            clock.now = 30
+            self.server.failure_rate = 0.0
+            return await client.get_product('8690504000000')
+
+        self.assertEqual(self.run_client(calls, max_retries=0, breaker=breaker)['status'], 1)
+        self.assertEqual(breaker.state, CircuitBreaker.CLOSED)
+        self.assertEqual(self.server.request_count, 2)
@@ -0,0 +1,246 @@
+# api/tests/test_preprocessing.py
+
+import logging
+import os
+import tempfile
+from contextlib import contextmanager
+
+import pandas as pd
+from django.test import SimpleTestCase
+
+from aimodels.ml_models.data_preprocessing import OpenFoodFactsPreprocessor
+
+from .utils import sample_tsv_columns, write_sample_tsv
+
+PREPROCESSING_LOGGER = 'aimodels.ml_models.data_preprocessing'
+
+
+class PreprocessingTestCase(SimpleTestCase):
+    """Geçici dizin ve sessiz log ile önişleme testleri"""
+
+    def setUp(self):
+        super().setUp()
+        logging.disable(logging.WARNING)
+        self.addCleanup(logging.disable, logging.NOTSET)
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        self.preprocessor = OpenFoodFactsPreprocessor()
+
+    def write_tsv(self, name: str, n_rows: int, seed: int = 0, clean_rows: int = 0) -> str:
+        """Sentetik TSV; clean_rows verilirse ilk clean_rows satırda sayı olmayan değer ('abc') bırakılmaz"""
+        path = write_sample_tsv(os.path.join(self.directory, name), n_rows, seed=seed)
+        if clean_rows:
+            with open(path, encoding='utf-8') as f:
+                lines = f.readlines()
+            for i in range(1, clean_rows + 1):
+                lines[i] = '\t'.join('' if value == 'abc' else value for value in lines[i].split('\t'))
+            with open(path, 'w', encoding='utf-8') as f:
+                f.writelines(lines)
+        return path
+
+    @contextmanager
+    def assertTypedFallback(self, expected: bool):
+        """Blok içinde tipli okumanın string okumaya düşüp düşmediğini log'dan kontrol et"""
+        logging.disable(logging.NOTSET)
+        try:
+            if expected:
+                with self.assertLogs(PREPROCESSING_LOGGER, level='WARNING') as logs:
+                    yield logs
+            else:
+                with self.assertNoLogs(PREPROCESSING_LOGGER, level='WARNING'):
+                    yield None
+        finally:
+            logging.disable(logging.WARNING)
+
+
+class LateEncodingFallbackTests(PreprocessingTestCase):
+    """Encoding örneğinden (ilk 1 MB) sonra gelen latin-1 byte okuyucuları durdurmamalı"""
+
+    def setUp(self):
+        super().setUp()
+        self.path = write_sample_tsv(os.path.join(self.directory, 'late_latin1.tsv'), 4000, seed=1)
+        self.assertGreater(os.path.getsize(self.path), self.preprocessor.encoding_sample_size)
+
+        columns = sample_tsv_columns()
+        row = ['1.5' if column.endswith('_100g') else '' for column in columns]
+        row[columns.index('code')] = '9999999'
+        row[columns.index('product_name')] = 'Café au lait'
+        with open(self.path, 'ab') as f:
+            f.write('\t'.join(row).encode('latin-1') + b'\n')
+        self.assertEqual(self.preprocessor.detect_encoding(self.path), 'utf-8')
+
+    def test_projected_reader(self):
+        df = self.preprocessor.load_tsv_projected(self.path)
+        self.assertEqual(len(df), len(self.preprocessor.load_tsv(self.path)))
+        self.assertEqual(df['product_name'].iloc[-1], 'Café au lait')
+
+    def test_chunked_reader_continues_with_next_encoding(self):
+        chunks = list(self.preprocessor.iter_tsv_chunks(self.path, chunksize=500))
+        df = pd.concat(chunks)
+        self.assertEqual(len(df), 4001)
+        self.assertEqual(list(df.index), list(range(4001)))
+        # Hatadan önceki satırlar utf-8, sonrası bir sonraki encoding ile okunur
+        self.assertTrue(df['product_name'].iloc[:500].str.startswith('Ürün', na=True).all())
+        self.assertEqual(df['product_name'].iloc[-1], 'Café au lait')
+
+    def test_byte_range_reader(self):
+        encoding = self.preprocessor.detect_encoding(self.path)
+        read_options = self.preprocessor.get_projected_read_options(self.path, encoding)
+        frames = [
+            self.preprocessor.load_tsv_range(self.path, start, end, encoding, read_options)
+            for start, end in self.preprocessor.split_byte_ranges(self.path, 3)
+        ]
+        self.assertEqual(sum(len(frame) for frame in frames), 4001)
+        self.assertEqual(frames[-1]['product_name'].iloc[-1], 'Café au lait')
+
+    def test_preprocess_paths_agree(self):
+        expected = self.preprocessor.preprocess(self.path)
+        chunked = pd.concat(self.preprocessor.preprocess_chunked(self.path, chunksize=700))
+        self.assertEqual(len(chunked), len(expected))
+        self.assertIn('9999999', set(chunked['code']))
+
+
+class ChunkedPreprocessingTests(PreprocessingTestCase):
+    """preprocess_chunked parçalarının birleşimi preprocess() çıktısı ile aynı olmalı"""
+
+    def test_chunks_match_in_memory_preprocess(self):
+        path = self.write_tsv('sample.tsv', 1500, seed=4)
+        expected = self.preprocessor.preprocess(path)
+        self.assertGreater(len(expected), 0)
+        for chunksize in [97, 400, 1500, 5000]:
+            with self.subTest(chunksize=chunksize):
+                chunked = pd.concat(self.preprocessor.preprocess_chunked(path, chunksize=chunksize))
+                pd.testing.assert_frame_equal(chunked, expected)
+
+    def test_legacy_reader_chunks(self):
+        path = self.write_tsv('sample.tsv', 900, seed=5)
+        expected = self.preprocessor.preprocess(path, projected=False)
+        chunked = pd.concat(self.preprocessor.preprocess_chunked(path, chunksize=250, projected=False))
+        pd.testing.assert_frame_equal(chunked, expected)
+
+    def test_sample_size(self):
+        path = self.write_tsv('sample.tsv', 900, seed=5)
+        expected = self.preprocessor.preprocess(path, sample_size=333)
+        chunked = pd.concat(self.preprocessor.preprocess_chunked(path, sample_size=333, chunksize=100))
+        pd.testing.assert_frame_equal(chunked, expected)
+
+    def test_typed_fallback_after_first_chunks(self):
+        # 'abc' sadece 600. satırdan sonra: ilk parçalar tipli okunur, kalan satırlar string okunarak devam edilir
+        path = self.write_tsv('sample.tsv', 1000, seed=6, clean_rows=600)
+        expected = self.preprocessor.preprocess(path)
+        with self.assertTypedFallback(True) as logs:
+            chunked = pd.concat(self.preprocessor.preprocess_chunked(path, chunksize=200))
+        self.assertTrue(any('Tipli okuma 600. satırdan sonra' in message for message in logs.output))
+        pd.testing.assert_frame_equal(chunked, expected)
+
+    def test_output_file(self):
+        path = self.write_tsv('sample.tsv', 700, seed=7)
+        output_path = os.path.join(self.directory, 'processed.csv')
+        expected = self.preprocessor.preprocess(path)
+        for _ in self.preprocessor.preprocess_chunked(path, output_path=output_path, chunksize=150):
+            pass
+        self.assertEqual(len(pd.read_csv(output_path, dtype=str)), len(expected))
+
+
+class ProjectedReaderTests(PreprocessingTestCase):
+    """Sütun projeksiyonlu, tipli okuyucu eski (tüm sütunlar string) okuyucu ile aynı sonucu vermeli"""
+
+    def assertSameAfterProcessing(self, path: str):
+        legacy = self.preprocessor.load_tsv(path)
+        projected = self.preprocessor.load_tsv_projected(path)
+        self.assertLess(len(projected.columns), len(legacy.columns))
+        self.assertEqual(len(projected), len(legacy))
+
+        present = self.preprocessor.check_available_columns(legacy)['present']
+        expected = self.preprocessor._process_frame(legacy, present)
+        pd.testing.assert_frame_equal(self.preprocessor._process_frame(projected, present), expected)
+        return expected
+
+    def test_typed_read(self):
+        path = self.write_tsv('sample.tsv', 800, seed=8, clean_rows=800)
+        with self.assertTypedFallback(False):
+            self.preprocessor.load_tsv_projected(path)
+        self.assertGreater(len(self.assertSameAfterProcessing(path)), 0)
+
+    def test_falls_back_to_strings_for_non_numeric_values(self):
+        path = self.write_tsv('sample.tsv', 800, seed=8)
+        with self.assertTypedFallback(True) as logs:
+            df = self.preprocessor.load_tsv_projected(path)
+        self.assertTrue(any('Tipli okuma başarısız' in message for message in logs.output))
+        self.assertTrue((df['energy_100g'] == 'abc').any())
+        self.assertSameAfterProcessing(path)
+
+    def test_projection_keeps_required_and_document_columns(self):
+        path = self.write_tsv('sample.tsv', 10)
+        options = self.preprocessor.get_projected_read_options(path, 'utf-8')
+        header = sample_tsv_columns()
+        required = set(self.preprocessor.all_required_columns) | set(self.preprocessor.document_columns)
+        self.assertEqual(options['usecols'], [column for column in header if column in required])
+        self.assertEqual(options['dtype']['energy_100g'], 'float64')
+        self.assertEqual(options['dtype']['additives_n'], 'float64')
+        self.assertIs(options['dtype']['product_name'], str)
+
+    def test_preprocess_readers_agree(self):
+        path = self.write_tsv('sample.tsv', 800, seed=9)
+        pd.testing.assert_frame_equal(self.preprocessor.preprocess(path), self.preprocessor.preprocess(path, projected=False))
+
+
+class ByteRangePreprocessingTests(PreprocessingTestCase):
+    """Byte aralıklarının ayrı ayrı önişlenmesi sıralı preprocess() ile aynı satırları vermeli (kayıp/tekrar yok)"""
+
+    def setUp(self):
+        super().setUp()
+        self.path = self.write_tsv('sample.tsv', 1200, seed=10)
+
+    def test_ranges_cover_data_on_line_boundaries(self):
+        with open(self.path, 'rb') as f:
+            header_end = len(f.readline())
+            data = f.read()
+        line_starts = {header_end + i + 1 for i, byte in enumerate(data) if byte == ord('\n')} | {header_end}
+        file_size = os.path.getsize(self.path)
+
+        for n_ranges in [1, 2, 3, 7, 40, 5000]:
+            with self.subTest(n_ranges=n_ranges):
+                ranges = self.preprocessor.split_byte_ranges(self.path, n_ranges)
+                self.assertLessEqual(len(ranges), n_ranges)
+                self.assertEqual(ranges[0][0], header_end)
+                self.assertEqual(ranges[-1][1], file_size)
+                for (_, end), (start, _) in zip(ranges, ranges[1:]):
+                    self.assertEqual(end, start)
+                self.assertTrue(all(start in line_starts for start, _ in ranges))
+
+    def test_ranges_match_sequential_preprocess(self):
+        expected = self.preprocessor.preprocess(self.path).reset_index(drop=True)
+        for n_ranges in [1, 3, 7, 40]:
+            with self.subTest(n_ranges=n_ranges):
+                frames = [
+                    self.preprocessor.preprocess_byte_range(self.path, start, end)
+                    for start, end in self.preprocessor.split_byte_ranges(self.path, n_ranges)
+                ]
+                combined = pd.concat(frames).reset_index(drop=True)
+                pd.testing.assert_frame_equal(combined, expected)
+
+    def test_no_rows_lost_or_duplicated(self):
+        raw = self.preprocessor.load_tsv(self.path)
+        encoding = self.preprocessor.detect_encoding(self.path)
+        read_options = self.preprocessor.get_projected_read_options(self.path, encoding)
+        for n_ranges in [2, 9, 64]:
+            with self.subTest(n_ranges=n_ranges):
+                codes = []
+                for start, end in self.preprocessor.split_byte_ranges(self.path, n_ranges):
+                    codes.extend(self.preprocessor.load_tsv_range(self.path, start, end, encoding, read_options)['code'].tolist())
+                self.assertEqual(len(codes), len(raw))
+                self.assertEqual(
+                    [code if isinstance(code, str) else None for code in codes],
+                    [code if isinstance(code, str) else None for code in raw['code'].tolist()]
+                )
+
+    def test_resume_offset(self):
+        ranges = self.preprocessor.split_byte_ranges(self.path, 8)
+        resumed = self.preprocessor.split_byte_ranges(self.path, 3, start_offset=ranges[4][0])
+        self.assertEqual(resumed[0][0], ranges[4][0])
+        self.assertEqual(resumed[-1][1], ranges[-1][1])
+        expected = pd.concat([self.preprocessor.preprocess_byte_range(self.path, *byte_range) for byte_range in ranges[4:]])
+        combined = pd.concat([self.preprocessor.preprocess_byte_range(self.path, *byte_range) for byte_range in resumed])
+        pd.testing.assert_frame_equal(combined.reset_index(drop=True), expected.reset_index(drop=True))
@@ -0,0 +1,120 @@
+# api/tests/test_product_comparison.py
+
+import importlib
+import logging
+from unittest import mock
+
+import requests
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework_simplejwt.tokens import AccessToken
+
+from aimodels.ml_models.model_registry import ModelArtifacts
+from api.models.product_features import ProductFeatures
+from api.pipeline import product_comparison
+from api.pipeline.product_comparison import get_compared_products
+from api.views import async_product_views
+
+score_service_module = importlib.import_module('aimodels.ml_models.ml_product_score_service')
+
+PROFILE = {
+    'age': 30, 'gender': 'Female', 'height': 165.0, 'weight': 60.0, 'activity_level': 'moderate',
+    'medical_conditions': [], 'allergies': [], 'dietary_preferences': [], 'health_goals': [],
+}
+
+REMOTE_DOCUMENTS = {
+    'r-2': {'code': 'r-2', 'product_name': 'Uzak ürün', 'brands': 'Marka, Diğer', 'categories': 'Snacks, Sweet',
+            'nova_group': '3', 'nutriscore_grade': 'C', 'nutriments': {'sugars_100g': 12.0, 'salt_100g': 0.4}},
+    # Yerelde analize uygun olmadığı için API'den alınır
+    'c-invalid': {'code': 'c-invalid', 'product_name': 'Belgeden', 'nova_group': 'x', 'nutriments': {}},
+}
+
+
+class FakeRepository:
+    """ProductRepository yerine: sabit belgeler, 'r-fail' için bağlantı hatası"""
+
+    def __init__(self):
+        self.requested = []
+
+    def get(self, product_code):
+        self.requested.append(product_code)
+        if product_code == 'r-fail':
+            raise requests.ConnectionError('bağlantı yok')
+        return REMOTE_DOCUMENTS.get(product_code)
+
+    async def aget(self, product_code):
+        return self.get(product_code)
+
+
+class ProductComparisonTests(TestCase):
+    """Karşılaştırma: istek sırası korunur, bulunamayan ürünler atlanır; sync ve async view aynı yanıtı verir"""
+
+    @classmethod
+    def setUpTestData(cls):
+        for code, sugar, valid in [('c-1', 40.0, True), ('c-3', 2.0, True), ('c-invalid', 0.0, False)]:
+            ProductFeatures.objects.create(
+                product_code=code, product_name=f'Yerel {code}', main_category='Snacks',
+                nutrition_vector={'sugars_100g': sugar, 'proteins_100g': 8.0}, processing_level=2,
+                health_score=6.0, is_valid_for_analysis=valid,
+            )
+        cls.user = get_user_model().objects.create_user(
+            email='compare@example.com', username='compare', password='parola-123'
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.repository = FakeRepository()
+        for patcher in [
+            mock.patch.object(product_comparison, 'get_product_repository', return_value=self.repository),
+            mock.patch.object(async_product_views, 'get_product_repository', return_value=self.repository),
+            mock.patch.object(score_service_module, 'get_model_artifacts', return_value=ModelArtifacts()),
+            mock.patch('api.pipeline.feature_matrix.get_feature_matrix', return_value=None),
+            # Kural tabanlı analizin kendi hata kayıtları bu testlerin konusu değil
+            mock.patch.object(logging.getLogger('aimodels.product_analysis'), 'disabled', True),
+        ]:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_request_order_and_unknown_codes(self):
+        with self.assertLogs('api.pipeline.product_comparison', 'WARNING'):
+            products = get_compared_products(PROFILE, ['c-3', 'r-2', 'x-9', 'c-1', 'c-3', 'r-fail', 'c-invalid'])
+
+        self.assertEqual([product.product_code for product in products], ['c-3', 'r-2', 'c-1', 'c-invalid'])
+        # Yerel ürünler tek sorguyla bulunur, sadece eksikler (bir kez) API'den istenir
+        self.assertEqual(sorted(self.repository.requested), ['c-invalid', 'r-2', 'r-fail', 'x-9'])
+
+        local, remote = products[0], products[1]
+        self.assertIsNotNone(local.pk)
+        self.assertNotEqual(local.ml_analysis, {'basic_analysis': True})
+        self.assertIsNone(remote.pk)
+        self.assertEqual(remote.ml_analysis, {'basic_analysis': True})
+        self.assertEqual((remote.main_brand, remote.main_category, remote.processing_level), ('Marka', 'Snacks', 3))
+        self.assertEqual(products[3].processing_level, 1)
+        for product in products:
+            self.assertTrue(0 <= product.final_score <= 10)
+
+    def test_nothing_found(self):
+        self.assertEqual(get_compared_products(PROFILE, ['x-1', 'x-2']), [])
+
+    def compare(self, url, product_codes):
+        cache.clear()
+        headers = {'Authorization': f'Bearer {AccessToken.for_user(self.user)}'}
+        client = self.async_client if 'async' in url else self.client
+        return client.post(url, {'product_codes': product_codes}, content_type='application/json', headers=headers)
+
+    async def test_sync_and_async_views_return_the_same_response(self):
+        logging.disable(logging.ERROR)
+        self.addCleanup(logging.disable, logging.NOTSET)
+        statuses = []
+        for product_codes in (['c-1', 'r-2', 'x-9', 'c-3', 'r-fail'], ['c-invalid', 'c-3'], ['x-1', 'x-2']):
+            sync_response = await sync_to_async(self.compare)('/api/products/compare/', product_codes)
+            async_response = await self.compare('/api/async/products/compare/', product_codes)
+            self.assertEqual(async_response.status_code, sync_response.status_code, product_codes)
+            self.assertEqual(async_response.json(), sync_response.json(), product_codes)
+            statuses.append(async_response.status_code)
+            if async_response.status_code == 200:
+                self.assertEqual(async_response.json()['comparison_summary']['products_compared'],
+                                 len(set(product_codes) & {'c-1', 'c-3', 'r-2', 'c-invalid'}))
+        self.assertEqual(statuses, [200, 200, 404])
@@ -0,0 +1,123 @@
+# api/tests/test_product_flags.py
+
+import importlib
+
+import numpy as np
+from django.test import SimpleTestCase, TestCase
+
+from api.models.product_features import ProductFeatures
+from api.pipeline.product_flags import (
+    ALLERGEN_BITS,
+    FLAG_BITS,
+    HEALTH_INDICATOR_BITS,
+    PROCESSING_LEVEL_BITS,
+    compatible_rows,
+    compute_product_flags,
+    exclude_flagged,
+    flags_mask,
+    profile_exclusion_mask,
+)
+
+flags_migration = importlib.import_module('api.migrations.0010_productfeatures_product_flags')
+
+
+class ProductFlagsTests(SimpleTestCase):
+
+    def test_bits_are_distinct(self):
+        bits = list(ALLERGEN_BITS.values()) + list(HEALTH_INDICATOR_BITS.values()) + list(PROCESSING_LEVEL_BITS.values())
+        self.assertEqual(len(set(bits)), len(bits))
+        self.assertTrue(all(bit & (bit - 1) == 0 for bit in bits))
+        # BigIntegerField (işaretli 64 bit) sınırı
+        self.assertLess(max(bits), 1 << 63)
+
+    def test_compute_product_flags(self):
+        flags = compute_product_flags(
+            {'contains_milk': 1, 'contains_eggs': 0, 'total_allergens': 1},
+            {'high_salt': 1, 'high_sugar': 0},
+            4,
+        )
+        self.assertEqual(flags, ALLERGEN_BITS['contains_milk'] | HEALTH_INDICATOR_BITS['high_salt'] | PROCESSING_LEVEL_BITS[4])
+
+    def test_only_value_one_sets_a_flag(self):
+        # contains_allergen() / is_high_*() ile aynı kural: sadece == 1
+        self.assertEqual(compute_product_flags({'contains_milk': 2, 'contains_soy': True}, {'high_fat': '1'}, None),
+                         ALLERGEN_BITS['contains_soy'])
+
+    def test_missing_and_invalid_inputs(self):
+        self.assertEqual(compute_product_flags(None, None, None), 0)
+        self.assertEqual(compute_product_flags({}, {}, 'abc'), 0)
+        self.assertEqual(compute_product_flags({}, {}, 7), 0)
+        self.assertEqual(compute_product_flags({}, {}, '2'), PROCESSING_LEVEL_BITS[2])
+
+    def test_flags_mask(self):
+        self.assertEqual(flags_mask([]), 0)
+        self.assertEqual(flags_mask(['contains_nuts', 'high_fat', 'unknown']), FLAG_BITS['contains_nuts'] | FLAG_BITS['high_fat'])
+
+    def test_profile_exclusion_mask(self):
+        profile = {
+            'allergies': ['peanuts', 'milk'],
+            'dietary_preferences': ['vegan', 'low_sodium'],
+            'medical_conditions': ['celiac_disease', 'diabetes_type_2'],
+        }
+        expected = flags_mask([
+            'contains_peanuts', 'contains_milk', 'contains_eggs', 'contains_fish', 'contains_shellfish',
+            'high_salt', 'contains_gluten',
+        ])
+        self.assertEqual(profile_exclusion_mask(profile), expected)
+        self.assertEqual(profile_exclusion_mask({}), 0)
+        self.assertEqual(profile_exclusion_mask(None), 0)
+        self.assertEqual(profile_exclusion_mask({'allergies': None}), 0)
+
+    def test_compatible_rows(self):
+        flags = np.array([0, FLAG_BITS['contains_milk'], FLAG_BITS['high_salt'] | FLAG_BITS['contains_soy']])
+        np.testing.assert_array_equal(compatible_rows(flags, flags_mask(['contains_milk'])), [True, False, True])
+        np.testing.assert_array_equal(compatible_rows(flags, flags_mask(['contains_soy', 'contains_milk'])), [True, False, False])
+        np.testing.assert_array_equal(compatible_rows(flags, 0), [True, True, True])
+
+    def test_migration_encoder_matches_current_layout(self):
+        # 0010 bit düzenini dondurur; mevcut bitler değişirse eski veritabanlarının maskeleri anlamını yitirir
+        self.assertEqual(flags_migration.ALLERGEN_BITS, ALLERGEN_BITS)
+        self.assertEqual(flags_migration.HEALTH_INDICATOR_BITS, HEALTH_INDICATOR_BITS)
+        self.assertEqual(flags_migration.PROCESSING_LEVEL_BITS, PROCESSING_LEVEL_BITS)
+        cases = [
+            ({'contains_milk': 1, 'contains_sesame': 1}, {'high_fiber': 1}, 1),
+            (None, {'high_calorie': 1}, '3'),
+            ({}, None, None),
+        ]
+        for allergens, indicators, level in cases:
+            self.assertEqual(flags_migration.compute_product_flags(allergens, indicators, level),
+                             compute_product_flags(allergens, indicators, level))
+
+
+class ExcludeFlaggedTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        for code, allergens, indicators, level in [
+            ('plain', {}, {}, 1),
+            ('milk', {'contains_milk': 1}, {}, 2),
+            ('salty-nuts', {'contains_nuts': 1}, {'high_salt': 1}, 4),
+        ]:
+            ProductFeatures.objects.create(
+                product_code=code, product_name=code, main_category='test',
+                allergen_vector=allergens, health_indicators=indicators, processing_level=level,
+                product_flags=compute_product_flags(allergens, indicators, level),
+            )
+
+    def codes(self, mask, **filters):
+        return sorted(exclude_flagged(ProductFeatures.objects.filter(**filters), mask).values_list('product_code', flat=True))
+
+    def test_sql_filter_matches_numpy_filter(self):
+        products = list(ProductFeatures.objects.order_by('product_code'))
+        flags = np.array([product.product_flags for product in products])
+        for mask in [0, flags_mask(['contains_milk']), flags_mask(['high_salt']),
+                     flags_mask(['contains_milk', 'contains_nuts']), PROCESSING_LEVEL_BITS[4]]:
+            expected = [product.product_code for product, keep in zip(products, compatible_rows(flags, mask)) if keep]
+            self.assertEqual(self.codes(mask), expected)
+
+    def test_profile_mask(self):
+        self.assertEqual(self.codes(profile_exclusion_mask({'dietary_preferences': ['vegan']})), ['plain', 'salty-nuts'])
+        self.assertEqual(self.codes(profile_exclusion_mask({'allergies': ['tree_nuts', 'lactose']})), ['plain'])
+
+    def test_related_field(self):
+        self.assertEqual(self.codes(flags_mask(['contains_milk']), product_name__startswith='m'), [])
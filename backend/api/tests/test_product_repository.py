@@ -0,0 +1,93 @@
+# api/tests/test_product_repository.py
+
+from unittest import mock
+
+import requests
+from django.test import TestCase
+
+from api.clients import product_repository
+from api.clients.async_openfoodfacts import AsyncOpenFoodFactsClient, httpx
+from api.clients.product_repository import ProductRepository
+from api.models.product_document import ProductDocument
+
+from .test_openfoodfacts_client import FakeServerMixin
+
+LOCAL_DOCUMENT = {'code': '3017620422003', 'product_name': 'Nutella (yerel)', 'brands': 'Ferrero'}
+
+
+class ProductRepositoryTests(FakeServerMixin, TestCase):
+    """Belge önce product_documents'tan okunur; API'den gelen belge tabloya yazılır"""
+
+    def setUp(self):
+        super().setUp()
+        self.repository = ProductRepository(self.make_client(max_retries=0))
+
+    def test_local_hit_does_not_call_the_api(self):
+        ProductDocument.objects.create(product_code='3017620422003', document=LOCAL_DOCUMENT)
+        self.assertEqual(self.repository.get('3017620422003'), LOCAL_DOCUMENT)
+        self.assertEqual(self.server.request_count, 0)
+
+    def test_api_miss_is_written_back(self):
+        document = self.repository.get('5449000000996')
+        self.assertEqual(document['product_name'], 'Coca-Cola')
+
+        stored = ProductDocument.objects.get(product_code='5449000000996')
+        self.assertEqual(stored.document, document)
+        self.assertEqual(stored.source, ProductDocument.SOURCE_API)
+
+        # İkinci istek yerelden
+        self.assertEqual(self.repository.get('5449000000996'), document)
+        self.assertEqual(self.server.request_count, 1)
+
+    def test_unknown_product(self):
+        self.assertIsNone(self.repository.get('0000000000000'))
+        self.assertFalse(ProductDocument.objects.exists())
+
+    def test_api_errors_are_raised_and_not_stored(self):
+        self.server.failure_rate = 1.0
+        with self.assertRaises(requests.HTTPError):
+            self.repository.get('5449000000996')
+        self.assertFalse(ProductDocument.objects.exists())
+
+    def test_failed_write_back_still_returns_the_document(self):
+        with mock.patch.object(ProductDocument.objects, 'update_or_create', side_effect=RuntimeError('disk')), \
+                self.assertLogs('api.clients.product_repository', 'WARNING'):
+            self.assertEqual(self.repository.get('8690504000000')['product_name'], 'Ayran')
+
+
+class AsyncProductRepositoryTests(FakeServerMixin, TestCase):
+    """aget, get ile aynı akış: yerel belge, yoksa asenkron istemci ve tabloya yazma"""
+
+    def setUp(self):
+        if httpx is None:
+            self.skipTest('httpx kurulu değil')
+        super().setUp()
+        self.repository = ProductRepository()
+
+    async def aget(self, product_code):
+        client = AsyncOpenFoodFactsClient(base_url=self.server.base_url, max_retries=0, backoff_factor=0)
+        try:
+            with mock.patch.object(product_repository, 'get_async_openfoodfacts_client', return_value=client):
+                return await self.repository.aget(product_code)
+        finally:
+            await client.close()
+
+    async def test_local_hit_does_not_call_the_api(self):
+        await ProductDocument.objects.acreate(product_code='3017620422003', document=LOCAL_DOCUMENT)
+        self.assertEqual(await self.aget('3017620422003'), LOCAL_DOCUMENT)
+        self.assertEqual(self.server.request_count, 0)
+
+    async def test_api_miss_is_written_back(self):
+        document = await self.aget('8690504000000')
+        self.assertEqual(document['product_name'], 'Ayran')
+
+        stored = await ProductDocument.objects.aget(product_code='8690504000000')
+        self.assertEqual(stored.document, document)
+        self.assertEqual(stored.source, ProductDocument.SOURCE_API)
+
+        self.assertEqual(await self.aget('8690504000000'), document)
+        self.assertEqual(self.server.request_count, 1)
+
+    async def test_unknown_product(self):
+        self.assertIsNone(await self.aget('0000000000000'))
+        self.assertFalse(await ProductDocument.objects.aexists())
@@ -0,0 +1,93 @@
+# api/tests/test_product_search.py
+
+from unittest import mock
+
+from django.test import TestCase
+
+from api.models.product_document import ProductDocument
+from api.models.product_features import ProductFeatures
+from api.pipeline import product_search
+from api.pipeline.product_search import MAX_QUERY_TERMS, query_terms, search_products
+
+# (kod, ad, marka, kategori, içerik, nutriscore, nova, health_score, nutrition_quality_score)
+CATALOG = [
+    ('s-1', 'Chocolate Biscuits', 'Ülker', 'Biscuits', 'wheat flour, sugar, cocoa', 'E', 4, 2.0, 3.0),
+    ('s-2', 'Oat Biscuits', 'Eti', 'Biscuits', 'oats, sugar', 'B', 3, 6.5, 7.0),
+    ('s-3', 'Dark Chocolate', 'Ülker', 'Chocolates', 'cocoa mass, sugar', 'D', 4, 4.0, 5.5),
+    ('s-4', 'Ayran', 'Sütaş', 'Dairy drinks', 'milk, water, salt', 'A', 1, 8.0, 6.0),
+    ('s-5', 'Süzme Yoğurt', 'Sütaş', 'Dairy', 'milk, cultures', 'a', 1, 8.0, 9.0),
+    ('s-6', 'Cola', 'Coca-Cola', 'Sodas', 'water, sugar, caffeine', 'E', 4, 1.0, 1.0),
+    ('s-7', 'Chocolate milk', 'Pınar', 'Dairy drinks', 'milk, sugar, cocoa', 'C', 3, 5.0, 4.0),
+]
+
+
+class ProductSearchTests(TestCase):
+    """Yerel arama: PostgreSQL dışı metin araması (her terim bir alanda geçmeli), filtreler, sıralama, sayfalama"""
+
+    @classmethod
+    def setUpTestData(cls):
+        for code, name, brand, category, ingredients, grade, nova, health, quality in CATALOG:
+            ProductFeatures.objects.create(
+                product_code=code, product_name=name, main_brand=brand, main_category=category,
+                ingredients_text=ingredients, nutriscore_data={'nutriscore_grade': grade}, processing_level=nova,
+                health_score=health, nutrition_quality_score=quality, is_valid_for_analysis=True,
+            )
+        ProductDocument.objects.create(product_code='s-4', document={'code': 's-4', 'product_name': 'Ayran (belge)'})
+
+    def setUp(self):
+        # Test veritabanı PostgreSQL olsa da yedek metin araması kullanılsın
+        patcher = mock.patch.object(product_search, 'connection', mock.Mock(vendor='sqlite'))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def codes(self, query='', filters=None, **options):
+        return [product['code'] for product in search_products(query, filters, **options)['products']]
+
+    def test_query_terms(self):
+        self.assertEqual(query_terms('  Dark-CHOCOLATE & (oat)!'), ['dark', 'chocolate', 'oat'])
+        self.assertEqual(query_terms(None), [])
+        self.assertEqual(len(query_terms(' '.join(f'w{i}' for i in range(20)))), MAX_QUERY_TERMS)
+
+    def test_every_term_must_match_some_field(self):
+        self.assertEqual(self.codes('chocolate'), ['s-7', 's-3', 's-1'])
+        # ad + içerik
+        self.assertEqual(self.codes('chocolate milk'), ['s-7'])
+        # marka + kategori
+        self.assertEqual(self.codes('sütaş drinks'), ['s-4'])
+        self.assertEqual(self.codes('chocolate caffeine'), [])
+
+    def test_filters(self):
+        self.assertEqual(self.codes(filters={'category': 'dairy'}), ['s-4', 's-5', 's-7'])
+        self.assertEqual(self.codes(filters={'category': 'sodas, chocolates'}), ['s-3', 's-6'])
+        self.assertEqual(self.codes(filters={'brand': ['sütaş', 'Eti']}), ['s-4', 's-5', 's-2'])
+        self.assertEqual(self.codes(filters={'nutriscore_grade': 'a'}), ['s-4', 's-5'])
+        self.assertEqual(self.codes(filters={'nova_group': '1,x,3'}), ['s-4', 's-5', 's-2', 's-7'])
+        self.assertEqual(self.codes('chocolate', {'brand': 'Ülker', 'nova_group': 4}), ['s-3', 's-1'])
+        self.assertEqual(self.codes(filters={'category': '', 'brand': []}), self.codes())
+
+    def test_ordering(self):
+        # Varsayılan: health_score azalan, eşitlikte id
+        self.assertEqual(self.codes(), ['s-4', 's-5', 's-2', 's-7', 's-3', 's-1', 's-6'])
+        self.assertEqual(self.codes(sort_by='nutrition_quality_score'), ['s-5', 's-2', 's-4', 's-3', 's-7', 's-1', 's-6'])
+        self.assertEqual(self.codes('biscuits', sort_by='product_name'), ['s-1', 's-2'])
+        # Yedek aramada alaka skoru yok
+        self.assertEqual(self.codes('chocolate', sort_by='relevance'), self.codes('chocolate', sort_by='health_score'))
+
+    def test_pagination(self):
+        everything = self.codes(page_size=100)
+        pages = [search_products(page=page, page_size=3) for page in (1, 2, 3, 4)]
+        self.assertEqual([result['count'] for result in pages], [len(CATALOG)] * 4)
+        self.assertEqual([product['code'] for result in pages for product in result['products']], everything)
+        self.assertEqual(pages[3]['products'], [])
+        self.assertEqual((pages[1]['page'], pages[1]['page_size']), (2, 3))
+
+        result = search_products('sugar', page=2, page_size=2)
+        self.assertEqual(result['count'], 5)
+        self.assertEqual([product['code'] for product in result['products']], ['s-3', 's-1'])
+
+    def test_documents_from_table_or_features(self):
+        products = {product['code']: product for product in search_products('dairy')['products']}
+        self.assertEqual(products['s-4'], {'code': 's-4', 'product_name': 'Ayran (belge)'})
+        self.assertEqual(products['s-7']['product_name'], 'Chocolate milk')
+        self.assertEqual(products['s-7']['brands'], 'Pınar')
+        self.assertEqual(products['s-7']['nova_group'], 3)
@@ -0,0 +1,102 @@
+# api/tests/test_scoring.py
+
+import importlib
+import logging
+import tempfile
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+from django.test import TestCase
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.preprocessing import StandardScaler
+
+from aimodels.ml_models.feature_builder import FEATURE_COLUMNS
+from aimodels.ml_models.model_registry import ModelArtifacts
+from api.models.product_features import ProductFeatures
+from api.pipeline.product_data_pipeline import ProductDataPipeline
+
+from .utils import sample_features
+
+# Paket __init__'i modül adını servis nesnesiyle gölgeler; modülün kendisi import_module ile alınır
+score_service_module = importlib.import_module('aimodels.ml_models.ml_product_score_service')
+
+PROFILE = {
+    'age': 45, 'height': 170, 'weight': 95, 'gender': 'Male', 'activity_level': 'moderate',
+    'medical_conditions': ['diabetes_type_2'], 'health_goals': ['muscle_gain'],
+    'dietary_preferences': ['high_protein'], 'allergies': [],
+}
+
+
+def trained_artifacts() -> ModelArtifacts:
+    """Servislerin feature sütunlarıyla eğitilmiş küçük bir model (gerçek model dosyası gerekmez)"""
+    rng = np.random.default_rng(0)
+    features = pd.DataFrame(rng.random((300, len(FEATURE_COLUMNS))) * 50, columns=FEATURE_COLUMNS)
+    target = (features['product_health_score'] + features['product_protein'] - features['product_sugar']) % 10
+    scaler = StandardScaler().fit(features)
+    model = RandomForestRegressor(n_estimators=10, random_state=0).fit(scaler.transform(features), target)
+    return ModelArtifacts(model, scaler, FEATURE_COLUMNS)
+
+
+class BatchScoringTests(TestCase):
+    """Toplu skorlama (tek sorgu, tek predict), ürün ürün skorlamayla aynı sonucu vermeli"""
+
+    @classmethod
+    def setUpTestData(cls):
+        logging.disable(logging.WARNING)
+        try:
+            with tempfile.TemporaryDirectory() as directory:
+                ProductDataPipeline(batch_size=100)._save_to_database(sample_features(directory, 200, seed=5))
+        finally:
+            logging.disable(logging.NOTSET)
+        cls.codes = list(ProductFeatures.objects.order_by('product_code').values_list('product_code', flat=True)[:60])
+
+    def setUp(self):
+        self.service = score_service_module.ml_product_score_service
+        # Geliştirme ortamındaki özellik matrisi test veritabanının id'leriyle eşleşmez - model alanları kullanılır
+        patcher = mock.patch('api.pipeline.feature_matrix.get_feature_matrix', return_value=None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def use_artifacts(self, artifacts: ModelArtifacts):
+        patcher = mock.patch.object(score_service_module, 'get_model_artifacts', return_value=artifacts)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def assertBulkMatchesSingle(self):
+        codes = self.codes + ['missing-product']
+        single = {code: self.service.get_personalized_score(PROFILE, code) for code in codes}
+        with self.assertNumQueries(1):
+            bulk = self.service.calculate_bulk_scores(PROFILE, codes)
+        self.assertEqual(bulk, single)
+        self.assertIsNone(bulk['missing-product'])
+        return bulk
+
+    def test_fallback_scores(self):
+        self.use_artifacts(ModelArtifacts())
+        self.assertBulkMatchesSingle()
+
+    def test_model_scores(self):
+        self.use_artifacts(trained_artifacts())
+        bulk = self.assertBulkMatchesSingle()
+        scores = [result['personalized_score'] for result in bulk.values() if result]
+        self.assertGreater(len(set(scores)), 1)
+
+    def test_batch_predict_matches_per_product_predict(self):
+        self.use_artifacts(trained_artifacts())
+        products = list(ProductFeatures.objects.filter(product_code__in=self.codes))
+        batch = self.service._calculate_ml_scores(PROFILE, products)
+        single = [self.service._calculate_ml_scores(PROFILE, [product])[0] for product in products]
+        np.testing.assert_allclose(batch, single)
+        self.assertTrue(all(0 <= score <= 10 for score in batch))
+
+    def test_score_products_does_not_query(self):
+        self.use_artifacts(trained_artifacts())
+        products = list(ProductFeatures.objects.filter(product_code__in=self.codes))
+        with self.assertNumQueries(0):
+            results = self.service.score_products(PROFILE, products)
+        self.assertEqual(set(results), set(self.codes))
+
+    def test_empty_input(self):
+        self.assertEqual(self.service.calculate_bulk_scores(PROFILE, []), {})
+        self.assertEqual(self.service.score_products(PROFILE, []), {})
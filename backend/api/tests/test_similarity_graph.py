@@ -0,0 +1,146 @@
+# api/tests/test_similarity_graph.py
+
+import logging
+import tempfile
+from collections import defaultdict
+from unittest import mock
+
+import numpy as np
+from django.test import TestCase
+
+from api.models.product_features import ProductFeatures, ProductSimilarity
+from api.pipeline import feature_matrix, similarity_graph
+from api.pipeline.similarity_graph import (
+    CATEGORY_WEIGHT,
+    NUTRITION_WEIGHT,
+    PROCESSING_WEIGHT,
+    SCALE_PERCENTILE,
+    build_similarity_graph,
+)
+
+NUTRITION_KEYS = ['energy_kcal_100g', 'proteins_100g', 'fat_100g', 'sugars_100g', 'salt_100g', 'fiber_100g']
+
+# Kategori -> ürün sayısı; kategorisizler ve tek ürünlü kategori grafiğe kenar eklemez
+FIXTURE_CATEGORIES = {'Biscuits': 11, 'Cheeses': 6, 'Sodas': 2, 'Honey': 1, '': 3, 'unknown': 2}
+
+
+def create_fixture_products(seed: int = 0):
+    """Küçük, elle kurulmuş katalog: besin değeri olmayan ve analize uygun olmayan ürünler dahil"""
+    rng = np.random.default_rng(seed)
+    number = 0
+    for category, count in FIXTURE_CATEGORIES.items():
+        for _ in range(count):
+            values = rng.uniform(0, 60, len(NUTRITION_KEYS))
+            values[rng.random(len(values)) < 0.2] = 0
+            number += 1
+            ProductFeatures.objects.create(
+                product_code=f'sim-{number}', product_name=f'Ürün {number}', main_category=category,
+                nutrition_vector={key: round(float(value), 3) for key, value in zip(NUTRITION_KEYS, values)},
+                processing_level=int(rng.integers(1, 5)), is_valid_for_analysis=True,
+            )
+    # Besin değeri olmayan ve analize uygun olmayan ürünler grafiğe girmez
+    ProductFeatures.objects.create(product_code='sim-empty', product_name='Boş', main_category='Biscuits',
+                                   nutrition_vector={}, processing_level=1, is_valid_for_analysis=True)
+    ProductFeatures.objects.create(product_code='sim-invalid', product_name='Geçersiz', main_category='Biscuits',
+                                   nutrition_vector={'proteins_100g': 5}, processing_level=1,
+                                   is_valid_for_analysis=False)
+
+
+def reference_graph(top_k: int):
+    """
+    Doğrudan tanım: her ürün çifti için kosinüs benzerliği ayrı ayrı hesaplanır.
+    Dönen sözlük: kaynak id -> {hedef id: (besin benzerliği, genel benzerlik)} ve kaynak id -> top_k skorları
+    """
+    products = list(ProductFeatures.objects.filter(is_valid_for_analysis=True).order_by('id'))
+    raw = np.array([[max(float(product.nutrition_vector.get(key, 0)), 0.0) for key in NUTRITION_KEYS]
+                    for product in products])
+    scale = np.percentile(raw, SCALE_PERCENTILE, axis=0)
+    scale[scale <= 0] = 1.0
+    scaled = np.minimum(raw / scale, 1.0)
+
+    pairs, top_scores = defaultdict(dict), {}
+    for i, source in enumerate(products):
+        if source.main_category in ('', 'unknown') or not scaled[i].any():
+            continue
+        scores = []
+        for j, target in enumerate(products):
+            if i == j or target.main_category != source.main_category or not scaled[j].any():
+                continue
+            cosine = float(scaled[i] @ scaled[j] / (np.linalg.norm(scaled[i]) * np.linalg.norm(scaled[j])))
+            score = (CATEGORY_WEIGHT + NUTRITION_WEIGHT * cosine
+                     + PROCESSING_WEIGHT * (abs(source.processing_level - target.processing_level) <= 1))
+            pairs[source.id][target.id] = (cosine, score)
+            scores.append(score)
+        top_scores[source.id] = sorted(scores, reverse=True)[:top_k]
+    return pairs, top_scores
+
+
+class SimilarityGraphTests(TestCase):
+    """Bloklu matris çarpımıyla bulunan komşular, doğrudan kosinüs hesabıyla aynı olmalı"""
+
+    @classmethod
+    def setUpTestData(cls):
+        create_fixture_products()
+
+    def setUp(self):
+        logging.disable(logging.WARNING)
+        self.addCleanup(logging.disable, logging.NOTSET)
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        directory = tmp_dir.name
+
+        # Grafik test dizinindeki matristen oluşturulur
+        for patcher in [
+            mock.patch.dict(feature_matrix._loaded_matrix),
+            mock.patch.object(similarity_graph, 'build_feature_matrix',
+                              lambda: feature_matrix.build_feature_matrix(directory)),
+            mock.patch.object(similarity_graph, 'get_feature_matrix',
+                              lambda: feature_matrix.get_feature_matrix(directory)),
+        ]:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def graph_edges(self):
+        return sorted(ProductSimilarity.objects.values_list(
+            'product_1_id', 'product_2_id', 'nutritional_similarity', 'overall_similarity'
+        ))
+
+    def assertMatchesReference(self, top_k: int, block_size: int):
+        summary = build_similarity_graph(top_k=top_k, block_size=block_size)
+        pairs, top_scores = reference_graph(top_k)
+
+        edges = defaultdict(list)
+        for source, target, nutritional, overall in self.graph_edges():
+            self.assertIn(target, pairs[source], f'{source} -> {target} aynı kategoride değil')
+            cosine, score = pairs[source][target]
+            self.assertAlmostEqual(nutritional, cosine, places=3)
+            self.assertAlmostEqual(overall, score, places=3)
+            edges[source].append(overall)
+
+        self.assertEqual(set(edges), {source for source, scores in top_scores.items() if scores})
+        for source, scores in edges.items():
+            np.testing.assert_allclose(sorted(scores, reverse=True), top_scores[source], atol=2e-4)
+        self.assertEqual(summary['edges'], sum(len(scores) for scores in top_scores.values()))
+
+    def test_blocked_graph_matches_direct_cosine(self):
+        self.assertMatchesReference(top_k=3, block_size=4)
+
+    def test_single_block_and_large_top_k(self):
+        self.assertMatchesReference(top_k=50, block_size=1024)
+
+    def test_excluded_products(self):
+        build_similarity_graph(top_k=3, block_size=4)
+        excluded = ProductFeatures.objects.filter(
+            product_code__in=['sim-empty', 'sim-invalid']
+        ) | ProductFeatures.objects.filter(main_category__in=['', 'unknown', 'Honey'])
+        excluded_ids = set(excluded.values_list('id', flat=True))
+        for source, target, _, _ in self.graph_edges():
+            self.assertNotIn(source, excluded_ids)
+            self.assertNotIn(target, excluded_ids)
+            self.assertNotEqual(source, target)
+
+    def test_workers_build_the_same_graph(self):
+        build_similarity_graph(top_k=3, block_size=4)
+        sequential = self.graph_edges()
+        build_similarity_graph(top_k=3, block_size=4, workers=2)
+        self.assertEqual(self.graph_edges(), sequential)
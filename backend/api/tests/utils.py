@@ -0,0 +1,109 @@
+# api/tests/utils.py
+
+import os
+import random
+from datetime import datetime, timezone
+from typing import List, Optional
+
+import numpy as np
+
+from aimodels.ml_models.data_preprocessing import OpenFoodFactsPreprocessor
+
+# Alerjen/içerik kelimeleri: eşleşen, iç içe geçen (peanut/nut) ve Unicode temizliği gerektiren değerler
+SAMPLE_WORDS = [
+    'milk', 'wheat flour', 'sugar', 'egg', 'Soja lecithin', 'peanut', 'fındık', 'susam', 'salt', 'water',
+    'balık', 'süt', 'mustard', 'kereviz', 'sulphite', 'nuts', 'çilek', 'café', 'naïve', '\x01ctrl',
+]
+
+TEXT_COLUMNS = {
+    'allergens', 'traces', 'allergens_en', 'traces_en', 'ingredients_text', 'additives', 'brands', 'categories',
+    'main_category', 'main_category_en', 'categories_en', 'generic_name',
+}
+
+
+def sample_tsv_columns() -> List[str]:
+    """Ham OpenFoodFacts dökümü gibi: gerekli sütunlar + önişlemenin atacağı fazladan sütunlar"""
+    return ['url', 'creator'] + OpenFoodFactsPreprocessor().all_required_columns + [f'extra_{i}' for i in range(5)]
+
+
+def write_sample_tsv(path: str, n_rows: int, seed: int = 0, code_offset: int = 1000000) -> str:
+    """
+    Tekrarlanabilir sentetik ham TSV yaz: eksik, negatif ve sayı olmayan besin değerleri,
+    boş ürün adları ve kodları, kontrol karakterli metinler içerir.
+    """
+    rng = random.Random(seed)
+    columns = sample_tsv_columns()
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('\t'.join(columns) + '\n')
+        for i in range(n_rows):
+            row = []
+            for column in columns:
+                r = rng.random()
+                if column == 'code':
+                    value = str(code_offset + i) if r > 0.01 else ''
+                elif column == 'product_name':
+                    value = '' if r < 0.1 else f'Ürün {i} {rng.choice(SAMPLE_WORDS)}'
+                elif column.endswith('_100g') or column.endswith('_n'):
+                    if r < 0.35:
+                        value = ''
+                    elif r < 0.37:
+                        value = '-1'
+                    elif r < 0.39:
+                        value = 'abc'
+                    elif r < 0.42:
+                        value = '0'
+                    elif column == 'additives_n':
+                        value = str(rng.randint(0, 9))
+                    else:
+                        value = f'{rng.uniform(0, 3000 if column == "energy_100g" else 120):.3f}'
+                elif column in TEXT_COLUMNS:
+                    value = '' if r < 0.4 else ', '.join(rng.choice(SAMPLE_WORDS) for _ in range(rng.randint(1, 5)))
+                elif column.startswith('nutrition_grade'):
+                    value = '' if r < 0.5 else rng.choice('abcde')
+                else:
+                    value = '' if r < 0.7 else f'x{rng.randint(0, 99)}'
+                row.append(value)
+            f.write('\t'.join(row) + '\n')
+    return path
+
+
+def sample_features(directory: str, n_rows: int, seed: int = 0, code_offset: int = 1000000):
+    """Sentetik TSV'nin önişlenmiş ve özellikleri çıkarılmış hali (veritabanına yazılmadan)"""
+    from api.pipeline.product_data_pipeline import ProductDataPipeline
+
+    path = write_sample_tsv(os.path.join(directory, f'sample_{seed}.tsv'), n_rows, seed=seed, code_offset=code_offset)
+    return ProductDataPipeline().extract_features(OpenFoodFactsPreprocessor().preprocess(path))
+
+
+def synthetic_feature_matrix(n_rows: int, seed: int = 0, category_names: Optional[List[str]] = None):
+    """
+    Veritabanı gerektirmeyen bellek içi özellik matrisi: rastgele besin değerleri (bir kısmı sıfır vektör),
+    analize uygun olmayan satırlar, kategorisiz ürünler ve rastgele ürün bayrakları içerir.
+    """
+    from api.pipeline.feature_matrix import FEATURE_MATRIX_COLUMNS, ProductFeatureMatrix
+    from api.pipeline.product_flags import FLAG_BITS
+    from api.pipeline.similarity_graph import NUTRIENT_COLUMNS
+
+    rng = np.random.default_rng(seed)
+    category_names = category_names or ['Biscuits', 'Cheeses', '', 'Sodas', 'unknown', 'Dark chocolate biscuits']
+    columns = {name: i for i, name in enumerate(FEATURE_MATRIX_COLUMNS)}
+
+    matrix = np.zeros((n_rows, len(FEATURE_MATRIX_COLUMNS)), dtype=np.float32)
+    nutrients = [columns[name] for name in NUTRIENT_COLUMNS]
+    matrix[:, nutrients] = rng.uniform(0, 80, (n_rows, len(nutrients))) * (rng.random((n_rows, len(nutrients))) > 0.2)
+    matrix[np.ix_(rng.random(n_rows) < 0.05, nutrients)] = 0
+    matrix[:, columns['processing_level']] = rng.integers(1, 5, n_rows)
+    matrix[:, columns['health_score']] = rng.integers(0, 20, n_rows) / 2
+    matrix[:, columns['nutrition_quality_score']] = rng.random(n_rows) * 10
+    matrix[:, columns['is_valid_for_analysis']] = rng.random(n_rows) > 0.1
+
+    ids = np.arange(1, n_rows + 1, dtype=np.int64) * 3
+    codes = np.asarray([f'syn-{product_id}'.encode('utf-8') for product_id in ids], dtype=bytes)
+    code_rows = np.argsort(codes, kind='stable')
+    bits = list(FLAG_BITS.values())[:4]
+    flags = np.array([sum(bit for bit in bits if rng.random() < 0.2) for _ in range(n_rows)], dtype=np.int64)
+    categories = rng.integers(0, len(category_names), n_rows).astype(np.int32)
+
+    return ProductFeatureMatrix(matrix, ids, codes[code_rows], code_rows.astype(np.int64), categories,
+                                list(category_names), flags, list(FEATURE_MATRIX_COLUMNS),
+                                datetime.now(timezone.utc))
@@ -0,0 +1,13 @@
+# api/urls/async_product_urls.py
+
+from django.urls import path
+from api.views import async_product_views
+
+# Async (ASGI) sürümler - aynı yanıtlar ve aynı önbellek, uzak istekler event loop'u bloklamaz
+# Çalıştırma: uvicorn backend.asgi:application (veya daphne / gunicorn -k uvicorn.workers.UvicornWorker)
+urlpatterns = [
+    path('search/', async_product_views.product_search, name='async_product_search'),
+    path('detail/<str:product_code>/', async_product_views.get_product_detail, name='async_product_detail'),
+    path('analyze/', async_product_views.analyze_product_complete, name='async_analyze_product_complete'),
+    path('compare/', async_product_views.compare_products, name='async_compare_products'),
+]
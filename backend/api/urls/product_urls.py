@@ -10,7 +10,6 @@ urlpatterns = [
     
     # Ürün detay endpoint'leri
     path('detail/<str:product_code>/', product_views.get_product_detail, name='product_detail'),
-    path('<str:product_code>/', product_views.get_product_detail, name='product_detail_alt'),
     
     # Analiz endpoint'leri (POST)
     path('analyze/', product_views.analyze_product_complete, name='analyze_product_complete'),
@@ -20,4 +19,7 @@ urlpatterns = [
     path('personalized-score/', product_views.get_personalized_product_score, name='personalized_score'),
     path('ml-recommendations/', product_views.get_ml_recommendations, name='ml_recommendations'),
     path('warnings-only/', product_views.get_product_warnings_only, name='product_warnings_only'),
+    
+    # Kısa ürün detay yolu - diğer yolları gölgelememesi için en sonda
+    path('<str:product_code>/', product_views.get_product_detail, name='product_detail_alt'),
 ]
\ No newline at end of file
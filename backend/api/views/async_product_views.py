@@ -0,0 +1,410 @@
+# api/views/async_product_views.py
+
+import asyncio
+import logging
+from functools import wraps
+from typing import Dict, List
+
+import requests
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.core.handlers.asgi import ASGIRequest
+from django.http import JsonResponse
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework import status
+from rest_framework.exceptions import APIException, AuthenticationFailed, NotAuthenticated
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+
+from api.clients.async_openfoodfacts import close_async_openfoodfacts_client, get_async_openfoodfacts_client
+from api.clients.product_repository import get_product_repository
+from api.pipeline.product_comparison import build_compared_products, get_local_products, score_local_products
+
+# AI Models - ML tabanlı servisler doğrudan kullanılıyor
+from aimodels.ml_models.ml_product_score_service import ml_product_score_service
+from aimodels.product_analysis import ProductAnalyzer  # Sadece kural tabanlı uyarılar için
+
+# Serializers
+from api.serializers.product_serializer import ProductSearchSerializer, ProductComparisonSerializer
+
+# Shared with the sync views - both paths return the same responses and share the cache
+from api.views.product_views import (
+    SEARCH_FILTER_MAPPING,
+    OpenFoodFactsProductSerializer,
+    OpenFoodFactsResponse,
+    add_personalized_scores,
+    build_comparison_response,
+    build_complete_analysis,
+    build_search_params,
+    generate_cache_key,
+    get_search_filters,
+    get_user_profile_data,
+    search_products_local,
+)
+
+logger = logging.getLogger(__name__)
+
+def _get_authenticators() -> list:
+    """Same authenticators as the sync views (REST_FRAMEWORK['DEFAULT_AUTHENTICATION_CLASSES'])"""
+    return [authentication() for authentication in api_settings.DEFAULT_AUTHENTICATION_CLASSES]
+
+
+def _authenticate(drf_request: Request):
+    """
+    Run the authenticators exactly as APIView does: the first one that returns a user wins, and
+    SessionAuthentication enforces CSRF for cookie-authenticated requests. Sets request.user on the Django request.
+    """
+    return drf_request.user
+
+
+def _exception_response(request, exc: APIException, authenticators: list) -> JsonResponse:
+    """DRF-style error response (APIView.handle_exception): 401 with WWW-Authenticate if the first authenticator has one"""
+    if isinstance(exc, (NotAuthenticated, AuthenticationFailed)):
+        auth_header = authenticators[0].authenticate_header(request) if authenticators else None
+        if auth_header:
+            exc.auth_header = auth_header
+        else:
+            exc.status_code = status.HTTP_403_FORBIDDEN
+
+    data = exc.detail if isinstance(exc.detail, dict) else {'detail': exc.detail}
+    response = JsonResponse(data, status=exc.status_code)
+    if getattr(exc, 'auth_header', None):
+        response['WWW-Authenticate'] = exc.auth_header
+    return response
+
+
+def async_api_view(methods: List[str], authenticated: bool = False):
+    """
+    Async counterpart of @api_view + @permission_classes for coroutine views:
+    method check, DRF authentication (request.user) and body parsing with the DRF parsers (request.data).
+    Outside ASGI (runserver/WSGI) every request runs in its own event loop, so that loop's
+    OpenFoodFacts client is closed when the view returns instead of leaking its connection pool.
+    """
+    def decorator(view):
+        @csrf_exempt
+        @wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            if request.method not in methods:
+                return JsonResponse({'detail': f'Method "{request.method}" not allowed.'},
+                                    status=status.HTTP_405_METHOD_NOT_ALLOWED)
+
+            authenticators = _get_authenticators()
+            drf_request = Request(
+                request,
+                parsers=[parser() for parser in api_settings.DEFAULT_PARSER_CLASSES],
+                authenticators=authenticators,
+            )
+            try:
+                await sync_to_async(_authenticate)(drf_request)
+                if authenticated and not request.user.is_authenticated:
+                    raise NotAuthenticated()
+                request.data = drf_request.data if request.method == 'POST' else {}
+            except APIException as e:
+                return _exception_response(request, e, authenticators)
+
+            try:
+                return await view(request, *args, **kwargs)
+            finally:
+                if not isinstance(request, ASGIRequest):
+                    await close_async_openfoodfacts_client()
+        return wrapper
+    return decorator
+
+
+# Helper Functions
+async def aget_user_profile_data(user) -> Dict:
+    return await sync_to_async(get_user_profile_data)(user)
+
+
+async def asearch_products(query: str = "", filters: dict = None, page: int = 1,
+                           page_size: int = 20, sort_by: str = 'relevance') -> OpenFoodFactsResponse:
+    """Search the local catalog or OpenFoodFacts (PRODUCT_SEARCH_BACKEND) without blocking the event loop"""
+    if getattr(settings, 'PRODUCT_SEARCH_BACKEND', 'local') == 'local':
+        return await sync_to_async(search_products_local)(query, filters, page, page_size, sort_by)
+
+    try:
+        params = build_search_params(
+            query=query,
+            filters={SEARCH_FILTER_MAPPING[param]: value for param, value in (filters or {}).items()},
+            page=page,
+            page_size=page_size
+        )
+        return OpenFoodFactsResponse(success=True, data=await get_async_openfoodfacts_client().search(params))
+    except requests.RequestException as e:
+        logger.error(f"OpenFoodFacts API error: {str(e)}")
+        return OpenFoodFactsResponse(success=False, error_message=f"API request failed: {str(e)}")
+    except Exception as e:
+        logger.error(f"Unexpected error: {str(e)}")
+        return OpenFoodFactsResponse(success=False, error_message=f"Unexpected error: {str(e)}")
+
+
+async def aget_product_api(product_code: str) -> OpenFoodFactsResponse:
+    """Get single product - local catalog first, async OpenFoodFacts request on a miss"""
+    try:
+        product = await get_product_repository().aget(product_code)
+
+        if product:
+            return OpenFoodFactsResponse(success=True, data=product)
+        else:
+            return OpenFoodFactsResponse(success=False, error_message="Product not found")
+
+    except requests.RequestException as e:
+        logger.error(f"Product API error: {str(e)}")
+        return OpenFoodFactsResponse(success=False, error_message=f"API request failed: {str(e)}")
+    except Exception as e:
+        logger.error(f"Unexpected error: {str(e)}")
+        return OpenFoodFactsResponse(success=False, error_message=f"Unexpected error: {str(e)}")
+
+
+def _warnings_only(product_data: Dict, user_profile: Dict) -> Dict:
+    return ProductAnalyzer().analyze_warnings_only(product_data, user_profile)
+
+
+# View Functions
+@async_api_view(['GET'])
+async def product_search(request):
+    """
+    Async product search - search and user profile lookup run concurrently
+    """
+    try:
+        # Validate input parameters
+        serializer = ProductSearchSerializer(data=request.GET)
+        if not serializer.is_valid():
+            return JsonResponse({
+                'error': 'Invalid search parameters',
+                'details': serializer.errors
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        validated_data = serializer.validated_data
+        query = validated_data.get('query', '')
+        page = validated_data.get('page', 1)
+        page_size = validated_data.get('page_size', 20)
+        sort_by = validated_data.get('sort_by', 'relevance')
+        include_personalized = validated_data.get('include_personalized_scores', True)
+        user_id = request.user.id if request.user.is_authenticated else 0
+
+        # Same cache key as the sync view
+        cache_params = {
+            'query': query,
+            'page': page,
+            'page_size': page_size,
+            'sort_by': sort_by,
+            'filters': {param: request.GET.get(param, '') for param in SEARCH_FILTER_MAPPING},
+            'user_id': user_id
+        }
+        cache_key = generate_cache_key("enhanced_search", user_id, cache_params)
+
+        cached_result = await cache.aget(cache_key)
+        if cached_result:
+            return JsonResponse(cached_result, status=status.HTTP_200_OK)
+
+        personalize = request.user.is_authenticated and include_personalized
+        search_task = asearch_products(
+            query=query,
+            filters=get_search_filters(request.GET),
+            page=page,
+            page_size=page_size,
+            sort_by=sort_by
+        )
+        if personalize:
+            search_response, user_profile = await asyncio.gather(search_task, aget_user_profile_data(request.user))
+        else:
+            search_response, user_profile = await search_task, None
+
+        if not search_response.success:
+            return JsonResponse({
+                'error': search_response.error_message or 'Search failed'
+            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+        search_data = search_response.data
+        processed_products = [
+            serialized_product for serialized_product in
+            (OpenFoodFactsProductSerializer.serialize(product) for product in search_data.get('products', []))
+            if serialized_product
+        ]
+
+        # Add ML-based personalized scores for authenticated users
+        if personalize and processed_products:
+            try:
+                await sync_to_async(add_personalized_scores)(processed_products, user_profile)
+            except Exception as e:
+                logger.error(f"ML analysis error: {str(e)}")
+                # Continue without ML analysis
+
+        # Sort products if ML scores are available
+        if sort_by == 'personalized_score' and request.user.is_authenticated:
+            processed_products.sort(
+                key=lambda x: x.get('ml_analysis', {}).get('personalized_score', 0),
+                reverse=True
+            )
+
+        response_data = {
+            'products': processed_products,
+            'meta': {
+                'page': page,
+                'page_size': page_size,
+                'total_results': search_data.get('count', 0),
+                'sort_by': sort_by,
+                'has_ml_analysis': personalize,
+                'cache_used': False
+            }
+        }
+
+        # Cache results for 3 minutes
+        await cache.aset(cache_key, response_data, 180)
+
+        return JsonResponse(response_data, status=status.HTTP_200_OK)
+
+    except Exception as e:
+        logger.error(f"Search error: {str(e)}")
+        return JsonResponse({
+            'error': f'Search failed: {str(e)}'
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@async_api_view(['GET'])
+async def get_product_detail(request, product_code):
+    """
+    Async product details (local catalog first, OpenFoodFacts API fallback)
+    """
+    try:
+        cache_key = f"product_detail_{product_code}"
+        cached_result = await cache.aget(cache_key)
+        if cached_result:
+            return JsonResponse(cached_result, status=status.HTTP_200_OK)
+
+        api_response = await aget_product_api(product_code)
+        if not api_response.success:
+            return JsonResponse({
+                'error': 'Product not found'
+            }, status=status.HTTP_404_NOT_FOUND)
+
+        product_data = OpenFoodFactsProductSerializer.serialize(api_response.data)
+
+        # Cache for 30 minutes
+        await cache.aset(cache_key, product_data, 1800)
+
+        return JsonResponse(product_data, status=status.HTTP_200_OK, safe=False)
+
+    except Exception as e:
+        logger.error(f"Product detail error: {str(e)}")
+        return JsonResponse({
+            'error': f'Failed to get product: {str(e)}'
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@async_api_view(['POST'], authenticated=True)
+async def analyze_product_complete(request):
+    """
+    Async complete product analysis - profile and product are fetched concurrently,
+    then ML score and rule-based warnings are computed concurrently
+    """
+    try:
+        product_code = request.data.get('product_code')
+        if not product_code:
+            return JsonResponse({
+                'error': 'Product code is required'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        cache_key = f"complete_analysis_{request.user.id}_{product_code}"
+        cached_result = await cache.aget(cache_key)
+        if cached_result:
+            return JsonResponse(cached_result, status=status.HTTP_200_OK)
+
+        user_profile, api_response = await asyncio.gather(
+            aget_user_profile_data(request.user),
+            aget_product_api(product_code)
+        )
+        if not api_response.success:
+            return JsonResponse({
+                'error': 'Product not found'
+            }, status=status.HTTP_404_NOT_FOUND)
+
+        product_data = api_response.data
+
+        # ML skoru (DB + predict) ve kural tabanlı uyarılar (DB yok, ayrı thread) aynı anda
+        ml_score_result, warnings_result = await asyncio.gather(
+            sync_to_async(ml_product_score_service.get_personalized_score)(user_profile, product_code),
+            sync_to_async(_warnings_only, thread_sensitive=False)(product_data, user_profile)
+        )
+
+        response_data = build_complete_analysis(
+            OpenFoodFactsProductSerializer.serialize(product_data), ml_score_result, warnings_result, user_profile
+        )
+
+        # Cache for 10 minutes
+        await cache.aset(cache_key, response_data, 600)
+
+        return JsonResponse(response_data, status=status.HTTP_200_OK)
+
+    except Exception as e:
+        logger.error(f"Complete analysis error: {str(e)}")
+        return JsonResponse({
+            'error': f'Analysis failed: {str(e)}'
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@async_api_view(['POST'], authenticated=True)
+async def compare_products(request):
+    """
+    Async product comparison - one query for local products, concurrent API fetches for the rest,
+    ML scoring of local products runs while the API requests are in flight
+    """
+    try:
+        serializer = ProductComparisonSerializer(data=request.data)
+        if not serializer.is_valid():
+            return JsonResponse({
+                'error': 'Invalid parameters',
+                'details': serializer.errors
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        product_codes = serializer.validated_data['product_codes']
+
+        cache_key = generate_cache_key(
+            "product_comparison",
+            request.user.id,
+            {'products': sorted(product_codes)}
+        )
+        cached_result = await cache.aget(cache_key)
+        if cached_result:
+            return JsonResponse(cached_result, status=status.HTTP_200_OK)
+
+        user_profile, local_products = await asyncio.gather(
+            aget_user_profile_data(request.user),
+            sync_to_async(get_local_products)(product_codes)
+        )
+
+        # Yerelde olmayan ürünler API'den paralel alınır, bu sırada yerel ürünler skorlanır
+        missing_codes = [code for code in dict.fromkeys(product_codes) if code not in local_products]
+        score_results, *api_responses = await asyncio.gather(
+            sync_to_async(score_local_products)(user_profile, list(local_products.values())),
+            *[aget_product_api(code) for code in missing_codes]
+        )
+        remote_documents = {
+            code: api_response.data if api_response.success else None
+            for code, api_response in zip(missing_codes, api_responses)
+        }
+
+        # Kural tabanlı analiz veritabanına erişmez - isteğin sync thread'i dışında çalışır
+        compared_products = await sync_to_async(build_compared_products, thread_sensitive=False)(
+            product_codes, local_products, score_results, remote_documents, user_profile
+        )
+
+        if not compared_products:
+            return JsonResponse({
+                'error': 'No valid products found for comparison'
+            }, status=status.HTTP_404_NOT_FOUND)
+
+        response_data = build_comparison_response(compared_products)
+
+        # Cache for 5 minutes
+        await cache.aset(cache_key, response_data, 300)
+
+        return JsonResponse(response_data, status=status.HTTP_200_OK)
+
+    except Exception as e:
+        logger.error(f"Product comparison error: {str(e)}")
+        return JsonResponse({
+            'error': f'Failed to compare products: {str(e)}'
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
@@ -4,18 +4,21 @@ from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework.response import Response
-from django.http import JsonResponse
 from django.core.cache import cache
+from django.conf import settings
 import requests
 import logging
 import hashlib
 import json
 from typing import Dict, List, Optional
-from datetime import datetime
 
 # Models
 from api.models.user_profile import Profile
-from api.models.product_features import ProductFeatures
+from api.pipeline.diversity import DEFAULT_DIVERSITY
+from api.clients.openfoodfacts import get_openfoodfacts_client
+from api.clients.product_repository import get_product_repository
+from api.pipeline.product_search import search_products
+from api.pipeline.product_comparison import get_compared_products
 
 # AI Models - ML tabanlı servisler doğrudan kullanılıyor
 from aimodels.ml_models.recommendation_service import ml_recommendation_service
@@ -40,12 +43,6 @@ from api.serializers.product_serializer import (
 
 logger = logging.getLogger(__name__)
 
-# OpenFoodFacts API Configuration
-OPENFOODFACTS_API_BASE = "https://world.openfoodfacts.org"
-OPENFOODFACTS_SEARCH_URL = f"{OPENFOODFACTS_API_BASE}/cgi/search.pl"
-OPENFOODFACTS_PRODUCT_URL = f"{OPENFOODFACTS_API_BASE}/api/v0/product"
-
-
 class OpenFoodFactsProductSerializer:
     """OpenFoodFacts API response serializer"""
     
@@ -130,31 +127,50 @@ def generate_cache_key(operation: str, user_id: int, params: dict) -> str:
     return hashlib.md5(key_data.encode()).hexdigest()
 
 
+# Search request param -> OpenFoodFacts search.pl filter
+SEARCH_FILTER_MAPPING = {
+    'category': 'categories_tags',
+    'brand': 'brands_tags',
+    'nutriscore_grade': 'nutriscore_grade',
+    'nova_group': 'nova_group',
+}
+
+
+def get_search_filters(params) -> Dict:
+    """Search filters present in the request params (local catalog names)"""
+    return {param: params.get(param) for param in SEARCH_FILTER_MAPPING if params.get(param)}
+
+
+def build_search_params(query: str = "", filters: dict = None, page: int = 1,
+                        page_size: int = 20, fields: list = None) -> Dict:
+    """OpenFoodFacts search.pl query parameters"""
+    params = {
+        'action': 'process',
+        'json': 1,
+        'page': page,
+        'page_size': page_size,
+        'fields': ','.join(fields) if fields else 'code,_id,product_name,brands,categories,nutriscore_grade,nova_group,image_url,nutriments,image_front_url,image_front_small_url,ingredients_text,allergens,allergens_tags,additives_tags,labels_tags,completeness,last_modified_t'
+    }
+    
+    if query:
+        params['search_terms'] = query
+        
+    # Apply filters
+    if filters:
+        for key, value in filters.items():
+            if value:
+                params[key] = ','.join(map(str, value)) if isinstance(value, list) else value
+    return params
+
+
 def search_products_api(query: str = "", filters: dict = None, page: int = 1, 
                        page_size: int = 20, fields: list = None) -> OpenFoodFactsResponse:
     """Search products using OpenFoodFacts API"""
     try:
-        params = {
-            'action': 'process',
-            'json': 1,
-            'page': page,
-            'page_size': page_size,
-            'fields': ','.join(fields) if fields else 'code,_id,product_name,brands,categories,nutriscore_grade,nova_group,image_url,nutriments,image_front_url,image_front_small_url,ingredients_text,allergens,allergens_tags,additives_tags,labels_tags,completeness,last_modified_t'
-        }
-        
-        if query:
-            params['search_terms'] = query
-            
-        # Apply filters
-        if filters:
-            for key, value in filters.items():
-                if value:
-                    params[key] = ','.join(map(str, value)) if isinstance(value, list) else value
+        params = build_search_params(query, filters, page, page_size, fields)
         
-        response = requests.get(OPENFOODFACTS_SEARCH_URL, params=params, timeout=30)
-        response.raise_for_status()
-        
-        return OpenFoodFactsResponse(success=True, data=response.json())
+        # Pooled session with retries and circuit breaker (api/clients/openfoodfacts.py)
+        return OpenFoodFactsResponse(success=True, data=get_openfoodfacts_client().search(params))
         
     except requests.RequestException as e:
         logger.error(f"OpenFoodFacts API error: {str(e)}")
@@ -164,17 +180,23 @@ def search_products_api(query: str = "", filters: dict = None, page: int = 1,
         return OpenFoodFactsResponse(success=False, error_message=f"Unexpected error: {str(e)}")
 
 
+def search_products_local(query: str = "", filters: dict = None, page: int = 1,
+                          page_size: int = 20, sort_by: str = 'relevance') -> OpenFoodFactsResponse:
+    """Search the local catalog (PostgreSQL full-text + trigram) - same response shape as search.pl"""
+    try:
+        return OpenFoodFactsResponse(success=True, data=search_products(query, filters, page, page_size, sort_by))
+    except Exception as e:
+        logger.error(f"Local search error: {str(e)}")
+        return OpenFoodFactsResponse(success=False, error_message=f"Search failed: {str(e)}")
+
+
 def get_product_api(product_code: str) -> OpenFoodFactsResponse:
-    """Get single product from OpenFoodFacts API"""
+    """Get single product - local catalog (ProductDocument) first, OpenFoodFacts API on a miss"""
     try:
-        url = f"{OPENFOODFACTS_PRODUCT_URL}/{product_code}.json"
-        response = requests.get(url, timeout=30)
-        response.raise_for_status()
-        
-        data = response.json()
+        product = get_product_repository().get(product_code)
         
-        if data.get('status') == 1 and data.get('product'):
-            return OpenFoodFactsResponse(success=True, data=data.get('product'))
+        if product:
+            return OpenFoodFactsResponse(success=True, data=product)
         else:
             return OpenFoodFactsResponse(success=False, error_message="Product not found")
             
@@ -186,6 +208,103 @@ def get_product_api(product_code: str) -> OpenFoodFactsResponse:
         return OpenFoodFactsResponse(success=False, error_message=f"Unexpected error: {str(e)}")
 
 
+def add_personalized_scores(processed_products: List[Dict], user_profile: Dict):
+    """Add ML scores (rule-based warnings where no ML score) to serialized search results in place"""
+    # Tüm sayfa tek seferde skorlanır: tek DB sorgusu + tek predict
+    product_codes = [product.get('code') for product in processed_products if product.get('code')]
+    try:
+        score_results = ml_product_score_service.calculate_bulk_scores(user_profile, product_codes)
+    except Exception as e:
+        logger.warning(f"ML bulk score error: {str(e)}")
+        score_results = {}
+    
+    # ML skoru olmayan ürünler için kural tabanlı uyarılar (tek analyzer)
+    analyzer = None
+    for product in processed_products:
+        product_code = product.get('code')
+        if not product_code:
+            continue
+        try:
+            score_result = score_results.get(product_code)
+            if score_result:
+                product['ml_analysis'] = {
+                    'personalized_score': score_result.get('personalized_score', 5.0),
+                    'score_level': score_result.get('score_level', {}),
+                    'has_ml_analysis': True,
+                    'analysis_summary': score_result.get('analysis', {})
+                }
+            else:
+                # Fallback to basic rule-based analysis for warnings
+                if analyzer is None:
+                    analyzer = ProductAnalyzer()
+                warnings_result = analyzer.analyze_warnings_only(product, user_profile)
+                product['ml_analysis'] = {
+                    'basic_warnings': warnings_result.get('warnings', [])[:2],
+                    'critical_issues': warnings_result.get('critical_issues', 0),
+                    'has_ml_analysis': False
+                }
+        except Exception as e:
+            logger.warning(f"Product analysis error for {product_code}: {str(e)}")
+            product['ml_analysis'] = {'error': 'Analysis failed'}
+
+
+def build_complete_analysis(serialized_product: Optional[Dict], ml_score_result: Optional[Dict],
+                            warnings_result: Dict, user_profile: Dict) -> Dict:
+    """Combine ML score and rule-based warnings into the complete analysis response"""
+    analysis_result = {
+        'ml_analysis': ml_score_result if ml_score_result else {
+            'personalized_score': 5.0,
+            'score_level': {'level': 'medium', 'description': 'Orta seviye'},
+            'analysis': {'note': 'ML analizi yapılamadı'}
+        },
+        'rule_based_warnings': warnings_result,
+        'combined_summary': {
+            'has_ml_score': ml_score_result is not None,
+            'ml_score': ml_score_result.get('personalized_score', 5.0) if ml_score_result else 5.0,
+            'critical_warnings': warnings_result.get('critical_issues', 0),
+            'total_warnings': len(warnings_result.get('warnings', [])),
+            'recommendation': 'suitable' if (ml_score_result.get('personalized_score', 5.0) >= 6.0 if ml_score_result else True) and warnings_result.get('critical_issues', 0) == 0 else 'caution'
+        }
+    }
+    
+    return {
+        'product': serialized_product,
+        'analysis': analysis_result,
+        'user_profile_used': {
+            'has_conditions': bool(user_profile.get('medical_conditions')),
+            'has_allergies': bool(user_profile.get('allergies')),
+            'has_goals': bool(user_profile.get('health_goals'))
+        }
+    }
+
+
+def build_comparison_response(compared_products: List) -> Dict:
+    """Sort compared products by score and build the comparison response"""
+    compared_products.sort(key=lambda x: getattr(x, 'final_score', 0), reverse=True)
+    
+    # Create comparison summary
+    scores = [getattr(p, 'final_score', 0) for p in compared_products]
+    comparison_summary = {
+        'best_product': {
+            'code': compared_products[0].product_code,
+            'name': getattr(compared_products[0], 'product_name', ''),
+            'score': compared_products[0].final_score
+        },
+        'score_range': {
+            'highest': max(scores),
+            'lowest': min(scores),
+            'average': round(sum(scores) / len(scores), 2)
+        },
+        'products_compared': len(compared_products)
+    }
+    
+    return {
+        'products': ProductRecommendationSerializer(compared_products, many=True).data,
+        'comparison_summary': comparison_summary,
+        'best_match': comparison_summary['best_product']
+    }
+
+
 # View Functions
 @api_view(['GET'])
 @permission_classes([AllowAny])
@@ -215,6 +334,7 @@ def product_search(request):
             'page': page,
             'page_size': page_size,
             'sort_by': sort_by,
+            'filters': {param: request.GET.get(param, '') for param in ['category', 'brand', 'nutriscore_grade', 'nova_group']},
             'user_id': request.user.id if request.user.is_authenticated else 0
         }
         cache_key = generate_cache_key("enhanced_search", request.user.id if request.user.is_authenticated else 0, cache_params)
@@ -225,26 +345,25 @@ def product_search(request):
             return Response(cached_result, status=status.HTTP_200_OK)
         
         # Build search filters
-        filters = {}
-        filter_mapping = {
-            'category': 'categories_tags',
-            'brand': 'brands_tags',
-            'nutriscore_grade': 'nutriscore_grade',
-            'nova_group': 'nova_group',
-        }
-        
-        for param, filter_key in filter_mapping.items():
-            value = request.GET.get(param)
-            if value:
-                filters[filter_key] = value
-        
-        # Search products via OpenFoodFacts API
-        search_response = search_products_api(
-            query=query,
-            filters=filters,
-            page=page,
-            page_size=page_size
-        )
+        search_filters = get_search_filters(request.GET)
+        
+        if getattr(settings, 'PRODUCT_SEARCH_BACKEND', 'local') == 'local':
+            # Local catalog - filters and sorting are applied in SQL
+            search_response = search_products_local(
+                query=query,
+                filters=search_filters,
+                page=page,
+                page_size=page_size,
+                sort_by=sort_by
+            )
+        else:
+            # Search products via OpenFoodFacts API
+            search_response = search_products_api(
+                query=query,
+                filters={SEARCH_FILTER_MAPPING[param]: value for param, value in search_filters.items()},
+                page=page,
+                page_size=page_size
+            )
         
         if not search_response.success:
             return Response({
@@ -265,46 +384,7 @@ def product_search(request):
         if request.user.is_authenticated and include_personalized and processed_products:
             try:
                 user_profile = get_user_profile_data(request.user)
-                
-                # Add ML analysis for first 10 products
-                for i, product in enumerate(processed_products[:10]):
-                    try:
-                        product_code = product.get('code')
-                        if product_code:
-                            # Try to get ML score directly from service
-                            try:
-                                score_result = ml_product_score_service.get_personalized_score(
-                                    user_profile, product_code
-                                )
-                                if score_result:
-                                    product['ml_analysis'] = {
-                                        'personalized_score': score_result.get('personalized_score', 5.0),
-                                        'score_level': score_result.get('score_level', {}),
-                                        'has_ml_analysis': True,
-                                        'analysis_summary': score_result.get('analysis', {})
-                                    }
-                                else:
-                                    # Fallback to basic rule-based analysis for warnings
-                                    analyzer = ProductAnalyzer()
-                                    warnings_result = analyzer.analyze_warnings_only(product, user_profile)
-                                    product['ml_analysis'] = {
-                                        'basic_warnings': warnings_result.get('warnings', [])[:2],
-                                        'critical_issues': warnings_result.get('critical_issues', 0),
-                                        'has_ml_analysis': False
-                                    }
-                            except Exception as e:
-                                logger.warning(f"ML score error for {product_code}: {str(e)}")
-                                # Use rule-based warnings as fallback
-                                analyzer = ProductAnalyzer()
-                                warnings_result = analyzer.analyze_warnings_only(product, user_profile)
-                                product['ml_analysis'] = {
-                                    'basic_warnings': warnings_result.get('warnings', [])[:2],
-                                    'has_ml_analysis': False,
-                                    'error': 'ML analysis failed'
-                                }
-                    except Exception as e:
-                        logger.warning(f"Product analysis error for {product.get('code')}: {str(e)}")
-                        product['ml_analysis'] = {'error': 'Analysis failed'}
+                add_personalized_scores(processed_products, user_profile)
                         
             except Exception as e:
                 logger.error(f"ML analysis error: {str(e)}")
@@ -346,7 +426,7 @@ def product_search(request):
 @permission_classes([AllowAny])
 def get_product_detail(request, product_code):
     """
-    Get product details from OpenFoodFacts API
+    Get product details (local catalog first, OpenFoodFacts API fallback)
     """
     try:
         # Check cache
@@ -355,7 +435,7 @@ def get_product_detail(request, product_code):
         if cached_result:
             return Response(cached_result, status=status.HTTP_200_OK)
         
-        # Get from API
+        # Get from local catalog / API
         api_response = get_product_api(product_code)
         if not api_response.success:
             return Response({
@@ -398,7 +478,7 @@ def analyze_product_complete(request):
         # Get user profile
         user_profile = get_user_profile_data(request.user)
         
-        # Get product from OpenFoodFacts API
+        # Get product from local catalog / OpenFoodFacts API
         api_response = get_product_api(product_code)
         if not api_response.success:
             return Response({
@@ -416,31 +496,7 @@ def analyze_product_complete(request):
         warnings_result = analyzer.analyze_warnings_only(product_data, user_profile)
         
         # Sonuçları birleştir
-        analysis_result = {
-            'ml_analysis': ml_score_result if ml_score_result else {
-                'personalized_score': 5.0,
-                'score_level': {'level': 'medium', 'description': 'Orta seviye'},
-                'analysis': {'note': 'ML analizi yapılamadı'}
-            },
-            'rule_based_warnings': warnings_result,
-            'combined_summary': {
-                'has_ml_score': ml_score_result is not None,
-                'ml_score': ml_score_result.get('personalized_score', 5.0) if ml_score_result else 5.0,
-                'critical_warnings': warnings_result.get('critical_issues', 0),
-                'total_warnings': len(warnings_result.get('warnings', [])),
-                'recommendation': 'suitable' if (ml_score_result.get('personalized_score', 5.0) >= 6.0 if ml_score_result else True) and warnings_result.get('critical_issues', 0) == 0 else 'caution'
-            }
-        }
-        
-        response_data = {
-            'product': serialized_product,
-            'analysis': analysis_result,
-            'user_profile_used': {
-                'has_conditions': bool(user_profile.get('medical_conditions')),
-                'has_allergies': bool(user_profile.get('allergies')),
-                'has_goals': bool(user_profile.get('health_goals'))
-            }
-        }
+        response_data = build_complete_analysis(serialized_product, ml_score_result, warnings_result, user_profile)
         
         # Cache for 10 minutes
         cache.set(cache_key, response_data, 600)
@@ -526,6 +582,10 @@ def get_ml_recommendations(request):
         min_score = float(request.GET.get('min_score', 6.0))
         product_code = request.GET.get('product_code', None)
         categories = request.GET.get('categories', None)
+        # Çeşitlilik: benzerlik cezası (0-1) ve kategori başına en fazla ürün (verilmezse limit'in yarısı)
+        diversity = float(request.GET.get('diversity', DEFAULT_DIVERSITY))
+        category_cap = request.GET.get('category_cap', None)
+        category_cap = int(category_cap) if category_cap else None
         
         # Cache key
         cache_key = generate_cache_key(
@@ -535,7 +595,9 @@ def get_ml_recommendations(request):
                 'product_code': product_code, 
                 'categories': categories, 
                 'limit': limit, 
-                'min_score': min_score
+                'min_score': min_score,
+                'diversity': diversity,
+                'category_cap': category_cap
             }
         )
         
@@ -549,7 +611,9 @@ def get_ml_recommendations(request):
                 user_profile=user_profile,
                 product_code=product_code,
                 limit=limit,
-                min_score_threshold=min_score
+                min_score_threshold=min_score,
+                diversity=diversity,
+                category_cap=category_cap
             )
             
             if not result:
@@ -585,7 +649,9 @@ def get_ml_recommendations(request):
             result = ml_recommendation_service.get_user_recommendations(
                 user_data=user_profile,
                 categories=categories,
-                limit=limit
+                limit=limit,
+                diversity=diversity,
+                category_cap=category_cap
             )
             
             if not result or not result.get('recommendations'):
@@ -655,7 +721,7 @@ def get_product_warnings_only(request):
         # Get user profile and product
         user_profile = get_user_profile_data(request.user)
         
-        # Get product from API
+        # Get product from local catalog / API
         api_response = get_product_api(product_code)
         if not api_response.success:
             return Response({
@@ -712,77 +778,16 @@ def compare_products(request):
         # Get user profile
         user_profile = get_user_profile_data(request.user)
         
-        # Get and score products
-        compared_products = []
-        for product_code in product_codes:
-            try:
-                # Try to get from database first for ML analysis
-                try:
-                    db_product = ProductFeatures.objects.get(
-                        product_code=product_code,
-                        is_valid_for_analysis=True
-                    )
-                    
-                    # Calculate ML score
-                    score_result = ml_product_score_service.get_personalized_score(user_profile, product_code)
-                    
-                    # Add ML scores to product
-                    db_product.final_score = score_result.get('personalized_score', 5.0) if score_result else 5.0
-                    db_product.ml_analysis = score_result.get('analysis', {}) if score_result else {}
-                    
-                    compared_products.append(db_product)
-                    
-                except ProductFeatures.DoesNotExist:
-                    # Get from API and do basic analysis
-                    api_response = get_product_api(product_code)
-                    if api_response.success:
-                        # Create a temporary product-like object
-                        temp_product = type('TempProduct', (), {})()
-                        temp_product.product_code = product_code
-                        temp_product.product_name = api_response.data.get('product_name', '')
-                        temp_product.main_category = api_response.data.get('categories', '').split(',')[0] if api_response.data.get('categories') else ''
-                        
-                        # Basic scoring using ProductAnalyzer
-                        analyzer = ProductAnalyzer()
-                        basic_analysis = analyzer.analyze_product_complete(api_response.data, user_profile)
-                        temp_product.final_score = basic_analysis.get('health_score', 50) / 10.0  # Convert to 0-10 scale
-                        temp_product.ml_analysis = {'basic_analysis': True}
-                        
-                        compared_products.append(temp_product)
-                        
-            except Exception as e:
-                logger.warning(f"Product comparison error for {product_code}: {str(e)}")
-                continue
+        # One product_code__in query, concurrent fetches for products missing locally, batch ML scoring
+        compared_products = get_compared_products(user_profile, product_codes)
         
         if not compared_products:
             return Response({
                 'error': 'No valid products found for comparison'
             }, status=status.HTTP_404_NOT_FOUND)
         
-        # Sort by score
-        compared_products.sort(key=lambda x: getattr(x, 'final_score', 0), reverse=True)
-        
-        # Create comparison summary
-        scores = [getattr(p, 'final_score', 0) for p in compared_products]
-        comparison_summary = {
-            'best_product': {
-                'code': compared_products[0].product_code,
-                'name': getattr(compared_products[0], 'product_name', ''),
-                'score': compared_products[0].final_score
-            },
-            'score_range': {
-                'highest': max(scores),
-                'lowest': min(scores),
-                'average': round(sum(scores) / len(scores), 2)
-            },
-            'products_compared': len(compared_products)
-        }
-        
-        response_data = {
-            'products': ProductRecommendationSerializer(compared_products, many=True).data,
-            'comparison_summary': comparison_summary,
-            'best_match': comparison_summary['best_product']
-        }
+        # Sort by score and summarize
+        response_data = build_comparison_response(compared_products)
         
         # Cache for 5 minutes
         cache.set(cache_key, response_data, 300)
@@ -259,6 +259,22 @@ STATIC_URL = '/static/'
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 
+# OpenFoodFacts API istemcisi (api/clients/openfoodfacts.py)
+# Yerel testler için: python manage.py run_fake_openfoodfacts ve OPENFOODFACTS_API_BASE = 'http://127.0.0.1:8765'
+OPENFOODFACTS_API_BASE = 'https://world.openfoodfacts.org'
+OPENFOODFACTS_CONNECT_TIMEOUT = 3.05  # sn
+OPENFOODFACTS_READ_TIMEOUT = 10  # sn
+OPENFOODFACTS_POOL_SIZE = 10  # worker başına açık bağlantı
+OPENFOODFACTS_MAX_RETRIES = 2
+OPENFOODFACTS_FAILURE_THRESHOLD = 5  # art arda hata -> devre açılır
+OPENFOODFACTS_RESET_TIMEOUT = 30  # sn
+OPENFOODFACTS_ASYNC_MAX_CONNECTIONS = 200  # async view'lar (api/clients/async_openfoodfacts.py): event loop başına
+
+# Ürün araması: 'local' (ProductFeatures üzerinde PostgreSQL tam metin + trigram, api/pipeline/product_search.py)
+# veya 'openfoodfacts' (search.pl)
+PRODUCT_SEARCH_BACKEND = 'local'
+
+
 # Custom Color Palette for CKEditor
 customColorPalette = [
     {"color": "hsl(4, 90%, 58%)", "label": "Red"},
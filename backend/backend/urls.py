@@ -10,6 +10,7 @@ urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/', include('api.urls.auth_urls')),           
     path('api/products/', include('api.urls.product_urls')),
+    path('api/async/products/', include('api.urls.async_product_urls')),
     path('ckeditor/', include('ckeditor_uploader.urls')),
     path("ckeditor5/", include('django_ckeditor_5.urls')),
 ]